@@ -0,0 +1,429 @@
+"""
+Índice em memória para autocompletar nomes
+Na digitação de notas, o nome do aluno, do professor ou da disciplina é
+sugerido a cada tecla; sem este índice, cada tecla seria uma consulta ao banco.
+
+Os nomes ficam no processo, sem acentos e em minúsculas, em listas ordenadas
+(bisect) separadas por turma:
+
+    - cada nome entra com o nome inteiro e a partir de cada palavra seguinte
+      ("joao da silva", "silva"), então "sil" encontra "João da Silva";
+    - com várias palavras, a mais longa localiza os candidatos e as demais
+      precisam começar alguma palavra do nome ("jo silva");
+    - sem turma, a busca usa uma lista única de todas as turmas, que aponta
+      para as mesmas chaves das partições (não duplica os textos);
+    - com escola (X-Escola-ID, ver tenancia_escola.py), alunos e professores
+      são procurados em uma lista única das turmas da escola, montada da mesma
+      forma; disciplinas são o catálogo da rede e ignoram a escola.
+
+O índice acompanha as versões de versao_referencia (ver cache_referencia.py):
+quando a versão de uma das tabelas de um tipo muda, os nomes daquele tipo são
+lidos de novo, e só as partições (turmas) cujo conteúdo mudou são reordenadas.
+A recarga roda em segundo plano; enquanto isso, as buscas usam o índice
+anterior (só a primeira carga de cada tipo é esperada pela busca).
+
+A memória é limitada por AUTOCOMPLETAR_MEMORIA_MB (estimativa das listas e
+textos). Professores e disciplinas sempre são carregados; as partições de
+alunos que não couberem ficam fora, e buscar() retorna None para elas (o
+endpoint então consulta o banco, ver busca.py).
+
+Uso como script:
+    python autocompletar.py --nomes 100000
+Variáveis de ambiente:
+    AUTOCOMPLETAR_MEMORIA_MB  memória máxima estimada do índice (padrão 64)
+"""
+import os
+import sys
+import time
+import bisect
+import logging
+import threading
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+# Nomes de cada tipo (id, nome, turma, escola da turma) e as tabelas cujas
+# versões os invalidam. A escola de aluno e professor_disciplina_turma é a da
+# turma (trigger de tenancia_escola.py).
+CONSULTAS = {
+    "professores": (
+        "SELECT p.id_professor, p.nome_professor, pdt.id_turma, pdt.id_escola FROM professor p "
+        "LEFT JOIN professor_disciplina_turma pdt ON pdt.id_professor = p.id_professor",
+        ("professor", "professor_disciplina_turma"),
+    ),
+    "disciplinas": (
+        "SELECT d.id_disciplina, d.nome_disciplina, td.id_turma, NULL::integer FROM disciplina d "
+        "LEFT JOIN turma_disciplina td ON td.id_disciplina = d.id_disciplina",
+        ("disciplina", "turma_disciplina"),
+    ),
+    # Por último: o orçamento de memória só limita as partições de alunos
+    "alunos": (
+        "SELECT id_aluno, nome_aluno, id_turma, id_escola FROM aluno",
+        ("aluno",),
+    ),
+}
+
+TIPOS = tuple(CONSULTAS)
+
+# Tipos restritos à escola da requisição
+TIPOS_POR_ESCOLA = ("alunos", "professores")
+
+# Sem a tabela versao_referencia, o índice é recarregado por tempo
+TTL_SEM_VERSAO = 30
+
+# Palavras que não iniciam uma chave ("da", "de", "e"): continuam no nome inteiro
+TAMANHO_MINIMO_PALAVRA = 3
+
+# Custos estimados: ponteiros das listas de chaves e de posições, o int de uma
+# posição (as posições de uma turma são pequenas e compartilhadas pelo Python)
+# e a tupla (id, nome) de cada registro
+_BYTES_POR_ENTRADA = 2 * 8
+_BYTES_POR_INT = 28
+_BYTES_POR_REGISTRO = 56
+
+
+# Acentos do português, trocados direto; outros caracteres passam pela decomposição Unicode
+_ACENTUADAS = "áàâãäéèêëíìîïóòôõöúùûüçñ"
+_SEM_ACENTOS = str.maketrans(_ACENTUADAS + _ACENTUADAS.upper(), "aaaaaeeeeiiiiooooouuuucn" * 2)
+
+
+def dobrar(texto):
+    """Texto sem acentos, em minúsculas e com espaços simples ("João  DA Silva" -> "joao da silva")."""
+    texto = (texto or "").translate(_SEM_ACENTOS).casefold()
+    if not texto.isascii():
+        decomposto = unicodedata.normalize("NFKD", texto)
+        texto = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(texto.split())
+
+
+class _Particao:
+    """
+    Nomes de uma turma em ordem de chave.
+
+    chaves e posicoes são listas paralelas: chaves[i] é um sufixo (a partir de
+    uma palavra) do nome de registros[posicoes[i]].
+    """
+    __slots__ = ("registros", "chaves", "posicoes", "bytes")
+
+    def __init__(self, registros):
+        self.registros = registros
+        entradas = []
+        for posicao, (_, nome) in enumerate(registros):
+            palavras = dobrar(nome).split(" ")
+            for inicio, palavra in enumerate(palavras):
+                if inicio == 0 or len(palavra) >= TAMANHO_MINIMO_PALAVRA:
+                    entradas.append((" ".join(palavras[inicio:]), posicao))
+        entradas.sort()
+        self.chaves = [chave for chave, _ in entradas]
+        self.posicoes = [posicao for _, posicao in entradas]
+        self.bytes = (sum(sys.getsizeof(chave) for chave in self.chaves)
+                      + len(self.chaves) * _BYTES_POR_ENTRADA
+                      + sum(_BYTES_POR_REGISTRO + sys.getsizeof(nome) + sys.getsizeof(id_) for id_, nome in registros))
+
+    @classmethod
+    def unir(cls, particoes):
+        """
+        Partição com os nomes de todas as turmas, para buscas sem turma.
+
+        As chaves são as mesmas strings das partições (só as listas são novas);
+        um nome presente em várias turmas (professor, disciplina) entra uma vez.
+        """
+        todas = cls.__new__(cls)
+        todas.registros = []
+        entradas = []
+        posicoes = {}
+        for particao in particoes:
+            novas = {}
+            for posicao, registro in enumerate(particao.registros):
+                if registro not in posicoes:
+                    posicoes[registro] = novas[posicao] = len(todas.registros)
+                    todas.registros.append(registro)
+            entradas.extend((chave, novas[posicao]) for chave, posicao in zip(particao.chaves, particao.posicoes)
+                            if posicao in novas)
+        entradas.sort()
+        todas.chaves = [chave for chave, _ in entradas]
+        todas.posicoes = [posicao for _, posicao in entradas]
+        todas.bytes = len(todas.chaves) * (_BYTES_POR_ENTRADA + _BYTES_POR_INT) + len(todas.registros) * 8
+        return todas
+
+    def buscar(self, termo, palavras, limite):
+        """Posições dos registros encontrados, em ordem de chave, sem repetir."""
+        chaves = self.chaves
+        i = bisect.bisect_left(chaves, termo)
+        encontrados = []
+        vistos = set()
+        while i < len(chaves) and len(encontrados) < limite:
+            if not chaves[i].startswith(termo):
+                break
+            posicao = self.posicoes[i]
+            i += 1
+            if posicao in vistos:
+                continue
+            if palavras:
+                # As demais palavras do termo precisam começar alguma palavra do nome
+                do_nome = dobrar(self.registros[posicao][1]).split(" ")
+                if not all(any(p.startswith(q) for p in do_nome) for q in palavras):
+                    continue
+            vistos.add(posicao)
+            encontrados.append((chaves[i - 1], posicao))
+        return encontrados
+
+
+class _IndiceTipo:
+    """Partições de um tipo, trocadas inteiras a cada recarga."""
+    __slots__ = ("versao", "carregado_em", "particoes", "todas", "excluidas", "escolas", "por_escola")
+
+    def __init__(self, versao=None, carregado_em=float("-inf"), particoes=None, todas=None, excluidas=frozenset(),
+                 escolas=None, por_escola=None):
+        self.versao = versao
+        self.carregado_em = carregado_em
+        self.particoes = particoes or {}
+        # None se os nomes de todas as turmas não couberem na memória
+        self.todas = todas
+        self.excluidas = excluidas
+        # Escola de cada turma e a lista única das turmas de cada escola
+        # (por_escola é None se não couber na memória)
+        self.escolas = escolas or {}
+        self.por_escola = por_escola
+
+    def bytes(self):
+        return (sum(p.bytes for p in self.particoes.values()) + (self.todas.bytes if self.todas else 0)
+                + sum(p.bytes for p in (self.por_escola or {}).values()))
+
+
+class IndiceAutocompletar:
+    """
+    Índice de prefixos por tipo (alunos, professores, disciplinas) e turma.
+
+    Uso:
+        indice = IndiceAutocompletar(get_db_connection, referencia_cache.versoes)
+        indice.buscar("alunos", "mar", id_turma="1A")   # [{"id": ..., "nome": ...}] ou None
+    """
+
+    def __init__(self, obter_conexao, obter_versoes, memoria_mb=None):
+        self.obter_conexao = obter_conexao
+        self.obter_versoes = obter_versoes
+        self.memoria = int(float(memoria_mb if memoria_mb is not None
+                                 else os.environ.get("AUTOCOMPLETAR_MEMORIA_MB", "64")) * 1024 * 1024)
+        self._tipos = {tipo: _IndiceTipo() for tipo in TIPOS}
+        self._lock = threading.Lock()
+        self.stats = {"buscas": 0, "fora_da_memoria": 0, "recargas": 0, "particoes_reordenadas": 0}
+
+    # ------------------------------------------------------------------
+    # Atualização
+    # ------------------------------------------------------------------
+
+    def _atualizar(self, tipo):
+        atual = self._tipos[tipo]
+        versao = self.obter_versoes(CONSULTAS[tipo][1])
+        agora = time.monotonic()
+        if atual.carregado_em == float("-inf"):
+            # Primeira carga: a busca espera
+            with self._lock:
+                if self._tipos[tipo].carregado_em == float("-inf"):
+                    self._tipos[tipo] = self._recarregar(tipo, versao, agora)
+                return self._tipos[tipo]
+
+        if versao is not None and versao == atual.versao:
+            return atual
+        if versao is None and agora - atual.carregado_em < TTL_SEM_VERSAO:
+            return atual
+        # Já há um índice: a recarga roda em segundo plano (uma por vez) e a
+        # busca usa o índice atual
+        if self._lock.acquire(blocking=False):
+            threading.Thread(target=self._recarregar_em_segundo_plano, args=(tipo, versao, agora),
+                             name=f"autocompletar-{tipo}", daemon=True).start()
+        return atual
+
+    def _recarregar_em_segundo_plano(self, tipo, versao, agora):
+        try:
+            self._tipos[tipo] = self._recarregar(tipo, versao, agora)
+        except Exception as e:
+            logger.warning(f"Recarga do autocompletar de {tipo} falhou: {e}")
+        finally:
+            self._lock.release()
+
+    def _recarregar(self, tipo, versao, agora):
+        conn = self.obter_conexao()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(CONSULTAS[tipo][0])
+            linhas = cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+
+        por_turma = {}
+        escolas = {}
+        for id_, nome, id_turma, id_escola in linhas:
+            por_turma.setdefault(id_turma, []).append((id_, nome))
+            if id_turma is not None:
+                escolas[id_turma] = id_escola
+
+        anteriores = self._tipos[tipo].particoes
+        usados = sum(indice.bytes() for outro, indice in self._tipos.items() if outro != tipo)
+        particoes = {}
+        excluidas = set()
+        reordenadas = 0
+        # Ordem estável: com memória insuficiente, ficam de fora sempre as mesmas turmas
+        for id_turma in sorted(por_turma, key=lambda t: (t is None, str(t))):
+            # Um professor com duas disciplinas na turma aparece duas vezes na consulta
+            registros = tuple(sorted(set(por_turma[id_turma])))
+            particao = anteriores.get(id_turma)
+            if particao is None or particao.registros != registros:
+                particao = _Particao(registros)
+                reordenadas += 1
+            if tipo == "alunos" and usados + particao.bytes > self.memoria:
+                excluidas.add(id_turma)
+                continue
+            usados += particao.bytes
+            particoes[id_turma] = particao
+
+        todas = None
+        por_escola = None
+        if not excluidas:
+            todas = _Particao.unir(particoes.values())
+            if tipo == "alunos" and usados + todas.bytes > self.memoria:
+                todas = None
+        if todas is not None and tipo in TIPOS_POR_ESCOLA:
+            usados += todas.bytes
+            turmas_por_escola = {}
+            for id_turma, id_escola in escolas.items():
+                if id_escola is not None:
+                    turmas_por_escola.setdefault(id_escola, []).append(particoes[id_turma])
+            por_escola = {id_escola: _Particao.unir(turmas) for id_escola, turmas in turmas_por_escola.items()}
+            if tipo == "alunos" and usados + sum(p.bytes for p in por_escola.values()) > self.memoria:
+                por_escola = None
+        self.stats["recargas"] += 1
+        self.stats["particoes_reordenadas"] += reordenadas
+        if excluidas:
+            logger.warning(f"Autocompletar de {tipo}: {len(excluidas)} turmas fora da memória "
+                           f"(AUTOCOMPLETAR_MEMORIA_MB={self.memoria // (1024 * 1024)})")
+        logger.debug(f"Autocompletar de {tipo} recarregado: {len(particoes)} turmas, {reordenadas} reordenadas")
+        return _IndiceTipo(versao, agora, particoes, todas, frozenset(excluidas), escolas, por_escola)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def buscar(self, tipo, termo, id_turma=None, limite=10, id_escola=None):
+        """
+        Nomes que começam com o termo (em qualquer palavra), em ordem alfabética.
+
+        Args:
+            tipo (str): "alunos", "professores" ou "disciplinas"
+            id_turma (str): restringe à turma; sem ela, busca em todas
+            id_escola (int): restringe alunos e professores às turmas da escola
+
+        Returns:
+            list: [{"id": ..., "nome": ...}], ou None se alguma partição
+                necessária está fora da memória (consultar o banco)
+        """
+        indice = self._atualizar(tipo)
+        self.stats["buscas"] += 1
+        palavras = dobrar(termo).split(" ")
+        if not palavras[0]:
+            return []
+        # A palavra mais longa localiza os candidatos; as outras filtram
+        maior = max(range(len(palavras)), key=lambda i: len(palavras[i]))
+        chave = palavras[maior]
+        outras = palavras[:maior] + palavras[maior + 1:]
+
+        if tipo not in TIPOS_POR_ESCOLA:
+            id_escola = None
+        if id_turma is not None and id_escola is not None and indice.escolas.get(id_turma) != id_escola:
+            # Turma de outra escola (ou inexistente)
+            return []
+        if id_turma is None and id_escola is not None:
+            fora_da_memoria = indice.por_escola is None and (indice.particoes or indice.excluidas)
+            particao = None if fora_da_memoria else (indice.por_escola or {}).get(id_escola)
+        elif id_turma is None:
+            particao = indice.todas
+            fora_da_memoria = particao is None and (indice.particoes or indice.excluidas)
+        else:
+            particao = indice.particoes.get(id_turma)
+            fora_da_memoria = id_turma in indice.excluidas
+        if fora_da_memoria:
+            self.stats["fora_da_memoria"] += 1
+            return None
+        if particao is None:
+            return []
+        return [{"id": particao.registros[posicao][0], "nome": particao.registros[posicao][1]}
+                for _, posicao in particao.buscar(chave, outras, limite)]
+
+    def status(self):
+        """Resumo do índice (partições, memória estimada e contadores)."""
+        tipos = {}
+        for tipo, indice in self._tipos.items():
+            tipos[tipo] = {
+                "turmas": len(indice.particoes),
+                "nomes": sum(len(p.registros) for p in indice.particoes.values()),
+                "bytes": indice.bytes(),
+                "fora_da_memoria": len(indice.excluidas),
+                "versao": indice.versao,
+            }
+        return {"tipos": tipos, "memoria_maxima": self.memoria, **self.stats}
+
+
+if __name__ == "__main__":
+    # Benchmark: latência (p50/p99) de buscas por prefixo sobre N nomes de alunos,
+    # sem banco (as linhas são geradas em memória)
+    import random
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Índice de autocompletar")
+    parser.add_argument("--nomes", type=int, default=100000, help="quantidade de nomes de alunos")
+    parser.add_argument("--turmas", type=int, default=3000, help="quantidade de turmas")
+    parser.add_argument("--buscas", type=int, default=20000, help="quantidade de buscas medidas")
+    parser.add_argument("--memoria", type=float, default=None, help="AUTOCOMPLETAR_MEMORIA_MB")
+    args = parser.parse_args()
+
+    random.seed(1)
+    nomes = ["João", "José", "Maria", "Ana", "Antônio", "Francisco", "Luíza", "Márcia", "Cecília",
+             "Raimundo", "Sebastião", "Joaquim", "Letícia", "Gabriel", "Vitória", "Ícaro"]
+    sobrenomes = ["Silva", "Conceição", "Araújo", "Gonçalves", "Magalhães", "Sousa", "Brandão", "Simões",
+                  "Ribeiro", "Nascimento", "Assunção", "Lima", "Guimarães", "Patrício", "Ferraz"]
+    linhas = [(f"A{i}", f"{random.choice(nomes)} {random.choice(['da', 'de', 'dos'])} "
+                        f"{random.choice(sobrenomes)} {random.choice(sobrenomes)}", f"T{i % args.turmas}")
+              for i in range(args.nomes)]
+
+    class _Conexao:
+        def cursor(self):
+            return self
+
+        def execute(self, sql):
+            self.sql = sql
+
+        def fetchall(self):
+            return [linha + (1,) for linha in linhas] if "FROM aluno" in self.sql else []
+
+        def close(self):
+            pass
+
+    indice = IndiceAutocompletar(_Conexao, lambda tabelas: (1,) * len(tabelas), args.memoria)
+    inicio = time.perf_counter()
+    indice.buscar("alunos", "a")
+    construcao = time.perf_counter() - inicio
+    estado = indice.status()["tipos"]["alunos"]
+
+    termos = []
+    for _ in range(args.buscas):
+        nome = dobrar(random.choice(linhas)[1]).split(" ")
+        palavra = random.choice([nome[0], nome[-1], nome[-2]])
+        termos.append(palavra[:random.randint(1, len(palavra))])
+
+    for rotulo, por_turma, quantidade in (("por turma", True, args.buscas),
+                                          ("todas as turmas", False, args.buscas)):
+        tempos = []
+        for termo in termos[:quantidade]:
+            id_turma = f"T{random.randrange(args.turmas)}" if por_turma else None
+            inicio = time.perf_counter()
+            indice.buscar("alunos", termo, id_turma, 10)
+            tempos.append((time.perf_counter() - inicio) * 1e6)
+        tempos.sort()
+        print(f"{rotulo:16} {len(tempos)} buscas | p50 {tempos[len(tempos) // 2]:7.1f} µs | "
+              f"p99 {tempos[int(len(tempos) * 0.99)]:7.1f} µs | máximo {tempos[-1]:7.1f} µs")
+
+    print(f"{args.nomes} nomes em {estado['turmas']} turmas | construção {construcao * 1000:.0f} ms | "
+          f"memória estimada {estado['bytes'] / 1024 / 1024:.1f} MB | "
+          f"fora da memória: {indice.stats['fora_da_memoria']} buscas")
@@ -0,0 +1,335 @@
+"""
+Boletim agregado
+Mantém a tabela boletim_agregado, com uma linha por (aluno, disciplina, ano,
+escola) contendo as notas de cada bimestre, a média anual e a situação final.
+A escola (id_escola da nota, 0 para turmas sem escola) faz parte da chave,
+como na partição de nota (ver tenancia_escola.py): o recálculo de uma linha
+lê apenas a partição da escola, pelo índice único que começa por id_escola.
+
+A tabela é atualizada pelo trigger atualizar_boletim_agregado_trigger na mesma
+transação que grava a nota, de modo que /api/boletim-medias só precisa ler
+linhas já prontas. A média anual e a situação usam as regras de motor_medias.
+
+Uso como script:
+    python boletim_agregado.py --sql > migracoes/0014_boletim_agregado_escola.sql
+    python boletim_agregado.py --sql 0005 > migracoes/0005_boletim_agregado.sql
+    python boletim_agregado.py --reconstruir            # todos os anos
+    python boletim_agregado.py --reconstruir --ano 2024 # apenas um ano
+"""
+from motor_medias import expressao_sql_situacao
+
+
+def _sql_agregacao(filtro, escola=True):
+    """
+    Retorna o SELECT que monta as linhas de boletim_agregado a partir de nota.
+
+    Args:
+        filtro (str): condição SQL aplicada às notas (colunas com o alias n)
+        escola (bool): inclui id_escola nas colunas e no agrupamento
+            (False apenas para a versão da migracoes/0005_boletim_agregado.sql)
+    """
+    coluna_escola = "agregado.id_escola,\n           " if escola else ""
+    nota_escola = "n.id_escola,\n               " if escola else ""
+    agrupamento_escola = ", n.id_escola" if escola else ""
+    return f"""SELECT agregado.id_aluno,
+           agregado.id_disciplina,
+           agregado.ano,
+           {coluna_escola}agregado.id_turma,
+           agregado.notas_bimestrais,
+           COALESCE(ROUND(agregado.media_anual, 1), 0)::float8,
+           {expressao_sql_situacao("agregado.media_anual")},
+           CURRENT_TIMESTAMP
+    FROM (
+        SELECT n.id_aluno,
+               n.id_disciplina,
+               n.ano,
+               {nota_escola}(ARRAY_AGG(n.id_turma ORDER BY n.bimestre DESC, n.id DESC))[1] AS id_turma,
+               JSONB_OBJECT_AGG(n.bimestre::text, JSONB_BUILD_OBJECT(
+                   'nota_mensal', n.nota_mensal,
+                   'nota_bimestral', n.nota_bimestral,
+                   'recuperacao', n.recuperacao,
+                   'frequencia', n.frequencia,
+                   'media_bimestral', n.media
+               )) AS notas_bimestrais,
+               AVG(n.media::numeric) FILTER (
+                   WHERE n.bimestre BETWEEN 1 AND 4 AND n.media IS NOT NULL
+               ) AS media_anual
+        FROM nota n
+        WHERE {filtro}
+        GROUP BY n.id_aluno, n.id_disciplina, n.ano{agrupamento_escola}
+    ) agregado"""
+
+
+_CHAVE = "id_aluno, id_disciplina, ano, id_escola"
+_CHAVE_SEM_ESCOLA = "id_aluno, id_disciplina, ano"
+
+_COLUNAS = f"{_CHAVE}, id_turma, notas_bimestrais, media_anual, situacao, atualizado_em"
+_COLUNAS_SEM_ESCOLA = f"{_CHAVE_SEM_ESCOLA}, id_turma, notas_bimestrais, media_anual, situacao, atualizado_em"
+
+_ATUALIZACAO = """ON CONFLICT ({chave}) DO UPDATE SET
+        id_turma = EXCLUDED.id_turma,
+        notas_bimestrais = EXCLUDED.notas_bimestrais,
+        media_anual = EXCLUDED.media_anual,
+        situacao = EXCLUDED.situacao,
+        atualizado_em = EXCLUDED.atualizado_em"""
+
+
+def sql_boletim_agregado():
+    """
+    Retorna o script que cria (ou atualiza) a tabela, as funções e o trigger
+    (migracoes/0014_boletim_agregado_escola.sql; a versão sem escola, da 0005, é
+    sql_boletim_agregado_sem_escola).
+    Requer nota.id_escola (migracoes/0012_tenancia_escola.sql).
+    """
+    return f"""-- Gerado por boletim_agregado.py (python boletim_agregado.py --sql). Não edite manualmente.
+
+-- Tabela com o boletim pronto por aluno, disciplina, ano e escola
+CREATE TABLE IF NOT EXISTS boletim_agregado (
+    id_aluno VARCHAR(20) NOT NULL,
+    id_disciplina VARCHAR(10) NOT NULL,
+    ano INTEGER NOT NULL,
+    id_escola INTEGER NOT NULL DEFAULT 0,
+    id_turma VARCHAR(10),
+    notas_bimestrais JSONB NOT NULL DEFAULT '{{}}',
+    media_anual FLOAT NOT NULL DEFAULT 0,
+    situacao VARCHAR(20) NOT NULL,
+    atualizado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id_aluno, id_disciplina, ano, id_escola)
+);
+
+-- Tabela criada sem a escola (migracoes/0005_boletim_agregado.sql): a chave passa
+-- a incluí-la; as linhas são recalculadas por reconstruir_boletim_agregado() no fim
+ALTER TABLE boletim_agregado ADD COLUMN IF NOT EXISTS id_escola INTEGER NOT NULL DEFAULT 0;
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint c
+        JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = ANY(c.conkey)
+        WHERE c.conrelid = 'boletim_agregado'::regclass AND c.contype = 'p' AND a.attname = 'id_escola'
+    ) THEN
+        ALTER TABLE boletim_agregado DROP CONSTRAINT IF EXISTS boletim_agregado_pkey;
+        ALTER TABLE boletim_agregado ADD PRIMARY KEY (id_aluno, id_disciplina, ano, id_escola);
+    END IF;
+END;
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_boletim_agregado_ano_turma ON boletim_agregado (ano, id_turma);
+CREATE INDEX IF NOT EXISTS idx_boletim_agregado_ano_disciplina ON boletim_agregado (ano, id_disciplina);
+CREATE INDEX IF NOT EXISTS idx_boletim_agregado_escola_ano ON boletim_agregado (id_escola, ano, id_turma);
+
+-- Notas de um aluno/disciplina/ano sem a escola (reconstrução e consultas da rede)
+CREATE INDEX IF NOT EXISTS idx_nota_aluno_disciplina_ano ON nota (id_aluno, id_disciplina, ano);
+
+-- Recalcula a linha de um aluno/disciplina/ano/escola a partir das notas
+-- (apenas a partição da escola é lida)
+CREATE OR REPLACE FUNCTION atualizar_boletim_agregado(p_escola INTEGER, p_aluno VARCHAR, p_disciplina VARCHAR, p_ano INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    -- Serializa as atualizações da mesma chave: sem isso, duas transações gravando
+    -- bimestres diferentes ao mesmo tempo calculariam o agregado sem a nota da outra.
+    PERFORM pg_advisory_xact_lock(hashtextextended(p_aluno || '|' || p_disciplina || '|' || p_ano || '|' || p_escola, 0));
+
+    INSERT INTO boletim_agregado ({_COLUNAS})
+    {_sql_agregacao("n.id_escola = p_escola AND n.id_aluno = p_aluno AND n.id_disciplina = p_disciplina AND n.ano = p_ano")}
+    {_ATUALIZACAO.format(chave=_CHAVE)};
+
+    IF NOT FOUND THEN
+        -- Não restou nenhuma nota para a chave
+        DELETE FROM boletim_agregado
+        WHERE id_aluno = p_aluno AND id_disciplina = p_disciplina AND ano = p_ano AND id_escola = p_escola;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger: mantém o agregado a cada gravação em nota
+CREATE OR REPLACE FUNCTION atualizar_boletim_agregado_nota() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM atualizar_boletim_agregado(NEW.id_escola, NEW.id_aluno, NEW.id_disciplina, NEW.ano);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM atualizar_boletim_agregado(OLD.id_escola, OLD.id_aluno, OLD.id_disciplina, OLD.ano);
+    ELSE
+        PERFORM atualizar_boletim_agregado(NEW.id_escola, NEW.id_aluno, NEW.id_disciplina, NEW.ano);
+        IF (OLD.id_escola, OLD.id_aluno, OLD.id_disciplina, OLD.ano)
+           IS DISTINCT FROM (NEW.id_escola, NEW.id_aluno, NEW.id_disciplina, NEW.ano) THEN
+            -- A nota mudou de chave (ou de escola): a linha antiga também precisa ser recalculada
+            PERFORM atualizar_boletim_agregado(OLD.id_escola, OLD.id_aluno, OLD.id_disciplina, OLD.ano);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS atualizar_boletim_agregado_trigger ON nota;
+CREATE TRIGGER atualizar_boletim_agregado_trigger
+AFTER INSERT OR DELETE OR UPDATE OF id_aluno, id_disciplina, id_turma, ano, bimestre,
+    nota_mensal, nota_bimestral, recuperacao, frequencia, media, id_escola ON nota
+FOR EACH ROW
+EXECUTE FUNCTION atualizar_boletim_agregado_nota();
+
+-- Versão sem a escola, substituída pela de cima
+DROP FUNCTION IF EXISTS atualizar_boletim_agregado(VARCHAR, VARCHAR, INTEGER);
+
+-- Reconstrução completa (ou de um ano) em uma única instrução, para cargas iniciais
+CREATE OR REPLACE FUNCTION reconstruir_boletim_agregado(p_ano INTEGER DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    linhas INTEGER;
+BEGIN
+    DELETE FROM boletim_agregado b
+    WHERE (p_ano IS NULL OR b.ano = p_ano)
+      AND NOT EXISTS (
+          SELECT 1 FROM nota n
+          WHERE n.id_escola = b.id_escola AND n.id_aluno = b.id_aluno
+            AND n.id_disciplina = b.id_disciplina AND n.ano = b.ano
+      );
+
+    INSERT INTO boletim_agregado ({_COLUNAS})
+    {_sql_agregacao("p_ano IS NULL OR n.ano = p_ano")}
+    {_ATUALIZACAO.format(chave=_CHAVE)};
+    GET DIAGNOSTICS linhas = ROW_COUNT;
+    RETURN linhas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Carga inicial (e recálculo das linhas gravadas antes da escola fazer parte da chave)
+SELECT reconstruir_boletim_agregado();
+"""
+
+
+def sql_boletim_agregado_sem_escola():
+    """
+    Retorna o script da primeira versão, sem a escola na chave
+    (migracoes/0005_boletim_agregado.sql, gerada quando era a saída de --sql).
+    Mantido para que a 0005 continue reproduzível; bancos novos recebem as duas.
+    """
+    return f"""-- Gerado por boletim_agregado.py (python boletim_agregado.py --sql). Não edite manualmente.
+
+-- Tabela com o boletim pronto por aluno, disciplina e ano
+CREATE TABLE IF NOT EXISTS boletim_agregado (
+    id_aluno VARCHAR(20) NOT NULL,
+    id_disciplina VARCHAR(10) NOT NULL,
+    ano INTEGER NOT NULL,
+    id_turma VARCHAR(10),
+    notas_bimestrais JSONB NOT NULL DEFAULT '{{}}',
+    media_anual FLOAT NOT NULL DEFAULT 0,
+    situacao VARCHAR(20) NOT NULL,
+    atualizado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY ({_CHAVE_SEM_ESCOLA})
+);
+
+CREATE INDEX IF NOT EXISTS idx_boletim_agregado_ano_turma ON boletim_agregado (ano, id_turma);
+CREATE INDEX IF NOT EXISTS idx_boletim_agregado_ano_disciplina ON boletim_agregado (ano, id_disciplina);
+
+-- Recalcula a linha de um aluno/disciplina/ano a partir das notas
+CREATE OR REPLACE FUNCTION atualizar_boletim_agregado(p_aluno VARCHAR, p_disciplina VARCHAR, p_ano INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    -- Serializa as atualizações da mesma chave: sem isso, duas transações gravando
+    -- bimestres diferentes ao mesmo tempo calculariam o agregado sem a nota da outra.
+    PERFORM pg_advisory_xact_lock(hashtextextended(p_aluno || '|' || p_disciplina || '|' || p_ano, 0));
+
+    INSERT INTO boletim_agregado ({_COLUNAS_SEM_ESCOLA})
+    {_sql_agregacao("n.id_aluno = p_aluno AND n.id_disciplina = p_disciplina AND n.ano = p_ano", escola=False)}
+    {_ATUALIZACAO.format(chave=_CHAVE_SEM_ESCOLA)};
+
+    IF NOT FOUND THEN
+        -- Não restou nenhuma nota para a chave
+        DELETE FROM boletim_agregado
+        WHERE id_aluno = p_aluno AND id_disciplina = p_disciplina AND ano = p_ano;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger: mantém o agregado a cada gravação em nota
+CREATE OR REPLACE FUNCTION atualizar_boletim_agregado_nota() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM atualizar_boletim_agregado(NEW.id_aluno, NEW.id_disciplina, NEW.ano);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM atualizar_boletim_agregado(OLD.id_aluno, OLD.id_disciplina, OLD.ano);
+    ELSE
+        PERFORM atualizar_boletim_agregado(NEW.id_aluno, NEW.id_disciplina, NEW.ano);
+        IF (OLD.id_aluno, OLD.id_disciplina, OLD.ano) IS DISTINCT FROM (NEW.id_aluno, NEW.id_disciplina, NEW.ano) THEN
+            -- A nota mudou de chave: a linha antiga também precisa ser recalculada
+            PERFORM atualizar_boletim_agregado(OLD.id_aluno, OLD.id_disciplina, OLD.ano);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS atualizar_boletim_agregado_trigger ON nota;
+CREATE TRIGGER atualizar_boletim_agregado_trigger
+AFTER INSERT OR DELETE OR UPDATE OF id_aluno, id_disciplina, id_turma, ano, bimestre,
+    nota_mensal, nota_bimestral, recuperacao, frequencia, media ON nota
+FOR EACH ROW
+EXECUTE FUNCTION atualizar_boletim_agregado_nota();
+
+-- Reconstrução completa (ou de um ano) em uma única instrução, para cargas iniciais
+CREATE OR REPLACE FUNCTION reconstruir_boletim_agregado(p_ano INTEGER DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    linhas INTEGER;
+BEGIN
+    DELETE FROM boletim_agregado b
+    WHERE (p_ano IS NULL OR b.ano = p_ano)
+      AND NOT EXISTS (
+          SELECT 1 FROM nota n
+          WHERE n.id_aluno = b.id_aluno AND n.id_disciplina = b.id_disciplina AND n.ano = b.ano
+      );
+
+    INSERT INTO boletim_agregado ({_COLUNAS_SEM_ESCOLA})
+    {_sql_agregacao("p_ano IS NULL OR n.ano = p_ano", escola=False)}
+    {_ATUALIZACAO.format(chave=_CHAVE_SEM_ESCOLA)};
+    GET DIAGNOSTICS linhas = ROW_COUNT;
+    RETURN linhas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Carga inicial
+SELECT reconstruir_boletim_agregado();
+"""
+
+
+def reconstruir_boletim_agregado(conn, ano=None):
+    """
+    Reconstrói boletim_agregado a partir de nota.
+
+    Args:
+        conn: conexão psycopg2
+        ano (int, optional): reconstrói apenas um ano letivo
+
+    Returns:
+        int: quantidade de linhas gravadas
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT reconstruir_boletim_agregado(%s)", (ano,))
+        linhas = cursor.fetchone()[0]
+        if not conn.autocommit:
+            conn.commit()
+        return linhas
+    finally:
+        cursor.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Boletim agregado")
+    parser.add_argument("--sql", nargs="?", const="0014", choices=["0005", "0014"],
+                        help="imprime o script da migração (padrão: 0014_boletim_agregado_escola.sql)")
+    parser.add_argument("--reconstruir", action="store_true", help="reconstrói a tabela a partir das notas")
+    parser.add_argument("--ano", type=int, help="restringe a reconstrução a um ano letivo")
+    args = parser.parse_args()
+
+    if args.sql == "0005":
+        print(sql_boletim_agregado_sem_escola(), end="")
+    elif args.sql:
+        print(sql_boletim_agregado(), end="")
+
+    if args.reconstruir:
+        from db_config import get_db_connection
+        linhas = reconstruir_boletim_agregado(get_db_connection(), ano=args.ano)
+        print(f"{linhas} linhas de boletim reconstruídas")
@@ -0,0 +1,577 @@
+"""
+Geração de boletins em PDF no servidor
+Substitui a montagem do boletim no navegador (js/gerador-pdf.js) por um
+renderizador em Python que trabalha sobre os dados de /api/boletim-medias.
+
+    - Cada aluno vira uma página (ou mais, se tiver muitas disciplinas)
+    - As páginas são renderizadas em paralelo em um pool de processos e depois
+      juntadas em um único PDF, ou em um ZIP com um PDF por aluno
+    - O resultado fica em cache pela hash do conteúdo das notas: se nenhuma
+      nota mudou, o mesmo arquivo é devolvido sem renderizar de novo
+    - Gerações grandes (escola inteira) podem rodar como tarefa em segundo plano
+
+O PDF é escrito diretamente (fontes padrão Helvetica, codificação WinAnsi),
+sem dependências externas.
+
+Variáveis de ambiente:
+    BOLETIM_PDF_PROCESSOS   processos do pool de renderização (padrão: nº de CPUs, máximo 4)
+    BOLETIM_PDF_CACHE_MB    memória máxima do cache de arquivos gerados (padrão 64)
+    BOLETIM_PDF_TAREFA_TTL  segundos que o resultado de uma tarefa fica disponível (padrão 3600)
+    ESCOLA_NOME             nome impresso no cabeçalho (padrão "EMEF Nazaré Rodrigues")
+"""
+import io
+import os
+import re
+import json
+import time
+import uuid
+import zlib
+import hashlib
+import logging
+import threading
+import unicodedata
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+# Mudar sempre que o layout mudar, para invalidar o cache
+VERSAO_LAYOUT = 1
+
+ESCOLA_NOME = os.environ.get("ESCOLA_NOME", "EMEF Nazaré Rodrigues")
+
+# Abaixo disso não compensa enviar as páginas para outros processos
+MINIMO_ALUNOS_PARALELO = 20
+# Alunos enviados por vez a cada processo
+ALUNOS_POR_BLOCO = 25
+
+# Página A4 em pontos
+LARGURA_PAGINA = 595.28
+ALTURA_PAGINA = 841.89
+MARGEM = 40
+
+# ==============================================================
+# Métricas das fontes padrão (larguras em 1/1000 do tamanho da fonte)
+# ==============================================================
+
+_LARGURAS_HELVETICA = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+
+_LARGURAS_HELVETICA_BOLD = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+]
+
+
+def _largura_caractere(caractere, negrito):
+    tabela = _LARGURAS_HELVETICA_BOLD if negrito else _LARGURAS_HELVETICA
+    codigo = ord(caractere)
+    if 32 <= codigo <= 126:
+        return tabela[codigo - 32]
+    # Letras acentuadas têm a largura da letra base (á -> a, Ç -> C)
+    base = unicodedata.normalize("NFD", caractere)[0]
+    if base != caractere and 32 <= ord(base) <= 126:
+        return tabela[ord(base) - 32]
+    return 556
+
+
+def largura_texto(texto, tamanho, negrito=False):
+    """Largura do texto em pontos."""
+    return sum(_largura_caractere(c, negrito) for c in texto) * tamanho / 1000.0
+
+
+def _escapar(texto):
+    dados = texto.encode("cp1252", errors="replace")
+    return dados.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _numero(valor):
+    return f"{valor:.2f}".rstrip("0").rstrip(".")
+
+
+class _Pagina:
+    """Acumula os operadores de desenho de uma página."""
+
+    def __init__(self):
+        self.partes = []
+
+    def texto(self, x, y, texto, tamanho=10, negrito=False, alinhamento="esquerda", cor=(0, 0, 0)):
+        if alinhamento == "centro":
+            x -= largura_texto(texto, tamanho, negrito) / 2
+        elif alinhamento == "direita":
+            x -= largura_texto(texto, tamanho, negrito)
+        fonte = "F2" if negrito else "F1"
+        self.partes.append(
+            b"BT %s rg /%s %s Tf %s %s Td (%s) Tj ET" % (
+                " ".join(_numero(c) for c in cor).encode(), fonte.encode(), _numero(tamanho).encode(),
+                _numero(x).encode(), _numero(y).encode(), _escapar(texto),
+            )
+        )
+
+    def retangulo(self, x, y, largura, altura, preenchimento=None, borda=(0.6, 0.6, 0.6)):
+        comandos = []
+        if preenchimento is not None:
+            comandos.append(" ".join(_numero(c) for c in preenchimento) + " rg")
+        if borda is not None:
+            comandos.append(" ".join(_numero(c) for c in borda) + " RG 0.5 w")
+        operador = "B" if preenchimento is not None and borda is not None else ("f" if borda is None else "S")
+        comandos.append(f"{_numero(x)} {_numero(y)} {_numero(largura)} {_numero(altura)} re {operador}")
+        self.partes.append(" ".join(comandos).encode())
+
+    def conteudo(self):
+        """Retorna o stream de conteúdo da página já comprimido."""
+        return zlib.compress(b"\n".join(self.partes))
+
+
+# ==============================================================
+# Layout do boletim
+# ==============================================================
+
+_CORES_SITUACAO = {
+    "Aprovado": ((0.78, 1, 0.78), (0, 0.39, 0)),
+    "Reprovado": ((1, 0.78, 0.78), (0.39, 0, 0)),
+    "Recuperação Final": ((1, 0.95, 0.75), (0.45, 0.3, 0)),
+}
+
+_COLUNAS = [
+    ("Disciplina", 155),
+    ("1º Bim", 52),
+    ("2º Bim", 52),
+    ("3º Bim", 52),
+    ("4º Bim", 52),
+    ("Média Anual", 62),
+    ("Situação", 90),
+]
+
+ALTURA_LINHA = 20
+
+
+def _formatar_nota(valor):
+    if valor is None:
+        return "-"
+    return f"{float(valor):.1f}".replace(".", ",")
+
+
+def _ajustar(texto, largura, tamanho, negrito=False):
+    """Corta o texto com reticências para caber na largura."""
+    if largura_texto(texto, tamanho, negrito) <= largura:
+        return texto
+    while texto and largura_texto(texto + "...", tamanho, negrito) > largura:
+        texto = texto[:-1]
+    return texto + "..."
+
+
+def _nova_pagina_boletim(aluno, ano, gerado_em, continuacao=False):
+    pagina = _Pagina()
+    topo = ALTURA_PAGINA - MARGEM
+
+    pagina.texto(LARGURA_PAGINA / 2, topo - 10, ESCOLA_NOME, tamanho=12, negrito=True, alinhamento="centro")
+    titulo = f"Boletim Escolar - {ano}" + (" (continuação)" if continuacao else "")
+    pagina.texto(LARGURA_PAGINA / 2, topo - 32, titulo, tamanho=16, negrito=True, alinhamento="centro")
+
+    y = topo - 62
+    pagina.retangulo(MARGEM, y - 38, LARGURA_PAGINA - 2 * MARGEM, 46, preenchimento=(0.95, 0.95, 0.97))
+    pagina.texto(MARGEM + 8, y - 8, "Aluno: ", tamanho=10, negrito=True)
+    pagina.texto(MARGEM + 48, y - 8, aluno.get("nome_aluno") or "", tamanho=10)
+    pagina.texto(MARGEM + 8, y - 26, "Matrícula: ", tamanho=10, negrito=True)
+    pagina.texto(MARGEM + 66, y - 26, str(aluno.get("id_aluno") or ""), tamanho=10)
+    turma = str(aluno.get("id_turma") or "")
+    if aluno.get("serie"):
+        turma = f"{turma} - {aluno['serie']}"
+    pagina.texto(LARGURA_PAGINA / 2 + 20, y - 26, "Turma: ", tamanho=10, negrito=True)
+    pagina.texto(LARGURA_PAGINA / 2 + 60, y - 26, turma, tamanho=10)
+
+    # Rodapé
+    pagina.texto(MARGEM, MARGEM - 15, f"Gerado em: {gerado_em}", tamanho=8, cor=(0.4, 0.4, 0.4))
+    pagina.texto(LARGURA_PAGINA - MARGEM, MARGEM - 15, f"{ESCOLA_NOME} - Sistema de Gestão Escolar",
+                 tamanho=8, alinhamento="direita", cor=(0.4, 0.4, 0.4))
+
+    # Cabeçalho da tabela
+    y -= 70
+    x = MARGEM
+    for titulo_coluna, largura in _COLUNAS:
+        pagina.retangulo(x, y, largura, ALTURA_LINHA, preenchimento=(0.2, 0.33, 0.55))
+        pagina.texto(x + largura / 2, y + 6.5, titulo_coluna, tamanho=9, negrito=True,
+                     alinhamento="centro", cor=(1, 1, 1))
+        x += largura
+    return pagina, y - ALTURA_LINHA
+
+
+def renderizar_boletim_aluno(aluno, ano, gerado_em):
+    """
+    Renderiza o boletim de um aluno.
+
+    Args:
+        aluno (dict): um item de "boletim" de /api/boletim-medias
+        ano (int): ano letivo
+        gerado_em (str): data impressa no rodapé
+
+    Returns:
+        list: streams de conteúdo (bytes, comprimidos) de cada página
+    """
+    paginas = []
+    pagina, y = _nova_pagina_boletim(aluno, ano, gerado_em)
+
+    for indice, disciplina in enumerate(aluno.get("disciplinas") or []):
+        if y < MARGEM + 10:
+            paginas.append(pagina.conteudo())
+            pagina, y = _nova_pagina_boletim(aluno, ano, gerado_em, continuacao=True)
+
+        notas = disciplina.get("notas_bimestrais") or {}
+        situacao = disciplina.get("situacao") or ""
+        valores = [_ajustar(disciplina.get("nome_disciplina") or "", _COLUNAS[0][1] - 10, 9)]
+        for bimestre in range(1, 5):
+            nota = notas.get(str(bimestre)) or notas.get(bimestre) or {}
+            valores.append(_formatar_nota(nota.get("media_bimestral")))
+        valores.append(_formatar_nota(disciplina.get("media_anual")))
+        valores.append(situacao)
+
+        fundo_linha = (0.97, 0.97, 0.97) if indice % 2 else (1, 1, 1)
+        x = MARGEM
+        for coluna, ((_, largura), valor) in enumerate(zip(_COLUNAS, valores)):
+            fundo, cor = fundo_linha, (0, 0, 0)
+            if coluna == len(_COLUNAS) - 1 and situacao in _CORES_SITUACAO:
+                fundo, cor = _CORES_SITUACAO[situacao]
+            pagina.retangulo(x, y, largura, ALTURA_LINHA, preenchimento=fundo)
+            if coluna == 0:
+                pagina.texto(x + 5, y + 6.5, valor, tamanho=9)
+            else:
+                pagina.texto(x + largura / 2, y + 6.5, valor, tamanho=9,
+                             negrito=(coluna == len(_COLUNAS) - 2), alinhamento="centro", cor=cor)
+            x += largura
+        y -= ALTURA_LINHA
+
+    if not aluno.get("disciplinas"):
+        pagina.texto(LARGURA_PAGINA / 2, y - 14, "Nenhuma nota lançada.", tamanho=10, alinhamento="centro")
+
+    paginas.append(pagina.conteudo())
+    return paginas
+
+
+def _renderizar_bloco(alunos, ano, gerado_em):
+    """Executado nos processos do pool: renderiza vários alunos de uma vez."""
+    return [renderizar_boletim_aluno(aluno, ano, gerado_em) for aluno in alunos]
+
+
+def montar_pdf(paginas):
+    """
+    Junta streams de conteúdo de páginas em um único documento PDF.
+
+    Args:
+        paginas (list): bytes comprimidos retornados por renderizar_boletim_aluno
+
+    Returns:
+        bytes: o arquivo PDF
+    """
+    objetos = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages, preenchido depois de conhecer as páginas
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+    kids = []
+    for conteudo in paginas:
+        numero_conteudo = len(objetos) + 2
+        objetos.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %s %s] "
+            b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>"
+            % (_numero(LARGURA_PAGINA).encode(), _numero(ALTURA_PAGINA).encode(), numero_conteudo)
+        )
+        kids.append(b"%d 0 R" % (len(objetos)))
+        objetos.append(
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(conteudo), conteudo)
+        )
+    objetos[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    saida = io.BytesIO()
+    saida.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    posicoes = []
+    for numero, objeto in enumerate(objetos, start=1):
+        posicoes.append(saida.tell())
+        saida.write(b"%d 0 obj\n%s\nendobj\n" % (numero, objeto))
+    inicio_xref = saida.tell()
+    saida.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1))
+    for posicao in posicoes:
+        saida.write(b"%010d 00000 n \n" % posicao)
+    saida.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, inicio_xref))
+    return saida.getvalue()
+
+
+# ==============================================================
+# Pool de processos
+# ==============================================================
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def processos_padrao():
+    valor = os.environ.get("BOLETIM_PDF_PROCESSOS")
+    if valor:
+        try:
+            return max(1, int(valor))
+        except ValueError:
+            logger.warning(f"Valor inválido para BOLETIM_PDF_PROCESSOS: {valor!r}")
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+def _obter_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=processos_padrao())
+        return _executor
+
+
+def encerrar_pool():
+    """Encerra o pool de processos (chamado no shutdown da API)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def renderizar_alunos(alunos, ano, gerado_em, progresso=None):
+    """
+    Renderiza os boletins de vários alunos, em paralelo quando há muitos.
+
+    Args:
+        alunos (list): itens de "boletim" de /api/boletim-medias
+        ano (int): ano letivo
+        gerado_em (str): data impressa no rodapé
+        progresso (callable, optional): chamado com (alunos_renderizados, total)
+
+    Returns:
+        list: para cada aluno (na ordem recebida), a lista de páginas
+    """
+    total = len(alunos)
+    if total < MINIMO_ALUNOS_PARALELO or processos_padrao() == 1:
+        resultado = []
+        for aluno in alunos:
+            resultado.append(renderizar_boletim_aluno(aluno, ano, gerado_em))
+            if progresso is not None:
+                progresso(len(resultado), total)
+        return resultado
+
+    executor = _obter_executor()
+    blocos = {}
+    for inicio in range(0, total, ALUNOS_POR_BLOCO):
+        futuro = executor.submit(_renderizar_bloco, alunos[inicio:inicio + ALUNOS_POR_BLOCO], ano, gerado_em)
+        blocos[futuro] = inicio
+
+    resultado = [None] * total
+    concluidos = 0
+    for futuro in as_completed(blocos):
+        inicio = blocos[futuro]
+        paginas = futuro.result()
+        resultado[inicio:inicio + len(paginas)] = paginas
+        concluidos += len(paginas)
+        if progresso is not None:
+            progresso(concluidos, total)
+    return resultado
+
+
+def _nome_arquivo(aluno):
+    nome = unicodedata.normalize("NFKD", aluno.get("nome_aluno") or "").encode("ascii", "ignore").decode()
+    nome = re.sub(r"[^A-Za-z0-9]+", "_", nome).strip("_")
+    return f"{aluno.get('id_aluno')}_{nome or 'aluno'}.pdf"
+
+
+def gerar_arquivo(alunos, ano, formato="pdf", gerado_em=None, progresso=None):
+    """
+    Gera o arquivo com os boletins.
+
+    Args:
+        formato (str): "pdf" (um único PDF com todos os alunos) ou "zip"
+            (um PDF por aluno)
+
+    Returns:
+        bytes: conteúdo do arquivo
+    """
+    if gerado_em is None:
+        gerado_em = time.strftime("%d/%m/%Y %H:%M")
+    paginas_por_aluno = renderizar_alunos(alunos, ano, gerado_em, progresso)
+
+    if formato == "zip":
+        saida = io.BytesIO()
+        with zipfile.ZipFile(saida, "w", zipfile.ZIP_STORED) as arquivo_zip:
+            for aluno, paginas in zip(alunos, paginas_por_aluno):
+                # As páginas já são comprimidas; ZIP_STORED evita comprimir duas vezes
+                arquivo_zip.writestr(_nome_arquivo(aluno), montar_pdf(paginas))
+        return saida.getvalue()
+
+    return montar_pdf([pagina for paginas in paginas_por_aluno for pagina in paginas])
+
+
+# ==============================================================
+# Cache por conteúdo
+# ==============================================================
+
+def chave_conteudo(alunos, ano, formato):
+    """Hash do conteúdo do boletim: muda se qualquer nota, nome ou turma mudar."""
+    dados = json.dumps(
+        {"versao": VERSAO_LAYOUT, "escola": ESCOLA_NOME, "ano": ano, "formato": formato, "alunos": alunos},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(dados.encode("utf-8")).hexdigest()
+
+
+class CacheArquivos:
+    """Cache LRU de arquivos gerados, limitado pelo total de bytes."""
+
+    def __init__(self, max_bytes=None):
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("BOLETIM_PDF_CACHE_MB", "64")) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        with self._lock:
+            conteudo = self._itens.get(chave)
+            if conteudo is not None:
+                self._itens.move_to_end(chave)
+            return conteudo
+
+    def guardar(self, chave, conteudo):
+        if len(conteudo) > self.max_bytes:
+            return
+        with self._lock:
+            antigo = self._itens.pop(chave, None)
+            if antigo is not None:
+                self._bytes -= len(antigo)
+            self._itens[chave] = conteudo
+            self._bytes += len(conteudo)
+            while self._bytes > self.max_bytes:
+                _, removido = self._itens.popitem(last=False)
+                self._bytes -= len(removido)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+
+# ==============================================================
+# Tarefas em segundo plano
+# ==============================================================
+
+class TarefasBoletim:
+    """
+    Executa gerações de boletim em segundo plano e guarda o progresso.
+
+    A função passada para iniciar() recebe um callback de progresso
+    (renderizados, total) e retorna os bytes do arquivo.
+    """
+
+    def __init__(self, ttl=None, max_simultaneas=1):
+        self.ttl = ttl if ttl is not None else int(os.environ.get("BOLETIM_PDF_TAREFA_TTL", "3600"))
+        self._tarefas = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_simultaneas, thread_name_prefix="boletim-pdf")
+
+    def _remover_expiradas(self):
+        limite = time.time() - self.ttl
+        for id_tarefa in [t for t, dados in self._tarefas.items()
+                          if dados["concluida_em"] and dados["concluida_em"] < limite]:
+            del self._tarefas[id_tarefa]
+
+    def iniciar(self, funcao, descricao=None):
+        """Agenda a geração e retorna o id da tarefa."""
+        id_tarefa = uuid.uuid4().hex
+        with self._lock:
+            self._remover_expiradas()
+            self._tarefas[id_tarefa] = {
+                "id_tarefa": id_tarefa,
+                "descricao": descricao or {},
+                "estado": "pendente",
+                "total": None,
+                "renderizados": 0,
+                "erro": None,
+                "criada_em": time.time(),
+                "concluida_em": None,
+                "arquivo": None,
+            }
+        self._executor.submit(self._executar, id_tarefa, funcao)
+        return id_tarefa
+
+    def _executar(self, id_tarefa, funcao):
+        def progresso(renderizados, total):
+            with self._lock:
+                self._tarefas[id_tarefa].update(renderizados=renderizados, total=total)
+
+        with self._lock:
+            self._tarefas[id_tarefa]["estado"] = "executando"
+        try:
+            arquivo = funcao(progresso)
+            with self._lock:
+                self._tarefas[id_tarefa].update(estado="concluida", arquivo=arquivo, concluida_em=time.time())
+        except Exception as e:
+            logger.exception(f"Erro na tarefa de boletim {id_tarefa}")
+            with self._lock:
+                self._tarefas[id_tarefa].update(estado="erro", erro=str(e), concluida_em=time.time())
+
+    def status(self, id_tarefa):
+        """Retorna o estado da tarefa (sem o arquivo) ou None se não existir."""
+        with self._lock:
+            tarefa = self._tarefas.get(id_tarefa)
+            if tarefa is None:
+                return None
+            resumo = {chave: valor for chave, valor in tarefa.items() if chave != "arquivo"}
+            resumo["tamanho_bytes"] = len(tarefa["arquivo"]) if tarefa["arquivo"] is not None else None
+            return resumo
+
+    def arquivo(self, id_tarefa):
+        with self._lock:
+            tarefa = self._tarefas.get(id_tarefa)
+            return None if tarefa is None else tarefa["arquivo"]
+
+    def encerrar(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    # Gera um boletim de exemplo com alunos fictícios e mede o tempo de renderização
+    import argparse
+    import random
+
+    parser = argparse.ArgumentParser(description="Gera boletins de exemplo")
+    parser.add_argument("--alunos", type=int, default=40)
+    parser.add_argument("--formato", choices=("pdf", "zip"), default="pdf")
+    parser.add_argument("--saida", default="boletim_exemplo.pdf")
+    args = parser.parse_args()
+
+    gerador = random.Random(1)
+    nomes_disciplinas = ["Português", "Matemática", "Ciências", "História", "Geografia",
+                         "Inglês", "Educação Física", "Artes"]
+    alunos_exemplo = []
+    for numero in range(args.alunos):
+        disciplinas = []
+        for nome in nomes_disciplinas:
+            notas = {str(b): {"media_bimestral": round(gerador.uniform(2, 10), 1)} for b in range(1, 5)}
+            media = round(sum(n["media_bimestral"] for n in notas.values()) / 4, 1)
+            situacao = "Aprovado" if media >= 6 else ("Recuperação Final" if media >= 4 else "Reprovado")
+            disciplinas.append({"nome_disciplina": nome, "notas_bimestrais": notas,
+                                "media_anual": media, "situacao": situacao})
+        alunos_exemplo.append({"id_aluno": f"A{numero:05d}", "nome_aluno": f"Aluno Exemplo {numero}",
+                               "id_turma": "1A", "serie": "1º Ano", "disciplinas": disciplinas})
+
+    inicio = time.perf_counter()
+    conteudo = gerar_arquivo(alunos_exemplo, 2024, formato=args.formato)
+    print(f"{args.alunos} boletins em {time.perf_counter() - inicio:.2f}s ({len(conteudo)} bytes)")
+    with open(args.saida, "wb") as arquivo_saida:
+        arquivo_saida.write(conteudo)
+    encerrar_pool()
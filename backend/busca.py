@@ -0,0 +1,300 @@
+"""
+Busca por nome de alunos, professores e escolas
+As consultas de /api/busca/* comparam o termo digitado com o nome normalizado
+(minúsculas e sem acentos): "joao" encontra "João", "sao luis" encontra
+"São Luís". A normalização é a função busca_normalizar(), criada pela migração
+(com a extensão unaccent, quando disponível; sem ela, translate() com os
+acentos do português), e os índices são montados sobre a mesma expressão:
+
+    - índice btree (collation "C") para o prefixo do nome: atende o
+      autocompletar a partir do primeiro caractere, já em ordem alfabética;
+    - índice GIN de trigramas (pg_trgm) para partes do nome ("silva") e para a
+      semelhança entre palavras (<%), que tolera erros de digitação.
+
+Os resultados vêm ordenados por relevância (nomes que começam com o termo
+primeiro, depois os que contêm as palavras ou são mais semelhantes) e são
+sempre limitados (LIMITE_MAXIMO).
+Sem pg_trgm no banco, a busca continua funcionando, apenas sem a tolerância a
+erros de digitação e sem índice para partes do nome.
+
+Uso como script:
+    python busca.py --sql > migracoes/0011_busca.sql
+    python busca.py --alunos 50000     (benchmark; conexão pelas variáveis DB_*,
+                                        com a migração 0011 aplicada)
+"""
+import re
+from collections import namedtuple
+
+from psycopg2.extras import RealDictCursor
+
+LIMITE_PADRAO = 20
+LIMITE_MAXIMO = 100
+
+# Palavras mais curtas não têm trigramas completos: com um termo só de palavras
+# curtas, a busca se restringe ao prefixo do nome
+TAMANHO_MINIMO_PALAVRA = 3
+
+# Acentos do português removidos pela normalização sem a extensão unaccent
+# (maiúsculas incluídas: com collation C, lower() só altera letras ASCII)
+_ACENTUADAS = "áàâãäéèêëíìîïóòôõöúùûüçñ"
+_ACENTUADAS += _ACENTUADAS.upper()
+_SEM_ACENTO = "aaaaaeeeeiiiiooooouuuucn" * 2
+
+AlvoBusca = namedtuple("AlvoBusca", "tabela colunas expressao ordem filtros")
+
+ALVOS = {
+    "alunos": AlvoBusca(
+        tabela="aluno",
+        colunas="id, id_aluno, nome_aluno, id_turma, sexo, data_nasc, mae",
+        expressao="nome_aluno",
+        ordem="nome_aluno, id",
+        filtros={"id_turma": "id_turma = %s", "id_escola": "id_escola = %s"},
+    ),
+    "professores": AlvoBusca(
+        tabela="professor",
+        colunas="id, id_professor, nome_professor, email_professor, ativo",
+        expressao="nome_professor",
+        ordem="nome_professor, id",
+        filtros={"ativo": "ativo = %s"},
+    ),
+    "escolas": AlvoBusca(
+        tabela="escolas",
+        colunas="id_escola, codigo_inep, razao_social, nome_fantasia, cidade, uf, ativo",
+        # Nome fantasia, razão social e cidade: "escola centro sao luis"
+        expressao="(coalesce(nome_fantasia, '') || ' ' || razao_social || ' ' || coalesce(cidade, ''))",
+        ordem="razao_social, id_escola",
+        filtros={"ativo": "ativo = %s", "uf": "uf = %s"},
+    ),
+}
+
+_ESPACOS = re.compile(r"\s+")
+
+
+def escapar_like(texto):
+    """Escapa os curingas de LIKE (%, _ e a barra invertida) do texto digitado."""
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def normalizar_termo(termo):
+    """Remove espaços extras do termo; retorna '' se não sobrar nada."""
+    return _ESPACOS.sub(" ", (termo or "").strip())
+
+
+def _nome(alvo):
+    # Em collation "C", a comparação por prefixo (LIKE 'abc%') e a ordenação
+    # usam o mesmo índice btree
+    return f'busca_normalizar({alvo.expressao}) COLLATE "C"'
+
+
+def montar_consultas(alvo, termo, limite=LIMITE_PADRAO, trigramas=True, filtros=None):
+    """
+    Monta as consultas de um alvo de busca, em ordem de relevância.
+
+    A primeira traz os nomes que começam com o termo, em ordem alfabética,
+    direto do índice de prefixo (sem ordenar todos os encontrados). A segunda,
+    executada só se a primeira não preencher o limite, traz os demais nomes em
+    que todas as palavras com TAMANHO_MINIMO_PALAVRA ou mais caracteres
+    aparecem (em qualquer ordem) e, com trigramas, os semelhantes ao termo
+    inteiro, dos mais aos menos semelhantes (sem trigramas, em ordem
+    alfabética). Um termo só de palavras curtas busca apenas pelo prefixo.
+
+    Args:
+        alvo (AlvoBusca): tabela e expressão buscadas
+        termo (str): texto digitado, já normalizado por normalizar_termo()
+        trigramas (bool): pg_trgm disponível no banco
+        filtros (dict): filtros exatos adicionais, chaves de alvo.filtros
+
+    Returns:
+        list: pares (sql, params); o limite da segunda consulta é o que faltar
+            (params["limite"]), e os resultados trazem a coluna 'relevancia'
+    """
+    nome = _nome(alvo)
+    params = {"termo": termo, "prefixo": escapar_like(termo) + "%",
+              "limite": max(1, min(int(limite), LIMITE_MAXIMO))}
+    if trigramas:
+        semelhanca = f"word_similarity(busca_normalizar(%(termo)s), {nome})"
+    else:
+        # Quanto mais perto do início o termo aparece, maior; 0 se as palavras
+        # aparecem em outra ordem
+        semelhanca = f"coalesce(1.0 / (1 + nullif(strpos({nome}, busca_normalizar(%(termo)s)), 0)), 0)"
+    prefixo = f"{nome} LIKE busca_normalizar(%(prefixo)s)"
+
+    filtros_sql = ""
+    for chave, valor in (filtros or {}).items():
+        if valor is not None:
+            params[f"f_{chave}"] = valor
+            filtros_sql += " AND " + alvo.filtros[chave].replace("%s", f"%(f_{chave})s")
+
+    consultas = [(
+        f"SELECT {alvo.colunas}, round((1 + {semelhanca})::numeric, 3)::float AS relevancia "
+        f"FROM {alvo.tabela} WHERE {prefixo}{filtros_sql} "
+        f"ORDER BY {nome}, {alvo.ordem} LIMIT %(limite)s",
+        params,
+    )]
+
+    palavras = [p for p in termo.split(" ") if len(p) >= TAMANHO_MINIMO_PALAVRA]
+    if palavras:
+        params = dict(params)
+        condicoes = []
+        for i, palavra in enumerate(palavras):
+            params[f"p{i}"] = "%" + escapar_like(palavra) + "%"
+            condicoes.append(f"{nome} LIKE busca_normalizar(%(p{i})s)")
+        condicao = " AND ".join(condicoes)
+        if trigramas:
+            condicao = f"(({condicao}) OR busca_normalizar(%(termo)s) <%% {nome})"
+            ordem = f"relevancia DESC, {nome}"
+        else:
+            # Sem o índice de trigramas a condição é avaliada linha a linha: na
+            # ordem do índice de prefixo, a leitura para ao preencher o limite
+            ordem = nome
+        consultas.append((
+            f"SELECT {alvo.colunas}, round(({semelhanca})::numeric, 3)::float AS relevancia "
+            f"FROM {alvo.tabela} WHERE {condicao} AND NOT {prefixo}{filtros_sql} "
+            f"ORDER BY {ordem}, {alvo.ordem} LIMIT %(limite)s",
+            params,
+        ))
+    return consultas
+
+
+_trigramas_disponiveis = None
+
+
+def trigramas_disponiveis(cursor):
+    """Indica se pg_trgm está instalado; consultado uma vez por processo (cursor de dicionários)."""
+    global _trigramas_disponiveis
+    if _trigramas_disponiveis is None:
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') AS instalado")
+        _trigramas_disponiveis = bool(cursor.fetchone()["instalado"])
+    return _trigramas_disponiveis
+
+
+def buscar(conn, nome_alvo, termo, limite=LIMITE_PADRAO, filtros=None):
+    """
+    Executa a busca ranqueada em um dos ALVOS.
+
+    Returns:
+        list: dicionários com as colunas do alvo e a relevancia
+    """
+    termo = normalizar_termo(termo)
+    if not termo:
+        return []
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        return _executar(cursor, montar_consultas(ALVOS[nome_alvo], termo, limite,
+                                                  trigramas_disponiveis(cursor), filtros))
+    finally:
+        cursor.close()
+
+
+def _executar(cursor, consultas):
+    resultados = []
+    for sql, params in consultas:
+        restante = params["limite"] - len(resultados)
+        if restante <= 0:
+            break
+        cursor.execute(sql, {**params, "limite": restante})
+        resultados.extend(dict(linha) for linha in cursor.fetchall())
+    return resultados
+
+
+def sql_busca():
+    """Retorna o script de normalização e índices de busca (migracoes/0011_busca.sql)."""
+    linhas = [
+        "-- Gerado por busca.py (python busca.py --sql). Não edite manualmente.",
+        "",
+        "-- Normalização dos nomes: minúsculas e sem acentos. unaccent() não é IMMUTABLE",
+        "-- (depende do dicionário), por isso a chamada com o dicionário explícito fica",
+        "-- em uma função própria, que pode ser usada nos índices",
+        "DO $$",
+        "BEGIN",
+        "    CREATE EXTENSION IF NOT EXISTS unaccent;",
+        "    CREATE OR REPLACE FUNCTION busca_normalizar(texto TEXT) RETURNS TEXT",
+        "        LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE",
+        "        AS $f$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, texto)) $f$;",
+        "EXCEPTION WHEN OTHERS THEN",
+        "    RAISE NOTICE 'unaccent indisponível, normalização por translate(): %', SQLERRM;",
+        "    CREATE OR REPLACE FUNCTION busca_normalizar(texto TEXT) RETURNS TEXT",
+        "        LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE",
+        f"        AS $f$ SELECT translate(lower(texto), '{_ACENTUADAS}', '{_SEM_ACENTO}') $f$;",
+        "END $$;",
+        "",
+        "-- Prefixo do nome (autocompletar), já na ordem dos resultados",
+    ]
+    for alvo in ALVOS.values():
+        linhas.append(
+            f"CREATE INDEX IF NOT EXISTS idx_{alvo.tabela}_busca_prefixo ON {alvo.tabela} "
+            f"(({_nome(alvo)}));"
+        )
+    linhas += [
+        "",
+        "-- Partes do nome e semelhança (<%): índices de trigramas, se pg_trgm estiver disponível",
+        "DO $$",
+        "BEGIN",
+        "    CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+    ]
+    for alvo in ALVOS.values():
+        linhas.append(
+            f"    CREATE INDEX IF NOT EXISTS idx_{alvo.tabela}_busca_trgm ON {alvo.tabela} "
+            f"USING gin (({_nome(alvo)}) gin_trgm_ops);"
+        )
+    linhas += [
+        "EXCEPTION WHEN OTHERS THEN",
+        "    RAISE NOTICE 'Índices de trigramas da busca não criados: %', SQLERRM;",
+        "END $$;",
+    ]
+    return "\n".join(linhas) + "\n"
+
+
+if __name__ == "__main__":
+    # Benchmark: autocompletar sobre N alunos, digitando o nome letra a letra
+    import os
+    import time
+    import random
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Busca por nome")
+    parser.add_argument("--sql", action="store_true", help="imprime o script de migracoes/0011_busca.sql")
+    parser.add_argument("--alunos", type=int, default=0,
+                        help="executa o benchmark com N alunos em uma tabela temporária")
+    args = parser.parse_args()
+
+    if args.sql:
+        print(sql_busca(), end="")
+    if args.alunos:
+        import psycopg2
+
+        conn = psycopg2.connect(
+            dbname=os.environ.get("DB_NAME", "gestao_escolar"),
+            user=os.environ.get("DB_USER", "postgres"),
+            password=os.environ.get("DB_PASSWORD", ""),
+            host=os.environ.get("DB_HOST", "localhost"),
+            port=os.environ.get("DB_PORT", "5432"),
+        )
+        conn.autocommit = True
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        random.seed(1)
+        nomes = ["João", "José", "Maria", "Ana", "Antônio", "Francisco", "Luíza", "Márcia", "Cecília", "Raimundo"]
+        sobrenomes = ["Silva", "Conceição", "Araújo", "Gonçalves", "Magalhães", "Sousa", "Brandão", "Simões"]
+        # Tabela temporária com o nome da tabela real: a consulta é a mesma do endpoint
+        cursor.execute("CREATE TEMP TABLE aluno (id SERIAL PRIMARY KEY, id_aluno TEXT, nome_aluno TEXT, id_turma TEXT, "
+                       "sexo TEXT, data_nasc DATE, mae TEXT)")
+        cursor.executemany(
+            "INSERT INTO aluno (id_aluno, nome_aluno, id_turma) VALUES (%s, %s, %s)",
+            [(f"A{i}", f"{random.choice(nomes)} {random.choice(sobrenomes)} {random.choice(sobrenomes)}", "1A")
+             for i in range(args.alunos)],
+        )
+        cursor.execute(f"CREATE INDEX ON pg_temp.aluno (({_nome(ALVOS['alunos'])}))")
+        trigramas = trigramas_disponiveis(cursor)
+        if trigramas:
+            cursor.execute(f"CREATE INDEX ON pg_temp.aluno USING gin (({_nome(ALVOS['alunos'])}) gin_trgm_ops)")
+        cursor.execute("ANALYZE pg_temp.aluno")
+
+        tempos = []
+        for digitado in ["m", "ma", "mag", "maga", "magal", "magalh", "joao", "joao silva", "cecilia araujo", "goncalvs"]:
+            inicio = time.perf_counter()
+            encontrados = len(_executar(cursor, montar_consultas(ALVOS["alunos"], digitado, 10, trigramas)))
+            tempos.append((time.perf_counter() - inicio) * 1000)
+            print(f"{digitado!r:18} {encontrados:3} resultados  {tempos[-1]:6.2f} ms")
+        print(f"{args.alunos} alunos (pg_trgm: {'sim' if trigramas else 'não'}) | "
+              f"máximo {max(tempos):.2f} ms, médio {sum(tempos) / len(tempos):.2f} ms")
+        conn.close()
@@ -0,0 +1,315 @@
+"""
+Cache em memória dos dados de referência
+Turmas, disciplinas, professores e os vínculos turma_disciplina e
+professor_disciplina_turma são tabelas pequenas que mudam pouco, mas são
+consultadas em quase toda gravação só para verificar se um id existe.
+
+Este módulo mantém uma cópia dessas tabelas no processo. A validade da cópia é
+controlada pela tabela versao_referencia: um trigger por instrução incrementa o
+contador da tabela alterada, e o cache compara os contadores no máximo uma vez
+a cada REFERENCIA_CACHE_INTERVALO segundos, recarregando apenas as tabelas que
+mudaram. Gravações feitas pelo próprio processo chamam invalidar() e são vistas
+imediatamente; as feitas por outros workers aparecem em até um intervalo.
+Um id que não está na cópia, porém, nunca é dado como inexistente sem uma
+verificação de versão feita na hora: um registro recém-criado por outro worker
+não gera um 404 ou 400 falso.
+
+As mesmas versões (incluindo a de aluno) identificam o estado das listagens
+para os ETags das respostas HTTP (ver versoes()).
+
+Uso como script:
+    python cache_referencia.py --sql > migracoes/0006_cache_referencia.sql
+
+Variáveis de ambiente:
+    REFERENCIA_CACHE_INTERVALO  segundos entre verificações de versão (padrão 2)
+"""
+import os
+import time
+import logging
+import threading
+
+import psycopg2.extras
+
+logger = logging.getLogger(__name__)
+
+# Tabelas mantidas em cache e a consulta que carrega cada uma
+CONSULTAS = {
+    "turma": "SELECT id, id_turma, serie, turno, tipo_turma, coordenador, id_escola FROM turma",
+    "disciplina": "SELECT id, id_disciplina, nome_disciplina, carga_horaria FROM disciplina",
+    # Sem a senha: o cache só serve para existência e autorização
+    "professor": "SELECT id, id_professor, nome_professor, email_professor, ativo FROM professor",
+    "turma_disciplina": "SELECT id_turma, id_disciplina FROM turma_disciplina",
+    "professor_disciplina_turma": "SELECT id_professor, id_disciplina, id_turma FROM professor_disciplina_turma",
+}
+
+# Tabelas com contador de versão: as do cache e aluno, que não é mantida em
+# memória (é grande), mas cuja versão também gera os ETags das listagens
+TABELAS_VERSIONADAS = list(CONSULTAS) + ["aluno"]
+
+# Sem a tabela versao_referencia, o cache é recarregado por tempo
+TTL_SEM_VERSAO = 30
+
+
+def sql_versao_referencia():
+    """Retorna o script que cria versao_referencia e os triggers (migracoes/0006_cache_referencia.sql)."""
+    tabelas = TABELAS_VERSIONADAS
+    linhas = [
+        "-- Gerado por cache_referencia.py (python cache_referencia.py --sql). Não edite manualmente.",
+        "",
+        "-- Contador de alterações por tabela de referência",
+        "CREATE TABLE IF NOT EXISTS versao_referencia (",
+        "    tabela VARCHAR(50) PRIMARY KEY,",
+        "    versao BIGINT NOT NULL DEFAULT 0",
+        ");",
+        "",
+        "INSERT INTO versao_referencia (tabela) VALUES",
+        ",\n".join(f"    ('{tabela}')" for tabela in tabelas),
+        "ON CONFLICT (tabela) DO NOTHING;",
+        "",
+        "-- Incrementa o contador uma vez por instrução (não por linha)",
+        "CREATE OR REPLACE FUNCTION incrementar_versao_referencia() RETURNS TRIGGER AS $$",
+        "BEGIN",
+        "    UPDATE versao_referencia SET versao = versao + 1 WHERE tabela = TG_TABLE_NAME;",
+        "    RETURN NULL;",
+        "END;",
+        "$$ LANGUAGE plpgsql;",
+    ]
+    for tabela in tabelas:
+        linhas += [
+            "",
+            f"DROP TRIGGER IF EXISTS versao_referencia_trigger ON {tabela};",
+            "CREATE TRIGGER versao_referencia_trigger",
+            f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {tabela}",
+            "FOR EACH STATEMENT",
+            "EXECUTE FUNCTION incrementar_versao_referencia();",
+        ]
+    return "\n".join(linhas) + "\n"
+
+
+class _Dados:
+    """Cópia imutável das tabelas de referência (trocada inteira a cada recarga)."""
+    __slots__ = ("turmas", "turmas_por_id", "disciplinas", "disciplinas_por_id", "professores",
+                 "turma_disciplina", "professor_disciplina_turma")
+
+    def __init__(self):
+        self.turmas = {}
+        self.turmas_por_id = {}
+        self.disciplinas = {}
+        self.disciplinas_por_id = {}
+        self.professores = {}
+        self.turma_disciplina = frozenset()
+        self.professor_disciplina_turma = frozenset()
+
+
+class CacheReferencia:
+    """
+    Cache versionado das tabelas de referência.
+
+    Uso:
+        cache = CacheReferencia(db_pool.getconn)
+        if not cache.turma_existe("1A"):
+            ...
+        cache.invalidar("turma")   # depois de gravar em turma
+    """
+
+    def __init__(self, obter_conexao, intervalo=None):
+        self.obter_conexao = obter_conexao
+        self.intervalo = (intervalo if intervalo is not None
+                          else float(os.environ.get("REFERENCIA_CACHE_INTERVALO", "2")))
+        self._dados = _Dados()
+        self._versoes = {}
+        self._sujas = set(CONSULTAS)
+        self._verificado_em = float("-inf")
+        self._recarregado_em = float("-inf")
+        self._tem_tabela_versao = False
+        self._lock = threading.Lock()
+        self.stats = {"verificacoes": 0, "recargas": 0}
+
+    # ------------------------------------------------------------------
+    # Atualização
+    # ------------------------------------------------------------------
+
+    def invalidar(self, *tabelas):
+        """Força a recarga das tabelas na próxima consulta (todas, se nenhuma for informada)."""
+        with self._lock:
+            self._sujas.update(tabelas or CONSULTAS)
+
+    def _ler_versoes(self, cursor):
+        # A existência da tabela é verificada antes: um erro aqui abortaria a
+        # transação do endpoint que estiver usando a mesma conexão.
+        if not self._tem_tabela_versao:
+            cursor.execute("SELECT to_regclass('versao_referencia') IS NOT NULL")
+            self._tem_tabela_versao = cursor.fetchone()[0]
+            if not self._tem_tabela_versao:
+                return None
+        cursor.execute("SELECT tabela, versao FROM versao_referencia")
+        return dict(cursor.fetchall())
+
+    def _recarregar(self, cursor, tabelas):
+        dados = _Dados()
+        for nome in _Dados.__slots__:
+            setattr(dados, nome, getattr(self._dados, nome))
+
+        cursor_dict = cursor.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        try:
+            if "turma" in tabelas:
+                cursor_dict.execute(CONSULTAS["turma"])
+                linhas = [dict(linha) for linha in cursor_dict.fetchall()]
+                dados.turmas = {linha["id_turma"]: linha for linha in linhas}
+                dados.turmas_por_id = {linha["id"]: linha for linha in linhas}
+            if "disciplina" in tabelas:
+                cursor_dict.execute(CONSULTAS["disciplina"])
+                linhas = [dict(linha) for linha in cursor_dict.fetchall()]
+                dados.disciplinas = {linha["id_disciplina"]: linha for linha in linhas}
+                dados.disciplinas_por_id = {linha["id"]: linha for linha in linhas}
+            if "professor" in tabelas:
+                cursor_dict.execute(CONSULTAS["professor"])
+                dados.professores = {linha["id_professor"]: dict(linha) for linha in cursor_dict.fetchall()}
+        finally:
+            cursor_dict.close()
+
+        if "turma_disciplina" in tabelas:
+            cursor.execute(CONSULTAS["turma_disciplina"])
+            dados.turma_disciplina = frozenset(cursor.fetchall())
+        if "professor_disciplina_turma" in tabelas:
+            cursor.execute(CONSULTAS["professor_disciplina_turma"])
+            dados.professor_disciplina_turma = frozenset(cursor.fetchall())
+        return dados
+
+    def _atualizar(self, forcar=False):
+        """Retorna a cópia atual, verificando as versões se o intervalo passou (ou se forcar)."""
+        agora = time.monotonic()
+        if not forcar and not self._sujas and agora - self._verificado_em < self.intervalo:
+            return self._dados
+
+        with self._lock:
+            agora = time.monotonic()
+            if not forcar and not self._sujas and agora - self._verificado_em < self.intervalo:
+                return self._dados
+
+            conn = self.obter_conexao()
+            try:
+                cursor = conn.cursor()
+                self.stats["verificacoes"] += 1
+                # A versão é lida antes dos dados: se uma gravação acontecer entre as
+                # duas leituras, a próxima verificação apenas recarrega de novo.
+                versoes = self._ler_versoes(cursor)
+                if versoes is None:
+                    mudaram = set(self._sujas)
+                    if agora - self._recarregado_em >= TTL_SEM_VERSAO:
+                        mudaram = set(CONSULTAS)
+                    versoes = {}
+                else:
+                    mudaram = {tabela for tabela in CONSULTAS
+                               if tabela in self._sujas or versoes.get(tabela) != self._versoes.get(tabela)}
+
+                if mudaram:
+                    self._dados = self._recarregar(cursor, mudaram)
+                    self.stats["recargas"] += 1
+                    self._recarregado_em = agora
+                    logger.debug(f"Cache de referência recarregado: {sorted(mudaram)}")
+                cursor.close()
+                self._versoes = versoes
+                self._sujas.clear()
+                self._verificado_em = agora
+            finally:
+                conn.close()
+            return self._dados
+
+    def _buscar(self, funcao):
+        """
+        Aplica funcao à cópia atual. Se não encontrar nada e a cópia não acabou
+        de ser verificada, verifica as versões na hora e tenta de novo.
+        """
+        verificado_em = self._verificado_em
+        resultado = funcao(self._atualizar())
+        if not resultado and self._verificado_em == verificado_em:
+            resultado = funcao(self._atualizar(forcar=True))
+        return resultado
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def turma(self, id_turma):
+        """Retorna a turma (dict) pelo id_turma, ou None."""
+        return self._buscar(lambda dados: dados.turmas.get(id_turma))
+
+    def turma_por_id(self, id_numerico):
+        """Retorna a turma (dict) pela chave numérica (turma.id), ou None."""
+        return self._buscar(lambda dados: dados.turmas_por_id.get(id_numerico))
+
+    def turma_existe(self, id_turma):
+        return self._buscar(lambda dados: id_turma in dados.turmas)
+
+    def disciplina(self, id_disciplina):
+        """Retorna a disciplina (dict) pelo id_disciplina, ou None."""
+        return self._buscar(lambda dados: dados.disciplinas.get(id_disciplina))
+
+    def disciplina_por_id(self, id_numerico):
+        """Retorna a disciplina (dict) pela chave numérica (disciplina.id), ou None."""
+        return self._buscar(lambda dados: dados.disciplinas_por_id.get(id_numerico))
+
+    def disciplina_existe(self, id_disciplina):
+        return self._buscar(lambda dados: id_disciplina in dados.disciplinas)
+
+    def professor(self, id_professor):
+        """Retorna o professor (dict, sem senha) pelo id_professor, ou None."""
+        return self._buscar(lambda dados: dados.professores.get(id_professor))
+
+    def professor_existe(self, id_professor):
+        return self._buscar(lambda dados: id_professor in dados.professores)
+
+    def disciplina_na_turma(self, id_turma, id_disciplina):
+        """Indica se a disciplina está vinculada à turma (turma_disciplina)."""
+        return self._buscar(lambda dados: (id_turma, id_disciplina) in dados.turma_disciplina)
+
+    def professor_leciona(self, id_professor, id_disciplina, id_turma=None):
+        """
+        Indica se o professor está vinculado à disciplina (na turma informada,
+        ou em qualquer turma se id_turma for None).
+        """
+        def procurar(dados):
+            vinculos = dados.professor_disciplina_turma
+            if id_turma is not None:
+                return (id_professor, id_disciplina, id_turma) in vinculos
+            return any(p == id_professor and d == id_disciplina for p, d, _ in vinculos)
+
+        return self._buscar(procurar)
+
+    def versoes(self, tabelas):
+        """
+        Versões atuais das tabelas, para montar validadores HTTP (ETag).
+
+        Returns:
+            tuple: versão de cada tabela, ou None sem a tabela versao_referencia
+        """
+        self._atualizar()
+        if not self._tem_tabela_versao:
+            return None
+        versoes = self._versoes
+        return tuple(versoes.get(tabela) for tabela in tabelas)
+
+    def status(self):
+        """Resumo do cache (tamanhos e contadores)."""
+        dados = self._dados
+        return {
+            "turmas": len(dados.turmas),
+            "disciplinas": len(dados.disciplinas),
+            "professores": len(dados.professores),
+            "turma_disciplina": len(dados.turma_disciplina),
+            "professor_disciplina_turma": len(dados.professor_disciplina_turma),
+            "versoes": dict(self._versoes),
+            **self.stats,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cache dos dados de referência")
+    parser.add_argument("--sql", action="store_true", help="imprime o script de migracoes/0006_cache_referencia.sql")
+    args = parser.parse_args()
+
+    if args.sql:
+        print(sql_versao_referencia(), end="")
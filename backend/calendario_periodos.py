@@ -0,0 +1,96 @@
+"""
+Consultas por período no calendário escolar
+Os filtros de mês, ano e período de /api/calendario/* são convertidos em um
+único intervalo semiaberto [inicio, fim) de datas, e a listagem seleciona os
+eventos que se sobrepõem a esse intervalo. Assim:
+
+    - um evento de vários dias que começou no mês anterior (recesso, semana
+      pedagógica) aparece no mês em que ainda está acontecendo;
+    - a condição não aplica funções sobre as colunas (EXTRACT(MONTH FROM ...)),
+      e é atendida por um índice GiST sobre o período de cada evento,
+      daterange(data_inicio, data_fim, '[]'), com o operador de sobreposição &&.
+
+A expressão da condição precisa ser idêntica à do índice para que o banco o
+utilize; por isso as duas são montadas aqui, a partir de EXPRESSAO_PERIODO.
+
+Uso como script:
+    python calendario_periodos.py --sql > migracoes/0009_calendario_periodos.sql
+"""
+import calendar
+from datetime import date, datetime, timedelta
+
+# Período do evento (data_fim inclusiva)
+EXPRESSAO_PERIODO = "daterange(data_inicio, data_fim, '[]')"
+
+# Condição de sobreposição com um intervalo [inicio, fim); None é ilimitado
+CONDICAO_SOBREPOSICAO = f"{EXPRESSAO_PERIODO} && daterange(%s::date, %s::date, '[)')"
+
+
+def intervalo_mes(ano, mes):
+    """Intervalo [primeiro dia do mês, primeiro dia do mês seguinte)."""
+    inicio = date(ano, mes, 1)
+    return inicio, inicio + timedelta(days=calendar.monthrange(ano, mes)[1])
+
+
+def intervalo_ano(ano):
+    return date(ano, 1, 1), date(ano + 1, 1, 1)
+
+
+def _data(valor):
+    if valor is None or isinstance(valor, date):
+        return valor
+    return datetime.strptime(valor, "%Y-%m-%d").date()
+
+
+def intervalo_consulta(ano=None, mes=None, data_inicio=None, data_fim=None):
+    """
+    Combina os filtros em um único intervalo [inicio, fim).
+
+    O mês só é considerado junto com o ano; data_inicio e data_fim
+    (YYYY-MM-DD, data_fim inclusiva) restringem o intervalo do mês/ano.
+
+    Raises:
+        ValueError: data em formato inválido
+
+    Returns:
+        tuple: (inicio, fim), datas ou None para o lado ilimitado; ou None sem filtros
+    """
+    inicio = fim = None
+    if ano and mes:
+        inicio, fim = intervalo_mes(ano, mes)
+    elif ano:
+        inicio, fim = intervalo_ano(ano)
+
+    data_inicio = _data(data_inicio)
+    data_fim = _data(data_fim)
+    if data_inicio is not None:
+        inicio = max(inicio, data_inicio) if inicio else data_inicio
+    if data_fim is not None:
+        fim_periodo = data_fim + timedelta(days=1)
+        fim = min(fim, fim_periodo) if fim else fim_periodo
+
+    if inicio is None and fim is None:
+        return None
+    return inicio, fim
+
+
+def sql_indices_calendario():
+    """Retorna o script com o índice de períodos (migracoes/0009_calendario_periodos.sql)."""
+    return "\n".join([
+        "-- Gerado por calendario_periodos.py (python calendario_periodos.py --sql). Não edite manualmente.",
+        "",
+        "-- Período de cada evento ativo, para consultas de sobreposição (&&)",
+        "CREATE INDEX IF NOT EXISTS idx_calendario_periodo ON calendario_escolar",
+        f"    USING gist ({EXPRESSAO_PERIODO}) WHERE ativo = TRUE;",
+    ]) + "\n"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Consultas por período no calendário")
+    parser.add_argument("--sql", action="store_true", help="imprime o script de migracoes/0009_calendario_periodos.sql")
+    args = parser.parse_args()
+
+    if args.sql:
+        print(sql_indices_calendario(), end="")
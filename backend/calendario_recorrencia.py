@@ -0,0 +1,251 @@
+"""
+Expansão de eventos recorrentes do calendário escolar
+Um evento com recorrente = TRUE é uma série: a primeira ocorrência é a gravada
+(data_inicio a data_fim) e as seguintes se repetem conforme
+frequencia_recorrencia (diaria, semanal, mensal ou anual), até recorrencia_ate
+(inclusiva; NULL = sem fim), exceto nas datas de início listadas em
+recorrencia_excecoes.
+
+As ocorrências são geradas sob demanda, apenas dentro da janela consultada, e
+guardadas em memória por (evento, ano): a visão anual e os doze resumos mensais
+do mesmo ano reaproveitam a mesma expansão. A regra do evento (datas,
+frequência, fim e exceções) faz parte da entrada do cache, de modo que um
+evento editado por outro worker é expandido de novo na próxima leitura;
+invalidar() libera as entradas de um evento editado neste worker.
+
+Na recorrência mensal (e anual, em 29/02), o dia que não existe no mês é
+ajustado para o último dia do mês.
+
+Uso como script:
+    python calendario_recorrencia.py --sql > migracoes/0010_calendario_recorrencia.sql
+    python calendario_recorrencia.py --eventos 500
+"""
+import os
+import calendar
+import bisect
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+
+from calendario_periodos import CONDICAO_SOBREPOSICAO
+
+FREQUENCIAS = ("diaria", "semanal", "mensal", "anual")
+
+_PASSO_DIAS = {"diaria": 1, "semanal": 7}
+_PASSO_MESES = {"mensal": 1, "anual": 12}
+
+# Anos expandidos quando a consulta não limita o período (além do ano anterior ao atual)
+ANOS_EXPANSAO_PADRAO = 2
+
+# Período coberto pela série inteira (NULL em recorrencia_ate = sem fim)
+EXPRESSAO_SERIE = "daterange(data_inicio, recorrencia_ate + (data_fim - data_inicio), '[]')"
+
+# Eventos que se sobrepõem a [inicio, fim), contando as séries: parâmetros (inicio, fim, inicio, fim)
+CONDICAO_PERIODO_OU_SERIE = (
+    f"({CONDICAO_SOBREPOSICAO} OR (recorrente = TRUE "
+    f"AND {EXPRESSAO_SERIE} && daterange(%s::date, %s::date, '[)')))"
+)
+
+
+def _somar_meses(data, meses):
+    mes = data.month - 1 + meses
+    ano = data.year + mes // 12
+    mes = mes % 12 + 1
+    return date(ano, mes, min(data.day, calendar.monthrange(ano, mes)[1]))
+
+
+def expandir(data_inicio, data_fim, frequencia, ate=None, excecoes=(), janela_inicio=None, janela_fim=None):
+    """
+    Gera as ocorrências (inicio, fim) que se sobrepõem a [janela_inicio, janela_fim).
+
+    A busca começa perto da janela, sem percorrer a série desde o início.
+    Com frequência desconhecida, o evento tem uma única ocorrência.
+    """
+    duracao = data_fim - data_inicio
+    if frequencia not in FREQUENCIAS:
+        if (janela_fim is None or data_inicio < janela_fim) and (janela_inicio is None or data_fim >= janela_inicio):
+            yield data_inicio, data_fim
+        return
+
+    excecoes = set(excecoes or ())
+    primeira = 0
+    if janela_inicio is not None:
+        # Primeira ocorrência que pode terminar dentro da janela (uma a menos, por segurança)
+        alvo = janela_inicio - duracao
+        if frequencia in _PASSO_DIAS:
+            primeira = (alvo - data_inicio).days // _PASSO_DIAS[frequencia] - 1
+        else:
+            meses = (alvo.year - data_inicio.year) * 12 + alvo.month - data_inicio.month
+            primeira = meses // _PASSO_MESES[frequencia] - 1
+        primeira = max(primeira, 0)
+
+    indice = primeira
+    while True:
+        if frequencia in _PASSO_DIAS:
+            inicio = data_inicio + timedelta(days=indice * _PASSO_DIAS[frequencia])
+        else:
+            inicio = _somar_meses(data_inicio, indice * _PASSO_MESES[frequencia])
+        indice += 1
+        if (ate is not None and inicio > ate) or (janela_fim is not None and inicio >= janela_fim):
+            return
+        fim = inicio + duracao
+        if janela_inicio is not None and fim < janela_inicio:
+            continue
+        if inicio in excecoes:
+            continue
+        yield inicio, fim
+
+
+def janela_expansao(intervalo, hoje=None):
+    """
+    Janela limitada [inicio, fim) para expandir as séries de um intervalo de consulta.
+
+    Sem limite de um dos lados, cobre ANOS_EXPANSAO_PADRAO anos civis a partir do
+    ano do início informado (ou até o ano do fim); sem intervalo, do ano anterior
+    ao atual até o fim do ano seguinte.
+    """
+    inicio, fim = intervalo or (None, None)
+    if inicio is None and fim is None:
+        ano = (hoje or date.today()).year
+        return date(ano - 1, 1, 1), date(ano + ANOS_EXPANSAO_PADRAO, 1, 1)
+    if inicio is None:
+        inicio = date(fim.year - ANOS_EXPANSAO_PADRAO + 1, 1, 1)
+    if fim is None:
+        fim = date(inicio.year + ANOS_EXPANSAO_PADRAO, 1, 1)
+    return inicio, fim
+
+
+class CacheOcorrencias:
+    """
+    Ocorrências expandidas por (evento, ano), com descarte do menos usado.
+
+    Args:
+        capacidade (int): entradas (evento, ano) mantidas em memória
+    """
+
+    def __init__(self, capacidade=None):
+        self.capacidade = capacidade or int(os.environ.get("CALENDARIO_CACHE_OCORRENCIAS", "5000"))
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"acertos": 0, "expansoes": 0, "invalidacoes": 0}
+
+    def ocorrencias(self, evento, inicio, fim):
+        """
+        Ocorrências do evento que se sobrepõem a [inicio, fim), em ordem.
+
+        Args:
+            evento: linha com id, data_inicio, data_fim, frequencia_recorrencia,
+                recorrencia_ate e recorrencia_excecoes
+        """
+        regra = (
+            evento["data_inicio"], evento["data_fim"], evento["frequencia_recorrencia"],
+            evento["recorrencia_ate"], tuple(sorted(evento["recorrencia_excecoes"] or ())),
+        )
+        duracao = evento["data_fim"] - evento["data_inicio"]
+        resultado = []
+        for ano in range(inicio.year, (fim - timedelta(days=1)).year + 1):
+            ocorrencias, inicios = self._ano(evento["id"], ano, regra)
+            # Ocorrências em ordem de início: as que terminam a partir de 'inicio'
+            # começam a partir de inicio - duracao
+            primeira = bisect.bisect_left(inicios, inicio - duracao)
+            ultima = bisect.bisect_left(inicios, fim)
+            for ocorrencia in ocorrencias[primeira:ultima]:
+                # Uma ocorrência na virada do ano aparece nos dois anos
+                if not resultado or ocorrencia[0] > resultado[-1][0]:
+                    resultado.append(ocorrencia)
+        return resultado
+
+    def _ano(self, evento_id, ano, regra):
+        chave = (evento_id, ano)
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada[0] == regra:
+                self._entradas.move_to_end(chave)
+                self.stats["acertos"] += 1
+                return entrada[1], entrada[2]
+
+        data_inicio, data_fim, frequencia, ate, excecoes = regra
+        ocorrencias = list(expandir(data_inicio, data_fim, frequencia, ate, excecoes,
+                                    date(ano, 1, 1), date(ano + 1, 1, 1)))
+        inicios = [ocorrencia[0] for ocorrencia in ocorrencias]
+        with self._lock:
+            self.stats["expansoes"] += 1
+            self._entradas[chave] = (regra, ocorrencias, inicios)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.capacidade:
+                self._entradas.popitem(last=False)
+        return ocorrencias, inicios
+
+    def invalidar(self, evento_id):
+        """Descarta as ocorrências de um evento (editado ou excluído)."""
+        with self._lock:
+            for chave in [chave for chave in self._entradas if chave[0] == evento_id]:
+                del self._entradas[chave]
+            self.stats["invalidacoes"] += 1
+
+    def status(self):
+        return {"entradas": len(self._entradas), "capacidade": self.capacidade, **self.stats}
+
+
+def sql_recorrencia():
+    """Retorna o script de colunas e índice das séries (migracoes/0010_calendario_recorrencia.sql)."""
+    return "\n".join([
+        "-- Gerado por calendario_recorrencia.py (python calendario_recorrencia.py --sql). Não edite manualmente.",
+        "",
+        "-- Fim da série (inclusivo; NULL = sem fim) e datas de início canceladas",
+        "ALTER TABLE calendario_escolar ADD COLUMN IF NOT EXISTS recorrencia_ate DATE;",
+        "ALTER TABLE calendario_escolar ADD COLUMN IF NOT EXISTS recorrencia_excecoes DATE[];",
+        "",
+        "-- Período coberto por cada série ativa, para a condição de sobreposição das séries",
+        "CREATE INDEX IF NOT EXISTS idx_calendario_serie ON calendario_escolar",
+        f"    USING gist ({EXPRESSAO_SERIE}) WHERE ativo = TRUE AND recorrente = TRUE;",
+    ]) + "\n"
+
+
+if __name__ == "__main__":
+    # Benchmark: visão anual seguida dos doze resumos mensais, expandindo cada
+    # regra a cada consulta ou usando o cache por (evento, ano)
+    import time
+    import random
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Expansão de eventos recorrentes")
+    parser.add_argument("--sql", action="store_true", help="imprime o script de migracoes/0010_calendario_recorrencia.sql")
+    parser.add_argument("--eventos", type=int, default=0, help="executa o benchmark com N séries")
+    args = parser.parse_args()
+
+    if args.sql:
+        print(sql_recorrencia(), end="")
+    if args.eventos:
+        random.seed(1)
+        eventos = []
+        for i in range(args.eventos):
+            inicio = date(2020, 1, 1) + timedelta(days=random.randrange(1500))
+            eventos.append({
+                "id": i,
+                "data_inicio": inicio,
+                "data_fim": inicio + timedelta(days=random.randrange(3)),
+                "frequencia_recorrencia": random.choice(FREQUENCIAS),
+                "recorrencia_ate": None,
+                "recorrencia_excecoes": [inicio + timedelta(days=7)],
+            })
+        janelas = [(date(2025, 1, 1), date(2026, 1, 1))]
+        janelas += [(date(2025, mes, 1), _somar_meses(date(2025, mes, 1), 1)) for mes in range(1, 13)]
+
+        inicio = time.perf_counter()
+        total_sem = sum(
+            len(list(expandir(e["data_inicio"], e["data_fim"], e["frequencia_recorrencia"], None,
+                              e["recorrencia_excecoes"], a, b)))
+            for a, b in janelas for e in eventos
+        )
+        t_sem = time.perf_counter() - inicio
+
+        cache = CacheOcorrencias()
+        for e in eventos:
+            cache.ocorrencias(e, *janelas[0])  # visão anual: preenche o cache
+        inicio = time.perf_counter()
+        total_com = sum(len(cache.ocorrencias(e, a, b)) for a, b in janelas for e in eventos)
+        t_com = time.perf_counter() - inicio
+
+        print(f"{args.eventos} séries, ano + 12 meses ({total_sem} ocorrências) | "
+              f"expandindo {t_sem * 1000:.1f} ms | com cache {t_com * 1000:.1f} ms ({total_com})")
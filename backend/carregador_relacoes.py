@@ -0,0 +1,108 @@
+"""
+Carregador de relações em lote
+Evita o padrão "uma consulta por linha" nos endpoints de listagem: as chaves
+de cada relação são coletadas primeiro e resolvidas depois com uma única
+consulta `= ANY(%s)`, no estilo do DataLoader.
+
+Uso:
+    with CarregadorRelacoes(get_db_connection()) as carregador:
+        for row in professores:
+            carregador.pedir("disciplinas_do_professor", row["id_professor"])
+        for row in professores:
+            disciplinas = carregador.obter("disciplinas_do_professor", row["id_professor"])
+
+Usado com with, o carregador fecha a conexão recebida ao sair do bloco: a
+conexão da requisição volta ao pool antes da validação e do envio da resposta
+(ver db_pool.py).
+
+O número de consultas depende apenas de quantas relações são usadas, e não
+de quantas linhas a listagem tem. Os resultados ficam memorizados na instância,
+que deve viver apenas durante uma requisição.
+"""
+
+# Relação -> (consulta que recebe a lista de chaves e retorna (chave, valor), valor padrão)
+# O valor padrão é usado para as chaves sem nenhuma linha relacionada.
+RELACOES = {
+    "disciplinas_do_professor": ("""
+        SELECT id_professor, ARRAY_AGG(DISTINCT id_disciplina ORDER BY id_disciplina)
+        FROM professor_disciplina_turma
+        WHERE id_professor = ANY(%s)
+        GROUP BY id_professor
+    """, list),
+    "qtd_alunos_da_turma": ("""
+        SELECT id_turma, COUNT(*)
+        FROM aluno
+        WHERE id_turma = ANY(%s)
+        GROUP BY id_turma
+    """, int),
+    "turmas_da_disciplina": ("""
+        SELECT td.id_disciplina,
+               JSON_AGG(JSON_BUILD_OBJECT('id_turma', t.id_turma, 'serie', t.serie) ORDER BY t.id_turma)
+        FROM turma_disciplina td
+        JOIN turma t ON t.id_turma = td.id_turma
+        WHERE td.id_disciplina = ANY(%s)
+        GROUP BY td.id_disciplina
+    """, list),
+}
+
+
+class CarregadorRelacoes:
+    """Resolve relações em lote, uma consulta por relação."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._pendentes = {relacao: set() for relacao in RELACOES}
+        self._carregados = {relacao: {} for relacao in RELACOES}
+        self.consultas = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.close()
+        return False
+
+    def pedir(self, relacao, chave):
+        """Registra uma chave para ser carregada na próxima resolução."""
+        if chave is not None and chave not in self._carregados[relacao]:
+            self._pendentes[relacao].add(chave)
+
+    def carregar(self, relacao, chaves):
+        """
+        Carrega de uma vez os valores da relação para as chaves informadas.
+
+        Returns:
+            dict: chave -> valor (com o valor padrão para as chaves sem linhas)
+        """
+        for chave in chaves:
+            self.pedir(relacao, chave)
+        self._resolver(relacao)
+        carregados = self._carregados[relacao]
+        return {chave: carregados[chave] for chave in chaves if chave is not None}
+
+    def obter(self, relacao, chave):
+        """Retorna o valor da relação para a chave, resolvendo as chaves pendentes se preciso."""
+        if chave not in self._carregados[relacao]:
+            self.pedir(relacao, chave)
+            self._resolver(relacao)
+        return self._carregados[relacao].get(chave, RELACOES[relacao][1]())
+
+    def _resolver(self, relacao):
+        pendentes = self._pendentes[relacao]
+        if not pendentes:
+            return
+
+        consulta, padrao = RELACOES[relacao]
+        chaves = list(pendentes)
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(consulta, (chaves,))
+            encontrados = dict(cursor.fetchall())
+        finally:
+            cursor.close()
+        self.consultas += 1
+
+        carregados = self._carregados[relacao]
+        for chave in chaves:
+            carregados[chave] = encontrados.get(chave, padrao())
+        pendentes.clear()
@@ -0,0 +1,152 @@
+"""
+Compressão das respostas HTTP (gzip e brotli)
+Middleware ASGI que comprime as respostas de texto/JSON acima de um tamanho
+mínimo, conforme o Accept-Encoding do cliente. Brotli é usado quando o pacote
+está instalado e o cliente aceita; caso contrário, gzip.
+
+Respostas em streaming (sem Content-Length, como /api/boletim-medias/stream)
+são comprimidas em partes, com flush a cada parte, para que o cliente continue
+recebendo os dados conforme são gerados.
+
+Variáveis de ambiente:
+    COMPRESSAO_TAMANHO_MINIMO  bytes a partir dos quais a resposta é comprimida (padrão 1024)
+"""
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - sem brotli, apenas gzip
+    brotli = None
+
+# Tipos que valem a pena comprimir (PDF e ZIP já são comprimidos)
+TIPOS_COMPRIMIVEIS = ("text/", "application/json", "application/x-ndjson",
+                      "application/javascript", "image/svg+xml")
+
+
+def escolher_codificacao(accept_encoding):
+    """Escolhe 'br', 'gzip' ou None a partir do cabeçalho Accept-Encoding."""
+    aceitas = set()
+    for item in accept_encoding.split(","):
+        partes = [parte.strip() for parte in item.split(";")]
+        nome = partes[0].lower()
+        qualidade = 1.0
+        for parte in partes[1:]:
+            if parte.startswith("q="):
+                try:
+                    qualidade = float(parte[2:])
+                except ValueError:
+                    qualidade = 0.0
+        if qualidade > 0:
+            aceitas.add(nome)
+    if brotli is not None and "br" in aceitas:
+        return "br"
+    if "gzip" in aceitas or "*" in aceitas:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    """Compressor incremental com a mesma interface para gzip e brotli."""
+
+    def __init__(self, codificacao, nivel_gzip, qualidade_brotli):
+        if codificacao == "br":
+            self._br = brotli.Compressor(quality=qualidade_brotli)
+            self._gz = None
+        else:
+            self._br = None
+            self._gz = zlib.compressobj(nivel_gzip, zlib.DEFLATED, 31)  # 31 = formato gzip
+
+    def parte(self, dados):
+        """Comprime uma parte e força a saída do que já foi processado."""
+        if self._br is not None:
+            return self._br.process(dados) + self._br.flush()
+        return self._gz.compress(dados) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def fim(self, dados=b""):
+        if self._br is not None:
+            return self._br.process(dados) + self._br.finish()
+        return self._gz.compress(dados) + self._gz.flush()
+
+
+class CompressaoMiddleware:
+    """Middleware ASGI de compressão (ver docstring do módulo)."""
+
+    def __init__(self, app, tamanho_minimo=None, nivel_gzip=6, qualidade_brotli=4):
+        self.app = app
+        self.tamanho_minimo = (tamanho_minimo if tamanho_minimo is not None
+                               else int(os.environ.get("COMPRESSAO_TAMANHO_MINIMO", "1024")))
+        self.nivel_gzip = nivel_gzip
+        self.qualidade_brotli = qualidade_brotli
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for nome, valor in scope["headers"]:
+            if nome == b"accept-encoding":
+                accept = valor.decode("latin-1")
+                break
+        codificacao = escolher_codificacao(accept)
+        if codificacao is None:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = None
+        compressor = None
+        repassar = False
+
+        async def enviar(mensagem):
+            nonlocal inicio, compressor, repassar
+
+            if mensagem["type"] == "http.response.start":
+                inicio = mensagem
+                return
+            if mensagem["type"] != "http.response.body":
+                await send(mensagem)
+                return
+
+            corpo = mensagem.get("body", b"")
+            mais = mensagem.get("more_body", False)
+
+            if inicio is not None:
+                # Primeira parte do corpo: decidir se a resposta será comprimida
+                mensagem_inicio, inicio = inicio, None
+                cabecalhos = [(nome.lower(), valor) for nome, valor in mensagem_inicio["headers"]]
+                tipo = next((valor.decode("latin-1") for nome, valor in cabecalhos
+                             if nome == b"content-type"), "")
+                ja_codificada = any(nome == b"content-encoding" for nome, _ in cabecalhos)
+                if (ja_codificada or mensagem_inicio["status"] in (204, 206, 304)
+                        or not tipo.startswith(TIPOS_COMPRIMIVEIS)
+                        or (not mais and len(corpo) < self.tamanho_minimo)):
+                    repassar = True
+                    await send(mensagem_inicio)
+                    await send(mensagem)
+                    return
+
+                compressor = _Compressor(codificacao, self.nivel_gzip, self.qualidade_brotli)
+                cabecalhos = [(nome, valor) for nome, valor in cabecalhos
+                              if nome not in (b"content-length", b"vary")]
+                vary = [valor for nome, valor in mensagem_inicio["headers"] if nome.lower() == b"vary"]
+                cabecalhos.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+                cabecalhos.append((b"content-encoding", codificacao.encode()))
+                if not mais:
+                    corpo = compressor.fim(corpo)
+                    cabecalhos.append((b"content-length", str(len(corpo)).encode()))
+                    await send({**mensagem_inicio, "headers": cabecalhos})
+                    await send({"type": "http.response.body", "body": corpo})
+                    return
+                await send({**mensagem_inicio, "headers": cabecalhos})
+
+            if repassar:
+                await send(mensagem)
+            elif mais:
+                dados = compressor.parte(corpo) if corpo else b""
+                if dados:
+                    await send({"type": "http.response.body", "body": dados, "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": compressor.fim(corpo)})
+
+        await self.app(scope, receive, enviar)
@@ -9,6 +9,8 @@ import psycopg2.extras
 import logging
 from fastapi import HTTPException, status
 
+from db_pool import ConnectionPool
+
 # Configurar logging
 logger = logging.getLogger(__name__)
 
@@ -37,20 +39,22 @@ else:
         "port": "5432"
     }
 
+# Pool de conexões deste processo (ver db_pool.py para as variáveis de ambiente)
+db_pool = ConnectionPool(DB_PARAMS)
+
 def get_db_connection():
     """
-    Obtém uma conexão com o banco de dados PostgreSQL
+    Obtém uma conexão do pool de conexões com o banco de dados PostgreSQL.
+    Chamar close() na conexão a devolve ao pool.
     
     Returns:
-        Connection: Objeto de conexão com o banco de dados
+        PooledConnection: Conexão emprestada pelo pool (autocommit ativo)
         
     Raises:
         HTTPException: Se não for possível conectar ao banco de dados
     """
     try:
-        conn = psycopg2.connect(**DB_PARAMS)
-        conn.autocommit = True
-        return conn
+        return db_pool.getconn()
     except Exception as e:
         logger.error(f"Erro ao conectar ao banco de dados: {e}")
         raise HTTPException(
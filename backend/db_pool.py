@@ -0,0 +1,403 @@
+"""
+Pool de conexões com o banco de dados PostgreSQL
+Este módulo mantém conexões psycopg2 abertas entre as requisições, evitando
+um novo handshake TLS (sslmode=require em produção) a cada consulta.
+
+O pool é por processo: com N workers (WEB_CONCURRENCY) o total de conexões
+abertas no servidor é N * DB_POOL_MAX.
+
+Variáveis de ambiente:
+    DB_POOL_MAX            conexões por worker (padrão 5, ou DB_MAX_CONNECTIONS / WEB_CONCURRENCY)
+    DB_POOL_MAX_AGE        idade máxima de uma conexão em segundos antes de ser reciclada (padrão 1800)
+    DB_POOL_TIMEOUT        tempo máximo de espera por uma conexão livre em segundos (padrão 10)
+    DB_POOL_PING_INTERVAL  conexões ociosas há mais tempo que isso são testadas com SELECT 1 (padrão 30)
+"""
+import os
+import time
+import threading
+import logging
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import psycopg2
+import psycopg2.extensions
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(nome, padrao):
+    valor = os.environ.get(nome)
+    if valor is None or valor == "":
+        return padrao
+    try:
+        return int(valor)
+    except ValueError:
+        logger.warning(f"Valor inválido para {nome}: {valor!r}, usando {padrao}")
+        return padrao
+
+
+def tamanho_pool_padrao():
+    """
+    Calcula o tamanho do pool por worker.
+
+    Se DB_POOL_MAX estiver definido ele é usado diretamente. Caso contrário, se
+    DB_MAX_CONNECTIONS (limite do servidor reservado para a API) estiver definido,
+    ele é dividido entre os workers informados em WEB_CONCURRENCY.
+    """
+    explicito = _env_int("DB_POOL_MAX", 0)
+    if explicito > 0:
+        return explicito
+    total = _env_int("DB_MAX_CONNECTIONS", 0)
+    if total > 0:
+        workers = max(1, _env_int("WEB_CONCURRENCY", 1))
+        return max(1, total // workers)
+    return 5
+
+
+class PoolTimeout(Exception):
+    """Nenhuma conexão ficou livre dentro do tempo de espera configurado."""
+
+
+class _Entrada:
+    """Conexão física mantida pelo pool e seus metadados."""
+    __slots__ = ("conn", "criada_em", "usada_em")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.criada_em = time.monotonic()
+        self.usada_em = self.criada_em
+
+
+class _Emprestimo:
+    """
+    Conexão emprestada a uma requisição (obtida sob demanda).
+
+    A conexão fica com a requisição apenas enquanto houver proxies abertos
+    (abertas > 0) ou uma transação em andamento; depois volta ao pool.
+    """
+    __slots__ = ("entrada", "abertas")
+
+    def __init__(self):
+        self.entrada = None
+        self.abertas = 0
+
+
+class PooledConnection:
+    """
+    Proxy para uma conexão do pool.
+
+    Se comporta como a conexão psycopg2 original, exceto por close(), que
+    devolve a conexão ao pool em vez de encerrá-la. Chamar close() mais de
+    uma vez é seguro. Quando a conexão pertence ao empréstimo da requisição,
+    close() a devolve ao pool se este era o último proxy aberto e não há
+    transação em andamento.
+    """
+    __slots__ = ("_entrada", "_pool", "_emprestimo")
+
+    def __init__(self, entrada, pool, emprestimo=None):
+        object.__setattr__(self, "_entrada", entrada)
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_emprestimo", emprestimo)
+
+    def _conexao(self):
+        entrada = object.__getattribute__(self, "_entrada")
+        if entrada is None:
+            raise psycopg2.InterfaceError("connection already closed")
+        return entrada.conn
+
+    def __getattr__(self, nome):
+        return getattr(self._conexao(), nome)
+
+    def __setattr__(self, nome, valor):
+        setattr(self._conexao(), nome, valor)
+
+    def __enter__(self):
+        self._conexao().__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conexao().__exit__(exc_type, exc, tb)
+
+    @property
+    def closed(self):
+        entrada = object.__getattribute__(self, "_entrada")
+        return 1 if entrada is None else entrada.conn.closed
+
+    def close(self):
+        entrada = object.__getattribute__(self, "_entrada")
+        if entrada is None:
+            return
+        object.__setattr__(self, "_entrada", None)
+        emprestimo = object.__getattribute__(self, "_emprestimo")
+        if emprestimo is None:
+            object.__getattribute__(self, "_pool")._devolver(entrada)
+        else:
+            object.__getattribute__(self, "_pool")._liberar(emprestimo)
+
+
+class ConnectionPool:
+    """
+    Pool de conexões thread-safe com verificação no checkout e reciclagem por idade.
+
+    Uso:
+        pool = ConnectionPool(DB_PARAMS)
+        conn = pool.getconn()      # PooledConnection
+        ...
+        conn.close()               # devolve ao pool
+
+        with pool.conexao_requisicao():
+            ...                    # todas as chamadas a getconn() usam a mesma conexão
+    """
+
+    def __init__(self, params, maxconn=None, max_age=None, timeout=None, ping_interval=None,
+                 connection_factory=None):
+        self.params = dict(params)
+        self.connection_factory = connection_factory
+        self.maxconn = maxconn or tamanho_pool_padrao()
+        self.max_age = max_age if max_age is not None else _env_int("DB_POOL_MAX_AGE", 1800)
+        self.timeout = timeout if timeout is not None else _env_int("DB_POOL_TIMEOUT", 10)
+        self.ping_interval = (ping_interval if ping_interval is not None
+                              else _env_int("DB_POOL_PING_INTERVAL", 30))
+
+        self._lock = threading.Condition(threading.Lock())
+        self._ociosas = deque()
+        self._em_uso = 0
+        self._pid = os.getpid()
+        # Conexões herdadas de um fork: mantidas referenciadas para que o coletor
+        # de lixo não as feche no processo filho e derrube a sessão do processo pai.
+        self._herdadas = []
+        self._emprestimo = ContextVar(f"emprestimo_pool_{id(self)}", default=None)
+
+        self.stats = {
+            "criadas": 0,
+            "recicladas": 0,
+            "descartadas": 0,
+            "checkouts": 0,
+            "esperas": 0,
+            "timeouts": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida das conexões físicas
+    # ------------------------------------------------------------------
+
+    def _nova_entrada(self):
+        conn = psycopg2.connect(**self.params, connection_factory=self.connection_factory)
+        conn.autocommit = True
+        self.stats["criadas"] += 1
+        return _Entrada(conn)
+
+    def _fechar(self, entrada):
+        try:
+            entrada.conn.close()
+        except Exception:
+            pass
+
+    def _verificar_fork(self):
+        if self._pid != os.getpid():
+            self._herdadas.extend(self._ociosas)
+            self._ociosas.clear()
+            self._em_uso = 0
+            self._pid = os.getpid()
+
+    def _valida(self, entrada):
+        """Verifica no checkout se a conexão ainda pode ser usada."""
+        conn = entrada.conn
+        if conn.closed:
+            return False
+        agora = time.monotonic()
+        if self.max_age and agora - entrada.criada_em > self.max_age:
+            self.stats["recicladas"] += 1
+            return False
+        if agora - entrada.usada_em > self.ping_interval:
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+            except Exception:
+                return False
+        return True
+
+    def _obter(self):
+        """Retira uma conexão válida do pool, criando uma nova se houver espaço."""
+        limite = time.monotonic() + self.timeout
+        with self._lock:
+            self._verificar_fork()
+            while True:
+                if self._ociosas:
+                    entrada = self._ociosas.pop()
+                    self._em_uso += 1
+                    break
+                if self._em_uso < self.maxconn:
+                    self._em_uso += 1
+                    entrada = None
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self.stats["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"Nenhuma conexão livre após {self.timeout}s (pool com {self.maxconn} conexões)"
+                    )
+                self.stats["esperas"] += 1
+                self._lock.wait(restante)
+            self.stats["checkouts"] += 1
+
+        # Conexão e validação fora do lock para não bloquear as outras threads
+        try:
+            if entrada is not None and not self._valida(entrada):
+                self._fechar(entrada)
+                self.stats["descartadas"] += 1
+                entrada = None
+            if entrada is None:
+                entrada = self._nova_entrada()
+        except Exception:
+            with self._lock:
+                self._em_uso -= 1
+                self._lock.notify()
+            raise
+        return entrada
+
+    def _devolver(self, entrada):
+        """Devolve uma conexão ao pool, restaurando o estado padrão (autocommit)."""
+        conn = entrada.conn
+        reutilizavel = not conn.closed
+        if reutilizavel:
+            try:
+                if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if not conn.autocommit:
+                    conn.autocommit = True
+            except Exception:
+                reutilizavel = False
+        if reutilizavel and self.max_age and time.monotonic() - entrada.criada_em > self.max_age:
+            self.stats["recicladas"] += 1
+            reutilizavel = False
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # Conexão aberta antes do fork; não pertence a este processo
+                self._herdadas.append(entrada)
+                return
+            self._em_uso -= 1
+            if reutilizavel:
+                entrada.usada_em = time.monotonic()
+                self._ociosas.append(entrada)
+            self._lock.notify()
+
+        if not reutilizavel:
+            self.stats["descartadas"] += 1
+            self._fechar(entrada)
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def getconn(self):
+        """
+        Obtém uma conexão do pool.
+
+        Dentro de conexao_requisicao(), retorna a conexão compartilhada pela
+        requisição atual (enquanto algum proxy dela estiver aberto).
+
+        Raises:
+            PoolTimeout: se nenhuma conexão ficar livre a tempo
+            psycopg2.Error: se não for possível abrir uma nova conexão
+        """
+        emprestimo = self._emprestimo.get()
+        if emprestimo is not None:
+            with self._lock:
+                emprestimo.abertas += 1
+                entrada = emprestimo.entrada
+            if entrada is None:
+                try:
+                    entrada = self._obter()
+                except Exception:
+                    with self._lock:
+                        emprestimo.abertas -= 1
+                    raise
+                with self._lock:
+                    if emprestimo.entrada is None:
+                        emprestimo.entrada, entrada = entrada, None
+                if entrada is not None:
+                    # Outro thread da mesma requisição obteve a conexão antes
+                    self._devolver(entrada)
+            return PooledConnection(emprestimo.entrada, self, emprestimo)
+        return PooledConnection(self._obter(), self)
+
+    def getconn_dedicada(self):
+        """
+        Obtém uma conexão exclusiva do pool, mesmo dentro de conexao_requisicao().
+
+        Usada por respostas em streaming, que continuam lendo do banco depois que
+        o empréstimo da requisição já foi devolvido. Deve ser fechada com close().
+        """
+        return PooledConnection(self._obter(), self)
+
+    def _liberar(self, emprestimo):
+        """
+        Fecha um proxy do empréstimo; a conexão volta ao pool com o último.
+
+        Assim a requisição não segura a conexão enquanto espera por outro
+        thread do threadpool (validação e envio da resposta, middlewares):
+        com mais requisições que conexões, as que esperam no pool ocupavam
+        todos os threads e as que tinham conexão não conseguiam terminar.
+        Com uma transação aberta (autocommit desligado e sem commit), a
+        conexão fica com a requisição até o fim do bloco.
+        """
+        with self._lock:
+            emprestimo.abertas -= 1
+            entrada = emprestimo.entrada
+            if emprestimo.abertas > 0 or entrada is None:
+                return
+            conn = entrada.conn
+            if (not conn.closed and conn.info.transaction_status
+                    != psycopg2.extensions.TRANSACTION_STATUS_IDLE):
+                return
+            emprestimo.entrada = None
+        self._devolver(entrada)
+
+    @contextmanager
+    def conexao_requisicao(self):
+        """
+        Compartilha uma conexão entre tudo o que for executado dentro do bloco.
+
+        A conexão só é retirada do pool na primeira chamada a getconn() e volta
+        a ele quando o último proxy é fechado (ver _liberar), de modo que as
+        chamadas aninhadas a getconn() recebem a mesma conexão, sem que ela
+        fique parada durante o envio da resposta. O que não for fechado é
+        devolvido no fim do bloco.
+        """
+        if self._emprestimo.get() is not None:
+            # Já existe um empréstimo ativo (blocos aninhados)
+            yield
+            return
+        emprestimo = _Emprestimo()
+        token = self._emprestimo.set(emprestimo)
+        try:
+            yield
+        finally:
+            self._emprestimo.reset(token)
+            with self._lock:
+                entrada, emprestimo.entrada = emprestimo.entrada, None
+            if entrada is not None:
+                self._devolver(entrada)
+
+    def status(self):
+        """Retorna um resumo do estado do pool."""
+        with self._lock:
+            resumo = {
+                "max": self.maxconn,
+                "em_uso": self._em_uso,
+                "ociosas": len(self._ociosas),
+            }
+        resumo.update(self.stats)
+        return resumo
+
+    def closeall(self):
+        """Fecha todas as conexões ociosas (as em uso são fechadas ao serem devolvidas)."""
+        with self._lock:
+            ociosas = list(self._ociosas)
+            self._ociosas.clear()
+        for entrada in ociosas:
+            self._fechar(entrada)
@@ -0,0 +1,330 @@
+"""
+Gravação assíncrona do log de atividades
+Os eventos de log_atividade (login, alterações, POST /api/logs) não precisam
+estar gravados antes da resposta. Em vez de um INSERT síncrono por evento, o
+evento é colocado em uma fila em memória e um thread do próprio processo grava
+os eventos em lote, com um único INSERT de várias linhas, quando o lote enche
+ou quando o intervalo máximo passa.
+
+    - Memória limitada: a fila tem capacidade fixa. Com a fila cheia, quem
+      registra espera um pouco (contrapressão) e, se ainda assim não houver
+      espaço, grava o próprio evento de forma síncrona; nenhum evento é perdido
+      por falta de espaço.
+    - O id e a data_hora são definidos no registro: os ids são reservados na
+      sequência de log_atividade em blocos (uma consulta a cada RESERVA_IDS
+      eventos), de modo que POST /api/logs continua retornando id e data_hora.
+    - Falhas de gravação são tentadas novamente; um lote que falha em todas as
+      tentativas é registrado no log da aplicação (nível ERROR) e descartado.
+    - fechar() grava tudo o que estiver pendente (encerramento do worker), e
+      descarregar() espera a gravação do que já foi registrado (usado antes de
+      ler o log, para que o próprio worker veja os eventos que registrou).
+
+Variáveis de ambiente:
+    LOG_ATIVIDADE_LOTE        eventos por INSERT (padrão 200)
+    LOG_ATIVIDADE_INTERVALO   segundos até gravar um lote incompleto (padrão 0.5)
+    LOG_ATIVIDADE_CAPACIDADE  eventos pendentes em memória (padrão 10000)
+
+Uso como script (compara INSERT por evento com a gravação em lote):
+    python log_atividade.py --eventos 2000
+"""
+import os
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+
+import psycopg2.extras
+
+logger = logging.getLogger(__name__)
+
+COLUNAS = ("id", "data_hora", "usuario", "acao", "entidade", "entidade_id", "detalhe", "status")
+
+QUERY_INSERIR = f"INSERT INTO log_atividade ({', '.join(COLUNAS)}) VALUES %s"
+
+QUERY_RESERVAR_IDS = """
+    SELECT nextval(pg_get_serial_sequence('log_atividade', 'id'))
+    FROM generate_series(1, %s)
+"""
+
+# Ids reservados na sequência de uma só vez
+RESERVA_IDS = 100
+
+# Espera entre as tentativas de gravar um lote (segundos)
+ESPERAS_RETENTATIVA = (0.5, 2, 5)
+
+# Marcador colocado na fila para gravar imediatamente o lote em formação
+_DESCARREGAR = object()
+
+
+class GravadorLogAtividade:
+    """
+    Fila de eventos de log_atividade com gravação em lote (ver docstring do módulo).
+
+    Args:
+        obter_conexao: função que retorna uma conexão (close() a devolve ao pool)
+        preparar: função chamada uma vez antes do primeiro uso (ex.: criar a tabela)
+        ao_gravar: função chamada com a lista de eventos depois de cada gravação
+        espera_maxima (float): segundos que registrar() espera por espaço na fila
+    """
+
+    def __init__(self, obter_conexao, tamanho_lote=None, intervalo=None, capacidade=None,
+                 espera_maxima=1.0, preparar=None, ao_gravar=None):
+        self.obter_conexao = obter_conexao
+        self.tamanho_lote = tamanho_lote or int(os.environ.get("LOG_ATIVIDADE_LOTE", "200"))
+        self.intervalo = intervalo or float(os.environ.get("LOG_ATIVIDADE_INTERVALO", "0.5"))
+        capacidade = capacidade or int(os.environ.get("LOG_ATIVIDADE_CAPACIDADE", "10000"))
+        self.espera_maxima = espera_maxima
+        self.preparar = preparar
+        self.ao_gravar = ao_gravar
+
+        self._fila = queue.Queue(maxsize=capacidade)
+        self._ids = deque()
+        self._lock = threading.Lock()
+        self._gravados = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self._parar = threading.Event()
+        self._preparado = False
+
+        # Eventos aceitos e eventos concluídos (gravados ou descartados)
+        self._registrados = 0
+        self._concluidos = 0
+        self.stats = {"lotes": 0, "gravados": 0, "sincronos": 0, "falhas": 0, "descartados": 0}
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def registrar(self, usuario, acao, entidade, entidade_id, detalhe=None, status="concluído"):
+        """
+        Registra um evento para gravação em segundo plano.
+
+        Returns:
+            dict: o evento, com id e data_hora já definidos
+        """
+        self._iniciar()
+        evento = {
+            "id": self._proximo_id(),
+            "data_hora": datetime.now(),
+            "usuario": usuario,
+            "acao": acao,
+            "entidade": entidade,
+            "entidade_id": str(entidade_id),
+            "detalhe": detalhe,
+            "status": status,
+        }
+        with self._gravados:
+            self._registrados += 1
+        try:
+            self._fila.put(evento, timeout=self.espera_maxima)
+        except queue.Full:
+            # Fila cheia mesmo após a espera: grava no thread de quem registrou
+            self.stats["sincronos"] += 1
+            try:
+                self._gravar([evento])
+            finally:
+                self._concluir(1)
+        return evento
+
+    def pendentes(self):
+        """Quantidade de eventos registrados e ainda não gravados."""
+        return self._registrados - self._concluidos
+
+    def descarregar(self, timeout=2.0):
+        """
+        Espera a gravação de todos os eventos registrados até o momento.
+
+        Returns:
+            bool: False se o tempo acabou antes
+        """
+        with self._gravados:
+            alvo = self._registrados
+            if self._concluidos >= alvo:
+                return True
+        self._sinalizar()
+        with self._gravados:
+            return self._gravados.wait_for(lambda: self._concluidos >= alvo, timeout)
+
+    def fechar(self, timeout=10.0):
+        """Grava os eventos pendentes e encerra o thread (encerramento do worker)."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._parar.set()
+        self._sinalizar()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.error(f"Log de atividades: {self.pendentes()} eventos não gravados no encerramento")
+
+    def status(self):
+        return {"pendentes": self.pendentes(), "capacidade": self._fila.maxsize, **self.stats}
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _iniciar(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            if not self._preparado and self.preparar is not None:
+                self.preparar()
+                self._preparado = True
+            # Após um fork, o thread do processo pai não existe no filho
+            self._pid = os.getpid()
+            self._ids.clear()
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name="log-atividade", daemon=True)
+            self._thread.start()
+
+    def _sinalizar(self):
+        try:
+            self._fila.put_nowait(_DESCARREGAR)
+        except queue.Full:
+            pass  # Fila cheia: o próximo lote já sai completo
+
+    def _proximo_id(self):
+        with self._lock:
+            if not self._ids:
+                conn = self.obter_conexao()
+                try:
+                    cursor = conn.cursor()
+                    cursor.execute(QUERY_RESERVAR_IDS, (RESERVA_IDS,))
+                    self._ids.extend(linha[0] for linha in cursor.fetchall())
+                    cursor.close()
+                finally:
+                    conn.close()
+            return self._ids.popleft()
+
+    def _concluir(self, quantidade):
+        with self._gravados:
+            self._concluidos += quantidade
+            self._gravados.notify_all()
+
+    def _executar(self):
+        while True:
+            try:
+                primeiro = self._fila.get(timeout=self.intervalo)
+            except queue.Empty:
+                if self._parar.is_set():
+                    return
+                continue
+
+            lote = [] if primeiro is _DESCARREGAR else [primeiro]
+            limite = time.monotonic() + self.intervalo
+            while primeiro is not _DESCARREGAR and len(lote) < self.tamanho_lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    evento = self._fila.get(timeout=restante)
+                except queue.Empty:
+                    break
+                if evento is _DESCARREGAR:
+                    break
+                lote.append(evento)
+
+            if lote:
+                self._gravar_com_retentativas(lote)
+            if self._parar.is_set() and self._fila.empty():
+                return
+
+    def _gravar_com_retentativas(self, lote):
+        try:
+            for tentativa, espera in enumerate((0,) + ESPERAS_RETENTATIVA):
+                if espera:
+                    if self._parar.is_set():
+                        espera = min(espera, 0.5)
+                    time.sleep(espera)
+                try:
+                    self._gravar(lote)
+                    return
+                except Exception as e:
+                    self.stats["falhas"] += 1
+                    logger.warning(f"Falha ao gravar {len(lote)} eventos de log_atividade "
+                                   f"(tentativa {tentativa + 1}): {e}")
+            self.stats["descartados"] += len(lote)
+            logger.error("Eventos de log_atividade descartados após as tentativas: %s", lote)
+        finally:
+            self._concluir(len(lote))
+
+    def _gravar(self, eventos):
+        conn = self.obter_conexao()
+        try:
+            cursor = conn.cursor()
+            psycopg2.extras.execute_values(
+                cursor, QUERY_INSERIR,
+                [tuple(evento[coluna] for coluna in COLUNAS) for evento in eventos],
+                page_size=len(eventos),
+            )
+            conn.commit()
+            cursor.close()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        self.stats["lotes"] += 1
+        self.stats["gravados"] += len(eventos)
+        if self.ao_gravar is not None:
+            try:
+                self.ao_gravar(eventos)
+            except Exception:
+                logger.exception("Erro no retorno de gravação do log de atividades")
+
+
+if __name__ == "__main__":
+    # Benchmark: INSERT síncrono por evento (caminho antigo) contra registrar()
+    # com gravação em lote, no banco configurado em DB_PARAMS/variáveis DB_*
+    import argparse
+    import psycopg2
+
+    parser = argparse.ArgumentParser(description="Benchmark do log de atividades")
+    parser.add_argument("--eventos", type=int, default=2000)
+    args = parser.parse_args()
+
+    params = {
+        "dbname": os.environ.get("DB_NAME", "gestao_escolar"),
+        "user": os.environ.get("DB_USER", "postgres"),
+        "password": os.environ.get("DB_PASSWORD", ""),
+        "host": os.environ.get("DB_HOST", "localhost"),
+        "port": os.environ.get("DB_PORT", "5432"),
+    }
+    conexao = psycopg2.connect(**params)
+    conexao.autocommit = True
+
+    class _SemFechar:
+        def __getattr__(self, nome):
+            return getattr(conexao, nome)
+
+        def close(self):
+            pass
+
+    cursor = conexao.cursor()
+    inicio = time.perf_counter()
+    for i in range(args.eventos):
+        cursor.execute(
+            "INSERT INTO log_atividade (usuario, acao, entidade, entidade_id, detalhe, status) "
+            "VALUES (%s, %s, %s, %s, %s, %s) RETURNING id, data_hora",
+            ("benchmark", "visualizar", "aluno", str(i), None, "concluído"),
+        )
+        cursor.fetchone()
+    t_sincrono = time.perf_counter() - inicio
+
+    gravador = GravadorLogAtividade(lambda: _SemFechar())
+    inicio = time.perf_counter()
+    for i in range(args.eventos):
+        gravador.registrar("benchmark", "visualizar", "aluno", i)
+    t_registro = time.perf_counter() - inicio
+    gravador.descarregar(timeout=60)
+    t_total = time.perf_counter() - inicio
+    gravador.fechar()
+
+    cursor.execute("DELETE FROM log_atividade WHERE usuario = 'benchmark'")
+    print(f"{args.eventos} eventos | INSERT por evento {t_sincrono * 1000:8.1f} ms"
+          f" | registrar() {t_registro * 1000:8.1f} ms (gravados em {t_total * 1000:.1f} ms,"
+          f" {gravador.stats['lotes']} lotes)")
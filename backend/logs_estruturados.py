@@ -0,0 +1,265 @@
+"""
+Logs estruturados da API
+Substitui o logging.basicConfig(level=DEBUG) e os print() espalhados pelos
+endpoints. Os registros:
+    - são enfileirados no thread da requisição (QueueHandler) e escritos na
+      saída por um thread separado (QueueListener), de modo que a E/S do
+      stdout não fica no caminho da requisição;
+    - levam o id da requisição (cabeçalho X-Request-ID, recebido ou gerado),
+      para correlacionar tudo o que uma requisição registrou;
+    - são emitidos em JSON (uma linha por registro) ou em texto;
+    - no nível DEBUG, são amostrados por requisição: apenas uma fração das
+      requisições registra seus eventos de depuração, mas registra todos.
+
+Os níveis podem ser ajustados por módulo. Em produção o padrão é INFO: as
+chamadas logger.debug() são descartadas logo na verificação de nível. Por isso
+os registros de depuração usam argumentos (logger.debug("... %s", valor)) e
+não f-strings, que seriam montadas mesmo quando o registro é descartado.
+
+Variáveis de ambiente:
+    LOG_NIVEL           nível padrão (INFO em produção, DEBUG fora dela)
+    LOG_NIVEIS          níveis por módulo, ex.: "simplified_api=DEBUG,cache_referencia=WARNING"
+    LOG_FORMATO         "json" ou "texto" (json em produção, texto fora dela)
+    LOG_AMOSTRA_DEBUG   fração das requisições com DEBUG registrado (0.05 em produção, 1 fora dela)
+
+Uso como script (custo por chamada):
+    python logs_estruturados.py --chamadas 100000
+"""
+import os
+import re
+import sys
+import json
+import uuid
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+# Cabeçalho com o id da requisição (aceito na entrada e devolvido na resposta)
+CABECALHO_ID_REQUISICAO = "X-Request-ID"
+
+# Módulos de terceiros que só interessam a partir de WARNING
+NIVEIS_PADRAO = {
+    "asyncio": "WARNING",
+    "httpx": "WARNING",
+    "httpcore": "WARNING",
+    "multipart": "WARNING",
+}
+
+_ID_VALIDO = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Estado da requisição atual: (id, debug_amostrado)
+_requisicao_atual = ContextVar("requisicao_atual", default=None)
+
+# Atributos próprios do LogRecord (o resto veio de extra=...)
+_ATRIBUTOS_PADRAO = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "id_requisicao"}
+
+_listener = None
+
+
+def id_requisicao_atual():
+    """Id da requisição em andamento, ou None fora de uma requisição."""
+    atual = _requisicao_atual.get()
+    return atual[0] if atual else None
+
+
+class FiltroRequisicao(logging.Filter):
+    """
+    Anota o id da requisição e descarta o DEBUG das requisições não amostradas.
+
+    Roda no thread da requisição (antes da fila), onde o contexto está disponível.
+    """
+
+    def filter(self, record):
+        atual = _requisicao_atual.get()
+        if atual is None:
+            record.id_requisicao = "-"
+            return True
+        record.id_requisicao = atual[0]
+        return record.levelno >= logging.INFO or atual[1]
+
+
+class FilaHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que monta a mensagem e o traceback antes de enfileirar.
+
+    A mensagem precisa ser montada no thread de origem (os argumentos podem
+    mudar depois), mas a formatação final (JSON, data) fica para o listener.
+    """
+
+    def prepare(self, record):
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+class FormatadorJSON(logging.Formatter):
+    """Um objeto JSON por linha, com os campos de extra=... incluídos."""
+
+    def format(self, record):
+        dados = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "id_requisicao": getattr(record, "id_requisicao", "-"),
+        }
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_PADRAO:
+                dados[chave] = valor
+        if record.exc_text:
+            dados["excecao"] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+def _nivel(valor, padrao=logging.INFO):
+    nivel = logging.getLevelName(str(valor).strip().upper())
+    return nivel if isinstance(nivel, int) else padrao
+
+
+def _niveis_por_modulo(texto):
+    niveis = dict(NIVEIS_PADRAO)
+    for item in (texto or "").split(","):
+        if "=" in item:
+            modulo, nivel = item.split("=", 1)
+            niveis[modulo.strip()] = nivel.strip()
+    return niveis
+
+
+def configurar_logs(producao=False):
+    """
+    Configura o logging do processo (uma única vez).
+
+    O logger raiz recebe apenas o FilaHandler; a escrita no stdout é feita pelo
+    QueueListener. Os loggers do uvicorn passam a usar a mesma fila.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    nivel = _nivel(os.environ.get("LOG_NIVEL", "INFO" if producao else "DEBUG"))
+    formato = os.environ.get("LOG_FORMATO", "json" if producao else "texto").lower()
+
+    saida = logging.StreamHandler(sys.stdout)
+    if formato == "json":
+        saida.setFormatter(FormatadorJSON())
+    else:
+        saida.setFormatter(logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - [%(id_requisicao)s] %(message)s"
+        ))
+
+    fila = queue.SimpleQueue()
+    handler = FilaHandler(fila)
+    handler.addFilter(FiltroRequisicao())
+
+    raiz = logging.getLogger()
+    for antigo in raiz.handlers[:]:
+        raiz.removeHandler(antigo)
+    raiz.addHandler(handler)
+    raiz.setLevel(nivel)
+
+    for modulo, nivel_modulo in _niveis_por_modulo(os.environ.get("LOG_NIVEIS")).items():
+        logging.getLogger(modulo).setLevel(_nivel(nivel_modulo))
+
+    # O uvicorn configura handlers próprios (escrita síncrona); passam a propagar para a fila
+    for nome in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logger_uvicorn = logging.getLogger(nome)
+        logger_uvicorn.handlers = []
+        logger_uvicorn.propagate = True
+
+    _listener = logging.handlers.QueueListener(fila, saida)
+    _listener.start()
+    atexit.register(parar_logs)
+    return _listener
+
+
+def parar_logs():
+    """Esvazia a fila e encerra o thread de escrita."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class IdRequisicaoMiddleware:
+    """
+    Middleware ASGI que define o id da requisição e a amostragem de DEBUG.
+
+    Um X-Request-ID válido recebido do cliente (ou do proxy) é reaproveitado;
+    caso contrário um novo id é gerado. O id volta no cabeçalho da resposta.
+    """
+
+    def __init__(self, app, amostra_debug=None, producao=False):
+        self.app = app
+        if amostra_debug is None:
+            amostra_debug = float(os.environ.get("LOG_AMOSTRA_DEBUG", "0.05" if producao else "1"))
+        self.amostra_debug = amostra_debug
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        recebido = None
+        for nome, valor in scope["headers"]:
+            if nome == b"x-request-id":
+                recebido = valor.decode("latin-1")
+                break
+        id_requisicao = recebido if recebido and _ID_VALIDO.match(recebido) else uuid.uuid4().hex[:16]
+        amostrado = self.amostra_debug >= 1 or random.random() < self.amostra_debug
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                cabecalhos = list(mensagem.get("headers", []))
+                cabecalhos.append((b"x-request-id", id_requisicao.encode()))
+                mensagem = {**mensagem, "headers": cabecalhos}
+            await send(mensagem)
+
+        token = _requisicao_atual.set((id_requisicao, amostrado))
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _requisicao_atual.reset(token)
+
+
+if __name__ == "__main__":
+    # Custo por chamada, no thread de origem: print() contra logger.debug()
+    # descartado pelo nível e logger.info() enfileirado
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Custo das chamadas de log")
+    parser.add_argument("--chamadas", type=int, default=100000)
+    args = parser.parse_args()
+
+    linha = {"id": 1, "id_aluno": "ALU00001", "nome_aluno": "Aluno 1", "id_turma": "1A"}
+
+    def medir(funcao):
+        inicio = time.perf_counter()
+        for _ in range(args.chamadas):
+            funcao()
+        return (time.perf_counter() - inicio) / args.chamadas * 1e6
+
+    with open(os.devnull, "w") as nulo:
+        saida_original, sys.stdout = sys.stdout, nulo
+        try:
+            t_print = medir(lambda: print(f"Processando aluno: {linha}"))
+            os.environ.setdefault("LOG_NIVEL", "INFO")
+            configurar_logs(producao=True)
+            logger = logging.getLogger("benchmark")
+            t_debug = medir(lambda: logger.debug("Processando aluno: %s", linha))
+            t_info = medir(lambda: logger.info("Processando aluno: %s", linha))
+            parar_logs()
+        finally:
+            sys.stdout = saida_original
+
+    print(f"print() (para /dev/null):    {t_print:6.2f} µs/chamada")
+    print(f"logger.debug() descartado:   {t_debug:6.2f} µs/chamada")
+    print(f"logger.info() enfileirado:   {t_info:6.2f} µs/chamada")
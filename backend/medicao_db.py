@@ -0,0 +1,162 @@
+"""
+Medição das consultas ao banco
+As conexões do pool são abertas com ConexaoMedida (connection_factory do
+psycopg2): todo cursor criado por elas, qualquer que seja o cursor_factory
+(DictCursor, RealDictCursor, cursores nomeados), cronometra execute() e
+executemany() e avisa os observadores registrados com observar(). Assim
+execute_query(), os endpoints que abrem cursores diretamente e os módulos
+auxiliares (execute_values, motor_medias, cache_referencia) são medidos sem
+alterar as chamadas.
+
+Os observadores recebem (sql, duracao_em_segundos) no thread que executou a
+consulta e devem ser rápidos; uma exceção em um observador é registrada e
+não interrompe a consulta.
+
+impressao_digital() reduz uma consulta à sua forma (literais e parâmetros
+trocados por ?, listas de valores recolhidas), para agrupar as execuções do
+mesmo comando.
+
+Uso como script (custo por execute(), sem banco):
+    python medicao_db.py --execucoes 100000
+"""
+import re
+import time
+import hashlib
+import logging
+import functools
+
+import psycopg2.extensions
+
+logger = logging.getLogger(__name__)
+
+_observadores = []
+
+# Classes de cursor medidas, por cursor_factory original
+_classes_medidas = {}
+
+_COMENTARIOS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_TEXTOS = re.compile(r"'(?:[^']|'')*'")
+_PARAMETROS = re.compile(r"%\(\w+\)s|%s")
+_NUMEROS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+_IN = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.I)
+_ESPACOS = re.compile(r"\s+")
+
+
+def observar(funcao):
+    """Registra funcao(sql, duracao) para ser chamada após cada consulta."""
+    _observadores.append(funcao)
+    return funcao
+
+
+def _notificar(sql, duracao):
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    elif not isinstance(sql, str):
+        # psycopg2.sql.Composed: a forma da consulta não depende da conexão
+        sql = repr(sql)
+    for funcao in _observadores:
+        try:
+            funcao(sql, duracao)
+        except Exception:
+            logger.exception("Erro no observador de consultas")
+
+
+@functools.lru_cache(maxsize=2048)
+def normalizar(sql):
+    """Texto da consulta sem comentários, literais ou parâmetros, em uma linha."""
+    texto = _COMENTARIOS.sub(" ", sql)
+    texto = _TEXTOS.sub("?", texto)
+    texto = _PARAMETROS.sub("?", texto)
+    texto = _NUMEROS.sub("?", texto)
+    texto = _ESPACOS.sub(" ", texto).strip()
+    # VALUES (?, ?), (?, ?) ... e IN (?, ?, ...) têm a mesma forma com qualquer quantidade
+    texto = _LISTAS.sub(lambda m: m.group(0)[:m.group(0).index(")") + 1] + ", ...", texto)
+    return _IN.sub("IN (?, ...)", texto)
+
+
+@functools.lru_cache(maxsize=2048)
+def impressao_digital(sql):
+    """Identificador curto da forma da consulta (ver normalizar())."""
+    return hashlib.sha1(normalizar(sql).encode()).hexdigest()[:12]
+
+
+class _CursorMedido:
+    """Mistura que cronometra execute() e executemany() do cursor original."""
+
+    def execute(self, query, vars=None):
+        inicio = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            _notificar(query, time.perf_counter() - inicio)
+
+    def executemany(self, query, vars_list):
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            _notificar(query, time.perf_counter() - inicio)
+
+
+def _cursor_medido(fabrica):
+    classe = _classes_medidas.get(fabrica)
+    if classe is None:
+        classe = type(f"{fabrica.__name__}Medido", (_CursorMedido, fabrica), {})
+        _classes_medidas[fabrica] = classe
+    return classe
+
+
+class ConexaoMedida(psycopg2.extensions.connection):
+    """
+    Conexão psycopg2 cujos cursores são medidos.
+
+    Uso:
+        psycopg2.connect(**DB_PARAMS, connection_factory=ConexaoMedida)
+    """
+
+    def cursor(self, *args, **kwargs):
+        if len(args) > 1:
+            # cursor(name, cursor_factory, ...)
+            args = (args[0], _cursor_medido(args[1] or self.cursor_factory or psycopg2.extensions.cursor)) + args[2:]
+        else:
+            fabrica = kwargs.get("cursor_factory") or self.cursor_factory or psycopg2.extensions.cursor
+            kwargs["cursor_factory"] = _cursor_medido(fabrica)
+        return super().cursor(*args, **kwargs)
+
+
+if __name__ == "__main__":
+    # Custo da medição por execute(), sem banco: o cursor original contra o
+    # medido, com um observador que apenas soma as durações
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Custo da medição das consultas")
+    parser.add_argument("--execucoes", type=int, default=100000)
+    args = parser.parse_args()
+
+    class _Cursor:
+        def execute(self, query, vars=None):
+            return None
+
+    total = [0.0]
+    observar(lambda sql, duracao: total.__setitem__(0, total[0] + duracao))
+    medido = type("CursorMedido", (_CursorMedido, _Cursor), {})()
+    original = _Cursor()
+    consulta = "SELECT * FROM aluno WHERE id_turma = %s ORDER BY nome_aluno"
+
+    def medir(cursor):
+        inicio = time.perf_counter()
+        for _ in range(args.execucoes):
+            cursor.execute(consulta, ("1A",))
+        return (time.perf_counter() - inicio) / args.execucoes * 1e6
+
+    t_original = medir(original)
+    t_medido = medir(medido)
+    inicio = time.perf_counter()
+    for _ in range(args.execucoes):
+        impressao_digital(consulta)
+    t_digital = (time.perf_counter() - inicio) / args.execucoes * 1e6
+
+    print(f"execute() original:            {t_original:6.2f} µs/chamada")
+    print(f"execute() medido:              {t_medido:6.2f} µs/chamada")
+    print(f"impressao_digital() (em cache): {t_digital:6.2f} µs/chamada")
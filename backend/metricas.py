@@ -0,0 +1,394 @@
+"""
+Métricas da API no formato texto do Prometheus (GET /metrics)
+Sem dependência do prometheus_client: os histogramas e contadores são mantidos
+em memória, por worker, e o texto é montado apenas quando /metrics é lido.
+
+Por requisição (MetricasMiddleware, rotulada pelo modelo da rota, ex.:
+/api/alunos/{aluno_id}, para não criar uma série por id):
+    gestao_http_requisicoes_total{metodo, rota, status}
+    gestao_http_duracao_segundos{metodo, rota}              histograma
+    gestao_http_resposta_bytes{metodo, rota}                histograma
+    gestao_http_requisicoes_em_andamento
+    gestao_http_consultas_por_requisicao{metodo, rota}      histograma
+    gestao_http_tempo_banco_segundos{metodo, rota}          histograma
+
+Por consulta (registrar_consulta, observador de medicao_db.py):
+    gestao_db_consultas_total, gestao_db_consultas_segundos_total
+    gestao_db_consulta_*{consulta, sql}   as METRICAS_TOP_CONSULTAS formas de
+                                          consulta com mais tempo acumulado
+                                          (execuções, soma e máximo); uma forma
+                                          exposta uma vez continua exposta
+
+Fontes adicionais (fonte()): os valores numéricos de status() do pool de
+conexões e dos caches, como gestao_<fonte>_<chave>.
+
+Com vários workers, cada processo tem as suas métricas; o Prometheus deve
+coletar cada worker (ou somar as séries pelo rótulo instance).
+
+Variáveis de ambiente:
+    METRICAS_MAX_CONSULTAS   formas de consulta distintas acompanhadas (padrão 500;
+                             as seguintes são somadas em "outras")
+    METRICAS_TOP_CONSULTAS   formas de consulta que passam a ser expostas em /metrics,
+                             as de mais tempo acumulado a cada coleta (padrão 20)
+
+Uso como script (custo por requisição e por consulta):
+    python metricas.py --requisicoes 100000
+"""
+import os
+import time
+import bisect
+import logging
+import threading
+from contextvars import ContextVar
+
+from starlette.routing import Match
+
+from medicao_db import impressao_digital, normalizar
+
+logger = logging.getLogger(__name__)
+
+# Response acrescenta "; charset=utf-8"
+CONTENT_TYPE_METRICAS = "text/plain; version=0.0.4"
+
+BUCKETS_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+BUCKETS_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# Rótulo das requisições que não corresponderam a nenhuma rota
+ROTA_DESCONHECIDA = "(sem rota)"
+
+# Forma de consulta que soma as execuções além de METRICAS_MAX_CONSULTAS
+CONSULTA_OUTRAS = "outras"
+
+# Consultas da requisição em andamento: [quantidade, segundos]
+_consultas_requisicao = ContextVar("consultas_requisicao", default=None)
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _rotulos(nomes, valores, extra=""):
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _numero(valor):
+    if isinstance(valor, float):
+        return repr(valor) if valor == valor and valor not in (float("inf"), float("-inf")) else "NaN"
+    return str(valor)
+
+
+class Histograma:
+    """Histograma com buckets fixos, uma série por combinação de rótulos."""
+
+    def __init__(self, nome, ajuda, buckets, rotulos=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.buckets = tuple(buckets)
+        self.rotulos = tuple(rotulos)
+        self.limites = [f'le="{_numero(float(limite))}"' for limite in self.buckets] + ['le="+Inf"']
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valores, valor):
+        # Contagens não cumulativas; a soma cumulativa (le=...) é feita em linhas()
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def linhas(self):
+        with self._lock:
+            series = [(valores, list(contagens), soma) for valores, (contagens, soma) in self._series.items()]
+        yield f"# HELP {self.nome} {self.ajuda}"
+        yield f"# TYPE {self.nome} histogram"
+        for valores, contagens, soma in sorted(series):
+            acumulado = 0
+            for limite, contagem in zip(self.limites, contagens):
+                acumulado += contagem
+                yield f"{self.nome}_bucket{_rotulos(self.rotulos, valores, limite)} {acumulado}"
+            yield f"{self.nome}_sum{_rotulos(self.rotulos, valores)} {_numero(soma)}"
+            yield f"{self.nome}_count{_rotulos(self.rotulos, valores)} {acumulado}"
+
+
+class Contador:
+    """Contador (ou gauge, com tipo="gauge") por combinação de rótulos."""
+
+    def __init__(self, nome, ajuda, rotulos=(), tipo="counter"):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.tipo = tipo
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def somar(self, valores=(), quantidade=1):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + quantidade
+
+    def linhas(self):
+        with self._lock:
+            valores = sorted(self._valores.items())
+        yield f"# HELP {self.nome} {self.ajuda}"
+        yield f"# TYPE {self.nome} {self.tipo}"
+        for rotulos, valor in valores:
+            yield f"{self.nome}{_rotulos(self.rotulos, rotulos)} {_numero(valor)}"
+
+
+class EstatisticasConsultas:
+    """
+    Execuções, tempo total e tempo máximo por forma de consulta.
+
+    Acompanha até max_formas formas distintas; as execuções das demais são
+    somadas em CONSULTA_OUTRAS, para que a memória não cresça com consultas
+    montadas com literais.
+    """
+
+    def __init__(self, max_formas=None):
+        self.max_formas = max_formas or int(os.environ.get("METRICAS_MAX_CONSULTAS", "500"))
+        self._formas = {}
+        self._lock = threading.Lock()
+        self.total = 0
+        self.segundos = 0.0
+
+    def registrar(self, sql, duracao):
+        chave = impressao_digital(sql)
+        with self._lock:
+            self.total += 1
+            self.segundos += duracao
+            forma = self._formas.get(chave)
+            if forma is None and len(self._formas) >= self.max_formas:
+                chave, sql = CONSULTA_OUTRAS, None
+                forma = self._formas.get(chave)
+            if forma is None:
+                # [texto normalizado, execuções, soma, máximo]
+                texto = normalizar(sql) if sql is not None else CONSULTA_OUTRAS
+                forma = self._formas[chave] = [texto, 0, 0.0, 0.0]
+            forma[1] += 1
+            forma[2] += duracao
+            if duracao > forma[3]:
+                forma[3] = duracao
+
+    def mais_custosas(self, quantidade, incluir=()):
+        """
+        As formas com mais tempo acumulado, mais as de chave em incluir:
+        [(chave, sql, execuções, soma, máximo)], da mais custosa.
+        """
+        with self._lock:
+            formas = [(chave, *forma) for chave, forma in self._formas.items()]
+        formas.sort(key=lambda forma: forma[3], reverse=True)
+        return formas[:quantidade] + [forma for forma in formas[quantidade:] if forma[0] in incluir]
+
+
+class Metricas:
+    """
+    Registro das métricas de um worker.
+
+    Uso:
+        metricas = Metricas()
+        medicao_db.observar(metricas.registrar_consulta)
+        app.add_middleware(MetricasMiddleware, metricas=metricas)
+        metricas.fonte("db_pool", db_pool.status)
+        metricas.texto()        # corpo de GET /metrics
+    """
+
+    def __init__(self, top_consultas=None, max_consultas=None):
+        self.top_consultas = top_consultas or int(os.environ.get("METRICAS_TOP_CONSULTAS", "20"))
+        rotulos = ("metodo", "rota")
+        self.requisicoes = Contador(
+            "gestao_http_requisicoes_total", "Requisições HTTP concluídas.", rotulos + ("status",))
+        self.duracao = Histograma(
+            "gestao_http_duracao_segundos", "Duração das requisições HTTP, até o último byte da resposta.",
+            BUCKETS_DURACAO, rotulos)
+        self.tamanho = Histograma(
+            "gestao_http_resposta_bytes", "Tamanho do corpo das respostas HTTP (após a compressão).",
+            BUCKETS_BYTES, rotulos)
+        self.consultas_requisicao = Histograma(
+            "gestao_http_consultas_por_requisicao", "Consultas ao banco executadas por requisição.",
+            BUCKETS_CONSULTAS, rotulos)
+        self.tempo_banco = Histograma(
+            "gestao_http_tempo_banco_segundos", "Tempo gasto em consultas ao banco por requisição.",
+            BUCKETS_DURACAO, rotulos)
+        self.em_andamento = 0
+        self.consultas = EstatisticasConsultas(max_consultas)
+        # Formas já expostas em /metrics: continuam sendo expostas mesmo fora
+        # das mais custosas, para que a série não some entre duas coletas (o
+        # Prometheus veria o contador reaparecer como um reinício)
+        self._consultas_expostas = set()
+        self._fontes = []
+
+    def fonte(self, nome, status):
+        """Expõe os valores numéricos de status() (dicionário) como gestao_<nome>_<chave>."""
+        self._fontes.append((nome, status))
+
+    def registrar_consulta(self, sql, duracao):
+        """Observador de medicao_db: soma a consulta à forma e à requisição em andamento."""
+        self.consultas.registrar(sql, duracao)
+        atual = _consultas_requisicao.get()
+        if atual is not None:
+            atual[0] += 1
+            atual[1] += duracao
+
+    def registrar_requisicao(self, metodo, rota, status, duracao, tamanho, consultas, tempo_banco):
+        rotulos = (metodo, rota)
+        self.requisicoes.somar(rotulos + (str(status),))
+        self.duracao.observar(rotulos, duracao)
+        self.tamanho.observar(rotulos, tamanho)
+        self.consultas_requisicao.observar(rotulos, consultas)
+        self.tempo_banco.observar(rotulos, tempo_banco)
+
+    def _linhas_consultas(self):
+        yield "# HELP gestao_db_consultas_total Consultas executadas no banco."
+        yield "# TYPE gestao_db_consultas_total counter"
+        yield f"gestao_db_consultas_total {self.consultas.total}"
+        yield "# HELP gestao_db_consultas_segundos_total Tempo total das consultas ao banco."
+        yield "# TYPE gestao_db_consultas_segundos_total counter"
+        yield f"gestao_db_consultas_segundos_total {_numero(self.consultas.segundos)}"
+
+        formas = self.consultas.mais_custosas(self.top_consultas, self._consultas_expostas)
+        self._consultas_expostas.update(forma[0] for forma in formas)
+        rotulos = ("consulta", "sql")
+        for sufixo, tipo, ajuda, posicao in (
+            ("execucoes_total", "counter", "Execuções da forma de consulta.", 2),
+            ("segundos_total", "counter", "Tempo total da forma de consulta.", 3),
+            ("maximo_segundos", "gauge", "Execução mais lenta da forma de consulta.", 4),
+        ):
+            nome = f"gestao_db_consulta_{sufixo}"
+            yield (f"# HELP {nome} {ajuda} As {self.top_consultas} formas com mais tempo acumulado"
+                   " e as que já foram expostas.")
+            yield f"# TYPE {nome} {tipo}"
+            for forma in formas:
+                yield f"{nome}{_rotulos(rotulos, (forma[0], forma[1][:300]))} {_numero(forma[posicao])}"
+
+    def _linhas_fontes(self):
+        for nome, status in self._fontes:
+            try:
+                valores = status()
+            except Exception as e:
+                logger.warning(f"Métricas de {nome} indisponíveis: {e}")
+                continue
+            for chave, valor in _achatar(valores):
+                metrica = f"gestao_{nome}_{chave}"
+                yield f"# TYPE {metrica} untyped"
+                yield f"{metrica} {_numero(valor)}"
+
+    def texto(self):
+        """Corpo da resposta de GET /metrics."""
+        linhas = [
+            "# HELP gestao_http_requisicoes_em_andamento Requisições HTTP em andamento.",
+            "# TYPE gestao_http_requisicoes_em_andamento gauge",
+            f"gestao_http_requisicoes_em_andamento {self.em_andamento}",
+        ]
+        for metrica in (self.requisicoes, self.duracao, self.tamanho, self.consultas_requisicao, self.tempo_banco):
+            linhas.extend(metrica.linhas())
+        linhas.extend(self._linhas_consultas())
+        linhas.extend(self._linhas_fontes())
+        return "\n".join(linhas) + "\n"
+
+
+def _achatar(valores, prefixo=""):
+    """Pares (chave, número) de um status() com dicionários aninhados."""
+    for chave, valor in valores.items():
+        nome = f"{prefixo}{chave}".replace("-", "_").replace(".", "_")
+        if isinstance(valor, dict):
+            yield from _achatar(valor, f"{nome}_")
+        elif isinstance(valor, bool):
+            yield nome, int(valor)
+        elif isinstance(valor, (int, float)):
+            yield nome, valor
+
+
+def _rota(scope, status):
+    """Modelo da rota (definido pelo roteador em scope["route"]) ou ROTA_DESCONHECIDA."""
+    rota = scope.get("route")
+    if rota is None and status != 404 and "app" in scope:
+        # Respostas dadas por um middleware antes do roteamento (ex.: 304 do ETag)
+        for candidata in getattr(scope["app"].router, "routes", ()):
+            if candidata.matches(scope)[0] == Match.FULL:
+                rota = candidata
+                break
+    return getattr(rota, "path", ROTA_DESCONHECIDA)
+
+
+class MetricasMiddleware:
+    """
+    Middleware ASGI que mede as requisições HTTP.
+
+    Deve ficar por fora da compressão (para medir o tamanho transmitido) e
+    do empréstimo de conexão do pool (para contar todas as consultas).
+    Os caminhos em ignorar (o próprio /metrics) não são medidos.
+    """
+
+    def __init__(self, app, metricas, ignorar=("/metrics",)):
+        self.app = app
+        self.metricas = metricas
+        self.ignorar = frozenset(ignorar)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.ignorar:
+            await self.app(scope, receive, send)
+            return
+
+        metricas = self.metricas
+        resposta = {"status": 500, "bytes": 0}
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                resposta["status"] = mensagem["status"]
+            elif mensagem["type"] == "http.response.body":
+                resposta["bytes"] += len(mensagem.get("body", b""))
+            await send(mensagem)
+
+        consultas = [0, 0.0]
+        token = _consultas_requisicao.set(consultas)
+        metricas.em_andamento += 1
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracao = time.perf_counter() - inicio
+            metricas.em_andamento -= 1
+            _consultas_requisicao.reset(token)
+            metricas.registrar_requisicao(
+                scope["method"], _rota(scope, resposta["status"]), resposta["status"],
+                duracao, resposta["bytes"], consultas[0], consultas[1],
+            )
+
+
+if __name__ == "__main__":
+    # Custo das métricas por requisição (cinco séries atualizadas) e por
+    # consulta (forma e requisição em andamento), e da montagem de /metrics
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Custo das métricas")
+    parser.add_argument("--requisicoes", type=int, default=100000)
+    args = parser.parse_args()
+
+    metricas = Metricas()
+    rotas = [f"/api/rota{i}/{{id}}" for i in range(50)]
+    consultas = [f"SELECT * FROM tabela{i} WHERE id = %s" for i in range(100)]
+
+    inicio = time.perf_counter()
+    for i in range(args.requisicoes):
+        metricas.registrar_requisicao("GET", rotas[i % 50], 200, 0.012, 5300, 3, 0.004)
+    t_requisicao = (time.perf_counter() - inicio) / args.requisicoes * 1e6
+
+    _consultas_requisicao.set([0, 0.0])
+    inicio = time.perf_counter()
+    for i in range(args.requisicoes):
+        metricas.registrar_consulta(consultas[i % 100], 0.0013)
+    t_consulta = (time.perf_counter() - inicio) / args.requisicoes * 1e6
+
+    inicio = time.perf_counter()
+    corpo = metricas.texto()
+    t_texto = (time.perf_counter() - inicio) * 1000
+
+    print(f"registrar_requisicao(): {t_requisicao:6.2f} µs/requisição")
+    print(f"registrar_consulta():   {t_consulta:6.2f} µs/consulta")
+    print(f"texto():                {t_texto:6.2f} ms ({len(corpo.splitlines())} linhas, {len(rotas)} rotas)")
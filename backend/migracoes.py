@@ -0,0 +1,212 @@
+"""
+Migrações versionadas do esquema
+As alterações de esquema ficam em migracoes/NNNN_nome.sql e são aplicadas uma
+única vez, em ordem, no deploy (python migracoes.py --aplicar, antes de subir a
+API). Cada migração aplicada é registrada em schema_migracoes com o checksum do
+arquivo, e a API não executa mais DDL nem consultas ao catálogo durante as
+requisições: na inicialização, verificar() apenas compara os registros com
+os arquivos.
+
+    - Cada migração roda em sua própria transação, junto com o registro em
+      schema_migracoes: ou é aplicada por inteiro, ou não é aplicada.
+    - Um advisory lock serializa a aplicação: com várias instâncias subindo ao
+      mesmo tempo, a primeira aplica e as demais esperam e encontram tudo aplicado.
+    - Um arquivo já aplicado não deve ser editado (o checksum deixa de conferir e
+      a aplicação é recusada); alterações novas vão em um novo arquivo, com o
+      próximo número. Os scripts gerados (python paginacao.py --sql etc.) são
+      idempotentes e podem ser gerados de novo como uma nova migração.
+
+As migrações partem do esquema base (aluno, turma, disciplina, professor, nota,
+escolas), criado pelos scripts de criação do banco.
+
+Uso como script (conexão pelas variáveis DB_*):
+    python migracoes.py --status
+    python migracoes.py --aplicar
+
+Variáveis de ambiente:
+    MIGRACOES_AO_INICIAR  "verificar" (padrão) ou "aplicar": o que a API faz ao iniciar
+"""
+import os
+import re
+import time
+import hashlib
+import logging
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migracoes")
+
+# Chave do advisory lock que serializa a aplicação das migrações
+CHAVE_LOCK = "schema_migracoes"
+
+_NOME_ARQUIVO = re.compile(r"^(\d{4})_([a-z0-9_]+)\.sql$")
+
+SQL_TABELA = """
+    CREATE TABLE IF NOT EXISTS schema_migracoes (
+        versao VARCHAR(10) PRIMARY KEY,
+        nome VARCHAR(100) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        aplicada_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        duracao_ms INTEGER
+    )
+"""
+
+Migracao = namedtuple("Migracao", "versao nome arquivo checksum sql")
+
+
+class MigracaoAlterada(RuntimeError):
+    """Arquivo de uma migração já aplicada foi modificado."""
+
+
+def carregar_migracoes(diretorio=DIRETORIO):
+    """Lê os arquivos de migração do diretório, em ordem de versão."""
+    migracoes = []
+    for arquivo in sorted(os.listdir(diretorio)):
+        if not arquivo.endswith(".sql"):
+            continue
+        encontrado = _NOME_ARQUIVO.match(arquivo)
+        if not encontrado:
+            raise ValueError(f"Nome de migração inválido: {arquivo} (esperado NNNN_nome.sql)")
+        with open(os.path.join(diretorio, arquivo), encoding="utf-8") as f:
+            sql = f.read().replace("\r\n", "\n")
+        migracoes.append(Migracao(
+            versao=encontrado.group(1),
+            nome=encontrado.group(2),
+            arquivo=arquivo,
+            checksum=hashlib.sha256(sql.encode("utf-8")).hexdigest(),
+            sql=sql,
+        ))
+    versoes = [migracao.versao for migracao in migracoes]
+    if len(set(versoes)) != len(versoes):
+        raise ValueError("Há duas migrações com o mesmo número")
+    return migracoes
+
+
+def _aplicadas(cursor):
+    cursor.execute("SELECT to_regclass('schema_migracoes') IS NOT NULL")
+    if not cursor.fetchone()[0]:
+        return {}
+    cursor.execute("SELECT versao, checksum FROM schema_migracoes")
+    return dict(cursor.fetchall())
+
+
+def verificar(conn, migracoes=None):
+    """
+    Compara as migrações do diretório com as registradas no banco.
+
+    Returns:
+        dict: listas de versões aplicadas, pendentes, alteradas (checksum
+            diferente) e desconhecidas (no banco, mas sem arquivo)
+    """
+    if migracoes is None:
+        migracoes = carregar_migracoes()
+    cursor = conn.cursor()
+    try:
+        aplicadas = _aplicadas(cursor)
+    finally:
+        cursor.close()
+
+    arquivos = {migracao.versao: migracao for migracao in migracoes}
+    return {
+        "aplicadas": [versao for versao in arquivos if versao in aplicadas],
+        "pendentes": [migracao.arquivo for migracao in migracoes if migracao.versao not in aplicadas],
+        "alteradas": [migracao.arquivo for migracao in migracoes
+                      if migracao.versao in aplicadas and aplicadas[migracao.versao] != migracao.checksum],
+        "desconhecidas": sorted(versao for versao in aplicadas if versao not in arquivos),
+    }
+
+
+def aplicar_pendentes(conn, migracoes=None):
+    """
+    Aplica as migrações pendentes, em ordem, sob o advisory lock.
+
+    Raises:
+        MigracaoAlterada: se uma migração já aplicada teve o arquivo modificado
+
+    Returns:
+        list: arquivos das migrações aplicadas
+    """
+    if migracoes is None:
+        migracoes = carregar_migracoes()
+
+    autocommit = conn.autocommit
+    conn.autocommit = True
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_advisory_lock(hashtext(%s))", (CHAVE_LOCK,))
+    aplicadas_agora = []
+    try:
+        cursor.execute(SQL_TABELA)
+        # Lido depois do lock: outra instância pode ter acabado de aplicar
+        aplicadas = _aplicadas(cursor)
+        alteradas = [migracao.arquivo for migracao in migracoes
+                     if migracao.versao in aplicadas and aplicadas[migracao.versao] != migracao.checksum]
+        if alteradas:
+            raise MigracaoAlterada(
+                f"Migrações já aplicadas foram modificadas: {', '.join(alteradas)}. "
+                f"Crie uma nova migração em vez de editar as existentes."
+            )
+
+        conn.autocommit = False
+        for migracao in migracoes:
+            if migracao.versao in aplicadas:
+                continue
+            logger.info(f"Aplicando migração {migracao.arquivo}")
+            inicio = time.perf_counter()
+            try:
+                cursor.execute(migracao.sql)
+                cursor.execute(
+                    "INSERT INTO schema_migracoes (versao, nome, checksum, duracao_ms) VALUES (%s, %s, %s, %s)",
+                    (migracao.versao, migracao.nome, migracao.checksum,
+                     int((time.perf_counter() - inicio) * 1000)),
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                logger.error(f"Migração {migracao.arquivo} falhou; nenhuma alteração dela foi mantida")
+                raise
+            aplicadas_agora.append(migracao.arquivo)
+    finally:
+        conn.autocommit = True
+        cursor.execute("SELECT pg_advisory_unlock(hashtext(%s))", (CHAVE_LOCK,))
+        cursor.close()
+        conn.autocommit = autocommit
+
+    if aplicadas_agora:
+        logger.info(f"{len(aplicadas_agora)} migrações aplicadas: {', '.join(aplicadas_agora)}")
+    return aplicadas_agora
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+    import psycopg2
+
+    parser = argparse.ArgumentParser(description="Migrações do esquema")
+    parser.add_argument("--status", action="store_true", help="mostra as migrações pendentes")
+    parser.add_argument("--aplicar", action="store_true", help="aplica as migrações pendentes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    params = {
+        "dbname": os.environ.get("DB_NAME", "gestao_escolar"),
+        "user": os.environ.get("DB_USER", "postgres"),
+        "password": os.environ.get("DB_PASSWORD", ""),
+        "host": os.environ.get("DB_HOST", "localhost"),
+        "port": os.environ.get("DB_PORT", "5432"),
+    }
+    if os.environ.get("PRODUCTION", "False") == "True":
+        params["sslmode"] = "require"
+    conexao = psycopg2.connect(**params)
+    try:
+        if args.aplicar:
+            aplicar_pendentes(conexao)
+        situacao = verificar(conexao)
+        for chave in ("pendentes", "alteradas", "desconhecidas"):
+            if situacao[chave]:
+                print(f"{chave}: {', '.join(situacao[chave])}")
+        print(f"{len(situacao['aplicadas'])} migrações aplicadas, {len(situacao['pendentes'])} pendentes")
+    finally:
+        conexao.close()
+    sys.exit(1 if situacao["pendentes"] or situacao["alteradas"] else 0)
@@ -0,0 +1,47 @@
+-- Tabela do calendário escolar (antes criada por criar_tabela_calendario()
+-- na importação da API e a cada requisição do calendário)
+
+DO $$
+BEGIN
+    IF to_regclass('calendario_escolar') IS NULL THEN
+        CREATE TABLE calendario_escolar (
+            id SERIAL PRIMARY KEY,
+            titulo VARCHAR(200) NOT NULL,
+            descricao TEXT,
+            data_inicio DATE NOT NULL,
+            data_fim DATE NOT NULL,
+            hora_inicio TIME,
+            hora_fim TIME,
+            tipo_evento VARCHAR(50) NOT NULL DEFAULT 'evento_escolar',
+            cor VARCHAR(7) DEFAULT '#3498db',
+            recorrente BOOLEAN DEFAULT FALSE,
+            frequencia_recorrencia VARCHAR(20),
+            observacoes TEXT,
+            criado_por VARCHAR(100) NOT NULL,
+            data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            ativo BOOLEAN DEFAULT TRUE,
+            CHECK (data_fim >= data_inicio),
+            CHECK (tipo_evento IN ('feriado_nacional', 'feriado_estadual', 'feriado_municipal', 'evento_escolar', 'reuniao', 'conselho_classe', 'formatura', 'festa_junina', 'semana_pedagogica', 'outro'))
+        );
+
+        COMMENT ON TABLE calendario_escolar IS 'Tabela que armazena os eventos do calendário escolar';
+
+        -- Eventos padrão (feriados nacionais principais), apenas na criação da tabela
+        INSERT INTO calendario_escolar (titulo, data_inicio, data_fim, tipo_evento, cor, criado_por, observacoes) VALUES
+        ('Confraternização Universal', '2024-01-01', '2024-01-01', 'feriado_nacional', '#e74c3c', 'Sistema', 'Feriado Nacional'),
+        ('Carnaval', '2024-02-12', '2024-02-13', 'feriado_nacional', '#9b59b6', 'Sistema', 'Feriado Nacional'),
+        ('Sexta-feira Santa', '2024-03-29', '2024-03-29', 'feriado_nacional', '#8b4513', 'Sistema', 'Feriado Nacional'),
+        ('Tiradentes', '2024-04-21', '2024-04-21', 'feriado_nacional', '#27ae60', 'Sistema', 'Feriado Nacional'),
+        ('Dia do Trabalhador', '2024-05-01', '2024-05-01', 'feriado_nacional', '#e67e22', 'Sistema', 'Feriado Nacional'),
+        ('Independência do Brasil', '2024-09-07', '2024-09-07', 'feriado_nacional', '#f1c40f', 'Sistema', 'Feriado Nacional'),
+        ('Nossa Senhora Aparecida', '2024-10-12', '2024-10-12', 'feriado_nacional', '#3498db', 'Sistema', 'Feriado Nacional'),
+        ('Finados', '2024-11-02', '2024-11-02', 'feriado_nacional', '#34495e', 'Sistema', 'Feriado Nacional'),
+        ('Proclamação da República', '2024-11-15', '2024-11-15', 'feriado_nacional', '#2ecc71', 'Sistema', 'Feriado Nacional'),
+        ('Natal', '2024-12-25', '2024-12-25', 'feriado_nacional', '#c0392b', 'Sistema', 'Feriado Nacional');
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_calendario_data_inicio ON calendario_escolar (data_inicio);
+CREATE INDEX IF NOT EXISTS idx_calendario_data_fim ON calendario_escolar (data_fim);
+CREATE INDEX IF NOT EXISTS idx_calendario_tipo_evento ON calendario_escolar (tipo_evento);
+CREATE INDEX IF NOT EXISTS idx_calendario_ativo ON calendario_escolar (ativo);
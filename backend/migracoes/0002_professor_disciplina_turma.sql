@@ -0,0 +1,16 @@
+-- Vínculos entre professores, disciplinas e turmas (antes criada por
+-- criar_tabela_vinculos() na importação da API)
+
+CREATE TABLE IF NOT EXISTS professor_disciplina_turma (
+    id SERIAL PRIMARY KEY,
+    id_professor VARCHAR(20) NOT NULL,
+    id_disciplina VARCHAR(20) NOT NULL,
+    id_turma VARCHAR(20) NOT NULL,
+    CONSTRAINT unique_vinculo UNIQUE (id_professor, id_disciplina, id_turma)
+);
+
+COMMENT ON TABLE professor_disciplina_turma IS 'Tabela que armazena os vínculos entre professores, disciplinas e turmas';
+
+CREATE INDEX IF NOT EXISTS idx_pdt_professor ON professor_disciplina_turma (id_professor);
+CREATE INDEX IF NOT EXISTS idx_pdt_disciplina ON professor_disciplina_turma (id_disciplina);
+CREATE INDEX IF NOT EXISTS idx_pdt_turma ON professor_disciplina_turma (id_turma);
@@ -0,0 +1,7 @@
+-- Colunas de nota antes adicionadas pelos endpoints /api/schema/verificar_campos
+-- (professor_id) e /api/schema/adicionar_frequencia (frequencia)
+
+ALTER TABLE nota ADD COLUMN IF NOT EXISTS professor_id VARCHAR(20);
+ALTER TABLE nota ADD COLUMN IF NOT EXISTS frequencia INTEGER DEFAULT 0;
+
+UPDATE nota SET frequencia = 0 WHERE frequencia IS NULL;
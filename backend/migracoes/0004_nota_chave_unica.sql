@@ -0,0 +1,25 @@
+-- Script para garantir uma única nota por aluno/disciplina/turma/ano/bimestre
+-- Necessário para o upsert (INSERT ... ON CONFLICT) usado pelo lançamento em lote
+
+-- Impedir novas gravações em nota enquanto as duplicatas são removidas
+LOCK TABLE nota IN SHARE ROW EXCLUSIVE MODE;
+
+-- Remover duplicatas de forma determinística: mantém o registro mais recente (maior id)
+DELETE FROM nota n
+USING nota m
+WHERE n.id_aluno = m.id_aluno
+  AND n.id_disciplina = m.id_disciplina
+  AND n.id_turma = m.id_turma
+  AND n.ano = m.ano
+  AND n.bimestre = m.bimestre
+  AND n.id < m.id;
+
+-- Criar o índice único que serve de alvo para o ON CONFLICT
+CREATE UNIQUE INDEX IF NOT EXISTS uq_nota_aluno_disciplina_turma_ano_bimestre
+    ON nota (id_aluno, id_disciplina, id_turma, ano, bimestre);
+
+-- Mensagem de sucesso
+DO $$
+BEGIN
+    RAISE NOTICE 'Chave única de nota criada com sucesso!';
+END $$;
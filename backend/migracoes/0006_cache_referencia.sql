@@ -0,0 +1,60 @@
+-- Gerado por cache_referencia.py (python cache_referencia.py --sql). Não edite manualmente.
+
+-- Contador de alterações por tabela de referência
+CREATE TABLE IF NOT EXISTS versao_referencia (
+    tabela VARCHAR(50) PRIMARY KEY,
+    versao BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO versao_referencia (tabela) VALUES
+    ('turma'),
+    ('disciplina'),
+    ('professor'),
+    ('turma_disciplina'),
+    ('professor_disciplina_turma'),
+    ('aluno')
+ON CONFLICT (tabela) DO NOTHING;
+
+-- Incrementa o contador uma vez por instrução (não por linha)
+CREATE OR REPLACE FUNCTION incrementar_versao_referencia() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE versao_referencia SET versao = versao + 1 WHERE tabela = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS versao_referencia_trigger ON turma;
+CREATE TRIGGER versao_referencia_trigger
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON turma
+FOR EACH STATEMENT
+EXECUTE FUNCTION incrementar_versao_referencia();
+
+DROP TRIGGER IF EXISTS versao_referencia_trigger ON disciplina;
+CREATE TRIGGER versao_referencia_trigger
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON disciplina
+FOR EACH STATEMENT
+EXECUTE FUNCTION incrementar_versao_referencia();
+
+DROP TRIGGER IF EXISTS versao_referencia_trigger ON professor;
+CREATE TRIGGER versao_referencia_trigger
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON professor
+FOR EACH STATEMENT
+EXECUTE FUNCTION incrementar_versao_referencia();
+
+DROP TRIGGER IF EXISTS versao_referencia_trigger ON turma_disciplina;
+CREATE TRIGGER versao_referencia_trigger
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON turma_disciplina
+FOR EACH STATEMENT
+EXECUTE FUNCTION incrementar_versao_referencia();
+
+DROP TRIGGER IF EXISTS versao_referencia_trigger ON professor_disciplina_turma;
+CREATE TRIGGER versao_referencia_trigger
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON professor_disciplina_turma
+FOR EACH STATEMENT
+EXECUTE FUNCTION incrementar_versao_referencia();
+
+DROP TRIGGER IF EXISTS versao_referencia_trigger ON aluno;
+CREATE TRIGGER versao_referencia_trigger
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON aluno
+FOR EACH STATEMENT
+EXECUTE FUNCTION incrementar_versao_referencia();
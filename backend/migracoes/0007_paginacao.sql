@@ -0,0 +1,38 @@
+-- Gerado por paginacao.py (python paginacao.py --sql). Não edite manualmente.
+
+-- Índices compostos na mesma ordem das listagens paginadas
+
+DO $$
+BEGIN
+    IF to_regclass('aluno') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_aluno_paginacao ON aluno (nome_aluno, id);
+    END IF;
+END $$;
+
+DO $$
+BEGIN
+    IF to_regclass('professor') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_professor_paginacao ON professor (nome_professor, id);
+    END IF;
+END $$;
+
+DO $$
+BEGIN
+    IF to_regclass('escolas') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_escolas_paginacao ON escolas (razao_social, id_escola);
+    END IF;
+END $$;
+
+DO $$
+BEGIN
+    IF to_regclass('nota') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_nota_paginacao ON nota (ano DESC, bimestre, id_turma, id_disciplina, id_aluno, id);
+    END IF;
+END $$;
+
+DO $$
+BEGIN
+    IF to_regclass('log_atividade') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_log_atividade_paginacao ON log_atividade (data_hora DESC, id DESC);
+    END IF;
+END $$;
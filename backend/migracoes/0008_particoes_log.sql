@@ -0,0 +1,143 @@
+-- Gerado por particoes_log.py (python particoes_log.py --sql). Não edite manualmente.
+
+-- Funções de manutenção das partições
+-- Cria as partições mensais de 'desde' (padrão: mês atual) até meses_a_frente
+CREATE OR REPLACE FUNCTION criar_particoes_log(meses_a_frente INTEGER DEFAULT 3, desde DATE DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    mes DATE := date_trunc('month', COALESCE(desde, CURRENT_DATE))::date;
+    ultimo DATE := date_trunc('month', CURRENT_DATE + make_interval(months => meses_a_frente))::date;
+    proximo DATE;
+    nome TEXT;
+    criadas INTEGER := 0;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_class WHERE oid = to_regclass('log_atividade') AND relkind = 'p') THEN
+        RETURN 0;
+    END IF;
+    -- Vários workers podem executar a manutenção ao mesmo tempo
+    PERFORM pg_advisory_xact_lock(hashtext('particoes_log_atividade'));
+
+    WHILE mes <= ultimo LOOP
+        nome := 'log_atividade_' || to_char(mes, 'YYYY_MM');
+        proximo := (mes + INTERVAL '1 month')::date;
+        IF to_regclass(nome) IS NULL THEN
+            IF to_regclass('log_atividade_padrao') IS NOT NULL AND EXISTS (
+                SELECT 1 FROM log_atividade_padrao WHERE data_hora >= mes AND data_hora < proximo
+            ) THEN
+                -- Linhas do mês já estão na partição padrão: são movidas para a nova
+                EXECUTE format('CREATE TABLE %I (LIKE log_atividade INCLUDING DEFAULTS)', nome);
+                EXECUTE format(
+                    'WITH movidas AS (DELETE FROM log_atividade_padrao WHERE data_hora >= %L AND data_hora < %L RETURNING *) '
+                    'INSERT INTO %I SELECT * FROM movidas', mes, proximo, nome);
+                EXECUTE format('ALTER TABLE log_atividade ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                               nome, mes, proximo);
+            ELSE
+                EXECUTE format('CREATE TABLE %I PARTITION OF log_atividade FOR VALUES FROM (%L) TO (%L)',
+                               nome, mes, proximo);
+            END IF;
+            criadas := criadas + 1;
+        END IF;
+        mes := proximo;
+    END LOOP;
+    RETURN criadas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Remove as partições anteriores aos últimos 'meses' meses (arquivando ou apagando)
+CREATE OR REPLACE FUNCTION aplicar_retencao_log(meses INTEGER, arquivar BOOLEAN DEFAULT TRUE)
+RETURNS INTEGER AS $$
+DECLARE
+    limite DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => meses))::date;
+    particao RECORD;
+    removidas INTEGER := 0;
+BEGIN
+    IF meses IS NULL OR meses <= 0
+       OR NOT EXISTS (SELECT 1 FROM pg_class WHERE oid = to_regclass('log_atividade') AND relkind = 'p') THEN
+        RETURN 0;
+    END IF;
+    PERFORM pg_advisory_xact_lock(hashtext('particoes_log_atividade'));
+
+    FOR particao IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'log_atividade'::regclass
+          AND c.relname ~ '^log_atividade_[0-9]{4}_[0-9]{2}$'
+          AND to_date(substr(c.relname, 15), 'YYYY_MM') < limite
+        ORDER BY c.relname
+    LOOP
+        IF arquivar THEN
+            CREATE SCHEMA IF NOT EXISTS arquivo_log;
+            EXECUTE format('ALTER TABLE log_atividade DETACH PARTITION %I', particao.relname);
+            EXECUTE format('ALTER TABLE %I SET SCHEMA arquivo_log', particao.relname);
+        ELSE
+            EXECUTE format('DROP TABLE %I', particao.relname);
+        END IF;
+        removidas := removidas + 1;
+    END LOOP;
+    RETURN removidas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Conversão da tabela não particionada
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE oid = to_regclass('log_atividade') AND relkind = 'r') THEN
+        ALTER TABLE log_atividade RENAME TO log_atividade_nao_particionada;
+        ALTER INDEX IF EXISTS log_atividade_pkey RENAME TO log_atividade_nao_particionada_pkey;
+        ALTER INDEX IF EXISTS idx_log_atividade_paginacao RENAME TO idx_log_atividade_nao_particionada;
+        ALTER SEQUENCE IF EXISTS log_atividade_id_seq RENAME TO log_atividade_nao_particionada_id_seq;
+    END IF;
+END $$;
+
+-- Tabela particionada por mês
+CREATE TABLE IF NOT EXISTS log_atividade (
+    id SERIAL,
+    data_hora TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    usuario VARCHAR(100) NOT NULL,
+    acao VARCHAR(50) NOT NULL,
+    entidade VARCHAR(50) NOT NULL,
+    entidade_id VARCHAR(100) NOT NULL,
+    detalhe TEXT,
+    status VARCHAR(20) DEFAULT 'concluído',
+    PRIMARY KEY (id, data_hora)
+) PARTITION BY RANGE (data_hora);
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE oid = to_regclass('log_atividade') AND relkind = 'p') THEN
+        CREATE TABLE IF NOT EXISTS log_atividade_padrao PARTITION OF log_atividade DEFAULT;
+    END IF;
+END $$;
+
+DO $$
+DECLARE
+    inicio DATE;
+BEGIN
+    IF to_regclass('log_atividade_nao_particionada') IS NOT NULL THEN
+        SELECT MIN(data_hora)::date INTO inicio FROM log_atividade_nao_particionada;
+        PERFORM criar_particoes_log(3, inicio);
+        INSERT INTO log_atividade (id, data_hora, usuario, acao, entidade, entidade_id, detalhe, status)
+        SELECT id, COALESCE(data_hora, CURRENT_TIMESTAMP), usuario, acao, entidade, entidade_id, detalhe, status
+        FROM log_atividade_nao_particionada;
+        PERFORM setval(pg_get_serial_sequence('log_atividade', 'id'),
+                       GREATEST((SELECT MAX(id) FROM log_atividade), 1));
+        DROP TABLE log_atividade_nao_particionada;
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_log_atividade_paginacao ON log_atividade (data_hora DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_log_atividade_usuario ON log_atividade (usuario, data_hora DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_log_atividade_entidade ON log_atividade (entidade, acao, data_hora DESC, id DESC);
+
+-- Busca por parte do nome (usuario ILIKE '%...%'): índice de trigramas, se pg_trgm estiver disponível
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE INDEX IF NOT EXISTS idx_log_atividade_usuario_trgm ON log_atividade USING gin (usuario gin_trgm_ops);
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'Índice de trigramas de log_atividade não criado: %', SQLERRM;
+END $$;
+
+-- Partições do mês atual e dos próximos
+SELECT criar_particoes_log(3);
@@ -0,0 +1,5 @@
+-- Gerado por calendario_periodos.py (python calendario_periodos.py --sql). Não edite manualmente.
+
+-- Período de cada evento ativo, para consultas de sobreposição (&&)
+CREATE INDEX IF NOT EXISTS idx_calendario_periodo ON calendario_escolar
+    USING gist (daterange(data_inicio, data_fim, '[]')) WHERE ativo = TRUE;
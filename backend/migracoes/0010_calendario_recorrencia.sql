@@ -0,0 +1,9 @@
+-- Gerado por calendario_recorrencia.py (python calendario_recorrencia.py --sql). Não edite manualmente.
+
+-- Fim da série (inclusivo; NULL = sem fim) e datas de início canceladas
+ALTER TABLE calendario_escolar ADD COLUMN IF NOT EXISTS recorrencia_ate DATE;
+ALTER TABLE calendario_escolar ADD COLUMN IF NOT EXISTS recorrencia_excecoes DATE[];
+
+-- Período coberto por cada série ativa, para a condição de sobreposição das séries
+CREATE INDEX IF NOT EXISTS idx_calendario_serie ON calendario_escolar
+    USING gist (daterange(data_inicio, recorrencia_ate + (data_fim - data_inicio), '[]')) WHERE ativo = TRUE AND recorrente = TRUE;
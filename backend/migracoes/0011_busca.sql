@@ -0,0 +1,33 @@
+-- Gerado por busca.py (python busca.py --sql). Não edite manualmente.
+
+-- Normalização dos nomes: minúsculas e sem acentos. unaccent() não é IMMUTABLE
+-- (depende do dicionário), por isso a chamada com o dicionário explícito fica
+-- em uma função própria, que pode ser usada nos índices
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS unaccent;
+    CREATE OR REPLACE FUNCTION busca_normalizar(texto TEXT) RETURNS TEXT
+        LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+        AS $f$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, texto)) $f$;
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'unaccent indisponível, normalização por translate(): %', SQLERRM;
+    CREATE OR REPLACE FUNCTION busca_normalizar(texto TEXT) RETURNS TEXT
+        LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+        AS $f$ SELECT translate(lower(texto), 'áàâãäéèêëíìîïóòôõöúùûüçñÁÀÂÃÄÉÈÊËÍÌÎÏÓÒÔÕÖÚÙÛÜÇÑ', 'aaaaaeeeeiiiiooooouuuucnaaaaaeeeeiiiiooooouuuucn') $f$;
+END $$;
+
+-- Prefixo do nome (autocompletar), já na ordem dos resultados
+CREATE INDEX IF NOT EXISTS idx_aluno_busca_prefixo ON aluno ((busca_normalizar(nome_aluno) COLLATE "C"));
+CREATE INDEX IF NOT EXISTS idx_professor_busca_prefixo ON professor ((busca_normalizar(nome_professor) COLLATE "C"));
+CREATE INDEX IF NOT EXISTS idx_escolas_busca_prefixo ON escolas ((busca_normalizar((coalesce(nome_fantasia, '') || ' ' || razao_social || ' ' || coalesce(cidade, ''))) COLLATE "C"));
+
+-- Partes do nome e semelhança (<%): índices de trigramas, se pg_trgm estiver disponível
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE INDEX IF NOT EXISTS idx_aluno_busca_trgm ON aluno USING gin ((busca_normalizar(nome_aluno) COLLATE "C") gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS idx_professor_busca_trgm ON professor USING gin ((busca_normalizar(nome_professor) COLLATE "C") gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS idx_escolas_busca_trgm ON escolas USING gin ((busca_normalizar((coalesce(nome_fantasia, '') || ' ' || razao_social || ' ' || coalesce(cidade, ''))) COLLATE "C") gin_trgm_ops);
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'Índices de trigramas da busca não criados: %', SQLERRM;
+END $$;
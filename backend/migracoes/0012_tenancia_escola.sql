@@ -0,0 +1,220 @@
+-- Gerado por tenancia_escola.py (python tenancia_escola.py --sql). Não edite manualmente.
+
+-- Escola de turmas, alunos, vínculos e eventos
+ALTER TABLE turma ADD COLUMN IF NOT EXISTS id_escola INTEGER REFERENCES escolas (id_escola) ON DELETE SET NULL;
+ALTER TABLE aluno ADD COLUMN IF NOT EXISTS id_escola INTEGER REFERENCES escolas (id_escola) ON DELETE SET NULL;
+ALTER TABLE professor_disciplina_turma ADD COLUMN IF NOT EXISTS id_escola INTEGER REFERENCES escolas (id_escola) ON DELETE SET NULL;
+-- NULL: evento de toda a rede
+ALTER TABLE calendario_escolar ADD COLUMN IF NOT EXISTS id_escola INTEGER REFERENCES escolas (id_escola) ON DELETE CASCADE;
+
+-- Rede com uma única escola: todas as turmas passam a ser dela
+UPDATE turma SET id_escola = (SELECT MIN(id_escola) FROM escolas)
+WHERE id_escola IS NULL AND (SELECT COUNT(*) FROM escolas) = 1;
+
+UPDATE aluno a SET id_escola = t.id_escola
+FROM turma t
+WHERE t.id_turma = a.id_turma AND a.id_escola IS DISTINCT FROM t.id_escola;
+
+UPDATE professor_disciplina_turma v SET id_escola = t.id_escola
+FROM turma t
+WHERE t.id_turma = v.id_turma AND v.id_escola IS DISTINCT FROM t.id_escola;
+
+-- aluno e professor_disciplina_turma: a escola é sempre a da turma
+CREATE OR REPLACE FUNCTION definir_escola_pela_turma() RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.id_turma IS NOT NULL THEN
+        NEW.id_escola := (SELECT id_escola FROM turma WHERE id_turma = NEW.id_turma);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS definir_escola_trigger ON aluno;
+CREATE TRIGGER definir_escola_trigger
+BEFORE INSERT OR UPDATE OF id_turma, id_escola ON aluno
+FOR EACH ROW
+EXECUTE FUNCTION definir_escola_pela_turma();
+
+DROP TRIGGER IF EXISTS definir_escola_trigger ON professor_disciplina_turma;
+CREATE TRIGGER definir_escola_trigger
+BEFORE INSERT OR UPDATE OF id_turma, id_escola ON professor_disciplina_turma
+FOR EACH ROW
+EXECUTE FUNCTION definir_escola_pela_turma();
+
+-- Turma que muda de escola: alunos, vínculos e notas (de partição) a acompanham
+CREATE OR REPLACE FUNCTION propagar_escola_turma() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE aluno SET id_escola = NEW.id_escola
+    WHERE id_turma = NEW.id_turma AND id_escola IS DISTINCT FROM NEW.id_escola;
+    UPDATE professor_disciplina_turma SET id_escola = NEW.id_escola
+    WHERE id_turma = NEW.id_turma AND id_escola IS DISTINCT FROM NEW.id_escola;
+    UPDATE nota SET id_escola = COALESCE(NEW.id_escola, 0)
+    WHERE id_turma = NEW.id_turma AND id_escola <> COALESCE(NEW.id_escola, 0);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS propagar_escola_trigger ON turma;
+CREATE TRIGGER propagar_escola_trigger
+AFTER UPDATE OF id_escola ON turma
+FOR EACH ROW
+WHEN (OLD.id_escola IS DISTINCT FROM NEW.id_escola)
+EXECUTE FUNCTION propagar_escola_turma();
+
+CREATE INDEX IF NOT EXISTS idx_turma_escola ON turma (id_escola, id_turma);
+CREATE INDEX IF NOT EXISTS idx_aluno_escola ON aluno (id_escola, nome_aluno, id);
+CREATE INDEX IF NOT EXISTS idx_pdt_escola ON professor_disciplina_turma (id_escola, id_professor, id_turma);
+CREATE INDEX IF NOT EXISTS idx_calendario_escola ON calendario_escolar (id_escola, data_inicio) WHERE ativo = TRUE;
+
+-- Funções de nota por escola
+-- Cria a partição de cada escola cadastrada e remove as de escolas excluídas (já vazias)
+CREATE OR REPLACE FUNCTION criar_particoes_nota() RETURNS INTEGER AS $$
+DECLARE
+    escola RECORD;
+    particao RECORD;
+    nome TEXT;
+    ocupada BOOLEAN;
+    criadas INTEGER := 0;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_class WHERE oid = to_regclass('nota') AND relkind = 'p') THEN
+        RETURN 0;
+    END IF;
+    -- Vários workers podem executar a manutenção ao mesmo tempo
+    PERFORM pg_advisory_xact_lock(hashtext('particoes_nota'));
+
+    FOR escola IN SELECT id_escola FROM escolas ORDER BY id_escola LOOP
+        nome := 'nota_escola_' || escola.id_escola;
+        IF to_regclass(nome) IS NULL THEN
+            IF to_regclass('nota_padrao') IS NOT NULL
+               AND EXISTS (SELECT 1 FROM nota_padrao WHERE id_escola = escola.id_escola) THEN
+                -- Notas da escola já estão na partição padrão: são movidas para a nova,
+                -- sem disparar os triggers de nota (as linhas não mudam)
+                EXECUTE format('CREATE TABLE %I (LIKE nota INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', nome);
+                ALTER TABLE nota_padrao DISABLE TRIGGER USER;
+                EXECUTE format(
+                    'WITH movidas AS (DELETE FROM nota_padrao WHERE id_escola = %s RETURNING *) '
+                    'INSERT INTO %I SELECT * FROM movidas', escola.id_escola, nome);
+                ALTER TABLE nota_padrao ENABLE TRIGGER USER;
+                EXECUTE format('ALTER TABLE nota ATTACH PARTITION %I FOR VALUES IN (%s)', nome, escola.id_escola);
+            ELSE
+                EXECUTE format('CREATE TABLE %I PARTITION OF nota FOR VALUES IN (%s)', nome, escola.id_escola);
+            END IF;
+            criadas := criadas + 1;
+        END IF;
+    END LOOP;
+
+    FOR particao IN
+        SELECT c.relname, substr(c.relname, 13)::integer AS id_escola
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'nota'::regclass AND c.relname ~ '^nota_escola_[0-9]+$'
+    LOOP
+        IF NOT EXISTS (SELECT 1 FROM escolas WHERE id_escola = particao.id_escola) THEN
+            EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I)', particao.relname) INTO ocupada;
+            IF NOT ocupada THEN
+                EXECUTE format('DROP TABLE %I', particao.relname);
+            END IF;
+        END IF;
+    END LOOP;
+    RETURN criadas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Confere a escola da nota: no INSERT, a partição já foi escolhida pelo id_escola
+-- informado, que precisa ser o da turma; no UPDATE, a nota acompanha a turma
+CREATE OR REPLACE FUNCTION conferir_escola_nota() RETURNS TRIGGER AS $$
+DECLARE
+    escola INTEGER := COALESCE((SELECT id_escola FROM turma WHERE id_turma = NEW.id_turma), 0);
+BEGIN
+    IF TG_OP = 'INSERT' AND NEW.id_escola IS DISTINCT FROM escola THEN
+        RAISE EXCEPTION 'id_escola % da nota difere da escola da turma % (%)', NEW.id_escola, NEW.id_turma, escola
+            USING ERRCODE = 'check_violation',
+                  HINT = 'Informe id_escola = (SELECT COALESCE(id_escola, 0) FROM turma WHERE id_turma = ...)';
+    END IF;
+    NEW.id_escola := escola;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Conversão de nota em tabela particionada por escola
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE oid = to_regclass('nota') AND relkind = 'r') THEN
+        ALTER TABLE nota RENAME TO nota_nao_particionada;
+        ALTER INDEX IF EXISTS nota_pkey RENAME TO nota_nao_particionada_pkey;
+        ALTER INDEX IF EXISTS uq_nota_aluno_disciplina_turma_ano_bimestre RENAME TO nota_nao_particionada_chave;
+    END IF;
+END $$;
+
+DO $$
+BEGIN
+    IF to_regclass('nota_nao_particionada') IS NOT NULL AND to_regclass('nota') IS NULL THEN
+        CREATE TABLE nota (
+            LIKE nota_nao_particionada INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+            id_escola INTEGER NOT NULL DEFAULT 0
+        ) PARTITION BY LIST (id_escola);
+        ALTER TABLE nota ADD PRIMARY KEY (id, id_escola);
+        -- Alvo do ON CONFLICT dos lançamentos (a chave de antes, mais a escola)
+        CREATE UNIQUE INDEX uq_nota_aluno_disciplina_turma_ano_bimestre
+            ON nota (id_escola, id_aluno, id_disciplina, id_turma, ano, bimestre);
+        CREATE TABLE nota_padrao PARTITION OF nota DEFAULT;
+    END IF;
+END $$;
+
+DO $$
+DECLARE
+    objeto RECORD;
+BEGIN
+    IF to_regclass('nota_nao_particionada') IS NOT NULL THEN
+        PERFORM criar_particoes_nota();
+        -- Antes dos triggers: as linhas (médias e boletim_agregado) não mudam
+        INSERT INTO nota
+        SELECT n.*, COALESCE(t.id_escola, 0)
+        FROM nota_nao_particionada n
+        LEFT JOIN turma t ON t.id_turma = n.id_turma;
+
+        -- Demais índices, chaves estrangeiras e triggers da tabela antiga
+        FOR objeto IN
+            SELECT i.indexrelid::regclass AS nome, pg_get_indexdef(i.indexrelid) AS definicao
+            FROM pg_index i
+            WHERE i.indrelid = 'nota_nao_particionada'::regclass AND NOT i.indisunique
+        LOOP
+            EXECUTE format('DROP INDEX %s', objeto.nome);
+            EXECUTE regexp_replace(objeto.definicao, ' ON (ONLY )?(\S+\.)?nota_nao_particionada ', ' ON nota ');
+        END LOOP;
+        FOR objeto IN
+            SELECT conname, pg_get_constraintdef(oid) AS definicao
+            FROM pg_constraint
+            WHERE conrelid = 'nota_nao_particionada'::regclass AND contype = 'f'
+        LOOP
+            EXECUTE format('ALTER TABLE nota ADD CONSTRAINT %I %s', objeto.conname, objeto.definicao);
+        END LOOP;
+        FOR objeto IN
+            SELECT pg_get_triggerdef(oid) AS definicao
+            FROM pg_trigger
+            WHERE tgrelid = 'nota_nao_particionada'::regclass AND NOT tgisinternal
+        LOOP
+            EXECUTE regexp_replace(objeto.definicao, ' ON (\S+\.)?nota_nao_particionada ', ' ON nota ');
+        END LOOP;
+        -- Visões (media_final) passam a ler a nova tabela
+        FOR objeto IN
+            SELECT DISTINCT v.oid::regclass AS nome, pg_get_viewdef(v.oid) AS definicao
+            FROM pg_depend d
+            JOIN pg_rewrite r ON r.oid = d.objid
+            JOIN pg_class v ON v.oid = r.ev_class
+            WHERE d.refobjid = 'nota_nao_particionada'::regclass AND v.relkind = 'v'
+        LOOP
+            EXECUTE format('CREATE OR REPLACE VIEW %s AS %s', objeto.nome,
+                           regexp_replace(objeto.definicao, '\mnota_nao_particionada\M', 'nota', 'g'));
+        END LOOP;
+
+        ALTER SEQUENCE IF EXISTS nota_id_seq OWNED BY nota.id;
+        DROP TABLE nota_nao_particionada;
+    END IF;
+END $$;
+
+DROP TRIGGER IF EXISTS conferir_escola_trigger ON nota;
+CREATE TRIGGER conferir_escola_trigger
+BEFORE INSERT OR UPDATE OF id_turma, id_escola ON nota
+FOR EACH ROW
+EXECUTE FUNCTION conferir_escola_nota();
@@ -0,0 +1,50 @@
+-- Gerado por motor_medias.py (python motor_medias.py --sql). Não edite manualmente.
+
+-- Coluna que marca as notas cuja média gravada não corresponde às notas da linha
+ALTER TABLE nota ADD COLUMN IF NOT EXISTS media_pendente BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- Corrigir as médias existentes usando a fórmula do motor de médias
+-- (apenas as linhas que mudam são regravadas)
+UPDATE nota
+SET media = ROUND(CASE WHEN recuperacao IS NOT NULL AND recuperacao > 0 THEN ((CASE WHEN nota_mensal IS NOT NULL AND nota_bimestral IS NOT NULL THEN (nota_mensal::numeric + nota_bimestral::numeric) / 2 WHEN nota_mensal IS NOT NULL THEN nota_mensal::numeric WHEN nota_bimestral IS NOT NULL THEN nota_bimestral::numeric ELSE 0::numeric END) + recuperacao::numeric) / 2 ELSE (CASE WHEN nota_mensal IS NOT NULL AND nota_bimestral IS NOT NULL THEN (nota_mensal::numeric + nota_bimestral::numeric) / 2 WHEN nota_mensal IS NOT NULL THEN nota_mensal::numeric WHEN nota_bimestral IS NOT NULL THEN nota_bimestral::numeric ELSE 0::numeric END) END, 1),
+    media_pendente = FALSE
+WHERE media IS DISTINCT FROM ROUND(CASE WHEN recuperacao IS NOT NULL AND recuperacao > 0 THEN ((CASE WHEN nota_mensal IS NOT NULL AND nota_bimestral IS NOT NULL THEN (nota_mensal::numeric + nota_bimestral::numeric) / 2 WHEN nota_mensal IS NOT NULL THEN nota_mensal::numeric WHEN nota_bimestral IS NOT NULL THEN nota_bimestral::numeric ELSE 0::numeric END) + recuperacao::numeric) / 2 ELSE (CASE WHEN nota_mensal IS NOT NULL AND nota_bimestral IS NOT NULL THEN (nota_mensal::numeric + nota_bimestral::numeric) / 2 WHEN nota_mensal IS NOT NULL THEN nota_mensal::numeric WHEN nota_bimestral IS NOT NULL THEN nota_bimestral::numeric ELSE 0::numeric END) END, 1)
+   OR media_pendente;
+
+-- Função que calcula a média com a mesma fórmula da API
+CREATE OR REPLACE FUNCTION calcular_media_correta() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.media := ROUND(CASE WHEN NEW.recuperacao IS NOT NULL AND NEW.recuperacao > 0 THEN ((CASE WHEN NEW.nota_mensal IS NOT NULL AND NEW.nota_bimestral IS NOT NULL THEN (NEW.nota_mensal::numeric + NEW.nota_bimestral::numeric) / 2 WHEN NEW.nota_mensal IS NOT NULL THEN NEW.nota_mensal::numeric WHEN NEW.nota_bimestral IS NOT NULL THEN NEW.nota_bimestral::numeric ELSE 0::numeric END) + NEW.recuperacao::numeric) / 2 ELSE (CASE WHEN NEW.nota_mensal IS NOT NULL AND NEW.nota_bimestral IS NOT NULL THEN (NEW.nota_mensal::numeric + NEW.nota_bimestral::numeric) / 2 WHEN NEW.nota_mensal IS NOT NULL THEN NEW.nota_mensal::numeric WHEN NEW.nota_bimestral IS NOT NULL THEN NEW.nota_bimestral::numeric ELSE 0::numeric END) END, 1);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recriar o trigger para calcular a média automaticamente em inserções e atualizações
+DROP TRIGGER IF EXISTS calcular_media_trigger ON nota;
+CREATE TRIGGER calcular_media_trigger
+BEFORE INSERT OR UPDATE ON nota
+FOR EACH ROW
+EXECUTE FUNCTION calcular_media_correta();
+
+-- Função que marca a nota como pendente quando a média gravada não confere.
+-- Roda depois de calcular_media_trigger (triggers BEFORE disparam em ordem alfabética),
+-- então só marca linhas se o trigger de cálculo for removido ou desativado.
+CREATE OR REPLACE FUNCTION marcar_media_pendente() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.media_pendente := NEW.media IS DISTINCT FROM ROUND(CASE WHEN NEW.recuperacao IS NOT NULL AND NEW.recuperacao > 0 THEN ((CASE WHEN NEW.nota_mensal IS NOT NULL AND NEW.nota_bimestral IS NOT NULL THEN (NEW.nota_mensal::numeric + NEW.nota_bimestral::numeric) / 2 WHEN NEW.nota_mensal IS NOT NULL THEN NEW.nota_mensal::numeric WHEN NEW.nota_bimestral IS NOT NULL THEN NEW.nota_bimestral::numeric ELSE 0::numeric END) + NEW.recuperacao::numeric) / 2 ELSE (CASE WHEN NEW.nota_mensal IS NOT NULL AND NEW.nota_bimestral IS NOT NULL THEN (NEW.nota_mensal::numeric + NEW.nota_bimestral::numeric) / 2 WHEN NEW.nota_mensal IS NOT NULL THEN NEW.nota_mensal::numeric WHEN NEW.nota_bimestral IS NOT NULL THEN NEW.nota_bimestral::numeric ELSE 0::numeric END) END, 1);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS marcar_media_pendente_trigger ON nota;
+CREATE TRIGGER marcar_media_pendente_trigger
+BEFORE INSERT OR UPDATE OF nota_mensal, nota_bimestral, recuperacao, media ON nota
+FOR EACH ROW
+EXECUTE FUNCTION marcar_media_pendente();
+
+-- Índice parcial: contém apenas as notas pendentes, em ordem de id (recálculo por lotes)
+CREATE INDEX IF NOT EXISTS idx_nota_media_pendente ON nota (id) WHERE media_pendente;
+
+-- Índice para recalcular por escopo (ano/bimestre/turma/disciplina)
+CREATE INDEX IF NOT EXISTS idx_nota_ano_bimestre_turma_disciplina
+    ON nota (ano, bimestre, id_turma, id_disciplina);
@@ -0,0 +1,179 @@
+-- Gerado por boletim_agregado.py (python boletim_agregado.py --sql). Não edite manualmente.
+
+-- Tabela com o boletim pronto por aluno, disciplina, ano e escola
+CREATE TABLE IF NOT EXISTS boletim_agregado (
+    id_aluno VARCHAR(20) NOT NULL,
+    id_disciplina VARCHAR(10) NOT NULL,
+    ano INTEGER NOT NULL,
+    id_escola INTEGER NOT NULL DEFAULT 0,
+    id_turma VARCHAR(10),
+    notas_bimestrais JSONB NOT NULL DEFAULT '{}',
+    media_anual FLOAT NOT NULL DEFAULT 0,
+    situacao VARCHAR(20) NOT NULL,
+    atualizado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id_aluno, id_disciplina, ano, id_escola)
+);
+
+-- Tabela criada sem a escola (migracoes/0005_boletim_agregado.sql): a chave passa
+-- a incluí-la; as linhas são recalculadas por reconstruir_boletim_agregado() no fim
+ALTER TABLE boletim_agregado ADD COLUMN IF NOT EXISTS id_escola INTEGER NOT NULL DEFAULT 0;
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint c
+        JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = ANY(c.conkey)
+        WHERE c.conrelid = 'boletim_agregado'::regclass AND c.contype = 'p' AND a.attname = 'id_escola'
+    ) THEN
+        ALTER TABLE boletim_agregado DROP CONSTRAINT IF EXISTS boletim_agregado_pkey;
+        ALTER TABLE boletim_agregado ADD PRIMARY KEY (id_aluno, id_disciplina, ano, id_escola);
+    END IF;
+END;
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_boletim_agregado_ano_turma ON boletim_agregado (ano, id_turma);
+CREATE INDEX IF NOT EXISTS idx_boletim_agregado_ano_disciplina ON boletim_agregado (ano, id_disciplina);
+CREATE INDEX IF NOT EXISTS idx_boletim_agregado_escola_ano ON boletim_agregado (id_escola, ano, id_turma);
+
+-- Notas de um aluno/disciplina/ano sem a escola (reconstrução e consultas da rede)
+CREATE INDEX IF NOT EXISTS idx_nota_aluno_disciplina_ano ON nota (id_aluno, id_disciplina, ano);
+
+-- Recalcula a linha de um aluno/disciplina/ano/escola a partir das notas
+-- (apenas a partição da escola é lida)
+CREATE OR REPLACE FUNCTION atualizar_boletim_agregado(p_escola INTEGER, p_aluno VARCHAR, p_disciplina VARCHAR, p_ano INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    -- Serializa as atualizações da mesma chave: sem isso, duas transações gravando
+    -- bimestres diferentes ao mesmo tempo calculariam o agregado sem a nota da outra.
+    PERFORM pg_advisory_xact_lock(hashtextextended(p_aluno || '|' || p_disciplina || '|' || p_ano || '|' || p_escola, 0));
+
+    INSERT INTO boletim_agregado (id_aluno, id_disciplina, ano, id_escola, id_turma, notas_bimestrais, media_anual, situacao, atualizado_em)
+    SELECT agregado.id_aluno,
+           agregado.id_disciplina,
+           agregado.ano,
+           agregado.id_escola,
+           agregado.id_turma,
+           agregado.notas_bimestrais,
+           COALESCE(ROUND(agregado.media_anual, 1), 0)::float8,
+           CASE WHEN (agregado.media_anual) IS NULL THEN 'Sem notas' WHEN (agregado.media_anual) >= 6.0 THEN 'Aprovado' WHEN (agregado.media_anual) >= 4.0 THEN 'Recuperação Final' ELSE 'Reprovado' END,
+           CURRENT_TIMESTAMP
+    FROM (
+        SELECT n.id_aluno,
+               n.id_disciplina,
+               n.ano,
+               n.id_escola,
+               (ARRAY_AGG(n.id_turma ORDER BY n.bimestre DESC, n.id DESC))[1] AS id_turma,
+               JSONB_OBJECT_AGG(n.bimestre::text, JSONB_BUILD_OBJECT(
+                   'nota_mensal', n.nota_mensal,
+                   'nota_bimestral', n.nota_bimestral,
+                   'recuperacao', n.recuperacao,
+                   'frequencia', n.frequencia,
+                   'media_bimestral', n.media
+               )) AS notas_bimestrais,
+               AVG(n.media::numeric) FILTER (
+                   WHERE n.bimestre BETWEEN 1 AND 4 AND n.media IS NOT NULL
+               ) AS media_anual
+        FROM nota n
+        WHERE n.id_escola = p_escola AND n.id_aluno = p_aluno AND n.id_disciplina = p_disciplina AND n.ano = p_ano
+        GROUP BY n.id_aluno, n.id_disciplina, n.ano, n.id_escola
+    ) agregado
+    ON CONFLICT (id_aluno, id_disciplina, ano, id_escola) DO UPDATE SET
+        id_turma = EXCLUDED.id_turma,
+        notas_bimestrais = EXCLUDED.notas_bimestrais,
+        media_anual = EXCLUDED.media_anual,
+        situacao = EXCLUDED.situacao,
+        atualizado_em = EXCLUDED.atualizado_em;
+
+    IF NOT FOUND THEN
+        -- Não restou nenhuma nota para a chave
+        DELETE FROM boletim_agregado
+        WHERE id_aluno = p_aluno AND id_disciplina = p_disciplina AND ano = p_ano AND id_escola = p_escola;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger: mantém o agregado a cada gravação em nota
+CREATE OR REPLACE FUNCTION atualizar_boletim_agregado_nota() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM atualizar_boletim_agregado(NEW.id_escola, NEW.id_aluno, NEW.id_disciplina, NEW.ano);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM atualizar_boletim_agregado(OLD.id_escola, OLD.id_aluno, OLD.id_disciplina, OLD.ano);
+    ELSE
+        PERFORM atualizar_boletim_agregado(NEW.id_escola, NEW.id_aluno, NEW.id_disciplina, NEW.ano);
+        IF (OLD.id_escola, OLD.id_aluno, OLD.id_disciplina, OLD.ano)
+           IS DISTINCT FROM (NEW.id_escola, NEW.id_aluno, NEW.id_disciplina, NEW.ano) THEN
+            -- A nota mudou de chave (ou de escola): a linha antiga também precisa ser recalculada
+            PERFORM atualizar_boletim_agregado(OLD.id_escola, OLD.id_aluno, OLD.id_disciplina, OLD.ano);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS atualizar_boletim_agregado_trigger ON nota;
+CREATE TRIGGER atualizar_boletim_agregado_trigger
+AFTER INSERT OR DELETE OR UPDATE OF id_aluno, id_disciplina, id_turma, ano, bimestre,
+    nota_mensal, nota_bimestral, recuperacao, frequencia, media, id_escola ON nota
+FOR EACH ROW
+EXECUTE FUNCTION atualizar_boletim_agregado_nota();
+
+-- Versão sem a escola, substituída pela de cima
+DROP FUNCTION IF EXISTS atualizar_boletim_agregado(VARCHAR, VARCHAR, INTEGER);
+
+-- Reconstrução completa (ou de um ano) em uma única instrução, para cargas iniciais
+CREATE OR REPLACE FUNCTION reconstruir_boletim_agregado(p_ano INTEGER DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    linhas INTEGER;
+BEGIN
+    DELETE FROM boletim_agregado b
+    WHERE (p_ano IS NULL OR b.ano = p_ano)
+      AND NOT EXISTS (
+          SELECT 1 FROM nota n
+          WHERE n.id_escola = b.id_escola AND n.id_aluno = b.id_aluno
+            AND n.id_disciplina = b.id_disciplina AND n.ano = b.ano
+      );
+
+    INSERT INTO boletim_agregado (id_aluno, id_disciplina, ano, id_escola, id_turma, notas_bimestrais, media_anual, situacao, atualizado_em)
+    SELECT agregado.id_aluno,
+           agregado.id_disciplina,
+           agregado.ano,
+           agregado.id_escola,
+           agregado.id_turma,
+           agregado.notas_bimestrais,
+           COALESCE(ROUND(agregado.media_anual, 1), 0)::float8,
+           CASE WHEN (agregado.media_anual) IS NULL THEN 'Sem notas' WHEN (agregado.media_anual) >= 6.0 THEN 'Aprovado' WHEN (agregado.media_anual) >= 4.0 THEN 'Recuperação Final' ELSE 'Reprovado' END,
+           CURRENT_TIMESTAMP
+    FROM (
+        SELECT n.id_aluno,
+               n.id_disciplina,
+               n.ano,
+               n.id_escola,
+               (ARRAY_AGG(n.id_turma ORDER BY n.bimestre DESC, n.id DESC))[1] AS id_turma,
+               JSONB_OBJECT_AGG(n.bimestre::text, JSONB_BUILD_OBJECT(
+                   'nota_mensal', n.nota_mensal,
+                   'nota_bimestral', n.nota_bimestral,
+                   'recuperacao', n.recuperacao,
+                   'frequencia', n.frequencia,
+                   'media_bimestral', n.media
+               )) AS notas_bimestrais,
+               AVG(n.media::numeric) FILTER (
+                   WHERE n.bimestre BETWEEN 1 AND 4 AND n.media IS NOT NULL
+               ) AS media_anual
+        FROM nota n
+        WHERE p_ano IS NULL OR n.ano = p_ano
+        GROUP BY n.id_aluno, n.id_disciplina, n.ano, n.id_escola
+    ) agregado
+    ON CONFLICT (id_aluno, id_disciplina, ano, id_escola) DO UPDATE SET
+        id_turma = EXCLUDED.id_turma,
+        notas_bimestrais = EXCLUDED.notas_bimestrais,
+        media_anual = EXCLUDED.media_anual,
+        situacao = EXCLUDED.situacao,
+        atualizado_em = EXCLUDED.atualizado_em;
+    GET DIAGNOSTICS linhas = ROW_COUNT;
+    RETURN linhas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Carga inicial (e recálculo das linhas gravadas antes da escola fazer parte da chave)
+SELECT reconstruir_boletim_agregado();
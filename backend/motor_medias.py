@@ -0,0 +1,492 @@
+"""
+Motor de cálculo de médias bimestrais
+Fonte única da fórmula da média usada pela API, pelo trigger do banco
+(calcular_media_correta) e pelo recálculo em lote.
+
+Fórmula:
+    - base = (nota_mensal + nota_bimestral) / 2 se as duas existirem,
+      a nota existente se apenas uma existir, ou 0 se nenhuma existir
+    - se houver recuperação (> 0): media = (base + recuperacao) / 2
+    - arredondamento único, ao final, para 1 casa decimal com meio para
+      cima (mesmo comportamento do ROUND(numeric, 1) do PostgreSQL)
+
+Notas ausentes são NULL/None (no NumPy, NaN). Zero é uma nota válida.
+
+Uso como script:
+    python motor_medias.py --sql > migracoes/0013_motor_medias.sql
+    python motor_medias.py --verificar        # compara escalar, vetorizado e SQL
+    python motor_medias.py --recalcular 2024  # recalcula as médias de um ano
+    python motor_medias.py --pendentes        # grava as médias marcadas como pendentes
+
+Notas pendentes:
+    A coluna nota.media_pendente é mantida pelo trigger marcar_media_pendente:
+    fica TRUE quando a média gravada não corresponde às notas da linha (por
+    exemplo, após uma importação feita direto no banco). O recálculo
+    incremental (recalcular_pendentes) só visita essas linhas.
+"""
+import random
+from decimal import Decimal, ROUND_HALF_UP
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy só é necessário para o cálculo em lote
+    np = None
+
+# Escala usada no cálculo vetorizado: as notas são convertidas para inteiros em
+# milésimos, o que torna o arredondamento exato para notas com até 3 casas decimais.
+ESCALA = 1000
+
+_UM_DECIMO = Decimal("0.1")
+
+# Limites da situação final pela média anual
+MEDIA_APROVACAO = 6.0
+MEDIA_RECUPERACAO_FINAL = 4.0
+
+
+def _decimal(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, float) and valor != valor:  # NaN
+        return None
+    return valor if isinstance(valor, Decimal) else Decimal(str(valor))
+
+
+# ==============================================================
+# API escalar (gravação de uma nota)
+# ==============================================================
+
+def calcular_media(nota_mensal, nota_bimestral, recuperacao):
+    """
+    Calcula a média de uma nota.
+
+    Args:
+        nota_mensal, nota_bimestral, recuperacao: valores numéricos ou None
+
+    Returns:
+        float: média arredondada para 1 casa decimal
+    """
+    mensal = _decimal(nota_mensal)
+    bimestral = _decimal(nota_bimestral)
+    rec = _decimal(recuperacao)
+
+    if mensal is not None and bimestral is not None:
+        media = (mensal + bimestral) / 2
+    elif mensal is not None:
+        media = mensal
+    elif bimestral is not None:
+        media = bimestral
+    else:
+        media = Decimal(0)
+
+    if rec is not None and rec > 0:
+        media = (media + rec) / 2
+
+    return float(media.quantize(_UM_DECIMO, rounding=ROUND_HALF_UP))
+
+
+def situacao_final(media_anual):
+    """
+    Retorna a situação final do aluno na disciplina pela média anual.
+
+    Args:
+        media_anual: média das médias bimestrais, ou None se não houver notas
+    """
+    if media_anual is None:
+        return "Sem notas"
+    if media_anual >= MEDIA_APROVACAO:
+        return "Aprovado"
+    if media_anual >= MEDIA_RECUPERACAO_FINAL:
+        return "Recuperação Final"
+    return "Reprovado"
+
+
+# ==============================================================
+# API vetorizada (recálculo em lote)
+# ==============================================================
+
+def calcular_medias_lote(notas_mensais, notas_bimestrais, recuperacoes):
+    """
+    Calcula as médias de muitas notas de uma vez com NumPy.
+
+    Args:
+        notas_mensais, notas_bimestrais, recuperacoes: sequências de mesmo tamanho;
+            None ou NaN indicam nota ausente
+
+    Returns:
+        numpy.ndarray: médias (float64) arredondadas para 1 casa decimal
+    """
+    if np is None:
+        raise RuntimeError("numpy não está instalado; instale-o para usar o cálculo em lote")
+
+    mensal = np.asarray(notas_mensais, dtype=np.float64)
+    bimestral = np.asarray(notas_bimestrais, dtype=np.float64)
+    rec = np.asarray(recuperacoes, dtype=np.float64)
+
+    tem_mensal = ~np.isnan(mensal)
+    tem_bimestral = ~np.isnan(bimestral)
+    tem_rec = ~np.isnan(rec) & (rec > 0)
+
+    m = np.rint(np.where(tem_mensal, mensal, 0) * ESCALA).astype(np.int64)
+    b = np.rint(np.where(tem_bimestral, bimestral, 0) * ESCALA).astype(np.int64)
+    r = np.rint(np.where(tem_rec, rec, 0) * ESCALA).astype(np.int64)
+
+    # Média como fração exata numerador / denominador (em milésimos)
+    numerador = m + b
+    denominador = np.where(tem_mensal & tem_bimestral, 2, 1).astype(np.int64)
+
+    numerador = np.where(tem_rec, numerador + r * denominador, numerador)
+    denominador = np.where(tem_rec, denominador * 2, denominador)
+
+    # Arredondamento para décimos com meio para cima, em aritmética inteira:
+    # décimos = floor(numerador / (denominador * ESCALA / 10) + 1/2)
+    passo = ESCALA // 10
+    decimos = (2 * numerador + passo * denominador) // (2 * passo * denominador)
+    return decimos / 10.0
+
+
+# ==============================================================
+# Emissão de SQL
+# ==============================================================
+
+def expressao_sql_media(nota_mensal="nota_mensal", nota_bimestral="nota_bimestral",
+                        recuperacao="recuperacao"):
+    """
+    Retorna a expressão SQL equivalente a calcular_media para as colunas informadas.
+
+    Exemplo:
+        f"UPDATE nota SET media = {expressao_sql_media()}"
+        expressao_sql_media("NEW.nota_mensal", "NEW.nota_bimestral", "NEW.recuperacao")
+    """
+    m = f"{nota_mensal}::numeric"
+    b = f"{nota_bimestral}::numeric"
+    r = f"{recuperacao}::numeric"
+    base = (
+        f"CASE"
+        f" WHEN {nota_mensal} IS NOT NULL AND {nota_bimestral} IS NOT NULL THEN ({m} + {b}) / 2"
+        f" WHEN {nota_mensal} IS NOT NULL THEN {m}"
+        f" WHEN {nota_bimestral} IS NOT NULL THEN {b}"
+        f" ELSE 0::numeric END"
+    )
+    return (
+        f"ROUND(CASE"
+        f" WHEN {recuperacao} IS NOT NULL AND {recuperacao} > 0 THEN (({base}) + {r}) / 2"
+        f" ELSE ({base}) END, 1)"
+    )
+
+
+def expressao_sql_situacao(media_anual):
+    """Retorna a expressão SQL equivalente a situacao_final para a expressão informada."""
+    return (
+        f"CASE"
+        f" WHEN ({media_anual}) IS NULL THEN 'Sem notas'"
+        f" WHEN ({media_anual}) >= {MEDIA_APROVACAO} THEN 'Aprovado'"
+        f" WHEN ({media_anual}) >= {MEDIA_RECUPERACAO_FINAL} THEN 'Recuperação Final'"
+        f" ELSE 'Reprovado' END"
+    )
+
+
+def sql_trigger_media():
+    """
+    Retorna o script que recalcula as médias existentes, (re)cria a função e o
+    trigger calcular_media_correta e o controle de médias pendentes
+    (migracoes/0013_motor_medias.sql).
+    """
+    expressao = expressao_sql_media("NEW.nota_mensal", "NEW.nota_bimestral", "NEW.recuperacao")
+    return f"""-- Gerado por motor_medias.py (python motor_medias.py --sql). Não edite manualmente.
+
+-- Coluna que marca as notas cuja média gravada não corresponde às notas da linha
+ALTER TABLE nota ADD COLUMN IF NOT EXISTS media_pendente BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- Corrigir as médias existentes usando a fórmula do motor de médias
+-- (apenas as linhas que mudam são regravadas)
+UPDATE nota
+SET media = {expressao_sql_media()},
+    media_pendente = FALSE
+WHERE media IS DISTINCT FROM {expressao_sql_media()}
+   OR media_pendente;
+
+-- Função que calcula a média com a mesma fórmula da API
+CREATE OR REPLACE FUNCTION calcular_media_correta() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.media := {expressao};
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recriar o trigger para calcular a média automaticamente em inserções e atualizações
+DROP TRIGGER IF EXISTS calcular_media_trigger ON nota;
+CREATE TRIGGER calcular_media_trigger
+BEFORE INSERT OR UPDATE ON nota
+FOR EACH ROW
+EXECUTE FUNCTION calcular_media_correta();
+
+-- Função que marca a nota como pendente quando a média gravada não confere.
+-- Roda depois de calcular_media_trigger (triggers BEFORE disparam em ordem alfabética),
+-- então só marca linhas se o trigger de cálculo for removido ou desativado.
+CREATE OR REPLACE FUNCTION marcar_media_pendente() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.media_pendente := NEW.media IS DISTINCT FROM {expressao};
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS marcar_media_pendente_trigger ON nota;
+CREATE TRIGGER marcar_media_pendente_trigger
+BEFORE INSERT OR UPDATE OF nota_mensal, nota_bimestral, recuperacao, media ON nota
+FOR EACH ROW
+EXECUTE FUNCTION marcar_media_pendente();
+
+-- Índice parcial: contém apenas as notas pendentes, em ordem de id (recálculo por lotes)
+CREATE INDEX IF NOT EXISTS idx_nota_media_pendente ON nota (id) WHERE media_pendente;
+
+-- Índice para recalcular por escopo (ano/bimestre/turma/disciplina)
+CREATE INDEX IF NOT EXISTS idx_nota_ano_bimestre_turma_disciplina
+    ON nota (ano, bimestre, id_turma, id_disciplina);
+"""
+
+
+# Colunas de nota aceitas como filtro de escopo do recálculo (id_escola limita
+# o recálculo à partição da escola, ver tenancia_escola.py)
+COLUNAS_ESCOPO = ("id_escola", "ano", "bimestre", "id_turma", "id_disciplina")
+
+
+def _filtro_escopo(escopo):
+    """Monta as condições SQL e os parâmetros para um escopo {coluna: valor}."""
+    condicoes = []
+    params = []
+    for coluna in COLUNAS_ESCOPO:
+        valor = (escopo or {}).get(coluna)
+        if valor is not None:
+            condicoes.append(f"{coluna} = %s")
+            params.append(valor)
+    return condicoes, params
+
+
+def contar_pendentes(cursor, escopo=None):
+    """Conta as notas do escopo marcadas como pendentes."""
+    condicoes, params = _filtro_escopo(escopo)
+    where = " AND ".join(["media_pendente"] + condicoes)
+    cursor.execute(f"SELECT COUNT(*) FROM nota WHERE {where}", params)
+    return cursor.fetchone()[0]
+
+
+def recalcular_pendentes(conn, escopo=None, tamanho_lote=5000, completo=False, progresso=None):
+    """
+    Recalcula no banco, em lotes, as médias das notas de um escopo.
+
+    Cada lote é uma transação curta que trava apenas as linhas que ele altera;
+    linhas travadas por outra transação são puladas (SKIP LOCKED) e continuam
+    pendentes para a próxima execução.
+
+    Args:
+        conn: conexão psycopg2 (em autocommit; cada lote é confirmado sozinho)
+        escopo (dict, optional): filtros {id_escola, ano, bimestre, id_turma, id_disciplina}
+        tamanho_lote (int): linhas gravadas por transação
+        completo (bool): se True, reavalia todas as notas do escopo e não só as
+            marcadas como pendentes (útil antes do trigger de marcação existir)
+        progresso (callable, optional): chamado após cada lote com
+            (numero_lote, linhas_do_lote, total_ate_agora)
+
+    Returns:
+        dict: lotes executados e linhas atualizadas
+    """
+    condicoes, params = _filtro_escopo(escopo)
+    if completo:
+        condicoes.insert(0, f"(media_pendente OR media IS DISTINCT FROM {expressao_sql_media()})")
+    else:
+        condicoes.insert(0, "media_pendente")
+    where = " AND ".join(condicoes)
+
+    query = f"""
+        WITH lote AS (
+            SELECT id, id_escola FROM nota
+            WHERE id > %s AND {where}
+            ORDER BY id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE nota n
+        SET media = {expressao_sql_media("n.nota_mensal", "n.nota_bimestral", "n.recuperacao")},
+            media_pendente = FALSE
+        FROM lote
+        WHERE n.id = lote.id AND n.id_escola = lote.id_escola
+        RETURNING n.id
+    """
+
+    cursor = conn.cursor()
+    ultimo_id = 0
+    lotes = 0
+    atualizadas = 0
+    try:
+        while True:
+            cursor.execute(query, [ultimo_id] + params + [tamanho_lote])
+            ids = [linha[0] for linha in cursor.fetchall()]
+            if not conn.autocommit:
+                conn.commit()
+            if not ids:
+                break
+            lotes += 1
+            atualizadas += len(ids)
+            ultimo_id = max(ids)
+            if progresso is not None:
+                progresso(lotes, len(ids), atualizadas)
+    finally:
+        cursor.close()
+    return {"lotes": lotes, "atualizadas": atualizadas}
+
+
+# ==============================================================
+# Recálculo em lote a partir do banco
+# ==============================================================
+
+def recalcular_medias(conn, ano=None, tamanho_bloco=50000):
+    """
+    Recalcula em Python (vetorizado) as médias gravadas em nota e grava apenas as
+    que mudaram.
+
+    Args:
+        conn: conexão psycopg2
+        ano (int, optional): restringe o recálculo a um ano letivo
+        tamanho_bloco (int): linhas lidas e gravadas por vez
+
+    Returns:
+        dict: total de linhas lidas e de médias alteradas
+    """
+    import psycopg2.extras
+
+    filtro = "WHERE ano = %s" if ano is not None else ""
+    params = (ano,) if ano is not None else None
+
+    lidas = 0
+    alteradas = 0
+    # Cursor no servidor mantido entre commits: cada bloco é gravado em uma transação curta
+    conn.autocommit = False
+    leitura = conn.cursor(name="recalcular_medias", withhold=True)
+    leitura.itersize = tamanho_bloco
+    leitura.execute(
+        f"SELECT id, nota_mensal, nota_bimestral, recuperacao, media FROM nota {filtro} ORDER BY id",
+        params,
+    )
+    escrita = conn.cursor()
+    while True:
+        linhas = leitura.fetchmany(tamanho_bloco)
+        if not linhas:
+            break
+        lidas += len(linhas)
+        ids, mensais, bimestrais, recs, atuais = zip(*linhas)
+        novas = calcular_medias_lote(mensais, bimestrais, recs)
+        atuais = np.asarray(atuais, dtype=np.float64)
+        mudou = np.isnan(atuais) | (np.abs(novas - atuais) > 1e-9)
+        valores = [(ids[i], float(novas[i])) for i in np.flatnonzero(mudou)]
+        if valores:
+            psycopg2.extras.execute_values(
+                escrita,
+                "UPDATE nota SET media = v.media FROM (VALUES %s) AS v(id, media) WHERE nota.id = v.id",
+                valores,
+                page_size=len(valores),
+            )
+            alteradas += len(valores)
+        conn.commit()
+    leitura.close()
+    escrita.close()
+    conn.commit()
+    return {"lidas": lidas, "alteradas": alteradas}
+
+
+# ==============================================================
+# Verificação de consistência entre as implementações
+# ==============================================================
+
+def _nota_aleatoria(gerador):
+    sorteio = gerador.random()
+    if sorteio < 0.15:
+        return None
+    if sorteio < 0.25:
+        return 0.0
+    # Notas com 1 ou 2 casas decimais, incluindo valores terminados em 5 (casos de empate)
+    casas = gerador.choice((1, 2))
+    return round(gerador.randint(0, 10 * 10 ** casas) / 10 ** casas, casas)
+
+
+def gerar_casos(quantidade=10000, semente=None):
+    """Gera triplas (nota_mensal, nota_bimestral, recuperacao) aleatórias."""
+    gerador = random.Random(semente)
+    return [
+        (_nota_aleatoria(gerador), _nota_aleatoria(gerador), _nota_aleatoria(gerador))
+        for _ in range(quantidade)
+    ]
+
+
+def verificar_consistencia(casos=None, cursor=None):
+    """
+    Compara a API escalar, a vetorizada e (se um cursor for informado) o SQL emitido.
+
+    Returns:
+        list: casos divergentes no formato (entrada, escalar, vetorizado, sql)
+    """
+    if casos is None:
+        casos = gerar_casos()
+    escalares = [calcular_media(*caso) for caso in casos]
+    vetorizados = calcular_medias_lote(*zip(*casos)).tolist()
+
+    resultados_sql = [None] * len(casos)
+    if cursor is not None:
+        import psycopg2.extras
+        linhas = psycopg2.extras.execute_values(
+            cursor,
+            f"SELECT v.i, {expressao_sql_media()} FROM (VALUES %s) AS "
+            f"v(i, nota_mensal, nota_bimestral, recuperacao) ORDER BY v.i",
+            [(i, *caso) for i, caso in enumerate(casos)],
+            template="(%s, %s::numeric, %s::numeric, %s::numeric)",
+            page_size=len(casos),
+            fetch=True,
+        )
+        resultados_sql = [float(valor) for _, valor in linhas]
+
+    divergentes = []
+    for caso, escalar, vetorizado, sql in zip(casos, escalares, vetorizados, resultados_sql):
+        if abs(escalar - vetorizado) > 1e-9 or (sql is not None and abs(escalar - sql) > 1e-9):
+            divergentes.append((caso, escalar, vetorizado, sql))
+    return divergentes
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Motor de cálculo de médias")
+    parser.add_argument("--sql", action="store_true", help="imprime o script de migracoes/0013_motor_medias.sql")
+    parser.add_argument("--verificar", action="store_true",
+                        help="compara as implementações escalar, vetorizada e SQL (com --banco)")
+    parser.add_argument("--banco", action="store_true", help="usa o banco configurado em db_config")
+    parser.add_argument("--recalcular", type=int, metavar="ANO", help="recalcula as médias do ano")
+    parser.add_argument("--pendentes", action="store_true",
+                        help="grava no banco as médias marcadas como pendentes")
+    parser.add_argument("--casos", type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.sql:
+        print(sql_trigger_media(), end="")
+
+    if args.verificar:
+        cursor = None
+        if args.banco:
+            from db_config import get_db_connection
+            cursor = get_db_connection().cursor()
+        divergentes = verificar_consistencia(gerar_casos(args.casos), cursor)
+        for caso in divergentes[:20]:
+            print(f"DIVERGÊNCIA: entrada={caso[0]} escalar={caso[1]} vetorizado={caso[2]} sql={caso[3]}")
+        print(f"{args.casos} casos verificados, {len(divergentes)} divergências")
+        raise SystemExit(1 if divergentes else 0)
+
+    if args.recalcular is not None:
+        from db_config import get_db_connection
+        print(recalcular_medias(get_db_connection(), ano=args.recalcular))
+
+    if args.pendentes:
+        from db_config import get_db_connection
+        conn = get_db_connection()
+        conn.autocommit = True
+        print(recalcular_pendentes(
+            conn,
+            progresso=lambda lote, linhas, total: print(f"lote {lote}: {linhas} notas ({total} no total)"),
+        ))
@@ -0,0 +1,165 @@
+"""
+Orçamento de consultas por requisição e detecção de N+1
+Cada requisição HTTP tem um registro das consultas que executou (observador de
+medicao_db.py): quantas foram e quantas vezes cada forma de consulta se
+repetiu (impressao_digital). Uma requisição é sinalizada quando:
+    - executa mais consultas que o orçamento (CONSULTAS_ORCAMENTO), ou
+    - repete a mesma forma de consulta CONSULTAS_REPETIDAS vezes ou mais,
+      o padrão N+1 de uma consulta por linha de uma listagem.
+
+As requisições sinalizadas são registradas em WARNING (em produção, uma linha
+JSON com a rota, o total e as consultas repetidas). Fora de produção a
+resposta também traz o cabeçalho X-Consultas (total de consultas e, se houver,
+o motivo do alerta), visível nas ferramentas do navegador.
+
+Os relatórios de cada requisição concluída podem ser acompanhados com
+ouvir(), como faz o plugin de pytest (pytest_orcamento_consultas.py).
+
+Variáveis de ambiente:
+    CONSULTAS_ORCAMENTO   consultas permitidas por requisição (padrão 25; 0 desativa)
+    CONSULTAS_REPETIDAS   repetições da mesma forma que contam como N+1 (padrão 5; 0 desativa)
+"""
+import os
+import logging
+from contextvars import ContextVar
+
+from medicao_db import impressao_digital, normalizar
+
+logger = logging.getLogger(__name__)
+
+# Cabeçalho da resposta com o total de consultas (fora de produção)
+CABECALHO_CONSULTAS = "X-Consultas"
+
+# Registro da requisição em andamento
+_registro_atual = ContextVar("registro_consultas", default=None)
+
+_ouvintes = []
+
+
+class RelatorioConsultas:
+    """
+    Consultas executadas por uma requisição.
+
+    Attributes:
+        metodo, caminho, rota: da requisição (rota é o modelo, ex.: /api/alunos/{aluno_id})
+        total (int): consultas executadas
+        segundos (float): tempo total das consultas
+        formas (dict): impressão digital -> [execuções, sql da primeira execução]
+    """
+    __slots__ = ("metodo", "caminho", "rota", "total", "segundos", "formas")
+
+    def __init__(self, metodo, caminho):
+        self.metodo = metodo
+        self.caminho = caminho
+        self.rota = caminho
+        self.total = 0
+        self.segundos = 0.0
+        self.formas = {}
+
+    def registrar(self, sql, duracao):
+        self.total += 1
+        self.segundos += duracao
+        chave = impressao_digital(sql)
+        forma = self.formas.get(chave)
+        if forma is None:
+            self.formas[chave] = [1, sql]
+        else:
+            forma[0] += 1
+
+    def repetidas(self, minimo):
+        """Formas executadas pelo menos 'minimo' vezes: [(execuções, sql normalizado)], da mais repetida."""
+        if minimo is None:
+            return []
+        return sorted(
+            ((execucoes, normalizar(sql)) for execucoes, sql in self.formas.values() if execucoes >= minimo),
+            reverse=True,
+        )
+
+    def alertas(self, orcamento, repeticoes):
+        """Motivos pelos quais a requisição deve ser sinalizada (None desativa cada verificação)."""
+        motivos = []
+        if orcamento is not None and self.total > orcamento:
+            motivos.append(f"orcamento {self.total}/{orcamento}")
+        for execucoes, sql in self.repetidas(repeticoes):
+            motivos.append(f"repetida {execucoes}x: {sql[:120]}")
+        return motivos
+
+
+def registrar_consulta(sql, duracao):
+    """Observador de medicao_db: soma a consulta ao registro da requisição em andamento."""
+    registro = _registro_atual.get()
+    if registro is not None:
+        registro.registrar(sql, duracao)
+
+
+def ouvir(funcao):
+    """Registra funcao(relatorio) para ser chamada ao fim de cada requisição."""
+    _ouvintes.append(funcao)
+    return funcao
+
+
+def parar_de_ouvir(funcao):
+    if funcao in _ouvintes:
+        _ouvintes.remove(funcao)
+
+
+class OrcamentoConsultasMiddleware:
+    """
+    Middleware ASGI que registra as consultas de cada requisição.
+
+    Deve ficar por fora do empréstimo de conexão do pool, para que todas as
+    consultas da requisição (inclusive as do ETag) sejam contadas. Com
+    cabecalho=True (fora de produção) a resposta recebe X-Consultas com as
+    consultas executadas até o envio dos cabeçalhos.
+    """
+
+    def __init__(self, app, cabecalho=False, orcamento=None, repeticoes=None):
+        self.app = app
+        self.cabecalho = cabecalho
+        # 0 nas variáveis de ambiente desativa a verificação
+        self.orcamento = orcamento if orcamento is not None else int(os.environ.get("CONSULTAS_ORCAMENTO", "25")) or None
+        self.repeticoes = repeticoes if repeticoes is not None else int(os.environ.get("CONSULTAS_REPETIDAS", "5")) or None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registro = RelatorioConsultas(scope["method"], scope["path"])
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                valor = "; ".join([str(registro.total)] + registro.alertas(self.orcamento, self.repeticoes))
+                cabecalhos = list(mensagem.get("headers", []))
+                cabecalhos.append((CABECALHO_CONSULTAS.lower().encode(), valor.encode("latin-1", "replace")))
+                mensagem = {**mensagem, "headers": cabecalhos}
+            await send(mensagem)
+
+        token = _registro_atual.set(registro)
+        try:
+            await self.app(scope, receive, enviar if self.cabecalho else send)
+        finally:
+            _registro_atual.reset(token)
+            rota = scope.get("route")
+            if rota is not None:
+                registro.rota = rota.path
+            self._concluir(registro)
+
+    def _concluir(self, registro):
+        alertas = registro.alertas(self.orcamento, self.repeticoes)
+        if alertas:
+            logger.warning(
+                f"{registro.metodo} {registro.rota}: {registro.total} consultas "
+                f"({registro.segundos * 1000:.1f} ms) - {'; '.join(alertas)}",
+                extra={
+                    "rota": registro.rota,
+                    "consultas": registro.total,
+                    "consultas_ms": round(registro.segundos * 1000, 1),
+                    "repetidas": [{"execucoes": n, "sql": sql} for n, sql in registro.repetidas(self.repeticoes)],
+                },
+            )
+        for funcao in _ouvintes:
+            try:
+                funcao(registro)
+            except Exception:
+                logger.exception("Erro no ouvinte do orçamento de consultas")
@@ -0,0 +1,209 @@
+"""
+Paginação por chave (keyset)
+Cada listagem declara sua ordenação uma única vez (OrdemPaginacao). A partir
+dela são gerados o ORDER BY, a condição que continua a partir da última linha
+da página anterior e o cursor opaco entregue ao cliente. Diferente de
+LIMIT/OFFSET, o custo de uma página não cresce com a profundidade: o banco
+posiciona o índice diretamente na chave do cursor.
+
+O cursor é a última chave de ordenação codificada em base64 (JSON), junto com
+o nome da listagem, de modo que um cursor de /api/alunos não é aceito em
+/api/notas. As colunas de ordenação devem ser NOT NULL e a última deve ser
+única (normalmente o id), para que nenhuma linha seja pulada ou repetida.
+
+Uso como script:
+    python paginacao.py --sql > migracoes/0007_paginacao.sql
+"""
+import json
+import base64
+import datetime
+import decimal
+
+# Cabeçalho com o cursor da próxima página (ausente na última página)
+CABECALHO_CURSOR = "X-Proximo-Cursor"
+
+LIMITE_MAXIMO = 1000
+
+
+class CursorInvalido(ValueError):
+    """Cursor malformado ou de outra listagem."""
+
+
+def _valor_json(valor):
+    if isinstance(valor, (datetime.datetime, datetime.date)):
+        return valor.isoformat()
+    if isinstance(valor, decimal.Decimal):
+        return str(valor)
+    return valor
+
+
+class OrdemPaginacao:
+    """
+    Ordenação de uma listagem paginada.
+
+    Args:
+        nome (str): identifica a listagem dentro do cursor
+        colunas (list): tuplas (expressao_sql, campo, descendente), em que campo é
+            a chave (ou índice) da coluna na linha retornada pela consulta
+        tabela (str, optional): tabela do índice que atende a ordenação
+        colunas_indice (str, optional): colunas do índice, na ordem da ordenação
+    """
+
+    def __init__(self, nome, colunas, tabela=None, colunas_indice=None):
+        self.nome = nome
+        self.colunas = colunas
+        self.tabela = tabela
+        self.colunas_indice = colunas_indice
+
+    def order_by(self):
+        return ", ".join(f"{expr} DESC" if desc else expr for expr, _, desc in self.colunas)
+
+    def _condicao(self, valores):
+        """Condição SQL que seleciona as linhas posteriores à chave informada."""
+        direcoes = {desc for _, _, desc in self.colunas}
+        if len(direcoes) == 1:
+            # Mesma direção em todas as colunas: comparação de linha, atendida
+            # diretamente pelo índice
+            operador = "<" if direcoes.pop() else ">"
+            expressoes = ", ".join(expr for expr, _, _ in self.colunas)
+            marcadores = ", ".join(["%s"] * len(valores))
+            return f"({expressoes}) {operador} ({marcadores})", list(valores)
+
+        # Direções mistas: (a > x) OR (a = x AND b < y) OR ...
+        alternativas = []
+        params = []
+        for i, (expr, _, desc) in enumerate(self.colunas):
+            termos = [f"{anterior} = %s" for anterior, _, _ in self.colunas[:i]]
+            termos.append(f"{expr} {'<' if desc else '>'} %s")
+            alternativas.append("(" + " AND ".join(termos) + ")")
+            params.extend(valores[:i + 1])
+        # A primeira coluna também é limitada isoladamente, o que permite ao banco
+        # usar o índice para começar a leitura perto do cursor
+        primeira, _, desc = self.colunas[0]
+        condicao = f"{primeira} {'<=' if desc else '>='} %s AND ({' OR '.join(alternativas)})"
+        return condicao, [valores[0]] + params
+
+    def montar_consulta(self, consulta, params, limit=None, cursor=None, tem_where=False):
+        """
+        Acrescenta à consulta a condição do cursor, o ORDER BY e o LIMIT.
+
+        Uma linha a mais do que o limite é lida para saber se há próxima página.
+
+        Returns:
+            tuple: (sql, params)
+        """
+        params = list(params or [])
+        if cursor:
+            condicao, params_cursor = self._condicao(self.decodificar(cursor))
+            consulta += (" AND " if tem_where else " WHERE ") + condicao
+            params.extend(params_cursor)
+        consulta += " ORDER BY " + self.order_by()
+        if limit is not None:
+            consulta += " LIMIT %s"
+            params.append(limit + 1)
+        return consulta, params
+
+    def pagina(self, linhas, limit=None):
+        """
+        Separa a página das linhas lidas por montar_consulta.
+
+        Returns:
+            tuple: (linhas da página, cursor da próxima página ou None)
+        """
+        if limit is None or len(linhas) <= limit:
+            return linhas, None
+        linhas = linhas[:limit]
+        return linhas, self.codificar(linhas[-1])
+
+    def codificar(self, linha):
+        valores = [_valor_json(linha[campo]) for _, campo, _ in self.colunas]
+        dados = json.dumps({"l": self.nome, "v": valores}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(dados.encode()).decode().rstrip("=")
+
+    def decodificar(self, cursor):
+        try:
+            dados = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            valores = dados["v"]
+            nome = dados["l"]
+        except (ValueError, TypeError, KeyError):
+            raise CursorInvalido("Cursor inválido")
+        if nome != self.nome or not isinstance(valores, list) or len(valores) != len(self.colunas):
+            raise CursorInvalido("Cursor inválido para esta listagem")
+        if any(valor is None for valor in valores):
+            raise CursorInvalido("Cursor inválido")
+        return valores
+
+    def sql_indice(self):
+        if not self.tabela:
+            return None
+        # Algumas tabelas (escolas, log_atividade) podem ainda não existir
+        return (f"DO $$\nBEGIN\n"
+                f"    IF to_regclass('{self.tabela}') IS NOT NULL THEN\n"
+                f"        CREATE INDEX IF NOT EXISTS idx_{self.tabela}_paginacao "
+                f"ON {self.tabela} ({self.colunas_indice});\n"
+                f"    END IF;\nEND $$;")
+
+
+# Ordenações das listagens paginadas
+ORDEM_ALUNOS = OrdemPaginacao(
+    "alunos",
+    [("a.nome_aluno", 2, False), ("a.id", 0, False)],
+    tabela="aluno", colunas_indice="nome_aluno, id",
+)
+ORDEM_PROFESSORES = OrdemPaginacao(
+    "professores",
+    [("p.nome_professor", "nome_professor", False), ("p.id", "id", False)],
+    tabela="professor", colunas_indice="nome_professor, id",
+)
+ORDEM_ESCOLAS = OrdemPaginacao(
+    "escolas",
+    [("razao_social", "razao_social", False), ("id_escola", "id_escola", False)],
+    tabela="escolas", colunas_indice="razao_social, id_escola",
+)
+ORDEM_NOTAS = OrdemPaginacao(
+    "notas",
+    [("n.ano", 4, True), ("n.bimestre", 5, False), ("n.id_turma", 3, False),
+     ("n.id_disciplina", 2, False), ("n.id_aluno", 1, False), ("n.id", 0, False)],
+    tabela="nota", colunas_indice="ano DESC, bimestre, id_turma, id_disciplina, id_aluno, id",
+)
+# O nome do aluno vem do JOIN; o índice de nota atende o prefixo (ano, bimestre)
+ORDEM_NOTAS_COMPLETO = OrdemPaginacao(
+    "notas_completo",
+    [("n.ano", 8, True), ("n.bimestre", 9, False), ("a.nome_aluno", 2, False), ("n.id", 0, False)],
+)
+ORDEM_VINCULOS = OrdemPaginacao(
+    "vinculos",
+    [("id", "id", False)],
+)
+ORDEM_LOGS = OrdemPaginacao(
+    "logs",
+    [("data_hora", "data_hora", True), ("id", "id", True)],
+    tabela="log_atividade", colunas_indice="data_hora DESC, id DESC",
+)
+
+ORDENS = [ORDEM_ALUNOS, ORDEM_PROFESSORES, ORDEM_ESCOLAS, ORDEM_NOTAS,
+          ORDEM_NOTAS_COMPLETO, ORDEM_VINCULOS, ORDEM_LOGS]
+
+
+def sql_indices_paginacao():
+    """Retorna o script com os índices que atendem as ordenações (migracoes/0007_paginacao.sql)."""
+    linhas = [
+        "-- Gerado por paginacao.py (python paginacao.py --sql). Não edite manualmente.",
+        "",
+        "-- Índices compostos na mesma ordem das listagens paginadas",
+    ]
+    for ordem in ORDENS:
+        if ordem.sql_indice():
+            linhas += ["", ordem.sql_indice()]
+    return "\n".join(linhas) + "\n"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Paginação por chave")
+    parser.add_argument("--sql", action="store_true", help="imprime o script de migracoes/0007_paginacao.sql")
+    args = parser.parse_args()
+
+    if args.sql:
+        print(sql_indices_paginacao(), end="")
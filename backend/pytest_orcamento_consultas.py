@@ -0,0 +1,86 @@
+"""
+Plugin de pytest para o orçamento de consultas por requisição
+Falha o teste quando uma requisição feita por ele executa mais consultas que
+o permitido ou repete a mesma forma de consulta (N+1). As requisições são
+medidas pelo OrcamentoConsultasMiddleware da aplicação (orcamento_consultas.py),
+inclusive as feitas pelo TestClient em outro thread.
+
+Ativação (conftest.py ou linha de comando):
+    pytest_plugins = ["pytest_orcamento_consultas"]
+    pytest -p pytest_orcamento_consultas
+
+Uso com o marcador, conferido ao fim do teste para todas as requisições:
+    @pytest.mark.orcamento_consultas(maximo=3, repetidas=2)
+    def test_listar_professores(cliente):
+        cliente.get("/api/professores/")
+
+Uso com a fixture, por trecho do teste:
+    def test_vincular_turmas(cliente, orcamento_consultas):
+        with orcamento_consultas(maximo=4, repetidas=2):
+            cliente.post("/api/disciplinas/MAT/turmas", json={"turmas_ids": ["1A", "1B", "1C"]})
+        assert orcamento_consultas.relatorios[-1].total <= 4
+
+maximo é o total de consultas permitido por requisição; repetidas é o número
+de execuções da mesma forma de consulta a partir do qual a requisição falha
+(padrão 2: nenhuma forma pode se repetir). Qualquer um pode ser None.
+"""
+from contextlib import contextmanager
+
+import pytest
+
+from orcamento_consultas import ouvir, parar_de_ouvir
+
+
+class OrcamentoConsultas:
+    """Relatórios das requisições feitas durante o teste e verificação do orçamento."""
+
+    def __init__(self):
+        self.relatorios = []
+
+    def _registrar(self, relatorio):
+        self.relatorios.append(relatorio)
+
+    def verificar(self, relatorios=None, maximo=None, repetidas=2):
+        """Falha o teste se alguma requisição estourar o orçamento."""
+        falhas = []
+        for relatorio in self.relatorios if relatorios is None else relatorios:
+            alertas = relatorio.alertas(maximo, repetidas)
+            if alertas:
+                falhas.append(f"{relatorio.metodo} {relatorio.caminho}: {relatorio.total} consultas - "
+                              + "; ".join(alertas))
+        if falhas:
+            pytest.fail("Orçamento de consultas excedido:\n  " + "\n  ".join(falhas), pytrace=False)
+
+    @contextmanager
+    def __call__(self, maximo=None, repetidas=2):
+        inicio = len(self.relatorios)
+        yield self
+        self.verificar(self.relatorios[inicio:], maximo, repetidas)
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "orcamento_consultas(maximo=None, repetidas=2): limita as consultas de cada requisição do teste",
+    )
+
+
+@pytest.fixture
+def orcamento_consultas():
+    orcamento = OrcamentoConsultas()
+    ouvir(orcamento._registrar)
+    try:
+        yield orcamento
+    finally:
+        parar_de_ouvir(orcamento._registrar)
+
+
+@pytest.fixture(autouse=True)
+def _orcamento_consultas_marcador(request):
+    marcador = request.node.get_closest_marker("orcamento_consultas")
+    if marcador is None:
+        yield
+        return
+    orcamento = request.getfixturevalue("orcamento_consultas")
+    yield
+    orcamento.verificar(**marcador.kwargs)
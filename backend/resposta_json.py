@@ -0,0 +1,226 @@
+"""
+Resposta JSON rápida para listagens grandes
+No caminho normal do FastAPI, cada linha vira um dict em Python, é validada
+de novo contra o response_model (Pydantic), passa pelo jsonable_encoder e só
+então é serializada com o json da biblioteca padrão. Para dados que vêm
+direto do banco essa validação é redundante.
+
+Aqui as linhas do cursor são convertidas diretamente em bytes JSON:
+    - os formatadores de cada coluna (datas, Decimal) são escolhidos uma única
+      vez, pela descrição do cursor, e não a cada valor;
+    - a serialização usa orjson quando instalado (com fallback para json);
+    - o endpoint retorna RespostaJSONRapida, que o FastAPI envia sem validar.
+
+Com modelo (o response_model do endpoint), as chaves seguem a ordem dos campos
+do modelo, como na resposta validada pelo FastAPI, qualquer que seja a ordem
+das colunas do SELECT; colunas que não são campos do modelo são omitidas.
+
+Uso:
+    cursor.execute(query, params)
+    return resposta_linhas(cursor.description, cursor.fetchall(), modelo=Aluno)
+
+Uso como script (benchmark contra o caminho atual):
+    python resposta_json.py --linhas 10000 100000
+"""
+import json
+import datetime
+import decimal
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - sem orjson, usa o json da biblioteca padrão
+    orjson = None
+
+# Códigos de tipo do PostgreSQL (pg_type.oid) que precisam de formatação
+_OID_DATE = 1082
+_OID_TIMESTAMP = 1114
+_OID_TIMESTAMPTZ = 1184
+_OID_TIME = 1083
+_OID_NUMERIC = 1700
+
+
+def _iso(valor):
+    return valor.isoformat()
+
+
+if orjson is not None:
+    def dumps(dados):
+        """Serializa para bytes JSON (orjson)."""
+        return orjson.dumps(dados)
+
+    # orjson já serializa date/datetime no formato ISO 8601
+    _FORMATADORES_OID = {_OID_NUMERIC: float}
+else:
+    def dumps(dados):
+        """Serializa para bytes JSON (json da biblioteca padrão)."""
+        return json.dumps(dados, ensure_ascii=False, separators=(",", ":"), default=_padrao_json).encode()
+
+    _FORMATADORES_OID = {
+        _OID_DATE: _iso, _OID_TIMESTAMP: _iso, _OID_TIMESTAMPTZ: _iso, _OID_TIME: _iso,
+        _OID_NUMERIC: float,
+    }
+
+
+def _padrao_json(valor):
+    if isinstance(valor, (datetime.date, datetime.datetime, datetime.time)):
+        return valor.isoformat()
+    if isinstance(valor, decimal.Decimal):
+        return float(valor)
+    raise TypeError(f"Tipo não serializável em JSON: {type(valor).__name__}")
+
+
+class RespostaJSONRapida(Response):
+    """Resposta com corpo JSON já serializado (sem validação do response_model)."""
+    media_type = "application/json"
+
+    def render(self, content):
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def formatadores_colunas(descricao):
+    """
+    Escolhe, uma vez por consulta, o formatador de cada coluna.
+
+    Args:
+        descricao: cursor.description
+
+    Returns:
+        list: (índice, função) apenas das colunas que precisam de formatação
+    """
+    return [(i, _FORMATADORES_OID[coluna.type_code])
+            for i, coluna in enumerate(descricao)
+            if coluna.type_code in _FORMATADORES_OID]
+
+
+def linhas_para_dicts(nomes, linhas, formatadores=()):
+    """Converte tuplas do cursor em dicts, aplicando os formatadores das colunas."""
+    if not formatadores:
+        return [dict(zip(nomes, linha)) for linha in linhas]
+
+    resultado = []
+    for linha in linhas:
+        valores = list(linha)
+        for i, formatar in formatadores:
+            valor = valores[i]
+            if valor is not None:
+                valores[i] = formatar(valor)
+        resultado.append(dict(zip(nomes, valores)))
+    return resultado
+
+
+def ordenar_pelo_modelo(modelo, descricao, linhas):
+    """
+    Reordena as colunas na ordem dos campos do modelo Pydantic.
+
+    Returns:
+        tuple: (descrição, linhas) apenas com as colunas que são campos do modelo
+    """
+    posicoes = {coluna.name: i for i, coluna in enumerate(descricao)}
+    indices = [posicoes[campo] for campo in modelo.model_fields if campo in posicoes]
+    if indices == list(range(len(descricao))):
+        return descricao, linhas
+    return ([descricao[i] for i in indices],
+            [tuple(linha[i] for i in indices) for linha in linhas])
+
+
+def codificar_linhas(descricao, linhas, nomes=None, modelo=None):
+    """
+    Codifica as linhas de um cursor como um array JSON de objetos.
+
+    Args:
+        descricao: cursor.description (tipos e nomes das colunas)
+        linhas: tuplas retornadas pelo cursor
+        nomes (list, optional): nomes das chaves; por padrão, os nomes das colunas
+        modelo (optional): modelo Pydantic cuja ordem de campos as chaves seguem
+
+    Returns:
+        bytes: JSON
+    """
+    if modelo is not None:
+        descricao, linhas = ordenar_pelo_modelo(modelo, descricao, linhas)
+    nomes = nomes or [coluna.name for coluna in descricao]
+    return dumps(linhas_para_dicts(nomes, linhas, formatadores_colunas(descricao)))
+
+
+def resposta_linhas(descricao, linhas, nomes=None, headers=None, modelo=None):
+    """Resposta JSON com as linhas do cursor (ver codificar_linhas)."""
+    return RespostaJSONRapida(codificar_linhas(descricao, linhas, nomes, modelo), headers=headers)
+
+
+def resposta_json(dados, headers=None):
+    """Resposta JSON para dados já montados (dicts/listas), sem validação."""
+    return RespostaJSONRapida(dumps(dados), headers=headers)
+
+
+if __name__ == "__main__":
+    # Benchmark: caminho atual (dicts + validação Pydantic + jsonable_encoder +
+    # json) contra o caminho rápido, com linhas no formato de /api/notas/completo/
+    import argparse
+    import time
+    from collections import namedtuple
+    from typing import Dict, List
+
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+
+    parser = argparse.ArgumentParser(description="Benchmark da resposta JSON rápida")
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    Coluna = namedtuple("Coluna", "name type_code")
+    descricao = [
+        Coluna("id", 23), Coluna("id_aluno", 1043), Coluna("nome_aluno", 1043),
+        Coluna("id_disciplina", 1043), Coluna("nome_disciplina", 1043), Coluna("id_turma", 1043),
+        Coluna("serie", 1043), Coluna("turno", 1043), Coluna("ano", 23), Coluna("bimestre", 23),
+        Coluna("nota_mensal", 701), Coluna("nota_bimestral", 701), Coluna("recuperacao", 701),
+        Coluna("media", _OID_NUMERIC), Coluna("frequencia", 23), Coluna("data_nasc", _OID_DATE),
+    ]
+    nomes = [coluna.name for coluna in descricao]
+
+    def gerar(n):
+        return [
+            (i, f"ALU{i:05d}", f"Aluno {i}", "MAT", "Matemática", "1A", "1º Ano", "Manhã",
+             2025, i % 4 + 1, 7.5, 8.0, None, decimal.Decimal("7.8"), 10,
+             datetime.date(2010, 1 + i % 12, 1 + i % 28))
+            for i in range(n)
+        ]
+
+    adaptador = TypeAdapter(List[Dict])
+
+    def caminho_atual(linhas):
+        # O que os endpoints fazem hoje: monta dicts linha a linha e o FastAPI
+        # valida, converte (jsonable_encoder) e serializa com json.dumps
+        dados = []
+        for linha in linhas:
+            item = {nome: linha[i] for i, nome in enumerate(nomes)}
+            item["data_nasc"] = item["data_nasc"].isoformat() if item["data_nasc"] else None
+            dados.append(item)
+        validados = adaptador.validate_python(dados)
+        return json.dumps(jsonable_encoder(validados), ensure_ascii=False,
+                          allow_nan=False, separators=(",", ":")).encode()
+
+    def caminho_rapido(linhas):
+        return codificar_linhas(descricao, linhas)
+
+    def medir(funcao, linhas):
+        melhor = float("inf")
+        for _ in range(args.repeticoes):
+            inicio = time.perf_counter()
+            corpo = funcao(linhas)
+            melhor = min(melhor, time.perf_counter() - inicio)
+        return melhor, len(corpo)
+
+    print(f"Serializador: {'orjson ' + orjson.__version__ if orjson else 'json (biblioteca padrão)'}")
+    for n in args.linhas:
+        linhas = gerar(n)
+        assert json.loads(caminho_atual(linhas[:50])) == json.loads(caminho_rapido(linhas[:50]))
+        t_atual, tam_atual = medir(caminho_atual, linhas)
+        t_rapido, tam_rapido = medir(caminho_rapido, linhas)
+        print(f"{n:>7} linhas | atual {t_atual * 1000:8.1f} ms ({tam_atual / 1e6:.1f} MB)"
+              f" | rápido {t_rapido * 1000:8.1f} ms ({tam_rapido / 1e6:.1f} MB)"
+              f" | {t_atual / t_rapido:5.1f}x")
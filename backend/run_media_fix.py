@@ -149,7 +149,9 @@ if __name__ == "__main__":
     print("=== INICIANDO CORREÇÃO DO CÁLCULO DE MÉDIAS ===")
     
     # Etapa 1: Executar script SQL para criar trigger e atualizar médias
-    sql_sucesso = executar_script_sql('update_media_calculation.sql')
+    # (a mesma migração aplicada por python migracoes.py --aplicar; é idempotente)
+    sql_sucesso = executar_script_sql(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                   'migracoes', '0013_motor_medias.sql'))
     
     # Etapa 2: Executar script Python para garantir que todas as médias estão atualizadas
     if sql_sucesso:
@@ -5,22 +5,53 @@ para conexão direta com o PostgreSQL.
 """
 from fastapi import Request, FastAPI, HTTPException, Depends, status, Query, Path, Body
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import psycopg2
+import psycopg2.errors
 import psycopg2.extras
 import uvicorn
+import anyio
 import sys
 import os
 from datetime import date, datetime
 import logging
-
-# Configurar logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+import threading
+import time
+import hashlib
+
+from db_pool import ConnectionPool
+from medicao_db import ConexaoMedida, observar as observar_consultas
+from metricas import CONTENT_TYPE_METRICAS, Metricas, MetricasMiddleware
+from orcamento_consultas import CABECALHO_CONSULTAS, OrcamentoConsultasMiddleware, registrar_consulta
+from cache_referencia import CacheReferencia
+from compressao import CompressaoMiddleware
+from log_atividade import GravadorLogAtividade
+from logs_estruturados import CABECALHO_ID_REQUISICAO, IdRequisicaoMiddleware, configurar_logs
+from carregador_relacoes import CarregadorRelacoes
+from particoes_log import manter_particoes
+from tenancia_escola import EscolaMiddleware, condicao_escola, escola_atual, manter_particoes_nota
+from calendario_periodos import intervalo_consulta, intervalo_mes
+from calendario_recorrencia import CONDICAO_PERIODO_OU_SERIE, FREQUENCIAS, CacheOcorrencias, janela_expansao
+from migracoes import aplicar_pendentes, verificar as verificar_esquema
+from autocompletar import TIPOS as TIPOS_AUTOCOMPLETAR, IndiceAutocompletar
+from busca import LIMITE_MAXIMO as LIMITE_MAXIMO_BUSCA, LIMITE_PADRAO as LIMITE_PADRAO_BUSCA, buscar, escapar_like
+from paginacao import (
+    CABECALHO_CURSOR, LIMITE_MAXIMO, CursorInvalido, ORDEM_ALUNOS, ORDEM_ESCOLAS, ORDEM_LOGS,
+    ORDEM_NOTAS, ORDEM_NOTAS_COMPLETO, ORDEM_PROFESSORES, ORDEM_VINCULOS
 )
+from motor_medias import calcular_media, contar_pendentes, recalcular_pendentes
+import boletim_pdf
+from resposta_json import resposta_json, resposta_linhas, dumps as json_dumps_rapido
+
+# Verificar se estamos em ambiente de produção
+IS_PRODUCTION = os.environ.get('PRODUCTION', 'False') == 'True'
+
+# Configurar logging: fila com escrita em thread separado, INFO em produção
+# (níveis por módulo, formato e amostragem de DEBUG: ver logs_estruturados.py)
+configurar_logs(producao=IS_PRODUCTION)
 logger = logging.getLogger(__name__)
 
 # Configuração de codificação para caracteres especiais
@@ -34,9 +65,6 @@ if sys.version_info >= (3, 7):
         except:
             pass
 
-# Verificar se estamos em ambiente de produção
-IS_PRODUCTION = os.environ.get('PRODUCTION', 'False') == 'True'
-
 # Criação da aplicação FastAPI
 app = FastAPI(
     title="Sistema de Gestão Escolar API Simplificada",
@@ -44,6 +72,50 @@ app = FastAPI(
     version="1.0.0",
 )
 
+# Listagens com validador HTTP (ETag): caminho -> tabelas das quais a resposta depende.
+# O ETag é montado a partir das versões dessas tabelas (versao_referencia), e não
+# do corpo, de modo que um If-None-Match válido é respondido com 304 antes de
+# qualquer consulta do endpoint.
+ROTAS_VERSIONADAS = {
+    "/api/turmas": ("turma",),
+    "/api/disciplinas": ("disciplina", "turma_disciplina", "turma"),
+    "/api/alunos": ("aluno",),
+    "/api/professores": ("professor", "professor_disciplina_turma"),
+    "/api/professores/filtro": ("professor", "professor_disciplina_turma"),
+}
+
+# Alterar quando o formato das respostas mudar, para invalidar os ETags já emitidos
+VERSAO_ETAG = "1"
+
+# Os middlewares registrados por último ficam mais externos. ETag e compressão
+# são registrados antes do CORS para que os 304 também recebam os cabeçalhos CORS.
+app.add_middleware(CompressaoMiddleware)
+
+@app.middleware("http")
+async def etag_por_versao(request: Request, call_next):
+    tabelas = ROTAS_VERSIONADAS.get(request.url.path.rstrip("/"))
+    if request.method != "GET" or tabelas is None:
+        return await call_next(request)
+
+    versoes = await run_in_threadpool(referencia_cache.versoes, tabelas)
+    if versoes is None:
+        # Sem a tabela versao_referencia (migracoes/0006_cache_referencia.sql não aplicado)
+        return await call_next(request)
+
+    # A escola da requisição (X-Escola-ID) muda o conteúdo das listagens
+    chave = f"{VERSAO_ETAG}|{request.url.path}|{request.url.query}|{escola_atual()}|{versoes}"
+    etag = f'W/"{hashlib.sha1(chave.encode()).hexdigest()[:20]}"'
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [valor.strip() for valor in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    response = await call_next(request)
+    if response.status_code == 200:
+        # no-cache: o navegador guarda a resposta, mas revalida a cada uso
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+    return response
+
 # Configuração de CORS para permitir acesso do frontend
 app.add_middleware(
     CORSMiddleware,
@@ -51,6 +123,8 @@ app.add_middleware(
     allow_credentials=False,  # Desabilitar credentials quando allow_origins é "*"
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cursor da paginação, id da requisição e consultas executadas (fora de produção)
+    expose_headers=[CABECALHO_CURSOR, CABECALHO_ID_REQUISICAO, CABECALHO_CONSULTAS],
 )
 
 # Configuração de conexão com o banco de dados
@@ -75,19 +149,170 @@ else:
         "port": "5432"
     }
 
+# Pool de conexões compartilhado pelos endpoints deste worker; os cursores
+# das conexões são cronometrados para as métricas (ver medicao_db.py)
+db_pool = ConnectionPool(DB_PARAMS, connection_factory=ConexaoMedida)
+
+# Latência por rota, consultas por requisição e formas de consulta mais
+# custosas, expostas em GET /metrics (ver metricas.py)
+metricas = Metricas()
+observar_consultas(metricas.registrar_consulta)
+observar_consultas(registrar_consulta)
+metricas.fonte("db_pool", db_pool.status)
+
 # Função para obter uma conexão com o banco de dados
 def get_db_connection():
+    """
+    Obtém uma conexão do pool. Chamar close() na conexão a devolve ao pool.
+    Durante uma requisição HTTP, todas as chamadas recebem a mesma conexão.
+    """
+    try:
+        return db_pool.getconn()
+    except Exception as e:
+        logger.exception(f"Erro ao conectar ao banco de dados: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Erro de conexão com o banco de dados: {str(e)}"
+        )
+
+def get_db_connection_dedicada():
+    """
+    Obtém uma conexão exclusiva do pool, fora do empréstimo da requisição.
+    Necessária quando o banco é lido depois que o endpoint retorna (streaming).
+    """
     try:
-        conn = psycopg2.connect(**DB_PARAMS)
-        conn.autocommit = True
-        return conn
+        return db_pool.getconn_dedicada()
     except Exception as e:
-        print(f"Erro ao conectar ao banco de dados: {e}")
+        logger.exception(f"Erro ao conectar ao banco de dados: {e}")
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=f"Erro de conexão com o banco de dados: {str(e)}"
         )
 
+# Compartilhar uma conexão do pool entre as chamadas da requisição; ela volta
+# ao pool quando o último proxy é fechado, antes do envio da resposta
+@app.middleware("http")
+async def conexao_por_requisicao(request: Request, call_next):
+    with db_pool.conexao_requisicao():
+        return await call_next(request)
+
+# Escola da requisição (cabeçalho X-Escola-ID), por fora da conexão e do ETag
+# que dependem dela (ver tenancia_escola.py)
+app.add_middleware(EscolaMiddleware)
+
+# Métricas por rota, por fora da compressão (tamanho transmitido) e da conexão
+# da requisição (todas as consultas contadas)
+app.add_middleware(MetricasMiddleware, metricas=metricas)
+
+# Orçamento de consultas e N+1 por requisição: alertas no log e, fora de
+# produção, no cabeçalho X-Consultas (ver orcamento_consultas.py)
+app.add_middleware(OrcamentoConsultasMiddleware, cabecalho=not IS_PRODUCTION)
+
+# Id da requisição nos logs e no cabeçalho X-Request-ID (registrado por último:
+# é o middleware mais externo, e cobre os registros de todos os outros)
+app.add_middleware(IdRequisicaoMiddleware, producao=IS_PRODUCTION)
+
+# Cópia em memória de turma, disciplina, professor e seus vínculos, para
+# verificações de existência sem ida ao banco (ver cache_referencia.py)
+referencia_cache = CacheReferencia(get_db_connection)
+metricas.fonte("cache_referencia", referencia_cache.status)
+
+def buscar_disciplina_referencia(disciplina_id):
+    """Busca a disciplina no cache pelo id numérico ou pelo código (id_disciplina)."""
+    if disciplina_id.isdigit():
+        return referencia_cache.disciplina_por_id(int(disciplina_id))
+    return referencia_cache.disciplina(disciplina_id)
+
+def turma_da_escola(id_turma):
+    """Verifica no cache se a turma existe e pertence à escola da requisição (se houver)."""
+    turma = referencia_cache.turma(id_turma)
+    if turma is None:
+        return False
+    escola = escola_atual()
+    return escola is None or turma["id_escola"] == escola
+
+def invalidar_resumos_por_log(eventos):
+    """Os resumos do dashboard listam as atividades recentes do professor."""
+    for usuario in {evento["usuario"] for evento in eventos}:
+        resumo_professor_cache.invalidar_usuario(usuario)
+
+# Nomes de alunos, professores e disciplinas em memória, por turma, para o
+# autocompletar; recarregados quando versao_referencia muda (ver autocompletar.py)
+indice_autocompletar = IndiceAutocompletar(get_db_connection, referencia_cache.versoes)
+metricas.fonte("autocompletar", indice_autocompletar.status)
+
+# Eventos de log_atividade gravados em lote, fora do caminho da requisição
+# (ver log_atividade.py)
+gravador_log_atividade = GravadorLogAtividade(
+    get_db_connection,
+    ao_gravar=invalidar_resumos_por_log,
+)
+metricas.fonte("log_atividade", gravador_log_atividade.status)
+
+# Situação das migrações do esquema (ver migracoes.py), lida uma vez na
+# inicialização: os endpoints não consultam o catálogo nem executam DDL
+situacao_migracoes = {"aplicadas": [], "pendentes": [], "alteradas": [], "desconhecidas": []}
+
+@app.on_event("startup")
+def verificar_migracoes():
+    """Confere as migrações aplicadas (ou as aplica, com MIGRACOES_AO_INICIAR=aplicar)."""
+    global situacao_migracoes
+    conn = None
+    try:
+        conn = get_db_connection()
+        if os.environ.get("MIGRACOES_AO_INICIAR", "verificar") == "aplicar":
+            aplicar_pendentes(conn)
+        situacao_migracoes = verificar_esquema(conn)
+        if situacao_migracoes["pendentes"] or situacao_migracoes["alteradas"]:
+            logger.error(f"Esquema desatualizado (execute python migracoes.py --aplicar): "
+                         f"pendentes {situacao_migracoes['pendentes']}, "
+                         f"alteradas {situacao_migracoes['alteradas']}")
+    except Exception as e:
+        logger.exception(f"Erro ao verificar as migrações do esquema: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+def exigir_migracao(versao, descricao):
+    """Responde 503 se a migração não constava como aplicada na inicialização."""
+    if versao not in situacao_migracoes["aplicadas"]:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{descricao} não disponível: migração {versao} pendente (python migracoes.py --aplicar)"
+        )
+
+@app.on_event("startup")
+def manter_particoes_log():
+    """Cria as partições dos próximos meses de log_atividade e aplica a retenção."""
+    conn = None
+    try:
+        conn = get_db_connection()
+        manter_particoes(conn)
+    except Exception as e:
+        logger.warning(f"Manutenção das partições de log_atividade não executada: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+@app.on_event("startup")
+def manter_particoes_notas():
+    """Cria as partições de nota das escolas cadastradas desde a última inicialização."""
+    conn = None
+    try:
+        conn = get_db_connection()
+        manter_particoes_nota(conn)
+    except Exception as e:
+        logger.warning(f"Manutenção das partições de nota não executada: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+@app.on_event("shutdown")
+def fechar_pool_conexoes():
+    # Os eventos pendentes do log de atividades são gravados antes de fechar o pool
+    gravador_log_atividade.fechar()
+    db_pool.closeall()
+
 # Função auxiliar para executar consultas
 def execute_query(query, params=None, fetch=True, fetch_one=False):
     conn = None
@@ -106,7 +331,7 @@ def execute_query(query, params=None, fetch=True, fetch_one=False):
         cursor.close()
         return result
     except Exception as e:
-        print(f"Erro ao executar consulta: {e}")
+        logger.exception(f"Erro ao executar consulta: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao executar operação no banco de dados: {str(e)}"
@@ -115,6 +340,28 @@ def execute_query(query, params=None, fetch=True, fetch_one=False):
         if conn:
             conn.close()
 
+# Funções auxiliares de paginação por chave (ver paginacao.py)
+def paginar_consulta(ordem, query, params, limit, cursor, tem_where=False):
+    """Acrescenta cursor, ordenação e limite à consulta; cursor inválido gera 400."""
+    try:
+        return ordem.montar_consulta(query, params, limit, cursor, tem_where)
+    except CursorInvalido as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+def cabecalhos_paginacao(proximo_cursor):
+    """Cabeçalhos com o cursor da próxima página, se houver."""
+    return {CABECALHO_CURSOR: proximo_cursor} if proximo_cursor else {}
+
+def definir_proximo_cursor(response, proximo_cursor):
+    """Informa no cabeçalho o cursor da próxima página, se houver."""
+    response.headers.update(cabecalhos_paginacao(proximo_cursor))
+
+def parametro_limit():
+    return Query(None, ge=1, le=LIMITE_MAXIMO, description="Tamanho da página (omitido: todos os registros)")
+
+def parametro_cursor():
+    return Query(None, description=f"Cursor da página seguinte (cabeçalho {CABECALHO_CURSOR})")
+
 # ==============================================================
 # Modelos de dados (esquemas Pydantic)
 # ==============================================================
@@ -126,6 +373,7 @@ class TurmaBase(BaseModel):
     turno: str
     tipo_turma: Optional[str] = None
     coordenador: Optional[str] = None
+    id_escola: Optional[int] = None  # Omitido na criação: a escola da requisição (X-Escola-ID)
 
 class TurmaCreate(TurmaBase):
     pass
@@ -136,6 +384,7 @@ class TurmaUpdate(BaseModel):
     turno: Optional[str] = None
     tipo_turma: Optional[str] = None
     coordenador: Optional[str] = None
+    id_escola: Optional[int] = None
 
 class Turma(TurmaBase):
     id: int
@@ -163,6 +412,10 @@ class Disciplina(DisciplinaBase):
     class Config:
         from_attributes = True
 
+# Disciplina com as turmas vinculadas (listagem com incluir_turmas=true)
+class DisciplinaComTurmas(Disciplina):
+    turmas: Optional[List[Dict[str, Any]]] = None
+
 # Modelo para TurmaDisciplina
 class TurmaDisciplinaBase(BaseModel):
     id_disciplina: str
@@ -271,6 +524,21 @@ class Nota(NotaBase):
     class Config:
         from_attributes = True
 
+# Modelos para lançamento de notas em lote (uma turma/disciplina/bimestre inteira)
+class NotaLoteItem(BaseModel):
+    id_aluno: str
+    nota_mensal: Optional[float] = None
+    nota_bimestral: Optional[float] = None
+    recuperacao: Optional[float] = None
+    frequencia: Optional[int] = None
+
+class NotaLoteCreate(BaseModel):
+    id_turma: str
+    id_disciplina: str
+    ano: int
+    bimestre: int
+    notas: List[NotaLoteItem]
+
 # Modelo para Log de Atividades
 class LogAtividade(BaseModel):
     id: Optional[int] = None
@@ -305,6 +573,8 @@ class EventoCalendarioBase(BaseModel):
     cor: Optional[str] = "#3498db"  # Cor em hexadecimal para customização visual
     recorrente: Optional[bool] = False
     frequencia_recorrencia: Optional[str] = None  # diaria, semanal, mensal, anual
+    recorrencia_ate: Optional[str] = None  # Formato: YYYY-MM-DD (última data da série)
+    recorrencia_excecoes: Optional[List[str]] = None  # Datas de início canceladas (YYYY-MM-DD)
     observacoes: Optional[str] = None
 
 class EventoCalendarioCreate(EventoCalendarioBase):
@@ -321,12 +591,16 @@ class EventoCalendarioUpdate(BaseModel):
     cor: Optional[str] = None
     recorrente: Optional[bool] = None
     frequencia_recorrencia: Optional[str] = None
+    recorrencia_ate: Optional[str] = None
+    recorrencia_excecoes: Optional[List[str]] = None
     observacoes: Optional[str] = None
     ativo: Optional[bool] = None
 
 class EventoCalendario(EventoCalendarioBase):
     id: int
     criado_por: str
+    id_escola: Optional[int] = None  # Escola do evento (None: toda a rede)
+    inicio_serie: Optional[str] = None  # Nas ocorrências de eventos recorrentes: data_inicio da série
     data_criacao: Optional[datetime] = None
     ativo: Optional[bool] = True
     
@@ -448,15 +722,24 @@ def health_check():
             detail="Falha na conexão com o banco de dados"
         )
 
+# Métricas deste worker no formato texto do Prometheus
+@app.get("/metrics", include_in_schema=False)
+def expor_metricas():
+    return Response(content=metricas.texto(), media_type=CONTENT_TYPE_METRICAS)
+
 # ==============================================================
 # Endpoints para Turmas
 # ==============================================================
 
 @app.get("/api/turmas/", response_model=List[Turma])
 def read_turmas():
-    """Busca todas as turmas cadastradas."""
-    query = "SELECT id, id_turma, serie, turno, tipo_turma, coordenador FROM turma"
-    results = execute_query(query)
+    """Busca todas as turmas cadastradas (as da escola da requisição, com X-Escola-ID)."""
+    query = "SELECT id, id_turma, serie, turno, tipo_turma, coordenador, id_escola FROM turma"
+    params = []
+    condicao = condicao_escola("id_escola", params)
+    if condicao:
+        query += " WHERE " + condicao
+    results = execute_query(query, params)
     
     if not results:
         return []
@@ -470,7 +753,8 @@ def read_turmas():
             "serie": row["serie"],
             "turno": row["turno"],
             "tipo_turma": row["tipo_turma"],
-            "coordenador": row["coordenador"]
+            "coordenador": row["coordenador"],
+            "id_escola": row["id_escola"]
         }
         turmas.append(turma)
     
@@ -479,14 +763,11 @@ def read_turmas():
 @app.get("/api/turmas/{turma_id}/alunos")
 def read_alunos_turma(turma_id: str = Path(..., description="ID ou código da turma")):
     """Busca todos os alunos de uma turma específica."""
-    print(f"=== INICIANDO BUSCA DE ALUNOS DA TURMA {turma_id} ===")
+    logger.debug("INICIANDO BUSCA DE ALUNOS DA TURMA %s", turma_id)
     try:
-        # Primeiro verificamos se a turma existe
-        query_turma = "SELECT id_turma FROM turma WHERE id_turma = %s"
-        turma_result = execute_query(query_turma, (turma_id,), fetch_one=True)
-        
-        if not turma_result:
-            print(f"Turma com ID {turma_id} não encontrada")
+        # Primeiro verificamos se a turma existe (cache de referência)
+        if not referencia_cache.turma_existe(turma_id):
+            logger.info(f"Turma com ID {turma_id} não encontrada")
             raise HTTPException(status_code=404, detail=f"Turma com ID {turma_id} não encontrada")
         
         # Buscar alunos da turma diretamente da tabela aluno
@@ -498,17 +779,16 @@ def read_alunos_turma(turma_id: str = Path(..., description="ID ou código da tu
         ORDER BY a.nome_aluno
         """
         
-        print(f"Executando consulta: {query_alunos} com parâmetro {turma_id}")
+        logger.debug("Executando consulta: %s com parâmetro %s", query_alunos, turma_id)
         alunos_results = execute_query(query_alunos, (turma_id,))
         
         if not alunos_results:
-            print(f"Nenhum aluno encontrado para a turma {turma_id}")
+            logger.debug("Nenhum aluno encontrado para a turma %s", turma_id)
             return []
         
         # Converter os resultados para lista de alunos
         alunos = []
         for row in alunos_results:
-            print(f"Processando aluno: {row}")
             data_nasc = row["data_nasc"]
             if isinstance(data_nasc, (date, datetime)):
                 data_nasc = data_nasc.isoformat()
@@ -528,32 +808,29 @@ def read_alunos_turma(turma_id: str = Path(..., description="ID ou código da tu
             }
             alunos.append(aluno)
         
-        print(f"Retornando {len(alunos)} alunos para a turma {turma_id}")
+        logger.debug("Retornando %s alunos para a turma %s", len(alunos), turma_id)
         return alunos
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Erro ao buscar alunos da turma {turma_id}: {e}")
+        logger.exception(f"Erro ao buscar alunos da turma {turma_id}: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao buscar alunos da turma: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO BUSCA DE ALUNOS DA TURMA {turma_id} ===")
 
 @app.get("/api/turmas/{turma_id}/disciplinas")
 def read_disciplinas_turma(turma_id: str):
-    print(f"=== INICIANDO BUSCA DE DISCIPLINAS DA TURMA {turma_id} ===")
+    logger.debug("INICIANDO BUSCA DE DISCIPLINAS DA TURMA %s", turma_id)
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        # Verificar se a turma existe
-        cursor.execute("SELECT id_turma FROM turma WHERE id_turma = %s", (turma_id,))
-        if cursor.fetchone() is None:
+        # Verificar se a turma existe (cache de referência)
+        if not referencia_cache.turma_existe(turma_id):
             conn.close()
-            print(f"Turma {turma_id} não encontrada")
+            logger.info(f"Turma {turma_id} não encontrada")
             raise HTTPException(status_code=404, detail="Turma não encontrada")
         
         # Buscar disciplinas vinculadas à turma
@@ -573,16 +850,14 @@ def read_disciplinas_turma(turma_id: str):
                 "carga_horaria": row[2]
             })
         
-        print(f"Encontradas {len(disciplinas)} disciplinas para a turma {turma_id}")
-        print(f"Disciplinas: {disciplinas}")
+        logger.debug("Encontradas %s disciplinas para a turma %s", len(disciplinas), turma_id)
+        logger.debug("Disciplinas: %s", disciplinas)
         conn.close()
         return disciplinas
     except Exception as e:
         conn.close()
-        print(f"Erro ao executar consulta: {str(e)}")
+        logger.exception(f"Erro ao executar consulta: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro ao buscar disciplinas da turma: {str(e)}")
-    finally:
-        print(f"=== FINALIZANDO BUSCA DE DISCIPLINAS DA TURMA {turma_id} ===")
 
 @app.get("/api/turmas/{turma_id}", response_model=Turma)
 def read_turma(turma_id: str = Path(..., description="ID ou código da turma")):
@@ -590,10 +865,10 @@ def read_turma(turma_id: str = Path(..., description="ID ou código da turma")):
     # Verificar se o ID é numérico
     params = None
     if turma_id.isdigit():
-        query = "SELECT id, id_turma, serie, turno, tipo_turma, coordenador FROM turma WHERE id = %s"
+        query = "SELECT id, id_turma, serie, turno, tipo_turma, coordenador, id_escola FROM turma WHERE id = %s"
         params = (int(turma_id),)
     else:
-        query = "SELECT id, id_turma, serie, turno, tipo_turma, coordenador FROM turma WHERE id_turma = %s"
+        query = "SELECT id, id_turma, serie, turno, tipo_turma, coordenador, id_escola FROM turma WHERE id_turma = %s"
         params = (turma_id,)
     
     result = execute_query(query, params, fetch_one=True)
@@ -607,7 +882,8 @@ def read_turma(turma_id: str = Path(..., description="ID ou código da turma")):
         "serie": result["serie"],
         "turno": result["turno"],
         "tipo_turma": result["tipo_turma"],
-        "coordenador": result["coordenador"]
+        "coordenador": result["coordenador"],
+        "id_escola": result["id_escola"]
     }
     
     return turma
@@ -627,13 +903,15 @@ def create_turma(turma: TurmaCreate):
     
     # Inserir a nova turma
     query = """
-    INSERT INTO turma (id_turma, serie, turno, tipo_turma, coordenador)
-    VALUES (%s, %s, %s, %s, %s)
-    RETURNING id, id_turma, serie, turno, tipo_turma, coordenador
+    INSERT INTO turma (id_turma, serie, turno, tipo_turma, coordenador, id_escola)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    RETURNING id, id_turma, serie, turno, tipo_turma, coordenador, id_escola
     """
-    params = (turma.id_turma, turma.serie, turma.turno, turma.tipo_turma, turma.coordenador)
+    id_escola = turma.id_escola if turma.id_escola is not None else escola_atual()
+    params = (turma.id_turma, turma.serie, turma.turno, turma.tipo_turma, turma.coordenador, id_escola)
     
     result = execute_query(query, params, fetch_one=True)
+    referencia_cache.invalidar("turma")
     
     if not result:
         raise HTTPException(
@@ -647,7 +925,8 @@ def create_turma(turma: TurmaCreate):
         "serie": result["serie"],
         "turno": result["turno"],
         "tipo_turma": result["tipo_turma"],
-        "coordenador": result["coordenador"]
+        "coordenador": result["coordenador"],
+        "id_escola": result["id_escola"]
     }
 
 @app.put("/api/turmas/{turma_id}", response_model=Turma)
@@ -681,11 +960,14 @@ def update_turma(
         updates["tipo_turma"] = turma.tipo_turma
     if turma.coordenador is not None:
         updates["coordenador"] = turma.coordenador
+    if turma.id_escola is not None:
+        # Alunos, vínculos e notas da turma acompanham a escola (trigger da migração 0012)
+        updates["id_escola"] = turma.id_escola
     
     if not updates:
         # Se não houver campos para atualizar, buscamos e retornamos os dados atuais
         result = execute_query(
-            "SELECT id, id_turma, serie, turno, tipo_turma, coordenador FROM turma WHERE id = %s",
+            "SELECT id, id_turma, serie, turno, tipo_turma, coordenador, id_escola FROM turma WHERE id = %s",
             (existing["id"],),
             fetch_one=True
         )
@@ -693,13 +975,14 @@ def update_turma(
     
     # Construir a query de atualização
     set_clause = ", ".join(f"{field} = %s" for field in updates.keys())
-    query = f"UPDATE turma SET {set_clause} WHERE id = %s RETURNING id, id_turma, serie, turno, tipo_turma, coordenador"
+    query = f"UPDATE turma SET {set_clause} WHERE id = %s RETURNING id, id_turma, serie, turno, tipo_turma, coordenador, id_escola"
     
     # Montar os parâmetros na ordem correta
     params = list(updates.values())
     params.append(existing["id"])
     
     result = execute_query(query, params, fetch_one=True)
+    referencia_cache.invalidar("turma")
     
     if not result:
         raise HTTPException(
@@ -713,7 +996,8 @@ def update_turma(
         "serie": result["serie"],
         "turno": result["turno"],
         "tipo_turma": result["tipo_turma"],
-        "coordenador": result["coordenador"]
+        "coordenador": result["coordenador"],
+        "id_escola": result["id_escola"]
     }
 
 @app.delete("/api/turmas/{turma_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -738,6 +1022,7 @@ def delete_turma(turma_id: str = Path(..., description="ID ou código da turma")
     # Excluir a turma
     query = "DELETE FROM turma WHERE id = %s"
     execute_query(query, (existing["id"],), fetch=False)
+    referencia_cache.invalidar("turma", "turma_disciplina", "professor_disciplina_turma")
     
     return None  # HTTP 204 (No Content)
 
@@ -745,8 +1030,10 @@ def delete_turma(turma_id: str = Path(..., description="ID ou código da turma")
 # Endpoints para Disciplinas
 # ==============================================================
 
-@app.get("/api/disciplinas/", response_model=List[Disciplina])
-def read_disciplinas():
+@app.get("/api/disciplinas/", response_model=List[DisciplinaComTurmas], response_model_exclude_unset=True)
+def read_disciplinas(
+    incluir_turmas: bool = Query(False, description="Incluir as turmas vinculadas a cada disciplina")
+):
     """Busca todas as disciplinas cadastradas."""
     query = "SELECT id, id_disciplina, nome_disciplina, carga_horaria FROM disciplina"
     results = execute_query(query)
@@ -754,6 +1041,14 @@ def read_disciplinas():
     if not results:
         return []
     
+    # Turmas de todas as disciplinas em uma única consulta
+    turmas_por_disciplina = {}
+    if incluir_turmas:
+        with CarregadorRelacoes(get_db_connection()) as carregador:
+            turmas_por_disciplina = carregador.carregar(
+                "turmas_da_disciplina", [row["id_disciplina"] for row in results]
+            )
+    
     # Converter os resultados para objetos Disciplina
     disciplinas = []
     for row in results:
@@ -763,6 +1058,8 @@ def read_disciplinas():
             "nome_disciplina": row["nome_disciplina"],
             "carga_horaria": row["carga_horaria"]
         }
+        if incluir_turmas:
+            disciplina["turmas"] = turmas_por_disciplina[row["id_disciplina"]]
         disciplinas.append(disciplina)
     
     return disciplinas
@@ -803,8 +1100,8 @@ def read_turmas_disciplina(disciplina_id: str = Path(..., description="ID ou có
         turmas_results = execute_query(query_turmas, (disciplina_id_param,))
         
         # Exibir para debug
-        print(f"Disciplina ID: {disciplina_id_param}, SQL: {query_turmas}")
-        print(f"Resultados: {turmas_results}")
+        logger.debug("Disciplina ID: %s, SQL: %s", disciplina_id_param, query_turmas)
+        logger.debug("Resultados: %s", turmas_results)
         
         if not turmas_results:
             return []
@@ -819,15 +1116,15 @@ def read_turmas_disciplina(disciplina_id: str = Path(..., description="ID ou có
             turmas.append(turma)
             
         # Verificar se os dados estão completos
-        print(f"DEBUG - Turmas vinculadas à disciplina {disciplina_id}:", turmas)
+        logger.debug("Turmas vinculadas à disciplina %s: %s", disciplina_id, turmas)
         return turmas
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Erro ao buscar turmas da disciplina {disciplina_id}: {e}")
-        print(f"Query: {query_turmas}")
-        print(f"Parâmetros: {disciplina_id_param}")
+        logger.exception(f"Erro ao buscar turmas da disciplina {disciplina_id}: {e}")
+        logger.debug("Query: %s", query_turmas)
+        logger.debug("Parâmetros: %s", disciplina_id_param)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao buscar turmas da disciplina: {str(e)}"
@@ -881,6 +1178,7 @@ def create_disciplina(disciplina: DisciplinaCreate):
     params = (disciplina.id_disciplina, disciplina.nome_disciplina, disciplina.carga_horaria)
     
     result = execute_query(query, params, fetch_one=True)
+    referencia_cache.invalidar("disciplina")
     
     if not result:
         raise HTTPException(
@@ -941,6 +1239,7 @@ def update_disciplina(
     params.append(existing["id"])
     
     result = execute_query(query, params, fetch_one=True)
+    referencia_cache.invalidar("disciplina")
     
     if not result:
         raise HTTPException(
@@ -977,6 +1276,7 @@ def delete_disciplina(disciplina_id: str = Path(..., description="ID ou código
     # Excluir a disciplina
     query = "DELETE FROM disciplina WHERE id = %s"
     execute_query(query, (existing["id"],), fetch=False)
+    referencia_cache.invalidar("disciplina", "turma_disciplina", "professor_disciplina_turma")
     
     return None  # HTTP 204 (No Content)
 
@@ -989,7 +1289,7 @@ def read_professores_filtro(
     ativo: Optional[bool] = Query(None, description="Filtrar por status ativo (true/false)")
 ):
     """Busca professores com filtro opcional por status ativo."""
-    print(f"=== INICIANDO BUSCA DE PROFESSORES COM FILTRO (ativo={ativo}) ===")
+    logger.debug("INICIANDO BUSCA DE PROFESSORES COM FILTRO (ativo=%s)", ativo)
     try:
         # Construir query com filtro opcional
         if ativo is not None:
@@ -1008,30 +1308,25 @@ def read_professores_filtro(
             """
             params = None
             
-        print(f"Executando consulta: {query}")
+        logger.debug("Executando consulta: %s", query)
         results = execute_query(query, params)
         
         if not results:
-            print("Nenhum professor encontrado")
+            logger.debug("Nenhum professor encontrado")
             return []
         
-        print(f"Encontrados {len(results)} professores")
+        logger.debug("Encontrados %s professores", len(results))
+        
+        # Disciplinas de todos os professores em uma única consulta
+        with CarregadorRelacoes(get_db_connection()) as carregador:
+            disciplinas_por_professor = carregador.carregar(
+                "disciplinas_do_professor", [row["id_professor"] for row in results]
+            )
         
         # Converter os resultados para objetos Professor
         professores = []
         for row in results:
-            # Para cada professor, buscar suas disciplinas em uma consulta separada
-            query_disciplinas = """
-            SELECT DISTINCT id_disciplina
-            FROM professor_disciplina_turma
-            WHERE id_professor = %s
-            """
-            disciplinas_result = execute_query(query_disciplinas, (row["id_professor"],))
-            
-            disciplinas = []
-            if disciplinas_result:
-                disciplinas = [d["id_disciplina"] for d in disciplinas_result]
-                print(f"Professor {row['id_professor']} tem {len(disciplinas)} disciplinas: {disciplinas}")
+            disciplinas = disciplinas_por_professor[row["id_professor"]]
             
             professor = {
                 "id": row["id"],
@@ -1045,52 +1340,52 @@ def read_professores_filtro(
             }
             professores.append(professor)
         
-        print("Retornando lista de professores filtrada com sucesso")
+        logger.debug("Retornando lista de professores filtrada com sucesso")
         return professores
     except Exception as e:
-        print(f"ERRO ao buscar professores com filtro: {str(e)}")
+        logger.exception(f"ERRO ao buscar professores com filtro: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao buscar professores: {str(e)}"
         )
-    finally:
-        print("=== FINALIZANDO BUSCA DE PROFESSORES COM FILTRO ===")
 
 @app.get("/api/professores/", response_model=List[Professor])
-def read_professores():
-    """Busca todos os professores cadastrados."""
-    print("=== INICIANDO BUSCA DE TODOS OS PROFESSORES ===")
+def read_professores(
+    response: Response,
+    limit: Optional[int] = parametro_limit(),
+    cursor: Optional[str] = parametro_cursor()
+):
+    """Busca todos os professores cadastrados (paginação opcional por limit/cursor)."""
+    logger.debug("INICIANDO BUSCA DE TODOS OS PROFESSORES")
     try:
         # Consulta direta incluindo campo ativo e cpf
         query = """
         SELECT p.id, p.id_professor, p.nome_professor, p.email_professor, p.ativo, p.cpf
         FROM professor p
-        ORDER BY p.nome_professor
         """
-        print(f"Executando consulta: {query}")
-        results = execute_query(query)
+        query, params = paginar_consulta(ORDEM_PROFESSORES, query, [], limit, cursor)
+        logger.debug("Executando consulta: %s", query)
+        results = execute_query(query, params)
         
         if not results:
-            print("Nenhum professor encontrado")
+            logger.debug("Nenhum professor encontrado")
             return []
         
-        print(f"Encontrados {len(results)} professores")
+        results, proximo_cursor = ORDEM_PROFESSORES.pagina(results, limit)
+        definir_proximo_cursor(response, proximo_cursor)
+        
+        logger.debug("Encontrados %s professores", len(results))
+        
+        # Disciplinas de todos os professores em uma única consulta
+        with CarregadorRelacoes(get_db_connection()) as carregador:
+            disciplinas_por_professor = carregador.carregar(
+                "disciplinas_do_professor", [row["id_professor"] for row in results]
+            )
         
         # Converter os resultados para objetos Professor
         professores = []
         for row in results:
-            # Para cada professor, buscar suas disciplinas em uma consulta separada
-            query_disciplinas = """
-            SELECT DISTINCT id_disciplina
-            FROM professor_disciplina_turma
-            WHERE id_professor = %s
-            """
-            disciplinas_result = execute_query(query_disciplinas, (row["id_professor"],))
-            
-            disciplinas = []
-            if disciplinas_result:
-                disciplinas = [d["id_disciplina"] for d in disciplinas_result]
-                print(f"Professor {row['id_professor']} tem {len(disciplinas)} disciplinas: {disciplinas}")
+            disciplinas = disciplinas_por_professor[row["id_professor"]]
             
             professor = {
                 "id": row["id"],
@@ -1104,21 +1399,21 @@ def read_professores():
             }
             professores.append(professor)
         
-        print("Retornando lista de professores com sucesso")
+        logger.debug("Retornando lista de professores com sucesso")
         return professores
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"ERRO ao buscar professores: {str(e)}")
+        logger.exception(f"ERRO ao buscar professores: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao buscar professores: {str(e)}"
         )
-    finally:
-        print("=== FINALIZANDO BUSCA DE TODOS OS PROFESSORES ===")
 
 @app.get("/api/professores/{professor_id}", response_model=Professor)
 def read_professor(professor_id: str = Path(..., description="ID ou código do professor")):
     """Busca um professor específico pelo ID ou código."""
-    print(f"=== INICIANDO BUSCA DO PROFESSOR {professor_id} ===")
+    logger.debug("INICIANDO BUSCA DO PROFESSOR %s", professor_id)
     try:
         # Consulta direta incluindo campo ativo e cpf
         query = """
@@ -1127,14 +1422,14 @@ def read_professor(professor_id: str = Path(..., description="ID ou código do p
         WHERE p.id_professor = %s
         """
         
-        print(f"Executando consulta: {query}")
+        logger.debug("Executando consulta: %s", query)
         result = execute_query(query, (professor_id,), fetch_one=True)
         
         if not result:
-            print(f"Professor com ID {professor_id} não encontrado")
+            logger.info(f"Professor com ID {professor_id} não encontrado")
             raise HTTPException(status_code=404, detail="Professor não encontrado")
         
-        print(f"Professor {professor_id} encontrado")
+        logger.debug("Professor %s encontrado", professor_id)
         
         # Buscar disciplinas do professor em consulta separada
         query_disciplinas = """
@@ -1147,7 +1442,7 @@ def read_professor(professor_id: str = Path(..., description="ID ou código do p
         disciplinas = []
         if disciplinas_result:
             disciplinas = [d["id_disciplina"] for d in disciplinas_result]
-            print(f"Professor {professor_id} tem {len(disciplinas)} disciplinas: {disciplinas}")
+            logger.debug("Professor %s tem %s disciplinas: %s", professor_id, len(disciplinas), disciplinas)
         
         professor = {
             "id": result["id"],
@@ -1160,30 +1455,28 @@ def read_professor(professor_id: str = Path(..., description="ID ou código do p
             "disciplinas": disciplinas
         }
         
-        print(f"Retornando dados do professor {professor_id}")
+        logger.debug("Retornando dados do professor %s", professor_id)
         return professor
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO ao buscar professor {professor_id}: {str(e)}")
+        logger.exception(f"ERRO ao buscar professor {professor_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao buscar professor: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO BUSCA DO PROFESSOR {professor_id} ===")
 
 @app.post("/api/professores/", response_model=Professor, status_code=status.HTTP_201_CREATED)
 def create_professor(professor: ProfessorCreate):
     """Cria um novo professor."""
-    print(f"=== INICIANDO CRIAÇÃO DE PROFESSOR: {professor.id_professor} ===")
+    logger.debug("INICIANDO CRIAÇÃO DE PROFESSOR: %s", professor.id_professor)
     try:
         # Verificar se já existe um professor com o mesmo id_professor
         query = "SELECT id FROM professor WHERE id_professor = %s"
         existing = execute_query(query, (professor.id_professor,), fetch_one=True)
         
         if existing:
-            print(f"Professor com ID {professor.id_professor} já existe")
+            logger.info(f"Professor com ID {professor.id_professor} já existe")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Já existe um professor com o código {professor.id_professor}"
@@ -1204,17 +1497,18 @@ def create_professor(professor: ProfessorCreate):
             professor.cpf
         )
         
-        print(f"Executando query de inserção: {query}")
+        logger.debug("Executando query de inserção: %s", query)
         result = execute_query(query, params, fetch_one=True)
+        referencia_cache.invalidar("professor")
         
         if not result:
-            print("Falha ao criar professor")
+            logger.error("Falha ao criar professor")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Falha ao criar professor"
             )
         
-        print(f"Professor criado com sucesso: {result}")
+        logger.info(f"Professor criado com sucesso: {result}")
         
         # Lista para armazenar mensagens informativas
         mensagens = []
@@ -1224,20 +1518,17 @@ def create_professor(professor: ProfessorCreate):
         disciplinas_sem_turmas = []
         
         if hasattr(professor, 'disciplinas') and professor.disciplinas:
-            print(f"Verificando disciplinas: {professor.disciplinas}")
+            logger.debug("Verificando disciplinas: %s", professor.disciplinas)
             conn = None
             try:
                 conn = get_db_connection()
                 cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
                 
                 for disciplina_id in professor.disciplinas:
-                    # Verificar se a disciplina existe
-                    cursor.execute("SELECT id FROM disciplina WHERE id_disciplina = %s", (disciplina_id,))
-                    disciplina_result = cursor.fetchone()
-                    
-                    if not disciplina_result:
+                    # Verificar se a disciplina existe (cache de referência)
+                    if not referencia_cache.disciplina_existe(disciplina_id):
                         mensagens.append(f"Disciplina {disciplina_id} não encontrada")
-                        print(f"Disciplina {disciplina_id} não encontrada")
+                        logger.debug("Disciplina %s não encontrada", disciplina_id)
                         continue
                     
                     # Buscar turmas vinculadas à disciplina
@@ -1253,7 +1544,7 @@ def create_professor(professor: ProfessorCreate):
                         disciplinas_sem_turmas.append(disciplina_id)
                         mensagem = f"Disciplina {disciplina_id} não tem turmas vinculadas. É necessário realizar o vínculo de turmas e disciplinas primeiro no módulo de disciplinas."
                         mensagens.append(mensagem)
-                        print(mensagem)
+                        logger.debug(mensagem)
                         continue
                     
                     disciplinas_com_turmas.append(disciplina_id)
@@ -1279,17 +1570,19 @@ def create_professor(professor: ProfessorCreate):
                             
                             mensagem = f"Vínculo criado: Professor={professor.id_professor}, Disciplina={disciplina_id}, Turma={id_turma}"
                             mensagens.append(mensagem)
-                            print(mensagem)
+                            logger.debug(mensagem)
                 
                 conn.commit()
-                print("Vínculos de disciplinas e turmas processados com sucesso")
+                resumo_professor_cache.invalidar_professor(professor.id_professor)
+                referencia_cache.invalidar("professor_disciplina_turma")
+                logger.info("Vínculos de disciplinas e turmas processados com sucesso")
                 
             except Exception as e:
                 if conn:
                     conn.rollback()
                 erro = f"Erro ao vincular disciplinas: {str(e)}"
                 mensagens.append(erro)
-                print(erro)
+                logger.warning(erro)
             finally:
                 if conn:
                     conn.close()
@@ -1306,32 +1599,30 @@ def create_professor(professor: ProfessorCreate):
             "mensagens": mensagens
         }
         
-        print(f"Retornando resposta: {response}")
+        logger.debug("Retornando resposta: %s", response)
         return response
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO ao criar professor: {str(e)}")
+        logger.exception(f"ERRO ao criar professor: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao criar professor: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO CRIAÇÃO DE PROFESSOR ===")
 
 @app.get("/api/professores/vinculos/{prof_id}")
 def read_vinculos_professor_by_id(prof_id: str = Path(..., description="ID do professor para buscar vínculos")):
-    logger.debug(f"Tentando acessar endpoint /api/professores/vinculos/{prof_id}")
+    logger.debug("Tentando acessar endpoint /api/professores/vinculos/%s", prof_id)
     try:
         # Registrar a tentativa de verificar o professor
-        logger.debug(f"Verificando professor com ID: {prof_id}")
+        logger.debug("Verificando professor com ID: %s", prof_id)
         query_professor = "SELECT * FROM professor WHERE id_professor = %s"
         professor_result = execute_query(query_professor, (prof_id,), fetch_one=True)
         
-        logger.debug(f"Resultado da consulta: {professor_result}")
+        logger.debug("Resultado da consulta: %s", professor_result)
         
         if not professor_result:
-            logger.debug(f"Professor com ID {prof_id} não encontrado")
+            logger.debug("Professor com ID %s não encontrado", prof_id)
             raise HTTPException(status_code=404, detail=f"Professor com ID {prof_id} não encontrado")
         
         # Buscar vínculos do professor
@@ -1394,13 +1685,13 @@ def read_turma_detalhes(turma_id: str = Path(..., description="ID da turma")):
         
         # Converter para dict e retornar
         turma = dict(turma_result)
-        print(f"Detalhes da turma {turma_id}:", turma)
+        logger.debug("Detalhes da turma %s: %s", turma_id, turma)
         return turma
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Erro ao buscar detalhes da turma {turma_id}: {e}")
+        logger.exception(f"Erro ao buscar detalhes da turma {turma_id}: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao buscar detalhes da turma: {str(e)}"
@@ -1413,18 +1704,18 @@ def buscar_vinculos_professor_completo(prof_id: str = Path(..., description="ID
     Busca todos os vínculos entre professor, disciplinas e turmas direto da tabela de relacionamento.
     Usa uma consulta SQL direta que une as tabelas professor_disciplina_turma, professor, disciplina e turma.
     """
-    print(f"=== COMEÇANDO BUSCA DE VÍNCULOS PARA PROFESSOR: {prof_id} ===")
+    logger.debug("COMEÇANDO BUSCA DE VÍNCULOS PARA PROFESSOR: %s", prof_id)
     try:
         # Verificar se o professor existe
         query_professor = "SELECT * FROM professor WHERE id_professor = %s"
-        print(f"Executando query para verificar professor: {query_professor} com parâmetro: {prof_id}")
+        logger.debug("Executando query para verificar professor: %s com parâmetro: %s", query_professor, prof_id)
         professor_result = execute_query(query_professor, (prof_id,), fetch_one=True)
         
         if not professor_result:
-            print(f"Professor com ID {prof_id} não encontrado")
+            logger.info(f"Professor com ID {prof_id} não encontrado")
             raise HTTPException(status_code=404, detail=f"Professor com ID {prof_id} não encontrado")
         
-        print(f"Professor encontrado: {prof_id}, ID interno: {professor_result['id']}")
+        logger.debug("Professor encontrado: %s, ID interno: %s", prof_id, professor_result['id'])
         
         # Buscar todos os vínculos do professor diretamente da tabela de relacionamento
         query_vinculos = """
@@ -1447,13 +1738,13 @@ def buscar_vinculos_professor_completo(prof_id: str = Path(..., description="ID
             d.nome_disciplina, t.id_turma
         """
         
-        print(f"Executando query para buscar vínculos: {query_vinculos}")
+        logger.debug("Executando query para buscar vínculos: %s", query_vinculos)
         vinculos_results = execute_query(query_vinculos, (prof_id,))
         
-        print(f"Query executada com sucesso. Resultados encontrados: {len(vinculos_results) if vinculos_results else 0}")
+        logger.debug("Query executada com sucesso. Resultados encontrados: %s", len(vinculos_results) if vinculos_results else 0)
         
         if not vinculos_results:
-            print(f"Nenhum vínculo encontrado para o professor {prof_id}")
+            logger.debug("Nenhum vínculo encontrado para o professor %s", prof_id)
             return []
         
         # Converter resultados em uma lista estruturada
@@ -1469,28 +1760,25 @@ def buscar_vinculos_professor_completo(prof_id: str = Path(..., description="ID
                 "turno": row["turno"]
             }
             vinculos.append(vinculo)
-            print(f"Vínculo encontrado: Professor={vinculo['nome_professor']}, Disciplina={vinculo['nome_disciplina']}, Turma={vinculo['id_turma']}, Série={vinculo['serie']}")
         
-        print(f"Total de vínculos encontrados: {len(vinculos)}")
+        logger.debug("Total de vínculos encontrados: %s", len(vinculos))
         return vinculos
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO ao buscar vínculos do professor {prof_id}: {e}")
+        logger.exception(f"ERRO ao buscar vínculos do professor {prof_id}: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao buscar vínculos do professor: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO BUSCA DE VÍNCULOS PARA PROFESSOR: {prof_id} ===")
 
 @app.get("/api/prof001_vinculos")
 def get_prof001_vinculos():
     """
     Endpoint específico para PROF001 para garantir funcionamento.
     """
-    print(f"=== BUSCANDO VÍNCULOS PARA O PROFESSOR FIXO: PROF001 ===")
+    logger.debug("BUSCANDO VÍNCULOS PARA O PROFESSOR FIXO: PROF001")
     try:
         # Verificar se o professor existe
         query_professor = "SELECT * FROM professor WHERE id_professor = 'PROF001'"
@@ -1539,35 +1827,29 @@ def get_prof001_vinculos():
         return vinculos
         
     except Exception as e:
-        print(f"ERRO ao buscar vínculos do professor PROF001: {e}")
+        logger.exception(f"ERRO ao buscar vínculos do professor PROF001: {e}")
         return {"status": "error", "message": f"Erro: {str(e)}"}
 
 @app.post("/api/professores/vinculos", status_code=status.HTTP_201_CREATED)
 def vincular_professor_disciplina_direto(vinculo: ProfessorDisciplinaVinculo):
     """Endpoint otimizado para vincular um professor a uma disciplina com transação."""
-    print(f"=== CRIANDO VÍNCULO: Professor {vinculo.id_professor} - Disciplina {vinculo.id_disciplina} ===")
+    logger.debug("CRIANDO VÍNCULO: Professor %s - Disciplina %s", vinculo.id_professor, vinculo.id_disciplina)
     conn = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
         
-        # Verificar se o professor existe
-        cursor.execute("SELECT id FROM professor WHERE id_professor = %s", (vinculo.id_professor,))
-        professor_result = cursor.fetchone()
-        
-        if not professor_result:
-            print(f"Professor {vinculo.id_professor} não encontrado")
+        # Verificar se o professor existe (cache de referência)
+        if not referencia_cache.professor_existe(vinculo.id_professor):
+            logger.info(f"Professor {vinculo.id_professor} não encontrado")
             return {
                 "status": "error",
                 "message": f"Professor {vinculo.id_professor} não encontrado"
             }
         
-        # Verificar se a disciplina existe
-        cursor.execute("SELECT id FROM disciplina WHERE id_disciplina = %s", (vinculo.id_disciplina,))
-        disciplina_result = cursor.fetchone()
-        
-        if not disciplina_result:
-            print(f"Disciplina {vinculo.id_disciplina} não encontrada")
+        # Verificar se a disciplina existe (cache de referência)
+        if not referencia_cache.disciplina_existe(vinculo.id_disciplina):
+            logger.info(f"Disciplina {vinculo.id_disciplina} não encontrada")
             return {
                 "status": "error",
                 "message": f"Disciplina {vinculo.id_disciplina} não encontrada"
@@ -1583,7 +1865,7 @@ def vincular_professor_disciplina_direto(vinculo: ProfessorDisciplinaVinculo):
         turmas = cursor.fetchall()
         
         if not turmas:
-            print(f"Disciplina {vinculo.id_disciplina} não tem turmas vinculadas")
+            logger.debug("Disciplina %s não tem turmas vinculadas", vinculo.id_disciplina)
             return {
                 "status": "warning",
                 "message": f"Disciplina {vinculo.id_disciplina} não tem turmas vinculadas"
@@ -1612,10 +1894,12 @@ def vincular_professor_disciplina_direto(vinculo: ProfessorDisciplinaVinculo):
                 
                 vinculos_criados += 1
                 turmas_vinculadas.append(id_turma)
-                print(f"Vínculo criado: Professor={vinculo.id_professor}, Disciplina={vinculo.id_disciplina}, Turma={id_turma}")
+                logger.debug("Vínculo criado: Professor=%s, Disciplina=%s, Turma=%s", vinculo.id_professor, vinculo.id_disciplina, id_turma)
         
         conn.commit()
-        print(f"Transação concluída com sucesso, {vinculos_criados} vínculos criados")
+        resumo_professor_cache.invalidar_professor(vinculo.id_professor)
+        referencia_cache.invalidar("professor_disciplina_turma")
+        logger.info(f"Transação concluída com sucesso, {vinculos_criados} vínculos criados")
         
         # Retornar resultados
         return {
@@ -1628,7 +1912,7 @@ def vincular_professor_disciplina_direto(vinculo: ProfessorDisciplinaVinculo):
     except Exception as e:
         if conn:
             conn.rollback()
-        print(f"ERRO ao criar vínculo: {str(e)}")
+        logger.exception(f"ERRO ao criar vínculo: {str(e)}")
         return {
             "status": "error",
             "message": f"Erro ao criar vínculo: {str(e)}"
@@ -1638,7 +1922,6 @@ def vincular_professor_disciplina_direto(vinculo: ProfessorDisciplinaVinculo):
             cursor.close()
         if conn:
             conn.close()
-        print(f"=== FIM DA CRIAÇÃO DE VÍNCULO ===")
 
 @app.put("/api/professores/{professor_id}", response_model=Professor)
 def update_professor(
@@ -1646,14 +1929,14 @@ def update_professor(
     professor: ProfessorUpdate = Body(...)
 ):
     """Atualiza os dados de um professor existente."""
-    print(f"=== INICIANDO ATUALIZAÇÃO DO PROFESSOR {professor_id} ===")
+    logger.debug("INICIANDO ATUALIZAÇÃO DO PROFESSOR %s", professor_id)
     try:
         # Verificar se o professor existe
         check_query = "SELECT id FROM professor WHERE id_professor = %s"
         existing = execute_query(check_query, (professor_id,), fetch_one=True)
         
         if not existing:
-            print(f"Professor com ID {professor_id} não encontrado")
+            logger.info(f"Professor com ID {professor_id} não encontrado")
             raise HTTPException(status_code=404, detail="Professor não encontrado")
         
         # Verificar quais campos foram fornecidos para atualização
@@ -1672,7 +1955,7 @@ def update_professor(
         if professor.cpf is not None:
             updates["cpf"] = professor.cpf  # Adicionar suporte ao campo CPF
         
-        print(f"Campos a atualizar: {updates}")
+        logger.debug("Campos a atualizar: %s", updates)
         
         if not updates:
             # Se não houver campos para atualizar, buscamos e retornamos os dados atuais
@@ -1686,11 +1969,12 @@ def update_professor(
         params = list(updates.values())
         params.append(existing["id"])
         
-        print(f"Executando query: {query} com parâmetros: {params}")
+        logger.debug("Executando query: %s com parâmetros: %s", query, params)
         result = execute_query(query, params, fetch_one=True)
+        referencia_cache.invalidar("professor")
         
         if not result:
-            print("Falha ao atualizar professor")
+            logger.error("Falha ao atualizar professor")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Falha ao atualizar professor"
@@ -1708,13 +1992,10 @@ def update_professor(
                 
                 # Adicionar novos vínculos para cada disciplina
                 for disciplina_id in professor.disciplinas:
-                    print(f"Verificando disciplina: {disciplina_id}")
-                    # Primeiro verificamos se a disciplina existe
-                    cursor.execute("SELECT id FROM disciplina WHERE id_disciplina = %s", (disciplina_id,))
-                    disciplina_result = cursor.fetchone()
-                    
-                    if not disciplina_result:
-                        print(f"Disciplina {disciplina_id} não encontrada")
+                    logger.debug("Verificando disciplina: %s", disciplina_id)
+                    # Primeiro verificamos se a disciplina existe (cache de referência)
+                    if not referencia_cache.disciplina_existe(disciplina_id):
+                        logger.debug("Disciplina %s não encontrada", disciplina_id)
                         continue
                     
                     # Buscar turmas vinculadas à disciplina
@@ -1727,7 +2008,7 @@ def update_professor(
                     turmas = cursor.fetchall()
                     
                     if not turmas:
-                        print(f"Disciplina {disciplina_id} não tem turmas vinculadas")
+                        logger.debug("Disciplina %s não tem turmas vinculadas", disciplina_id)
                         continue
                     
                     # Para cada turma, criar um vínculo
@@ -1749,49 +2030,51 @@ def update_professor(
                                 VALUES (%s, %s, %s)
                             """, (professor_id, disciplina_id, id_turma))
                             
-                            print(f"Vínculo criado: Professor={professor_id}, Disciplina={disciplina_id}, Turma={id_turma}")
+                            logger.debug("Vínculo criado: Professor=%s, Disciplina=%s, Turma=%s", professor_id, disciplina_id, id_turma)
                 
                 conn.commit()
-                print("Vínculos atualizados com sucesso")
+                referencia_cache.invalidar("professor_disciplina_turma")
+                logger.info("Vínculos atualizados com sucesso")
             except Exception as e:
                 conn.rollback()
-                print(f"Erro ao atualizar vínculos: {e}")
+                logger.exception(f"Erro ao atualizar vínculos: {e}")
             finally:
                 if conn:
                     conn.close()
         
+        # Nome e vínculos podem ter mudado: descartar o resumo em cache
+        resumo_professor_cache.invalidar_professor(professor_id)
+        
         # Buscar dados atualizados com as disciplinas
         updated_professor = read_professor(professor_id if not updates.get("id_professor") else updates["id_professor"])
-        print(f"Professor atualizado: {updated_professor}")
+        logger.info(f"Professor atualizado: {updated_professor}")
         return updated_professor
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO ao atualizar professor {professor_id}: {str(e)}")
+        logger.exception(f"ERRO ao atualizar professor {professor_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao atualizar professor: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO ATUALIZAÇÃO DO PROFESSOR {professor_id} ===")
 
 @app.post("/api/professores/login")
 def login_professor(login_data: ProfessorLogin):
     """Endpoint para autenticação de professores via email e senha."""
-    print(f"=== TENTATIVA DE LOGIN: {login_data.email_professor} ===")
+    logger.debug("TENTATIVA DE LOGIN: %s", login_data.email_professor)
     try:
         # Buscar professor pelo email incluindo o campo ativo
         query = "SELECT * FROM professor WHERE email_professor = %s"
         result = execute_query(query, (login_data.email_professor,), fetch_one=True)
         
         if not result:
-            print(f"Professor com email {login_data.email_professor} não encontrado")
+            logger.warning(f"Professor com email {login_data.email_professor} não encontrado")
             raise HTTPException(status_code=401, detail="Credenciais inválidas")
         
         # Verificar se o professor está ativo
         if not result["ativo"]:
-            print(f"Professor {result['nome_professor']} está inativo")
+            logger.warning(f"Professor {result['nome_professor']} está inativo")
             raise HTTPException(
                 status_code=401, 
                 detail="Professor inativo. Entre em contato com a administração."
@@ -1800,7 +2083,7 @@ def login_professor(login_data: ProfessorLogin):
         # Verificar a senha (em produção, usaríamos verificação de hash)
         # Corrigido: usando "senha" ao invés de "senha_professor"
         if result["senha"] != login_data.senha_professor:
-            print("Senha incorreta")
+            logger.warning("Senha incorreta")
             raise HTTPException(status_code=401, detail="Credenciais inválidas")
         
         # Buscar disciplinas do professor
@@ -1825,34 +2108,20 @@ def login_professor(login_data: ProfessorLogin):
             "disciplinas": disciplinas
         }
         
-        # Registrar atividade de login no log
+        # Registrar atividade de login no log (gravado em segundo plano)
         try:
-            log_data = {
-                "usuario": result["nome_professor"],
-                "acao": "login",
-                "entidade": "professor",
-                "entidade_id": result["id_professor"],
-                "detalhe": "Login realizado com sucesso",
-                "status": "concluído"
-            }
-            
-            log_query = """
-            INSERT INTO log_atividade (usuario, acao, entidade, entidade_id, detalhe, status)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            execute_query(log_query, (
-                log_data["usuario"], 
-                log_data["acao"], 
-                log_data["entidade"], 
-                log_data["entidade_id"], 
-                log_data["detalhe"], 
-                log_data["status"]
-            ), fetch=False)
-            
+            gravador_log_atividade.registrar(
+                usuario=result["nome_professor"],
+                acao="login",
+                entidade="professor",
+                entidade_id=result["id_professor"],
+                detalhe="Login realizado com sucesso",
+                status="concluído"
+            )
         except Exception as e:
-            print(f"Erro ao registrar log de login: {str(e)}")
+            logger.warning(f"Erro ao registrar log de login: {str(e)}")
         
-        print(f"Login bem-sucedido para o professor {result['nome_professor']}")
+        logger.info(f"Login bem-sucedido para o professor {result['nome_professor']}")
         return {
             "message": "Login realizado com sucesso",
             "professor": professor_data
@@ -1860,13 +2129,11 @@ def login_professor(login_data: ProfessorLogin):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO no login: {str(e)}")
+        logger.exception(f"ERRO no login: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro interno no servidor: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO LOGIN DO PROFESSOR ===")
 
 @app.patch("/api/professores/{professor_id}/status", response_model=Professor)
 def toggle_professor_status(
@@ -1874,14 +2141,14 @@ def toggle_professor_status(
     ativo: bool = Body(..., embed=True, description="Status ativo do professor")
 ):
     """Ativa ou inativa um professor."""
-    print(f"=== ALTERANDO STATUS DO PROFESSOR {professor_id} PARA {'ATIVO' if ativo else 'INATIVO'} ===")
+    logger.debug("ALTERANDO STATUS DO PROFESSOR %s PARA %s", professor_id, 'ATIVO' if ativo else 'INATIVO')
     try:
         # Verificar se o professor existe
         check_query = "SELECT id FROM professor WHERE id_professor = %s"
         existing = execute_query(check_query, (professor_id,), fetch_one=True)
         
         if not existing:
-            print(f"Professor com ID {professor_id} não encontrado")
+            logger.info(f"Professor com ID {professor_id} não encontrado")
             raise HTTPException(status_code=404, detail="Professor não encontrado")
         
         # Atualizar o status do professor
@@ -1892,144 +2159,197 @@ def toggle_professor_status(
         RETURNING id, id_professor, nome_professor, email_professor, ativo
         """
         
-        print(f"Executando query: {query} com parâmetros: {ativo}, {professor_id}")
+        logger.debug("Executando query: %s com parâmetros: %s, %s", query, ativo, professor_id)
         result = execute_query(query, (ativo, professor_id), fetch_one=True)
+        referencia_cache.invalidar("professor")
         
         if not result:
-            print("Falha ao atualizar status do professor")
+            logger.error("Falha ao atualizar status do professor")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Falha ao atualizar status do professor"
             )
         
-        # Registrar atividade no log
+        # Registrar atividade no log (gravado em segundo plano)
         try:
-            log_data = {
-                "usuario": "Sistema",
-                "acao": "atualizar",
-                "entidade": "professor",
-                "entidade_id": professor_id,
-                "detalhe": f"Status alterado para {'ativo' if ativo else 'inativo'}",
-                "status": "concluído"
-            }
-            
-            log_query = """
-            INSERT INTO log_atividade (usuario, acao, entidade, entidade_id, detalhe, status)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            execute_query(log_query, (
-                log_data["usuario"], 
-                log_data["acao"], 
-                log_data["entidade"], 
-                log_data["entidade_id"], 
-                log_data["detalhe"], 
-                log_data["status"]
-            ), fetch=False)
-            
+            gravador_log_atividade.registrar(
+                usuario="Sistema",
+                acao="atualizar",
+                entidade="professor",
+                entidade_id=professor_id,
+                detalhe=f"Status alterado para {'ativo' if ativo else 'inativo'}",
+                status="concluído"
+            )
         except Exception as e:
-            print(f"Erro ao registrar log de alteração de status: {str(e)}")
+            logger.warning(f"Erro ao registrar log de alteração de status: {str(e)}")
         
         # Buscar dados atualizados com as disciplinas
         updated_professor = read_professor(professor_id)
-        print(f"Status do professor alterado com sucesso: {updated_professor}")
+        logger.info(f"Status do professor alterado com sucesso: {updated_professor}")
         return updated_professor
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO ao alterar status do professor {professor_id}: {str(e)}")
+        logger.exception(f"ERRO ao alterar status do professor {professor_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao alterar status do professor: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO ALTERAÇÃO DE STATUS DO PROFESSOR {professor_id} ===")
+
+# Cache do resumo do professor (dashboard e estatísticas)
+class ResumoProfessorCache:
+    """
+    Cache em memória, por worker, do resumo calculado por consultar_resumo_professor.
+
+    As entradas são guardadas por (professor, escola da requisição), já que o
+    resumo com X-Escola-ID conta apenas as turmas, alunos e notas daquela escola.
+    São invalidadas quando notas ou vínculos do professor mudam. O TTL limita
+    por quanto tempo um worker pode servir dados alterados por outro worker.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._itens = {}
+
+    def obter(self, id_professor, id_escola=None):
+        chave = (id_professor, id_escola)
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            if item["expira_em"] < time.monotonic():
+                del self._itens[chave]
+                return None
+            return item["resumo"]
+
+    def guardar(self, id_professor, resumo, nome_professor, pares, id_escola=None):
+        with self._lock:
+            self._itens[(id_professor, id_escola)] = {
+                "expira_em": time.monotonic() + self.ttl,
+                "resumo": resumo,
+                "nome": nome_professor,
+                "pares": {(p[0], p[1]) for p in pares},
+            }
+
+    def invalidar_professor(self, id_professor):
+        """Remove os resumos do professor em todas as escolas."""
+        with self._lock:
+            for chave in [chave for chave in self._itens if chave[0] == id_professor]:
+                del self._itens[chave]
+
+    def invalidar_turma_disciplina(self, id_turma, id_disciplina=None):
+        """Remove os resumos que dependem da turma (e, se informada, da disciplina)."""
+        with self._lock:
+            for chave in [
+                chave for chave, item in self._itens.items()
+                if any(t == id_turma and (id_disciplina is None or d == id_disciplina)
+                       for t, d in item["pares"])
+            ]:
+                del self._itens[chave]
+
+    def invalidar_usuario(self, nome_usuario):
+        """Remove o resumo do professor cujo nome aparece nas atividades recentes."""
+        with self._lock:
+            for chave in [chave for chave, item in self._itens.items() if item["nome"] == nome_usuario]:
+                del self._itens[chave]
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+
+resumo_professor_cache = ResumoProfessorCache(ttl=int(os.environ.get("RESUMO_PROFESSOR_TTL", "60")))
+
+# Todos os contadores do professor em uma única consulta. {escola_*} recebem a
+# condição de escola (vazias para a rede inteira), que também restringe as
+# notas à partição da escola.
+QUERY_RESUMO_PROFESSOR = """
+WITH vinculos AS (
+    SELECT id_turma, id_disciplina
+    FROM professor_disciplina_turma
+    WHERE id_professor = %(id_professor)s{escola_vinculos}
+)
+SELECT
+    p.id_professor,
+    p.nome_professor,
+    (SELECT COUNT(DISTINCT id_turma) FROM vinculos) AS total_turmas,
+    (SELECT COUNT(DISTINCT id_disciplina) FROM vinculos) AS total_disciplinas,
+    (SELECT COUNT(DISTINCT a.id_aluno)
+       FROM aluno a
+      WHERE a.id_turma IN (SELECT id_turma FROM vinculos){escola_alunos}) AS total_alunos,
+    (SELECT COUNT(*)
+       FROM nota n
+       JOIN vinculos v ON n.id_turma = v.id_turma AND n.id_disciplina = v.id_disciplina
+      WHERE TRUE{escola_notas}) AS total_notas,
+    (SELECT COALESCE(json_agg(json_build_array(v.id_turma, v.id_disciplina)), '[]'::json)
+       FROM (SELECT DISTINCT id_turma, id_disciplina FROM vinculos) v) AS pares,
+    (SELECT COALESCE(json_agg(l ORDER BY l.data_hora DESC), '[]'::json)
+       FROM (SELECT data_hora, acao, entidade, entidade_id, detalhe, status
+               FROM log_atividade
+              WHERE usuario = p.nome_professor
+              ORDER BY data_hora DESC
+              LIMIT 5) l) AS atividades_recentes
+FROM professor p
+WHERE p.id_professor = %(id_professor)s
+"""
+
+def consultar_resumo_professor(professor_id):
+    """
+    Retorna os contadores e as atividades recentes do professor (restritos à
+    escola da requisição, com X-Escola-ID), usando o cache quando possível.
+    Retorna None se o professor não existir.
+    """
+    escola = escola_atual()
+    resumo = resumo_professor_cache.obter(professor_id, escola)
+    if resumo is not None:
+        return resumo
+    
+    def filtro(coluna):
+        return "" if escola is None else f" AND {coluna} = %(id_escola)s"
+    
+    query = QUERY_RESUMO_PROFESSOR.format(
+        escola_vinculos=filtro("id_escola"),
+        escola_alunos=filtro("a.id_escola"),
+        escola_notas=filtro("n.id_escola"),
+    )
+    row = execute_query(query, {"id_professor": professor_id, "id_escola": escola}, fetch_one=True)
+    if not row:
+        return None
+    
+    resumo = {
+        "total_turmas": row["total_turmas"],
+        "total_disciplinas": row["total_disciplinas"],
+        "total_alunos": row["total_alunos"],
+        "total_notas": row["total_notas"],
+        "atividades_recentes": row["atividades_recentes"] or []
+    }
+    resumo_professor_cache.guardar(professor_id, resumo, row["nome_professor"], row["pares"] or [], escola)
+    return resumo
 
 @app.get("/api/professores/{professor_id}/dashboard")
 def get_professor_dashboard(professor_id: str):
     """Retorna dados resumidos para o dashboard do professor."""
-    print(f"=== BUSCANDO DADOS DO DASHBOARD PARA O PROFESSOR {professor_id} ===")
+    logger.debug("BUSCANDO DADOS DO DASHBOARD PARA O PROFESSOR %s", professor_id)
     try:
-        # Verificar se o professor existe
-        query_professor = "SELECT id_professor FROM professor WHERE id_professor = %s"
-        professor_result = execute_query(query_professor, (professor_id,), fetch_one=True)
+        resumo = consultar_resumo_professor(professor_id)
         
-        if not professor_result:
+        if resumo is None:
             raise HTTPException(status_code=404, detail=f"Professor com ID {professor_id} não encontrado")
         
-        # 1. Contar turmas do professor
-        query_turmas = """
-        SELECT COUNT(DISTINCT id_turma) as total_turmas 
-        FROM professor_disciplina_turma 
-        WHERE id_professor = %s
-        """
-        turmas_count = execute_query(query_turmas, (professor_id,), fetch_one=True)
-        total_turmas = turmas_count["total_turmas"] if turmas_count else 0
-        
-        # 2. Contar disciplinas do professor
-        query_disciplinas = """
-        SELECT COUNT(DISTINCT id_disciplina) as total_disciplinas 
-        FROM professor_disciplina_turma 
-        WHERE id_professor = %s
-        """
-        disciplinas_count = execute_query(query_disciplinas, (professor_id,), fetch_one=True)
-        total_disciplinas = disciplinas_count["total_disciplinas"] if disciplinas_count else 0
-        
-        # 3. Contar alunos nas turmas do professor
-        query_alunos = """
-        SELECT COUNT(DISTINCT a.id_aluno) as total_alunos
-        FROM aluno a
-        JOIN professor_disciplina_turma pdt ON a.id_turma = pdt.id_turma
-        WHERE pdt.id_professor = %s
-        """
-        alunos_count = execute_query(query_alunos, (professor_id,), fetch_one=True)
-        total_alunos = alunos_count["total_alunos"] if alunos_count else 0
-        
-        # 4. Contar notas lançadas pelo professor
-        query_notas = """
-        SELECT COUNT(*) as total_notas
-        FROM nota n
-        JOIN professor_disciplina_turma pdt ON 
-            n.id_turma = pdt.id_turma AND
-            n.id_disciplina = pdt.id_disciplina
-        WHERE pdt.id_professor = %s
-        """
-        notas_count = execute_query(query_notas, (professor_id,), fetch_one=True)
-        total_notas = notas_count["total_notas"] if notas_count else 0
-        
-        # 5. Buscar atividades recentes do professor
-        query_logs = """
-        SELECT * FROM log_atividade
-        WHERE usuario = (SELECT nome_professor FROM professor WHERE id_professor = %s)
-        ORDER BY data_hora DESC
-        LIMIT 5
-        """
-        logs_result = execute_query(query_logs, (professor_id,))
-        atividades_recentes = []
-        
-        if logs_result:
-            for log in logs_result:
-                atividades_recentes.append({
-                    "data_hora": log["data_hora"].isoformat() if log["data_hora"] else None,
-                    "acao": log["acao"],
-                    "entidade": log["entidade"],
-                    "entidade_id": log["entidade_id"],
-                    "detalhe": log["detalhe"],
-                    "status": log["status"]
-                })
-        
         return {
-            "total_turmas": total_turmas,
-            "total_disciplinas": total_disciplinas,
-            "total_alunos": total_alunos,
-            "total_notas_lancadas": total_notas,
-            "atividades_recentes": atividades_recentes
+            "total_turmas": resumo["total_turmas"],
+            "total_disciplinas": resumo["total_disciplinas"],
+            "total_alunos": resumo["total_alunos"],
+            "total_notas_lancadas": resumo["total_notas"],
+            "atividades_recentes": resumo["atividades_recentes"]
         }
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Erro ao buscar dados do dashboard do professor: {str(e)}")
+        logger.exception(f"Erro ao buscar dados do dashboard do professor: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao buscar dados do dashboard do professor: {str(e)}"
@@ -2038,19 +2358,15 @@ def get_professor_dashboard(professor_id: str):
 @app.get("/api/professores/{professor_id}/turmas")
 def get_professor_turmas(professor_id: str):
     """Retorna todas as turmas associadas a um professor."""
-    print(f"=== BUSCANDO TURMAS DO PROFESSOR {professor_id} ===")
+    logger.debug("BUSCANDO TURMAS DO PROFESSOR %s", professor_id)
     try:
-        # Verificar se o professor existe
-        query_professor = "SELECT id_professor FROM professor WHERE id_professor = %s"
-        professor_result = execute_query(query_professor, (professor_id,), fetch_one=True)
-        
-        if not professor_result:
+        # Verificar se o professor existe (cache de referência)
+        if not referencia_cache.professor_existe(professor_id):
             raise HTTPException(status_code=404, detail=f"Professor com ID {professor_id} não encontrado")
         
-        # Buscar todas as turmas do professor com contagem de alunos
+        # Buscar todas as turmas do professor
         query_turmas = """
-        SELECT DISTINCT t.*, 
-            (SELECT COUNT(*) FROM aluno a WHERE a.id_turma = t.id_turma) as qtd_alunos
+        SELECT DISTINCT t.*
         FROM turma t
         JOIN professor_disciplina_turma pdt ON t.id_turma = pdt.id_turma
         WHERE pdt.id_professor = %s
@@ -2059,9 +2375,15 @@ def get_professor_turmas(professor_id: str):
         turmas_result = execute_query(query_turmas, (professor_id,))
         
         if not turmas_result:
-            print(f"Nenhuma turma encontrada para o professor {professor_id}")
+            logger.debug("Nenhuma turma encontrada para o professor %s", professor_id)
             return []
         
+        # Contagem de alunos de todas as turmas em uma única consulta
+        with CarregadorRelacoes(get_db_connection()) as carregador:
+            qtd_alunos_por_turma = carregador.carregar(
+                "qtd_alunos_da_turma", [turma["id_turma"] for turma in turmas_result]
+            )
+        
         turmas = []
         for turma in turmas_result:
             # Assegurar que cada campo existe antes de tentar acessá-lo
@@ -2073,19 +2395,19 @@ def get_professor_turmas(professor_id: str):
                 "id_turma": turma["id_turma"],
                 "serie_turma": serie,
                 "turno_turma": turno,
-                "qtd_alunos": turma.get("qtd_alunos", 0),
+                "qtd_alunos": qtd_alunos_por_turma[turma["id_turma"]],
                 "ano_letivo": turma.get("ano_letivo", 0)
             })
         
-        print(f"Encontradas {len(turmas)} turmas para o professor {professor_id}")
+        logger.debug("Encontradas %s turmas para o professor %s", len(turmas), professor_id)
         # Para depuração
-        print(f"Dados das turmas: {turmas}")
+        logger.debug("Dados das turmas: %s", turmas)
         return turmas
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Erro ao buscar turmas do professor: {str(e)}")
+        logger.exception(f"Erro ao buscar turmas do professor: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao buscar turmas do professor: {str(e)}"
@@ -2094,16 +2416,11 @@ def get_professor_turmas(professor_id: str):
 @app.get("/api/professores/{professor_id}/alunos")
 def get_professor_alunos(professor_id: str, turma_id: Optional[str] = None):
     """Retorna todos os alunos das turmas de um professor, com filtro opcional por turma."""
-    print(f"=== BUSCANDO ALUNOS DO PROFESSOR {professor_id} ===")
+    logger.debug("BUSCANDO ALUNOS DO PROFESSOR %s", professor_id)
     try:
-        # Verificar se o professor existe
-        query_professor = "SELECT id_professor FROM professor WHERE id_professor = %s"
-        print(f"Executando query para verificar professor: {query_professor} com parâmetro: {professor_id}")
-        professor_result = execute_query(query_professor, (professor_id,), fetch_one=True)
-        print(f"Resultado da query de professor: {professor_result}")
-        
-        if not professor_result:
-            print(f"Professor com ID {professor_id} não encontrado")
+        # Verificar se o professor existe (cache de referência)
+        if not referencia_cache.professor_existe(professor_id):
+            logger.info(f"Professor com ID {professor_id} não encontrado")
             raise HTTPException(status_code=404, detail=f"Professor com ID {professor_id} não encontrado")
         
         # Construir a query base
@@ -2123,14 +2440,14 @@ def get_professor_alunos(professor_id: str, turma_id: Optional[str] = None):
         
         query_alunos += " ORDER BY a.nome_aluno"
         
-        print(f"Executando query para buscar alunos: {query_alunos} com parâmetros: {params}")
+        logger.debug("Executando query para buscar alunos: %s com parâmetros: %s", query_alunos, params)
         alunos_result = execute_query(query_alunos, tuple(params))
-        print(f"Resultados retornados: {len(alunos_result) if alunos_result else 0}")
+        logger.debug("Resultados retornados: %s", len(alunos_result) if alunos_result else 0)
         
         if not alunos_result:
-            print(f"Nenhum aluno encontrado para o professor {professor_id}")
+            logger.debug("Nenhum aluno encontrado para o professor %s", professor_id)
             if turma_id:
-                print(f"com o filtro de turma {turma_id}")
+                logger.debug("com o filtro de turma %s", turma_id)
                 
             # Verificar se o professor tem vínculos com turmas
             vinculos_query = """
@@ -2138,7 +2455,7 @@ def get_professor_alunos(professor_id: str, turma_id: Optional[str] = None):
             WHERE id_professor = %s
             """
             vinculos_result = execute_query(vinculos_query, (professor_id,), fetch_one=True)
-            print(f"Verificação de vínculos do professor: {vinculos_result}")
+            logger.debug("Verificação de vínculos do professor: %s", vinculos_result)
             
             # Verificar se existem alunos nas turmas vinculadas ao professor
             alunos_turmas_query = """
@@ -2150,13 +2467,12 @@ def get_professor_alunos(professor_id: str, turma_id: Optional[str] = None):
             GROUP BY t.id_turma
             """
             alunos_turmas_result = execute_query(alunos_turmas_query, (professor_id,))
-            print(f"Verificação de alunos nas turmas do professor: {alunos_turmas_result}")
+            logger.debug("Verificação de alunos nas turmas do professor: %s", alunos_turmas_result)
             
             return []
         
         alunos = []
         for aluno in alunos_result:
-            print(f"Processando aluno: {aluno['id_aluno']} - {aluno['nome_aluno']}")
             aluno_obj = {
                 "id": aluno["id"],
                 "id_aluno": aluno["id_aluno"],
@@ -2168,37 +2484,29 @@ def get_professor_alunos(professor_id: str, turma_id: Optional[str] = None):
             alunos.append(aluno_obj)
         
         filtro_msg = f" na turma {turma_id}" if turma_id else ""
-        print(f"Encontrados {len(alunos)} alunos para o professor {professor_id}{filtro_msg}")
+        logger.debug("Encontrados %s alunos para o professor %s%s", len(alunos), professor_id, filtro_msg)
         return alunos
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO ao buscar alunos do professor: {str(e)}")
+        logger.exception(f"ERRO ao buscar alunos do professor: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao buscar alunos do professor: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO BUSCA DE ALUNOS DO PROFESSOR {professor_id} ===")
 
 @app.get("/api/professores/{professor_id}/turmas/{turma_id}/disciplinas")
 def get_professor_disciplinas_turma(professor_id: str, turma_id: str):
     """Retorna todas as disciplinas que um professor leciona em uma turma específica."""
-    print(f"=== BUSCANDO DISCIPLINAS DO PROFESSOR {professor_id} NA TURMA {turma_id} ===")
+    logger.debug("BUSCANDO DISCIPLINAS DO PROFESSOR %s NA TURMA %s", professor_id, turma_id)
     try:
-        # Verificar se o professor existe
-        query_professor = "SELECT id_professor FROM professor WHERE id_professor = %s"
-        professor_result = execute_query(query_professor, (professor_id,), fetch_one=True)
-        
-        if not professor_result:
+        # Verificar se o professor existe (cache de referência)
+        if not referencia_cache.professor_existe(professor_id):
             raise HTTPException(status_code=404, detail=f"Professor com ID {professor_id} não encontrado")
         
-        # Verificar se a turma existe
-        query_turma = "SELECT id_turma FROM turma WHERE id_turma = %s"
-        turma_result = execute_query(query_turma, (turma_id,), fetch_one=True)
-        
-        if not turma_result:
+        # Verificar se a turma existe (cache de referência)
+        if not referencia_cache.turma_existe(turma_id):
             raise HTTPException(status_code=404, detail=f"Turma com ID {turma_id} não encontrada")
         
         # Buscar as disciplinas do professor na turma específica
@@ -2213,7 +2521,7 @@ def get_professor_disciplinas_turma(professor_id: str, turma_id: str):
         disciplinas_result = execute_query(query_disciplinas, (professor_id, turma_id))
         
         if not disciplinas_result:
-            print(f"Nenhuma disciplina encontrada para o professor {professor_id} na turma {turma_id}")
+            logger.debug("Nenhuma disciplina encontrada para o professor %s na turma %s", professor_id, turma_id)
             return []
         
         disciplinas = []
@@ -2224,13 +2532,13 @@ def get_professor_disciplinas_turma(professor_id: str, turma_id: str):
                 "nome_disciplina": disciplina["nome_disciplina"]
             })
         
-        print(f"Encontradas {len(disciplinas)} disciplinas para o professor {professor_id} na turma {turma_id}")
+        logger.debug("Encontradas %s disciplinas para o professor %s na turma %s", len(disciplinas), professor_id, turma_id)
         return disciplinas
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Erro ao buscar disciplinas do professor na turma: {str(e)}")
+        logger.exception(f"Erro ao buscar disciplinas do professor na turma: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao buscar disciplinas do professor na turma: {str(e)}"
@@ -2241,59 +2549,59 @@ def get_professor_disciplinas_turma(professor_id: str, turma_id: str):
 # ==============================================================
 
 @app.get("/api/alunos/", response_model=List[Aluno])
-def read_alunos():
-    """Busca todos os alunos cadastrados."""
-    print("=== INICIANDO BUSCA DE TODOS OS ALUNOS ===")
+def read_alunos(
+    limit: Optional[int] = parametro_limit(),
+    cursor: Optional[str] = parametro_cursor()
+):
+    """Busca todos os alunos cadastrados (paginação opcional por limit/cursor)."""
+    logger.debug("INICIANDO BUSCA DE TODOS OS ALUNOS")
+    conn = None
     try:
         query = """
         SELECT a.id, a.id_aluno, a.nome_aluno, a.data_nasc, a.sexo,
                a.endereco, a.telefone, a.email, a.mae, a.id_turma, a.codigo_inep
         FROM aluno a
-        ORDER BY a.nome_aluno
         """
+        params = []
+        condicao = condicao_escola("a.id_escola", params)
+        if condicao:
+            query += " WHERE " + condicao
+        query, params = paginar_consulta(ORDEM_ALUNOS, query, params, limit, cursor,
+                                         tem_where=bool(condicao))
         
-        print(f"Executando consulta: {query}")
-        results = execute_query(query)
-        
-        if not results:
-            print("Nenhum aluno encontrado")
-            return []
-        
-        print(f"Encontrados {len(results)} alunos")
-        
-        # Converter os resultados para objetos Aluno
-        alunos = []
-        for row in results:
-            aluno = {
-                "id": row["id"],
-                "id_aluno": row["id_aluno"],
-                "nome_aluno": row["nome_aluno"],
-                "data_nasc": row["data_nasc"].isoformat() if row["data_nasc"] else None,
-                "sexo": row["sexo"],
-                "endereco": row["endereco"],
-                "telefone": row["telefone"],
-                "email": row["email"],
-                "mae": row["mae"],
-                "id_turma": row["id_turma"],
-                "codigo_inep": row["codigo_inep"]
-            }
-            alunos.append(aluno)
-        
-        print("Retornando lista de alunos com sucesso")
-        return alunos
+        logger.debug("Executando consulta: %s", query)
+        conn = get_db_connection()
+        cursor_db = conn.cursor()
+        cursor_db.execute(query, params)
+        results = cursor_db.fetchall()
+        
+        results, proximo_cursor = ORDEM_ALUNOS.pagina(results, limit)
+        logger.debug("Encontrados %s alunos", len(results))
+        
+        # Linhas codificadas direto em JSON (data_nasc em ISO 8601), sem montar
+        # dicts um a um nem revalidar o response_model; as chaves seguem a
+        # ordem dos campos de Aluno, como em GET /api/alunos/{aluno_id}
+        resposta = resposta_linhas(cursor_db.description, results, modelo=Aluno,
+                                   headers=cabecalhos_paginacao(proximo_cursor))
+        cursor_db.close()
+        logger.debug("Retornando lista de alunos com sucesso")
+        return resposta
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"ERRO ao buscar alunos: {str(e)}")
+        logger.exception(f"ERRO ao buscar alunos: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao buscar alunos: {str(e)}"
         )
     finally:
-        print("=== FINALIZANDO BUSCA DE TODOS OS ALUNOS ===")
+        if conn:
+            conn.close()
 
 @app.get("/api/alunos/{aluno_id}", response_model=Aluno)
 def read_aluno(aluno_id: str = Path(..., description="ID ou código do aluno")):
     """Busca um aluno específico pelo ID ou código."""
-    print(f"=== INICIANDO BUSCA DO ALUNO {aluno_id} ===")
+    logger.debug("INICIANDO BUSCA DO ALUNO %s", aluno_id)
     try:
         query = """
         SELECT a.id, a.id_aluno, a.nome_aluno, a.data_nasc, a.sexo,
@@ -2302,14 +2610,14 @@ def read_aluno(aluno_id: str = Path(..., description="ID ou código do aluno")):
         WHERE a.id_aluno = %s
         """
         
-        print(f"Executando consulta: {query}")
+        logger.debug("Executando consulta: %s", query)
         result = execute_query(query, (aluno_id,), fetch_one=True)
         
         if not result:
-            print(f"Aluno com ID {aluno_id} não encontrado")
+            logger.info(f"Aluno com ID {aluno_id} não encontrado")
             raise HTTPException(status_code=404, detail="Aluno não encontrado")
         
-        print(f"Aluno {aluno_id} encontrado")
+        logger.debug("Aluno %s encontrado", aluno_id)
         
         aluno = {
             "id": result["id"],
@@ -2325,41 +2633,36 @@ def read_aluno(aluno_id: str = Path(..., description="ID ou código do aluno")):
             "codigo_inep": result["codigo_inep"]
         }
         
-        print(f"Retornando dados do aluno {aluno_id}")
+        logger.debug("Retornando dados do aluno %s", aluno_id)
         return aluno
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO ao buscar aluno {aluno_id}: {str(e)}")
+        logger.exception(f"ERRO ao buscar aluno {aluno_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao buscar aluno: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO BUSCA DO ALUNO {aluno_id} ===")
 
 @app.post("/api/alunos/", response_model=Aluno, status_code=status.HTTP_201_CREATED)
 def create_aluno(aluno: AlunoCreate):
     """Cria um novo aluno."""
-    print(f"=== INICIANDO CRIAÇÃO DE ALUNO ===")
+    logger.debug("INICIANDO CRIAÇÃO DE ALUNO")
     try:
         # Verificar se já existe um aluno com o mesmo id_aluno
         check_query = "SELECT id FROM aluno WHERE id_aluno = %s"
         existing = execute_query(check_query, (aluno.id_aluno,), fetch_one=True)
         
         if existing:
-            print(f"Aluno com ID {aluno.id_aluno} já existe")
+            logger.info(f"Aluno com ID {aluno.id_aluno} já existe")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Já existe um aluno com o código {aluno.id_aluno}"
             )
         
-        # Verificar se a turma existe
-        turma_query = "SELECT id FROM turma WHERE id_turma = %s"
-        turma = execute_query(turma_query, (aluno.id_turma,), fetch_one=True)
-        
-        if not turma:
-            print(f"Turma com ID {aluno.id_turma} não encontrada")
+        # Verificar se a turma existe (cache de referência)
+        if not referencia_cache.turma_existe(aluno.id_turma):
+            logger.info(f"Turma com ID {aluno.id_turma} não encontrada")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Turma com código {aluno.id_turma} não encontrada"
@@ -2387,16 +2690,19 @@ def create_aluno(aluno: AlunoCreate):
             aluno.codigo_inep
         )
         
-        print(f"Executando inserção: {insert_query} com parâmetros: {params}")
+        logger.debug("Executando inserção: %s com parâmetros: %s", insert_query, params)
         result = execute_query(insert_query, params, fetch_one=True)
         
         if not result:
-            print("Falha ao criar aluno")
+            logger.error("Falha ao criar aluno")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Falha ao criar aluno"
             )
         
+        resumo_professor_cache.invalidar_turma_disciplina(aluno.id_turma)
+        referencia_cache.invalidar("aluno")
+        
         aluno_criado = {
             "id": result["id"],
             "id_aluno": result["id_aluno"],
@@ -2411,19 +2717,17 @@ def create_aluno(aluno: AlunoCreate):
             "codigo_inep": result["codigo_inep"]
         }
         
-        print(f"Aluno criado com sucesso: {aluno_criado}")
+        logger.info(f"Aluno criado com sucesso: {aluno_criado}")
         return aluno_criado
     
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO ao criar aluno: {str(e)}")
+        logger.exception(f"ERRO ao criar aluno: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao criar aluno: {str(e)}"
         )
-    finally:
-        print("=== FINALIZANDO CRIAÇÃO DE ALUNO ===")
 
 @app.put("/api/alunos/{aluno_id}", response_model=Aluno)
 def update_aluno(
@@ -2431,14 +2735,14 @@ def update_aluno(
     aluno: AlunoUpdate = Body(...)
 ):
     """Atualiza os dados de um aluno existente."""
-    print(f"=== INICIANDO ATUALIZAÇÃO DO ALUNO {aluno_id} ===")
+    logger.debug("INICIANDO ATUALIZAÇÃO DO ALUNO %s", aluno_id)
     try:
         # Verificar se o aluno existe
-        check_query = "SELECT id FROM aluno WHERE id_aluno = %s"
+        check_query = "SELECT id, id_turma FROM aluno WHERE id_aluno = %s"
         existing = execute_query(check_query, (aluno_id,), fetch_one=True)
         
         if not existing:
-            print(f"Aluno com ID {aluno_id} não encontrado")
+            logger.info(f"Aluno com ID {aluno_id} não encontrado")
             raise HTTPException(status_code=404, detail="Aluno não encontrado")
         
         # Verificar quais campos foram fornecidos para atualização
@@ -2460,12 +2764,9 @@ def update_aluno(
         if aluno.mae is not None:
             updates["mae"] = aluno.mae
         if aluno.id_turma is not None:
-            # Verificar se a turma existe
-            turma_query = "SELECT id FROM turma WHERE id_turma = %s"
-            turma = execute_query(turma_query, (aluno.id_turma,), fetch_one=True)
-            
-            if not turma:
-                print(f"Turma com ID {aluno.id_turma} não encontrada")
+            # Verificar se a turma existe (cache de referência)
+            if not referencia_cache.turma_existe(aluno.id_turma):
+                logger.info(f"Turma com ID {aluno.id_turma} não encontrada")
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Turma com código {aluno.id_turma} não encontrada"
@@ -2475,7 +2776,7 @@ def update_aluno(
         if aluno.codigo_inep is not None:
             updates["codigo_inep"] = aluno.codigo_inep
         
-        print(f"Campos a atualizar: {updates}")
+        logger.debug("Campos a atualizar: %s", updates)
         
         if not updates:
             # Se não houver campos para atualizar, buscamos e retornamos os dados atuais
@@ -2495,16 +2796,21 @@ def update_aluno(
         params = list(updates.values())
         params.append(existing["id"])
         
-        print(f"Executando query: {query} com parâmetros: {params}")
+        logger.debug("Executando query: %s com parâmetros: %s", query, params)
         result = execute_query(query, params, fetch_one=True)
         
         if not result:
-            print("Falha ao atualizar aluno")
+            logger.error("Falha ao atualizar aluno")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Falha ao atualizar aluno"
             )
         
+        if "id_turma" in updates:
+            resumo_professor_cache.invalidar_turma_disciplina(existing["id_turma"])
+            resumo_professor_cache.invalidar_turma_disciplina(updates["id_turma"])
+        referencia_cache.invalidar("aluno")
+        
         aluno_atualizado = {
             "id": result["id"],
             "id_aluno": result["id_aluno"],
@@ -2519,31 +2825,29 @@ def update_aluno(
             "codigo_inep": result["codigo_inep"]
         }
         
-        print(f"Aluno atualizado: {aluno_atualizado}")
+        logger.info(f"Aluno atualizado: {aluno_atualizado}")
         return aluno_atualizado
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO ao atualizar aluno {aluno_id}: {str(e)}")
+        logger.exception(f"ERRO ao atualizar aluno {aluno_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao atualizar aluno: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO ATUALIZAÇÃO DO ALUNO {aluno_id} ===")
 
 @app.delete("/api/alunos/{aluno_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_aluno(aluno_id: str = Path(..., description="ID ou código do aluno")):
     """Remove um aluno do sistema."""
-    print(f"=== INICIANDO EXCLUSÃO DO ALUNO {aluno_id} ===")
+    logger.debug("INICIANDO EXCLUSÃO DO ALUNO %s", aluno_id)
     try:
         # Verificar se o aluno existe
-        check_query = "SELECT id FROM aluno WHERE id_aluno = %s"
+        check_query = "SELECT id, id_turma FROM aluno WHERE id_aluno = %s"
         existing = execute_query(check_query, (aluno_id,), fetch_one=True)
         
         if not existing:
-            print(f"Aluno com ID {aluno_id} não encontrado")
+            logger.info(f"Aluno com ID {aluno_id} não encontrado")
             raise HTTPException(status_code=404, detail="Aluno não encontrado")
         
         # Verificar se há dependências (por exemplo, notas vinculadas)
@@ -2552,32 +2856,29 @@ def delete_aluno(aluno_id: str = Path(..., description="ID ou código do aluno")
         # Excluir o aluno
         query = "DELETE FROM aluno WHERE id = %s"
         execute_query(query, (existing["id"],), fetch=False)
+        resumo_professor_cache.invalidar_turma_disciplina(existing["id_turma"])
+        referencia_cache.invalidar("aluno")
         
-        print(f"Aluno {aluno_id} excluído com sucesso")
+        logger.info(f"Aluno {aluno_id} excluído com sucesso")
         return None  # HTTP 204 (No Content)
     
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO ao excluir aluno {aluno_id}: {str(e)}")
+        logger.exception(f"ERRO ao excluir aluno {aluno_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao excluir aluno: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO EXCLUSÃO DO ALUNO {aluno_id} ===")
 
 @app.get("/api/alunos/turma/{turma_id}")
 def read_alunos_by_turma(turma_id: str = Path(..., description="ID ou código da turma")):
     """Busca todos os alunos de uma turma específica."""
-    print(f"=== INICIANDO BUSCA DE ALUNOS DA TURMA {turma_id} ===")
+    logger.debug("INICIANDO BUSCA DE ALUNOS DA TURMA %s", turma_id)
     try:
-        # Verificar se a turma existe
-        turma_query = "SELECT id FROM turma WHERE id_turma = %s"
-        turma = execute_query(turma_query, (turma_id,), fetch_one=True)
-        
-        if not turma:
-            print(f"Turma com ID {turma_id} não encontrada")
+        # Verificar se a turma existe (cache de referência)
+        if not referencia_cache.turma_existe(turma_id):
+            logger.info(f"Turma com ID {turma_id} não encontrada")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Turma com código {turma_id} não encontrada"
@@ -2592,14 +2893,14 @@ def read_alunos_by_turma(turma_id: str = Path(..., description="ID ou código da
         ORDER BY a.nome_aluno
         """
         
-        print(f"Executando consulta: {query}")
+        logger.debug("Executando consulta: %s", query)
         results = execute_query(query, (turma_id,))
         
         if not results:
-            print(f"Nenhum aluno encontrado na turma {turma_id}")
+            logger.debug("Nenhum aluno encontrado na turma %s", turma_id)
             return []
         
-        print(f"Encontrados {len(results)} alunos na turma {turma_id}")
+        logger.debug("Encontrados %s alunos na turma %s", len(results), turma_id)
         
         # Converter os resultados para objetos Aluno
         alunos = []
@@ -2619,107 +2920,73 @@ def read_alunos_by_turma(turma_id: str = Path(..., description="ID ou código da
             }
             alunos.append(aluno)
         
-        print(f"Retornando lista de alunos da turma {turma_id}")
+        logger.debug("Retornando lista de alunos da turma %s", turma_id)
         return alunos
     
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO ao buscar alunos da turma {turma_id}: {str(e)}")
+        logger.exception(f"ERRO ao buscar alunos da turma {turma_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao buscar alunos da turma: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO BUSCA DE ALUNOS DA TURMA {turma_id} ===")
 
 # Endpoint para criar uma nota
 @app.post("/api/notas/", status_code=status.HTTP_201_CREATED, response_model=Nota)
 def create_nota(nota: NotaCreate):
     # Log para depuração - veja exatamente o que está chegando
-    print("="*70)
-    print(f"DADOS RECEBIDOS PARA CRIAR NOTA: {nota.dict()}")
-    print("="*70)
+    logger.debug("DADOS RECEBIDOS PARA CRIAR NOTA: %s", nota.dict())
     
     conn = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Verificações básicas - simplificadas
-        cursor.execute("SELECT * FROM aluno WHERE id_aluno = %s", (nota.id_aluno,))
-        if cursor.fetchone() is None:
-            raise HTTPException(status_code=404, detail="Aluno não encontrado")
-        
-        cursor.execute("SELECT * FROM disciplina WHERE id_disciplina = %s", (nota.id_disciplina,))
-        if cursor.fetchone() is None:
+        # Disciplina e turma são verificadas no cache de referência (sem ida ao banco)
+        if not referencia_cache.disciplina_existe(nota.id_disciplina):
             raise HTTPException(status_code=404, detail="Disciplina não encontrada")
-        
-        cursor.execute("SELECT * FROM turma WHERE id_turma = %s", (nota.id_turma,))
-        if cursor.fetchone() is None:
+        if not turma_da_escola(nota.id_turma):
             raise HTTPException(status_code=404, detail="Turma não encontrada")
         
-        # Calcular média - algoritmo simplificado
-        nota_mensal = nota.nota_mensal or 0
-        nota_bimestral = nota.nota_bimestral or 0
-        recuperacao = nota.recuperacao or 0
-        
-        # Cálculo da média
-        if recuperacao > 0:
-            maior_nota = max(nota_mensal, nota_bimestral)
-            media = round((maior_nota * 0.6) + (recuperacao * 0.4), 1)
-        else:
-            media = round((nota_mensal + nota_bimestral) / 2, 1) if (nota_mensal > 0 or nota_bimestral > 0) else 0
+        # Calcular média com o motor de médias (mesma fórmula do trigger do banco)
+        media = calcular_media(nota.nota_mensal, nota.nota_bimestral, nota.recuperacao)
         
-        print(f"CÁLCULO DE MÉDIA: Mensal={nota_mensal}, Bimestral={nota_bimestral}, Recuperação={recuperacao} = Média Final={media}")
+        logger.debug("CÁLCULO DE MÉDIA: Mensal=%s, Bimestral=%s, Recuperação=%s = Média Final=%s", nota.nota_mensal, nota.nota_bimestral, nota.recuperacao, media)
         
-        # Verificar se já existe nota com mesmos critérios
+        # Insert ou Update em um único comando, usando a chave única
+        # (id_escola, id_aluno, id_disciplina, id_turma, ano, bimestre) - ver
+        # migracoes/0004_nota_chave_unica.sql e 0012_tenancia_escola.sql. id_escola
+        # (o da turma) escolhe a partição da nota.
+        # A existência do aluno é verificada no próprio INSERT: se ele não existir,
+        # nenhuma linha é gravada nem retornada.
         cursor.execute("""
-            SELECT id FROM nota 
-            WHERE id_aluno = %s AND id_disciplina = %s AND id_turma = %s 
-            AND ano = %s AND bimestre = %s
-        """, (nota.id_aluno, nota.id_disciplina, nota.id_turma, nota.ano, nota.bimestre))
-        
-        existing_nota = cursor.fetchone()
-        nota_id = None
-        
-        # Update ou Insert
-        if existing_nota:
-            nota_id = existing_nota[0]
-            print(f"ATUALIZANDO nota existente: ID={nota_id}")
-            
-            cursor.execute("""
-                UPDATE nota 
-                SET nota_mensal = %s, nota_bimestral = %s, recuperacao = %s, media = %s, frequencia = %s
-                WHERE id = %s
-            """, (nota.nota_mensal, nota.nota_bimestral, nota.recuperacao, media, nota.frequencia, nota_id))
-            
-        else:
-            print(f"INSERINDO nova nota: Aluno={nota.id_aluno}, Disciplina={nota.id_disciplina}, Turma={nota.id_turma}")
-            
-            cursor.execute("""
-                INSERT INTO nota (id_aluno, id_disciplina, id_turma, ano, bimestre, 
-                                nota_mensal, nota_bimestral, recuperacao, media, frequencia)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING id
-            """, (nota.id_aluno, nota.id_disciplina, nota.id_turma, nota.ano, nota.bimestre,
-                nota.nota_mensal, nota.nota_bimestral, nota.recuperacao, media, nota.frequencia))
-            
-            nota_id = cursor.fetchone()[0]
+            INSERT INTO nota (id_aluno, id_disciplina, id_turma, ano, bimestre, 
+                            nota_mensal, nota_bimestral, recuperacao, media, frequencia, id_escola)
+            SELECT %s, %s, %s, %s::integer, %s::integer,
+                   %s::float8, %s::float8, %s::float8, %s::float8, %s::integer,
+                   (SELECT COALESCE(id_escola, 0) FROM turma WHERE id_turma = %s)
+            WHERE EXISTS (SELECT 1 FROM aluno WHERE id_aluno = %s)
+            ON CONFLICT (id_escola, id_aluno, id_disciplina, id_turma, ano, bimestre) DO UPDATE
+            SET nota_mensal = EXCLUDED.nota_mensal,
+                nota_bimestral = EXCLUDED.nota_bimestral,
+                recuperacao = EXCLUDED.recuperacao,
+                media = EXCLUDED.media,
+                frequencia = EXCLUDED.frequencia
+            RETURNING id, id_aluno, id_disciplina, id_turma, ano, bimestre, 
+                      nota_mensal, nota_bimestral, recuperacao, media, frequencia
+        """, (nota.id_aluno, nota.id_disciplina, nota.id_turma, nota.ano, nota.bimestre,
+            nota.nota_mensal, nota.nota_bimestral, nota.recuperacao, media, nota.frequencia,
+            nota.id_turma, nota.id_aluno))
+        
+        nota_data = cursor.fetchone()
+        if nota_data is None:
+            raise HTTPException(status_code=404, detail="Aluno não encontrado")
         
         # COMMIT EXPLÍCITO - MUITO IMPORTANTE
         conn.commit()
-        print(f"TRANSAÇÃO CONFIRMADA - NOTA ID={nota_id} SALVA COM SUCESSO")
-        
-        # Buscar nota salva para confirmar
-        cursor.execute("""
-            SELECT id, id_aluno, id_disciplina, id_turma, ano, bimestre, 
-                   nota_mensal, nota_bimestral, recuperacao, media, frequencia
-            FROM nota WHERE id = %s
-        """, (nota_id,))
-        
-        nota_data = cursor.fetchone()
-        print(f"DADOS DA NOTA CONFIRMADOS: {nota_data}")
+        resumo_professor_cache.invalidar_turma_disciplina(nota.id_turma, nota.id_disciplina)
+        logger.info(f"TRANSAÇÃO CONFIRMADA - NOTA ID={nota_data[0]} SALVA COM SUCESSO: {nota_data}")
         
         # Retornar objeto para API
         return {
@@ -2736,9 +3003,11 @@ def create_nota(nota: NotaCreate):
             "frequencia": nota_data[10]
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         # Em caso de erro, rollback explícito
-        print(f"ERRO AO PROCESSAR NOTA: {str(e)}")
+        logger.exception(f"ERRO AO PROCESSAR NOTA: {str(e)}")
         if conn:
             conn.rollback()
         raise HTTPException(status_code=500, detail=f"Erro ao criar/atualizar nota: {str(e)}")
@@ -2747,26 +3016,177 @@ def create_nota(nota: NotaCreate):
         # Garantir que a conexão sempre será fechada
         if conn:
             conn.close()
-            print("CONEXÃO FECHADA")
-        print("="*70)
+
+# Endpoint para lançar as notas de uma turma/disciplina/bimestre de uma só vez
+@app.post("/api/notas/lote", status_code=status.HTTP_200_OK)
+def create_notas_lote(lote: NotaLoteCreate):
+    """
+    Cria ou atualiza todas as notas de uma planilha (turma, disciplina, ano, bimestre).
+    
+    As chaves são validadas em uma única consulta (cada aluno precisa estar na
+    turma do lote) e as linhas válidas são gravadas com um único INSERT ... ON
+    CONFLICT. Uma frequência não informada mantém a já gravada. Linhas inválidas
+    não interrompem o lote: cada linha recebe seu próprio resultado, com "status"
+    igual a "criada", "atualizada" ou "erro".
+    """
+    logger.debug("LANÇAMENTO EM LOTE: Turma=%s, Disciplina=%s, Ano=%s, Bimestre=%s, Linhas=%s", lote.id_turma, lote.id_disciplina, lote.ano, lote.bimestre, len(lote.notas))
+    
+    if lote.bimestre not in (1, 2, 3, 4):
+        raise HTTPException(status_code=400, detail="Bimestre deve estar entre 1 e 4")
+    
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        
+        # Turma e disciplina vêm do cache de referência; os alunos (e suas
+        # turmas) são validados em uma única consulta
+        if not turma_da_escola(lote.id_turma):
+            raise HTTPException(status_code=404, detail="Turma não encontrada")
+        if not referencia_cache.disciplina_existe(lote.id_disciplina):
+            raise HTTPException(status_code=404, detail="Disciplina não encontrada")
+        
+        ids_alunos = list({item.id_aluno for item in lote.notas})
+        cursor.execute("SELECT id_aluno, id_turma FROM aluno WHERE id_aluno = ANY(%s)", (ids_alunos,))
+        turma_do_aluno = {linha[0]: linha[1] for linha in cursor.fetchall()}
+        
+        resultados = [None] * len(lote.notas)
+        linhas_por_aluno = {}
+        valores = []
+        
+        for indice, item in enumerate(lote.notas):
+            erro = None
+            if item.id_aluno not in turma_do_aluno:
+                erro = "Aluno não encontrado"
+            elif turma_do_aluno[item.id_aluno] != lote.id_turma:
+                erro = f"Aluno não pertence à turma {lote.id_turma}"
+            elif item.id_aluno in linhas_por_aluno:
+                erro = f"Aluno repetido no lote (linha {linhas_por_aluno[item.id_aluno]})"
+            elif item.nota_mensal is None and item.nota_bimestral is None and item.recuperacao is None:
+                erro = "Nenhuma nota informada"
+            else:
+                for campo in ("nota_mensal", "nota_bimestral", "recuperacao"):
+                    valor = getattr(item, campo)
+                    if valor is not None and not (0 <= valor <= 10):
+                        erro = f"{campo} deve estar entre 0 e 10"
+                        break
+            
+            if erro:
+                resultados[indice] = {"linha": indice, "id_aluno": item.id_aluno, "status": "erro", "erro": erro}
+                continue
+            
+            linhas_por_aluno[item.id_aluno] = indice
+            valores.append((
+                item.id_aluno, lote.id_disciplina, lote.id_turma, lote.ano, lote.bimestre,
+                item.nota_mensal, item.nota_bimestral, item.recuperacao,
+                calcular_media(item.nota_mensal, item.nota_bimestral, item.recuperacao),
+                item.frequencia
+            ))
+        
+        gravadas = []
+        if valores:
+            # Escola da turma: escolhe a partição das notas (ver tenancia_escola.py)
+            cursor.execute("SELECT COALESCE(id_escola, 0) FROM turma WHERE id_turma = %s", (lote.id_turma,))
+            id_escola = cursor.fetchone()[0]
+            valores = [linha + (id_escola,) for linha in valores]
+            # Notas que já existiam (o RETURNING de uma tabela particionada não
+            # expõe xmax para distinguir inserção de atualização)
+            cursor.execute("""
+                SELECT id_aluno FROM nota
+                WHERE id_escola = %s AND id_turma = %s AND id_disciplina = %s
+                  AND ano = %s AND bimestre = %s AND id_aluno = ANY(%s)
+            """, (id_escola, lote.id_turma, lote.id_disciplina, lote.ano, lote.bimestre,
+                  list(linhas_por_aluno)))
+            existentes = {linha[0] for linha in cursor.fetchall()}
+            # Um único comando (page_size = total de linhas) grava o lote inteiro de forma atômica
+            gravadas = psycopg2.extras.execute_values(cursor, """
+                INSERT INTO nota (id_aluno, id_disciplina, id_turma, ano, bimestre,
+                                  nota_mensal, nota_bimestral, recuperacao, media, frequencia, id_escola)
+                VALUES %s
+                ON CONFLICT (id_escola, id_aluno, id_disciplina, id_turma, ano, bimestre) DO UPDATE
+                SET nota_mensal = EXCLUDED.nota_mensal,
+                    nota_bimestral = EXCLUDED.nota_bimestral,
+                    recuperacao = EXCLUDED.recuperacao,
+                    media = EXCLUDED.media,
+                    frequencia = COALESCE(EXCLUDED.frequencia, nota.frequencia)
+                RETURNING id, id_aluno, nota_mensal, nota_bimestral, recuperacao, media, frequencia
+            """, valores, page_size=len(valores), fetch=True)
+            conn.commit()
+            resumo_professor_cache.invalidar_turma_disciplina(lote.id_turma, lote.id_disciplina)
+        
+        for row in gravadas:
+            indice = linhas_por_aluno[row["id_aluno"]]
+            resultados[indice] = {
+                "linha": indice,
+                "id_aluno": row["id_aluno"],
+                "status": "atualizada" if row["id_aluno"] in existentes else "criada",
+                "nota": {
+                    "id": row["id"],
+                    "id_aluno": row["id_aluno"],
+                    "id_disciplina": lote.id_disciplina,
+                    "id_turma": lote.id_turma,
+                    "ano": lote.ano,
+                    "bimestre": lote.bimestre,
+                    "nota_mensal": row["nota_mensal"],
+                    "nota_bimestral": row["nota_bimestral"],
+                    "recuperacao": row["recuperacao"],
+                    "media": row["media"],
+                    "frequencia": row["frequencia"]
+                }
+            }
+        
+        total_erros = sum(1 for r in resultados if r["status"] == "erro")
+        logger.info(f"LOTE PROCESSADO: {len(gravadas)} gravadas, {total_erros} com erro")
+        
+        return {
+            "total": len(resultados),
+            "gravadas": len(gravadas),
+            "erros": total_erros,
+            "resultados": resultados
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"ERRO AO PROCESSAR LOTE DE NOTAS: {str(e)}")
+        if conn:
+            conn.rollback()
+        raise HTTPException(status_code=500, detail=f"Erro ao gravar lote de notas: {str(e)}")
+    finally:
+        if conn:
+            conn.close()
 
 # Endpoint para listar todas as notas
 @app.get("/api/notas/", response_model=List[Nota])
-def read_notas():
+def read_notas(
+    response: Response,
+    limit: Optional[int] = parametro_limit(),
+    cursor: Optional[str] = parametro_cursor()
+):
+    query = """
+            SELECT n.id, n.id_aluno, n.id_disciplina, n.id_turma, 
+                   n.ano, n.bimestre, n.nota_mensal, n.nota_bimestral, n.recuperacao, n.media, n.frequencia
+            FROM nota n
+        """
+    params = []
+    # Com X-Escola-ID, só a partição de nota da escola é lida
+    condicao = condicao_escola("n.id_escola", params)
+    if condicao:
+        query += " WHERE " + condicao
+    query, params = paginar_consulta(ORDEM_NOTAS, query, params, limit, cursor, tem_where=bool(condicao))
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        cursor.execute("""
-            SELECT n.id, n.id_aluno, n.id_disciplina, n.id_turma, 
-                   n.ano, n.bimestre, n.nota_mensal, n.nota_bimestral, n.recuperacao, n.media, n.frequencia
-            FROM nota n
-            ORDER BY n.ano DESC, n.bimestre, n.id_turma, n.id_disciplina, n.id_aluno
-        """)
+        cursor.execute(query, params)
         
         notas_data = cursor.fetchall()
         conn.close()
         
+        notas_data, proximo_cursor = ORDEM_NOTAS.pagina(notas_data, limit)
+        definir_proximo_cursor(response, proximo_cursor)
+        
         notas = []
         for nota in notas_data:
             notas.append({
@@ -2796,18 +3216,15 @@ def read_notas_completo(
     bimestre: Optional[int] = None,
     id_turma: Optional[str] = None,
     id_disciplina: Optional[str] = None,
-    id_aluno: Optional[str] = None
+    id_aluno: Optional[str] = None,
+    limit: Optional[int] = parametro_limit(),
+    cursor: Optional[str] = parametro_cursor()
 ):
-    print("="*70)
-    print(f"BUSCANDO NOTAS COMPLETAS COM FILTROS:")
-    print(f"- Professor: {professor_id}")
-    print(f"- Turma: {id_turma}")
-    print(f"- Disciplina: {id_disciplina}")
-    print(f"- Aluno: {id_aluno}")
-    print(f"- Ano: {ano}")
-    print(f"- Bimestre: {bimestre}")
+    logger.debug("BUSCANDO NOTAS COMPLETAS COM FILTROS: professor=%s, turma=%s, disciplina=%s, aluno=%s, ano=%s, bimestre=%s",
+                 professor_id, id_turma, id_disciplina, id_aluno, ano, bimestre)
     
     conn = None
+    cursor_paginacao = cursor
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
@@ -2874,55 +3291,43 @@ def read_notas_completo(
             where_clauses.append("n.id_aluno = %s")
             params.append(id_aluno)
         
+        condicao = condicao_escola("n.id_escola", params)
+        if condicao:
+            where_clauses.append(condicao)
+        
         # Adicionar cláusula WHERE ao query se houver condições
         if where_clauses:
             query += " WHERE " + " AND ".join(where_clauses)
         
-        # Ordenação por nome do aluno para melhor organização
-        query += " ORDER BY n.ano DESC, n.bimestre, a.nome_aluno"
+        # Ordenação por nome do aluno para melhor organização (com paginação opcional)
+        query, params = paginar_consulta(ORDEM_NOTAS_COMPLETO, query, params, limit,
+                                         cursor_paginacao, tem_where=bool(where_clauses))
         
-        print(f"CONSULTA SQL:")
-        print(query)
-        print(f"PARÂMETROS: {params}")
+        logger.debug("CONSULTA SQL: %s | PARÂMETROS: %s", query, params)
         
         # Executar a consulta
         cursor.execute(query, params)
         notas_data = cursor.fetchall()
         
         # Debug - mostrar resultados antes de formatar
-        print(f"ENCONTRADAS {len(notas_data)} NOTAS")
+        logger.debug("ENCONTRADAS %s NOTAS", len(notas_data))
         
-        # Converter para o formato desejado
-        notas = []
-        for nota in notas_data:
-            notas.append({
-                "id": nota[0],
-                "id_aluno": nota[1],
-                "nome_aluno": nota[2],
-                "id_disciplina": nota[3],
-                "nome_disciplina": nota[4],
-                "id_turma": nota[5],
-                "serie": nota[6],
-                "turno": nota[7],
-                "ano": nota[8],
-                "bimestre": nota[9],
-                "nota_mensal": nota[10],
-                "nota_bimestral": nota[11],
-                "recuperacao": nota[12],
-                "media": nota[13],
-                "frequencia": nota[14]
-            })
+        notas_data, proximo_cursor = ORDEM_NOTAS_COMPLETO.pagina(notas_data, limit)
         
-        return notas
+        # As colunas já têm os nomes da resposta: as linhas são codificadas direto
+        # em JSON, sem montar dicts um a um nem revalidar o response_model
+        return resposta_linhas(cursor.description, notas_data,
+                               headers=cabecalhos_paginacao(proximo_cursor))
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"ERRO AO BUSCAR NOTAS COMPLETAS: {str(e)}")
+        logger.exception(f"ERRO AO BUSCAR NOTAS COMPLETAS: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro ao buscar notas: {str(e)}")
     
     finally:
         if conn:
             conn.close()
-        print("="*70)
 
 # Endpoint para obter uma nota específica pelo ID
 @app.get("/api/notas/{nota_id}", response_model=Nota)
@@ -2968,79 +3373,50 @@ def update_nota(nota_id: int, nota: NotaUpdate, request: Request):
     cursor = conn.cursor()
     
     try:
-        # Verificar se a nota existe
-        cursor.execute("SELECT * FROM nota WHERE id = %s", (nota_id,))
-        if cursor.fetchone() is None:
-            conn.close()
-            raise HTTPException(status_code=404, detail="Nota não encontrada")
-        
-        # Verificar se o aluno existe
-        cursor.execute("SELECT * FROM aluno WHERE id_aluno = %s", (nota.id_aluno,))
-        if cursor.fetchone() is None:
-            conn.close()
-            raise HTTPException(status_code=404, detail="Aluno não encontrado")
-        
-        # Verificar se a disciplina existe
-        cursor.execute("SELECT * FROM disciplina WHERE id_disciplina = %s", (nota.id_disciplina,))
-        if cursor.fetchone() is None:
-            conn.close()
+        # Disciplina e turma são verificadas no cache de referência (sem ida ao banco)
+        if not referencia_cache.disciplina_existe(nota.id_disciplina):
             raise HTTPException(status_code=404, detail="Disciplina não encontrada")
-        
-        # Verificar se a turma existe
-        cursor.execute("SELECT * FROM turma WHERE id_turma = %s", (nota.id_turma,))
-        if cursor.fetchone() is None:
-            conn.close()
+        if not referencia_cache.turma_existe(nota.id_turma):
             raise HTTPException(status_code=404, detail="Turma não encontrada")
         
         # Verificar se o parâmetro override_media está presente
         # Se estiver, usar o valor de media fornecido pelo cliente
         if request.query_params.get('override_media') == 'true' and nota.media is not None:
             media = nota.media
-            print(f"Usando média fornecida pelo cliente: {media}")
+            logger.debug("Usando média fornecida pelo cliente: %s", media)
         else:
-            # Calcular média usando a fórmula correta
-            nota_mensal = nota.nota_mensal or 0
-            nota_bimestral = nota.nota_bimestral or 0
-            recuperacao = nota.recuperacao or 0
-            
-            # Calcular média inicial
-            if nota_mensal > 0 and nota_bimestral > 0:
-                # Se ambas as notas estão presentes, a média é a média aritmética
-                media = round((nota_mensal + nota_bimestral) / 2, 1)
-            elif nota_mensal > 0:
-                media = nota_mensal
-            elif nota_bimestral > 0:
-                media = nota_bimestral
-            else:
-                media = 0
-            
-            # Se tem recuperação, a média final é a média entre a média anterior e a nota de recuperação
-            if recuperacao > 0:
-                media = round((media + recuperacao) / 2, 1)
+            # Calcular média com o motor de médias (mesma fórmula do trigger do banco)
+            media = calcular_media(nota.nota_mensal, nota.nota_bimestral, nota.recuperacao)
         
-        # Atualizar nota
+        # Atualizar a nota em um único comando. A nota não é recriada se não existir
+        # (404); os valores anteriores de turma/disciplina vêm do próprio UPDATE e a
+        # existência do aluno é verificada na mesma instrução.
         cursor.execute("""
-            UPDATE nota
+            UPDATE nota n
             SET id_aluno = %s, id_disciplina = %s, id_turma = %s, ano = %s, bimestre = %s,
                 nota_mensal = %s, nota_bimestral = %s, recuperacao = %s, media = %s, frequencia = %s
-            WHERE id = %s
-            RETURNING id
+            FROM nota anterior
+            WHERE n.id = %s AND anterior.id = n.id
+              AND EXISTS (SELECT 1 FROM aluno WHERE id_aluno = %s)
+            RETURNING n.id, n.id_aluno, n.id_disciplina, n.id_turma, n.ano, n.bimestre, 
+                      n.nota_mensal, n.nota_bimestral, n.recuperacao, n.media, n.frequencia,
+                      anterior.id_turma, anterior.id_disciplina
         """, (nota.id_aluno, nota.id_disciplina, nota.id_turma, nota.ano, nota.bimestre,
-              nota.nota_mensal, nota.nota_bimestral, nota.recuperacao, media, nota.frequencia, nota_id))
-        
-        nota_id = cursor.fetchone()[0]
-        conn.commit()
-        
-        # Buscar a nota atualizada
-        cursor.execute("""
-            SELECT id, id_aluno, id_disciplina, id_turma, ano, bimestre, 
-                   nota_mensal, nota_bimestral, recuperacao, media, frequencia
-            FROM nota
-            WHERE id = %s
-        """, (nota_id,))
+              nota.nota_mensal, nota.nota_bimestral, nota.recuperacao, media, nota.frequencia, nota_id,
+              nota.id_aluno))
         
         nota_data = cursor.fetchone()
+        if nota_data is None:
+            # Nada foi atualizado: descobrir se falta a nota ou o aluno
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM nota WHERE id = %s)", (nota_id,))
+            if not cursor.fetchone()[0]:
+                raise HTTPException(status_code=404, detail="Nota não encontrada")
+            raise HTTPException(status_code=404, detail="Aluno não encontrado")
+        
+        conn.commit()
         conn.close()
+        resumo_professor_cache.invalidar_turma_disciplina(nota_data[11], nota_data[12])
+        resumo_professor_cache.invalidar_turma_disciplina(nota.id_turma, nota.id_disciplina)
         
         return {
             "id": nota_data[0],
@@ -3055,6 +3431,16 @@ def update_nota(nota_id: int, nota: NotaUpdate, request: Request):
             "media": nota_data[9],
             "frequencia": nota_data[10]
         }
+    except HTTPException:
+        conn.close()
+        raise
+    except psycopg2.errors.UniqueViolation:
+        conn.rollback()
+        conn.close()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Já existe uma nota para este aluno, disciplina, turma, ano e bimestre"
+        )
     except Exception as e:
         conn.rollback()
         conn.close()
@@ -3068,14 +3454,16 @@ def delete_nota(nota_id: int):
     
     try:
         # Verificar se a nota existe
-        cursor.execute("SELECT * FROM nota WHERE id = %s", (nota_id,))
-        if cursor.fetchone() is None:
+        cursor.execute("SELECT id_turma, id_disciplina FROM nota WHERE id = %s", (nota_id,))
+        nota_existente = cursor.fetchone()
+        if nota_existente is None:
             conn.close()
             raise HTTPException(status_code=404, detail="Nota não encontrada")
         
         # Excluir nota
         cursor.execute("DELETE FROM nota WHERE id = %s", (nota_id,))
         conn.commit()
+        resumo_professor_cache.invalidar_turma_disciplina(nota_existente[0], nota_existente[1])
         conn.close()
         
         return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -3234,7 +3622,7 @@ def read_notas_by_filter(
 ):
     """Busca notas com base em diversos filtros, incluindo professor."""
     try:
-        print(f"Debug - Filtro de notas recebido: professor_id={professor_id}, turma={id_turma}, disciplina={id_disciplina}, aluno={id_aluno}, ano={ano}, bimestre={bimestre}")
+        logger.debug("Filtro de notas recebido: professor_id=%s, turma=%s, disciplina=%s, aluno=%s, ano=%s, bimestre=%s", professor_id, id_turma, id_disciplina, id_aluno, ano, bimestre)
         
         query = """
         SELECT n.id, n.id_aluno, n.id_disciplina, n.id_turma, n.ano, n.bimestre, 
@@ -3277,6 +3665,10 @@ def read_notas_by_filter(
             query += " AND n.id_aluno = %s"
             params.append(id_aluno)
         
+        condicao = condicao_escola("n.id_escola", params)
+        if condicao:
+            query += " AND " + condicao
+        
         # Adicionar filtro por professor
         if professor_id:
             query += " AND pdt.id_professor = %s"
@@ -3284,8 +3676,8 @@ def read_notas_by_filter(
         
         query += " ORDER BY n.ano DESC, n.bimestre DESC, a.nome_aluno ASC"
         
-        print(f"Debug - Query SQL: {query}")
-        print(f"Debug - Parâmetros: {params}")
+        logger.debug("Query SQL: %s", query)
+        logger.debug("Parâmetros: %s", params)
         
         notas_results = execute_query(query, params)
         
@@ -3294,11 +3686,11 @@ def read_notas_by_filter(
             nota = dict(row)
             notas.append(nota)
         
-        print(f"Debug - Total de notas encontradas: {len(notas)}")
+        logger.debug("Total de notas encontradas: %s", len(notas))
         return notas
         
     except Exception as e:
-        print(f"Erro ao buscar notas por filtro: {e}")
+        logger.exception(f"Erro ao buscar notas por filtro: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao buscar notas: {str(e)}"
@@ -3355,23 +3747,36 @@ def read_media_final(ano: Optional[int] = None):
 # Adicionar Endpoint de Resumo para o Dashboard
 @app.get("/api/dashboard/resumo")
 def get_dashboard_resumo():
-    """Retorna um resumo dos dados para o dashboard principal."""
+    """
+    Retorna um resumo dos dados para o dashboard principal.
+
+    Com X-Escola-ID, conta os alunos e turmas da escola e os professores e
+    disciplinas vinculados às turmas dela.
+    """
     try:
-        # Contar alunos
-        query_alunos = "SELECT COUNT(*) FROM aluno"
-        alunos_count = execute_query(query_alunos, fetch_one=True)[0]
-        
-        # Contar professores
-        query_professores = "SELECT COUNT(*) FROM professor"
-        professores_count = execute_query(query_professores, fetch_one=True)[0]
-        
-        # Contar turmas
-        query_turmas = "SELECT COUNT(*) FROM turma"
-        turmas_count = execute_query(query_turmas, fetch_one=True)[0]
+        escola = escola_atual()
+        if escola is None:
+            query_alunos = "SELECT COUNT(*) FROM aluno"
+            query_professores = "SELECT COUNT(*) FROM professor"
+            query_turmas = "SELECT COUNT(*) FROM turma"
+            query_disciplinas = "SELECT COUNT(*) FROM disciplina"
+            params = None
+        else:
+            query_alunos = "SELECT COUNT(*) FROM aluno WHERE id_escola = %s"
+            query_professores = "SELECT COUNT(DISTINCT id_professor) FROM professor_disciplina_turma WHERE id_escola = %s"
+            query_turmas = "SELECT COUNT(*) FROM turma WHERE id_escola = %s"
+            query_disciplinas = """
+                SELECT COUNT(DISTINCT td.id_disciplina)
+                FROM turma_disciplina td
+                JOIN turma t ON t.id_turma = td.id_turma
+                WHERE t.id_escola = %s
+            """
+            params = (escola,)
         
-        # Contar disciplinas
-        query_disciplinas = "SELECT COUNT(*) FROM disciplina"
-        disciplinas_count = execute_query(query_disciplinas, fetch_one=True)[0]
+        alunos_count = execute_query(query_alunos, params, fetch_one=True)[0]
+        professores_count = execute_query(query_professores, params, fetch_one=True)[0]
+        turmas_count = execute_query(query_turmas, params, fetch_one=True)[0]
+        disciplinas_count = execute_query(query_disciplinas, params, fetch_one=True)[0]
         
         return {
             "total_alunos": alunos_count,
@@ -3386,64 +3791,27 @@ def get_dashboard_resumo():
             detail=f"Erro ao buscar resumo do dashboard: {str(e)}"
         )
 
-# Endpoint para criar uma tabela de logs se não existir
+# Mantido para o frontend: a tabela é criada pela migração 0008 (ver migracoes.py)
 @app.post("/api/logs/criar-tabela", status_code=status.HTTP_201_CREATED)
 def criar_tabela_logs():
-    """Cria a tabela de logs se ela não existir."""
-    try:
-        query = """
-        CREATE TABLE IF NOT EXISTS log_atividade (
-            id SERIAL PRIMARY KEY,
-            data_hora TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            usuario VARCHAR(100) NOT NULL,
-            acao VARCHAR(50) NOT NULL,
-            entidade VARCHAR(50) NOT NULL,
-            entidade_id VARCHAR(100) NOT NULL,
-            detalhe TEXT,
-            status VARCHAR(20) DEFAULT 'concluído'
-        )
-        """
-        execute_query(query, fetch=False)
-        return {"mensagem": "Tabela de logs criada ou já existente"}
-    except Exception as e:
-        logger.error(f"Erro ao criar tabela de logs: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erro ao criar tabela de logs: {str(e)}"
-        )
+    """Confirma que a tabela de logs existe (criada pelas migrações, no deploy)."""
+    exigir_migracao("0008", "Tabela de logs")
+    return {"mensagem": "Tabela de logs criada ou já existente"}
 
 # Endpoint para registrar uma atividade no log
 @app.post("/api/logs", status_code=status.HTTP_201_CREATED)
 def registrar_log(log: LogCreate):
-    """Registra uma atividade no log."""
+    """Registra uma atividade no log (o INSERT é feito em lote, em segundo plano)."""
     try:
-        # Verificar se a tabela existe
-        criar_tabela_logs()
-        
-        query = """
-        INSERT INTO log_atividade (usuario, acao, entidade, entidade_id, detalhe, status)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        RETURNING id, data_hora
-        """
-        params = (log.usuario, log.acao, log.entidade, log.entidade_id, log.detalhe, log.status)
-        result = execute_query(query, params, fetch_one=True)
-        
-        if result:
-            return {
-                "id": result["id"],
-                "data_hora": result["data_hora"],
-                "usuario": log.usuario,
-                "acao": log.acao,
-                "entidade": log.entidade,
-                "entidade_id": log.entidade_id,
-                "detalhe": log.detalhe,
-                "status": log.status
-            }
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Erro ao registrar log"
-            )
+        # id e data_hora já são definidos no registro
+        return gravador_log_atividade.registrar(
+            usuario=log.usuario,
+            acao=log.acao,
+            entidade=log.entidade,
+            entidade_id=log.entidade_id,
+            detalhe=log.detalhe,
+            status=log.status
+        )
     except Exception as e:
         logger.error(f"Erro ao registrar log: {str(e)}")
         raise HTTPException(
@@ -3454,16 +3822,19 @@ def registrar_log(log: LogCreate):
 # Endpoint para buscar logs de atividades
 @app.get("/api/logs", response_model=List[LogAtividade])
 def listar_logs(
+    response: Response,
     limit: int = Query(10, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, description="Obsoleto: prefira o cursor"),
+    cursor: Optional[str] = parametro_cursor(),
     usuario: Optional[str] = None,
     entidade: Optional[str] = None,
     acao: Optional[str] = None
 ):
-    """Lista os logs de atividades com opções de filtragem."""
+    """Lista os logs de atividades com opções de filtragem (paginação por cursor)."""
     try:
-        # Verificar se a tabela existe
-        criar_tabela_logs()
+        # Eventos registrados por este worker e ainda na fila entram na listagem
+        if gravador_log_atividade.pendentes():
+            gravador_log_atividade.descarregar()
         
         # Construir consulta básica
         query = "SELECT * FROM log_atividade WHERE 1=1"
@@ -3482,11 +3853,16 @@ def listar_logs(
             query += " AND acao = %s"
             params.append(acao)
         
-        # Ordenar por data/hora decrescente e adicionar paginação
-        query += " ORDER BY data_hora DESC LIMIT %s OFFSET %s"
-        params.extend([limit, offset])
+        # Ordenar por data/hora decrescente e paginar pela chave (data_hora, id).
+        # O offset é mantido apenas para clientes antigos, sem cursor.
+        query, params = paginar_consulta(ORDEM_LOGS, query, params, limit, cursor, tem_where=True)
+        if offset and not cursor:
+            query += " OFFSET %s"
+            params.append(offset)
         
         result = execute_query(query, params)
+        result, proximo_cursor = ORDEM_LOGS.pagina(result, limit)
+        definir_proximo_cursor(response, proximo_cursor)
         logs = []
         
         for row in result:
@@ -3502,6 +3878,8 @@ def listar_logs(
             })
         
         return logs
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao listar logs: {str(e)}")
         raise HTTPException(
@@ -3521,14 +3899,11 @@ def read_notas_professor(
 ):
     """Busca notas de alunos filtradas por professor e outros parâmetros opcionais."""
     try:
-        logger.debug(f"Buscando notas para o professor: {professor_id} com filtros: turma={id_turma}, disciplina={id_disciplina}, aluno={id_aluno}, ano={ano}, bimestre={bimestre}")
+        logger.debug("Buscando notas para o professor: %s com filtros: turma=%s, disciplina=%s, aluno=%s, ano=%s, bimestre=%s", professor_id, id_turma, id_disciplina, id_aluno, ano, bimestre)
         
         # Verificar se o professor existe e está ativo
         if professor_id:
-            query_professor = "SELECT id FROM professor WHERE id_professor = %s"
-            professor_result = execute_query(query_professor, (professor_id,), fetch_one=True)
-            
-            if not professor_result:
+            if not referencia_cache.professor_existe(professor_id):
                 raise HTTPException(status_code=404, detail=f"Professor com ID {professor_id} não encontrado")
         
         # Construir a consulta base
@@ -3578,8 +3953,8 @@ def read_notas_professor(
         # Ordenar os resultados
         query += " ORDER BY a.nome_aluno, n.ano, n.bimestre"
         
-        logger.debug(f"Query final: {query}")
-        logger.debug(f"Parâmetros: {params}")
+        logger.debug("Query final: %s", query)
+        logger.debug("Parâmetros: %s", params)
         
         # Executar a consulta
         notas_results = execute_query(query, params)
@@ -3590,7 +3965,7 @@ def read_notas_professor(
             nota = dict(row)
             notas.append(nota)
             
-        logger.debug(f"Encontradas {len(notas)} notas para o professor {professor_id}")
+        logger.debug("Encontradas %s notas para o professor %s", len(notas), professor_id)
         return notas
         
     except HTTPException:
@@ -3614,17 +3989,12 @@ def read_notas_by_professor(
 ):
     """Busca notas específicas do professor informado."""
     try:
-        print(f"=== BUSCANDO NOTAS PARA O PROFESSOR: {professor_id} ===")
-        print(f"Parâmetros: ano={ano}, bimestre={bimestre}, id_turma={id_turma}, id_disciplina={id_disciplina}, id_aluno={id_aluno}")
-        
-        # Verificar se o professor existe
-        professor_query = "SELECT id FROM professor WHERE id_professor = %s"
-        print(f"Executando query para verificar professor: {professor_query} com parâmetro: {professor_id}")
-        professor_result = execute_query(professor_query, (professor_id,), fetch_one=True)
-        print(f"Resultado da query de professor: {professor_result}")
+        logger.debug("BUSCANDO NOTAS PARA O PROFESSOR: %s", professor_id)
+        logger.debug("Parâmetros: ano=%s, bimestre=%s, id_turma=%s, id_disciplina=%s, id_aluno=%s", ano, bimestre, id_turma, id_disciplina, id_aluno)
         
-        if not professor_result:
-            print(f"Professor com ID {professor_id} não encontrado")
+        # Verificar se o professor existe (cache de referência)
+        if not referencia_cache.professor_existe(professor_id):
+            logger.info(f"Professor com ID {professor_id} não encontrado")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Professor com ID {professor_id} não encontrado"
@@ -3673,12 +4043,12 @@ def read_notas_by_professor(
         # Ordenar os resultados
         query += " ORDER BY n.ano DESC, n.bimestre DESC, a.nome_aluno ASC"
         
-        print(f"Consulta SQL: {query}")
-        print(f"Parâmetros: {params}")
+        logger.debug("Consulta SQL: %s", query)
+        logger.debug("Parâmetros: %s", params)
         
         # Executar a consulta
         notas_results = execute_query(query, params)
-        print(f"Resultados retornados: {len(notas_results) if notas_results else 0}")
+        logger.debug("Resultados retornados: %s", len(notas_results) if notas_results else 0)
         
         # Converter resultados para o formato de resposta
         notas = []
@@ -3686,11 +4056,11 @@ def read_notas_by_professor(
             nota = dict(row)
             notas.append(nota)
             
-        print(f"Encontradas {len(notas)} notas para o professor {professor_id}")
+        logger.debug("Encontradas %s notas para o professor %s", len(notas), professor_id)
         
         # Se não houver resultados, retornar uma lista vazia mas com uma mensagem informativa no log
         if not notas:
-            print(f"ATENÇÃO: Nenhuma nota encontrada para o professor {professor_id} com os filtros informados")
+            logger.debug("ATENÇÃO: Nenhuma nota encontrada para o professor %s com os filtros informados", professor_id)
             # Vamos verificar se há notas sem o relacionamento com professor_disciplina_turma
             verificar_query = """
             SELECT COUNT(*) as total 
@@ -3703,7 +4073,7 @@ def read_notas_by_professor(
             )
             """
             verificar_result = execute_query(verificar_query, (professor_id,), fetch_one=True)
-            print(f"Verificação de notas relacionadas: {verificar_result}")
+            logger.debug("Verificação de notas relacionadas: %s", verificar_result)
             
             # Verificar vinculações do professor
             vinculos_query = """
@@ -3711,81 +4081,50 @@ def read_notas_by_professor(
             WHERE id_professor = %s
             """
             vinculos_result = execute_query(vinculos_query, (professor_id,), fetch_one=True)
-            print(f"Verificação de vínculos do professor: {vinculos_result}")
+            logger.debug("Verificação de vínculos do professor: %s", vinculos_result)
         
         return notas
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO ao buscar notas do professor {professor_id}: {e}")
+        logger.exception(f"ERRO ao buscar notas do professor {professor_id}: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao buscar notas: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO BUSCA DE NOTAS DO PROFESSOR: {professor_id} ===")
 
 # ===============================================================
 # ENDPOINTS PARA GERENCIAMENTO DO ESQUEMA DO BANCO DE DADOS
 # ===============================================================
 
+@app.get("/api/schema/migracoes")
+def status_migracoes():
+    """Situação das migrações do esquema, verificada na inicialização do worker."""
+    return situacao_migracoes
+
 @app.post("/api/schema/verificar_campos", status_code=status.HTTP_200_OK)
 def verificar_campos_tabelas():
-    """Verifica e adiciona campos faltantes em tabelas existentes."""
-    conn = None
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Verificar se a coluna professor_id existe na tabela nota
-        cursor.execute("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'nota' AND column_name = 'professor_id'
-        """)
-        
-        if cursor.fetchone() is None:
-            # Adicionar a coluna se não existir
-            print("Adicionando coluna professor_id à tabela nota")
-            cursor.execute("""
-                ALTER TABLE nota 
-                ADD COLUMN IF NOT EXISTS professor_id VARCHAR(20)
-            """)
-            conn.commit()
-            message = "Coluna professor_id adicionada à tabela nota com sucesso"
-        else:
-            message = "Coluna professor_id já existe na tabela nota"
-        
-        conn.close()
-        return {"status": "success", "message": message}
-        
-    except Exception as e:
-        if conn:
-            conn.rollback()
-            conn.close()
-        print(f"Erro ao verificar/modificar esquema: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erro ao verificar/modificar esquema: {str(e)}"
-        )
+    """Confirma os campos adicionados a tabelas existentes (migração 0003)."""
+    exigir_migracao("0003", "Coluna professor_id da tabela nota")
+    return {"status": "success", "message": "Coluna professor_id já existe na tabela nota"}
 
 @app.get("/api/professores/{professor_id}/disciplinas")
 def get_professor_disciplinas(
     professor_id: str = Path(..., description="ID do professor para buscar disciplinas")
 ):
     """Recupera todas as disciplinas associadas a um professor específico."""
-    print(f"=== BUSCANDO DISCIPLINAS DO PROFESSOR: {professor_id} ===")
+    logger.debug("BUSCANDO DISCIPLINAS DO PROFESSOR: %s", professor_id)
     try:
         # Verificar se o professor existe
         query_professor = "SELECT * FROM professor WHERE id_professor = %s"
         professor_result = execute_query(query_professor, (professor_id,), fetch_one=True)
         
         if not professor_result:
-            print(f"Professor com ID {professor_id} não encontrado")
+            logger.info(f"Professor com ID {professor_id} não encontrado")
             raise HTTPException(status_code=404, detail="Professor não encontrado")
         
-        print(f"Professor encontrado: {professor_id}")
+        logger.debug("Professor encontrado: %s", professor_id)
         
         # Buscar as disciplinas vinculadas ao professor
         query = """
@@ -3797,7 +4136,7 @@ def get_professor_disciplinas(
         results = execute_query(query, (professor_id,))
         
         if not results:
-            print(f"Nenhuma disciplina encontrada para o professor {professor_id}")
+            logger.debug("Nenhuma disciplina encontrada para o professor %s", professor_id)
             return []
         
         # Converter os resultados em um formato mais detalhado
@@ -3808,37 +4147,34 @@ def get_professor_disciplinas(
                 "nome_disciplina": row["nome_disciplina"]
             }
             disciplinas.append(disciplina)
-            print(f"Disciplina encontrada: {disciplina['id_disciplina']} - {disciplina['nome_disciplina']}")
         
-        print(f"Total de disciplinas encontradas: {len(disciplinas)}")
+        logger.debug("Total de disciplinas encontradas: %s", len(disciplinas))
         return disciplinas
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO ao buscar disciplinas do professor {professor_id}: {str(e)}")
+        logger.exception(f"ERRO ao buscar disciplinas do professor {professor_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao buscar disciplinas do professor: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO BUSCA DE DISCIPLINAS DO PROFESSOR: {professor_id} ===")
 
 @app.delete("/api/professores/{professor_id}/disciplinas", status_code=status.HTTP_204_NO_CONTENT)
 def delete_professor_disciplinas(
     professor_id: str = Path(..., description="ID do professor para remover vínculos com disciplinas")
 ):
     """Remove todos os vínculos entre um professor e suas disciplinas."""
-    print(f"=== REMOVENDO VÍNCULOS DO PROFESSOR: {professor_id} COM TODAS AS DISCIPLINAS ===")
+    logger.debug("REMOVENDO VÍNCULOS DO PROFESSOR: %s COM TODAS AS DISCIPLINAS", professor_id)
     try:
         # Verificar se o professor existe
         query_professor = "SELECT * FROM professor WHERE id_professor = %s"
         professor_result = execute_query(query_professor, (professor_id,), fetch_one=True)
         
         if not professor_result:
-            print(f"Professor com ID {professor_id} não encontrado")
+            logger.info(f"Professor com ID {professor_id} não encontrado")
             raise HTTPException(status_code=404, detail="Professor não encontrado")
         
-        print(f"Professor encontrado: {professor_id}, removendo vínculos com disciplinas")
+        logger.debug("Professor encontrado: %s, removendo vínculos com disciplinas", professor_id)
         
         # Remover todos os vínculos entre o professor e suas disciplinas
         delete_query = """
@@ -3847,103 +4183,48 @@ def delete_professor_disciplinas(
         """
         # Executar a query sem fetch (para DELETE)
         execute_query(delete_query, (professor_id,), fetch=False)
+        resumo_professor_cache.invalidar_professor(professor_id)
+        referencia_cache.invalidar("professor_disciplina_turma")
         
-        print(f"Vínculos do professor {professor_id} com disciplinas removidos com sucesso")
+        logger.info(f"Vínculos do professor {professor_id} com disciplinas removidos com sucesso")
         return None
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO ao remover vínculos do professor {professor_id} com disciplinas: {str(e)}")
+        logger.exception(f"ERRO ao remover vínculos do professor {professor_id} com disciplinas: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao remover vínculos do professor com disciplinas: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO REMOÇÃO DE VÍNCULOS DO PROFESSOR: {professor_id} ===")
 
 @app.get("/api/professores/{professor_id}/estatisticas")
 def get_professor_estatisticas(professor_id: str = Path(..., description="ID do professor")):
     """Retorna estatísticas do professor para o dashboard."""
-    print(f"=== BUSCANDO ESTATÍSTICAS DO PROFESSOR: {professor_id} ===")
+    logger.debug("BUSCANDO ESTATÍSTICAS DO PROFESSOR: %s", professor_id)
     try:
-        # Verificar se o professor existe
-        query_professor = "SELECT * FROM professor WHERE id_professor = %s"
-        print(f"Executando query para verificar professor: {query_professor} com parâmetro: {professor_id}")
-        professor_result = execute_query(query_professor, (professor_id,), fetch_one=True)
+        resumo = consultar_resumo_professor(professor_id)
         
-        print(f"Resultado da query de professor: {professor_result}")
-        
-        if not professor_result:
-            print(f"Professor com ID {professor_id} não encontrado")
+        if resumo is None:
+            logger.info(f"Professor com ID {professor_id} não encontrado")
             raise HTTPException(status_code=404, detail="Professor não encontrado")
         
-        print(f"Professor encontrado: {professor_id}")
-        
-        # Contar turmas do professor
-        query_turmas = """
-        SELECT COUNT(DISTINCT id_turma) as total_turmas 
-        FROM professor_disciplina_turma 
-        WHERE id_professor = %s
-        """
-        print(f"Executando query para contar turmas: {query_turmas} com parâmetro: {professor_id}")
-        turmas_result = execute_query(query_turmas, (professor_id,), fetch_one=True)
-        print(f"Resultado da query de turmas: {turmas_result}")
-        total_turmas = turmas_result["total_turmas"] if turmas_result else 0
-        
-        # Contar disciplinas do professor
-        query_disciplinas = """
-        SELECT COUNT(DISTINCT id_disciplina) as total_disciplinas 
-        FROM professor_disciplina_turma 
-        WHERE id_professor = %s
-        """
-        print(f"Executando query para contar disciplinas: {query_disciplinas} com parâmetro: {professor_id}")
-        disciplinas_result = execute_query(query_disciplinas, (professor_id,), fetch_one=True)
-        print(f"Resultado da query de disciplinas: {disciplinas_result}")
-        total_disciplinas = disciplinas_result["total_disciplinas"] if disciplinas_result else 0
-        
-        # Contar alunos do professor (todos os alunos nas turmas que ele leciona)
-        query_alunos = """
-        SELECT COUNT(DISTINCT a.id_aluno) as total_alunos
-        FROM aluno a
-        JOIN professor_disciplina_turma pdt ON a.id_turma = pdt.id_turma
-        WHERE pdt.id_professor = %s
-        """
-        print(f"Executando query para contar alunos: {query_alunos} com parâmetro: {professor_id}")
-        alunos_result = execute_query(query_alunos, (professor_id,), fetch_one=True)
-        print(f"Resultado da query de alunos: {alunos_result}")
-        total_alunos = alunos_result["total_alunos"] if alunos_result else 0
-        
-        # Contar notas lançadas pelo professor (todas as notas das disciplinas que ele leciona)
-        query_notas = """
-        SELECT COUNT(*) as total_notas
-        FROM nota n
-        JOIN professor_disciplina_turma pdt ON n.id_disciplina = pdt.id_disciplina AND n.id_turma = pdt.id_turma
-        WHERE pdt.id_professor = %s
-        """
-        print(f"Executando query para contar notas: {query_notas} com parâmetro: {professor_id}")
-        notas_result = execute_query(query_notas, (professor_id,), fetch_one=True)
-        print(f"Resultado da query de notas: {notas_result}")
-        total_notas = notas_result["total_notas"] if notas_result else 0
-        
         estatisticas = {
-            "total_turmas": total_turmas,
-            "total_disciplinas": total_disciplinas,
-            "total_alunos": total_alunos,
-            "total_notas": total_notas
+            "total_turmas": resumo["total_turmas"],
+            "total_disciplinas": resumo["total_disciplinas"],
+            "total_alunos": resumo["total_alunos"],
+            "total_notas": resumo["total_notas"]
         }
         
-        print(f"Estatísticas do professor {professor_id}: {estatisticas}")
+        logger.debug("Estatísticas do professor %s: %s", professor_id, estatisticas)
         return estatisticas
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO ao buscar estatísticas do professor {professor_id}: {str(e)}")
+        logger.exception(f"ERRO ao buscar estatísticas do professor {professor_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao buscar estatísticas do professor: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO BUSCA DE ESTATÍSTICAS DO PROFESSOR: {professor_id} ===")
 
 # ==============================================================
 # Endpoints para vincular Disciplinas e Turmas
@@ -3958,72 +4239,54 @@ def create_disciplina_turmas(
     Vincula uma ou mais turmas a uma disciplina específica.
     Envie um JSON com o formato: {"turmas_ids": ["id1", "id2", ...]}
     """
-    print(f"DEBUG: Endpoint POST disciplina-turmas acessado. Disciplina: {disciplina_id}, Turmas: {turmas_ids}")
+    logger.debug("Endpoint POST disciplina-turmas acessado. Disciplina: %s, Turmas: %s", disciplina_id, turmas_ids)
     try:
-        # Verificar se a disciplina existe
-        if disciplina_id.isdigit():
-            query_disciplina = "SELECT id_disciplina FROM disciplina WHERE id = %s"
-            params = (int(disciplina_id),)
-        else:
-            query_disciplina = "SELECT id_disciplina FROM disciplina WHERE id_disciplina = %s"
-            params = (disciplina_id,)
-        
-        disciplina = execute_query(query_disciplina, params, fetch_one=True)
+        # Verificar se a disciplina existe (cache de referência)
+        disciplina = buscar_disciplina_referencia(disciplina_id)
         
         if not disciplina:
             raise HTTPException(status_code=404, detail="Disciplina não encontrada")
         
         id_disciplina = disciplina["id_disciplina"]
         
-        # Lista para armazenar os vínculos criados
-        vinculos_criados = []
+        # Turmas existentes (cache de referência); as inexistentes são ignoradas
+        turmas_validas = [turma_id for turma_id in turmas_ids if referencia_cache.turma_existe(turma_id)]
+        if not turmas_validas:
+            return []
         
-        # Para cada ID de turma, verificar se a turma existe e criar o vínculo
-        for turma_id in turmas_ids:
-            # Verificar se a turma existe
-            query_turma = "SELECT id_turma FROM turma WHERE id_turma = %s"
-            turma = execute_query(query_turma, (turma_id,), fetch_one=True)
-            
-            if not turma:
-                print(f"DEBUG: Turma {turma_id} não encontrada, pulando")
-                continue  # Se a turma não existe, pular
-            
-            # Verificar se o vínculo já existe
-            query_vinculo = """
-            SELECT id FROM turma_disciplina 
-            WHERE id_disciplina = %s AND id_turma = %s
+        # Vínculos já existentes, em uma única consulta
+        query_vinculos = """
+        SELECT id, id_turma FROM turma_disciplina
+        WHERE id_disciplina = %s AND id_turma = ANY(%s)
+        """
+        vinculo_por_turma = {
+            row["id_turma"]: row["id"]
+            for row in execute_query(query_vinculos, (id_disciplina, turmas_validas))
+        }
+        
+        # Criar os vínculos que faltam, em um único INSERT
+        novas = [turma_id for turma_id in dict.fromkeys(turmas_validas) if turma_id not in vinculo_por_turma]
+        if novas:
+            query_insert = """
+            INSERT INTO turma_disciplina (id_disciplina, id_turma)
+            SELECT %s, unnest(%s::varchar[])
+            RETURNING id, id_turma
             """
-            vinculo_existente = execute_query(query_vinculo, (id_disciplina, turma_id), fetch_one=True)
-            
-            if not vinculo_existente:
-                # Criar o vínculo
-                query_insert = """
-                INSERT INTO turma_disciplina (id_disciplina, id_turma)
-                VALUES (%s, %s)
-                RETURNING id, id_disciplina, id_turma
-                """
-                novo_vinculo = execute_query(query_insert, (id_disciplina, turma_id), fetch_one=True)
-                
-                vinculos_criados.append({
-                    "id": novo_vinculo["id"],
-                    "id_disciplina": novo_vinculo["id_disciplina"],
-                    "id_turma": novo_vinculo["id_turma"]
-                })
-                
-                print(f"DEBUG: Vínculo criado entre {id_disciplina} e {turma_id}")
-            else:
-                print(f"DEBUG: Vínculo já existe entre {id_disciplina} e {turma_id}")
-                vinculos_criados.append({
-                    "id": vinculo_existente["id"],
-                    "id_disciplina": id_disciplina,
-                    "id_turma": turma_id
-                })
+            for row in execute_query(query_insert, (id_disciplina, novas)):
+                vinculo_por_turma[row["id_turma"]] = row["id"]
+            referencia_cache.invalidar("turma_disciplina")
+            logger.debug("Vínculos criados entre %s e %s", id_disciplina, novas)
+        
+        vinculos_criados = [
+            {"id": vinculo_por_turma[turma_id], "id_disciplina": id_disciplina, "id_turma": turma_id}
+            for turma_id in turmas_validas
+        ]
         
         return vinculos_criados
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Erro ao vincular turmas à disciplina: {e}")
+        logger.exception(f"Erro ao vincular turmas à disciplina: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao vincular turmas à disciplina: {str(e)}"
@@ -4039,17 +4302,10 @@ def delete_disciplina_turmas(
     Se turma_id for fornecido como query parameter, remove apenas o vínculo com essa turma.
     Caso contrário, remove todos os vínculos da disciplina.
     """
-    print(f"DEBUG: Removendo vínculos da disciplina {disciplina_id}, turma específica: {turma_id}")
+    logger.debug("Removendo vínculos da disciplina %s, turma específica: %s", disciplina_id, turma_id)
     try:
-        # Verificar se a disciplina existe
-        if disciplina_id.isdigit():
-            query_disciplina = "SELECT id_disciplina FROM disciplina WHERE id = %s"
-            params = (int(disciplina_id),)
-        else:
-            query_disciplina = "SELECT id_disciplina FROM disciplina WHERE id_disciplina = %s"
-            params = (disciplina_id,)
-        
-        disciplina = execute_query(query_disciplina, params, fetch_one=True)
+        # Verificar se a disciplina existe (cache de referência)
+        disciplina = buscar_disciplina_referencia(disciplina_id)
         
         if not disciplina:
             raise HTTPException(status_code=404, detail="Disciplina não encontrada")
@@ -4058,27 +4314,26 @@ def delete_disciplina_turmas(
         
         # Construir a query para remover vínculos
         if turma_id:
-            # Verificar se a turma existe
-            query_turma = "SELECT id_turma FROM turma WHERE id_turma = %s"
-            turma = execute_query(query_turma, (turma_id,), fetch_one=True)
-            
-            if not turma:
+            # Verificar se a turma existe (cache de referência)
+            if not referencia_cache.turma_existe(turma_id):
                 raise HTTPException(status_code=404, detail="Turma não encontrada")
             
             query_delete = "DELETE FROM turma_disciplina WHERE id_disciplina = %s AND id_turma = %s"
             execute_query(query_delete, (id_disciplina, turma_id), fetch=False)
-            print(f"DEBUG: Vínculo entre disciplina {id_disciplina} e turma {turma_id} removido")
+            referencia_cache.invalidar("turma_disciplina")
+            logger.info(f"Vínculo entre disciplina {id_disciplina} e turma {turma_id} removido")
         else:
             # Remover todos os vínculos da disciplina
             query_delete = "DELETE FROM turma_disciplina WHERE id_disciplina = %s"
             execute_query(query_delete, (id_disciplina,), fetch=False)
-            print(f"DEBUG: Todos os vínculos da disciplina {id_disciplina} removidos")
+            referencia_cache.invalidar("turma_disciplina")
+            logger.info(f"Todos os vínculos da disciplina {id_disciplina} removidos")
         
         return None
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Erro ao remover vínculos de turmas: {e}")
+        logger.exception(f"Erro ao remover vínculos de turmas: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao remover vínculos de turmas: {str(e)}"
@@ -4092,28 +4347,18 @@ def create_disciplina_turma(
     """
     Vincula uma turma específica a uma disciplina.
     """
-    print(f"DEBUG: Vinculando disciplina {disciplina_id} à turma {turma_id}")
+    logger.debug("Vinculando disciplina %s à turma %s", disciplina_id, turma_id)
     try:
-        # Verificar se a disciplina existe
-        if disciplina_id.isdigit():
-            query_disciplina = "SELECT id_disciplina FROM disciplina WHERE id = %s"
-            params = (int(disciplina_id),)
-        else:
-            query_disciplina = "SELECT id_disciplina FROM disciplina WHERE id_disciplina = %s"
-            params = (disciplina_id,)
-        
-        disciplina = execute_query(query_disciplina, params, fetch_one=True)
+        # Verificar se a disciplina existe (cache de referência)
+        disciplina = buscar_disciplina_referencia(disciplina_id)
         
         if not disciplina:
             raise HTTPException(status_code=404, detail="Disciplina não encontrada")
         
         id_disciplina = disciplina["id_disciplina"]
         
-        # Verificar se a turma existe
-        query_turma = "SELECT id_turma FROM turma WHERE id_turma = %s"
-        turma = execute_query(query_turma, (turma_id,), fetch_one=True)
-        
-        if not turma:
+        # Verificar se a turma existe (cache de referência)
+        if not referencia_cache.turma_existe(turma_id):
             raise HTTPException(status_code=404, detail="Turma não encontrada")
         
         # Verificar se o vínculo já existe
@@ -4124,7 +4369,7 @@ def create_disciplina_turma(
         vinculo_existente = execute_query(query_vinculo, (id_disciplina, turma_id), fetch_one=True)
         
         if vinculo_existente:
-            print(f"DEBUG: Vínculo já existe, retornando existente")
+            logger.info("Vínculo já existe, retornando existente")
             return {
                 "id": vinculo_existente["id"],
                 "id_disciplina": id_disciplina,
@@ -4138,8 +4383,9 @@ def create_disciplina_turma(
         RETURNING id, id_disciplina, id_turma
         """
         novo_vinculo = execute_query(query_insert, (id_disciplina, turma_id), fetch_one=True)
+        referencia_cache.invalidar("turma_disciplina")
         
-        print(f"DEBUG: Novo vínculo criado com id {novo_vinculo['id']}")
+        logger.debug("Novo vínculo criado com id %s", novo_vinculo['id'])
         return {
             "id": novo_vinculo["id"],
             "id_disciplina": novo_vinculo["id_disciplina"],
@@ -4148,7 +4394,7 @@ def create_disciplina_turma(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Erro ao vincular turma à disciplina: {e}")
+        logger.exception(f"Erro ao vincular turma à disciplina: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao vincular turma à disciplina: {str(e)}"
@@ -4162,28 +4408,18 @@ def delete_disciplina_turma(
     """
     Remove o vínculo entre uma disciplina específica e uma turma específica.
     """
-    print(f"DEBUG: Removendo vínculo entre disciplina {disciplina_id} e turma {turma_id}")
+    logger.debug("Removendo vínculo entre disciplina %s e turma %s", disciplina_id, turma_id)
     try:
-        # Verificar se a disciplina existe
-        if disciplina_id.isdigit():
-            query_disciplina = "SELECT id_disciplina FROM disciplina WHERE id = %s"
-            params = (int(disciplina_id),)
-        else:
-            query_disciplina = "SELECT id_disciplina FROM disciplina WHERE id_disciplina = %s"
-            params = (disciplina_id,)
-        
-        disciplina = execute_query(query_disciplina, params, fetch_one=True)
+        # Verificar se a disciplina existe (cache de referência)
+        disciplina = buscar_disciplina_referencia(disciplina_id)
         
         if not disciplina:
             raise HTTPException(status_code=404, detail="Disciplina não encontrada")
         
         id_disciplina = disciplina["id_disciplina"]
         
-        # Verificar se a turma existe
-        query_turma = "SELECT id_turma FROM turma WHERE id_turma = %s"
-        turma = execute_query(query_turma, (turma_id,), fetch_one=True)
-        
-        if not turma:
+        # Verificar se a turma existe (cache de referência)
+        if not referencia_cache.turma_existe(turma_id):
             raise HTTPException(status_code=404, detail="Turma não encontrada")
         
         # Remover o vínculo
@@ -4191,14 +4427,15 @@ def delete_disciplina_turma(
         DELETE FROM turma_disciplina 
         WHERE id_disciplina = %s AND id_turma = %s
         """
-        result = execute_query(query_delete, (id_disciplina, turma_id), fetch=False)
+        execute_query(query_delete, (id_disciplina, turma_id), fetch=False)
+        referencia_cache.invalidar("turma_disciplina")
         
-        print(f"DEBUG: Vínculo removido entre disciplina {id_disciplina} e turma {turma_id}")
+        logger.info(f"Vínculo removido entre disciplina {id_disciplina} e turma {turma_id}")
         return None
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Erro ao remover vínculo de turma: {e}")
+        logger.exception(f"Erro ao remover vínculo de turma: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao remover vínculo de turma: {str(e)}"
@@ -4223,71 +4460,6 @@ class ProfessorDisciplinaTurma(ProfessorDisciplinaTurmaBase):
     class Config:
         from_attributes = True
 
-# Função para garantir que a tabela professor_disciplina_turma exista
-def criar_tabela_vinculos():
-    try:
-        logger.info("Verificando se a tabela professor_disciplina_turma existe...")
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Verificar se a tabela já existe
-        cursor.execute("SELECT to_regclass('public.professor_disciplina_turma');")
-        table_exists = cursor.fetchone()[0]
-        
-        if table_exists:
-            logger.info("A tabela professor_disciplina_turma já existe.")
-        else:
-            # Criar a tabela professor_disciplina_turma
-            logger.info("Criando tabela professor_disciplina_turma...")
-            cursor.execute("""
-            CREATE TABLE professor_disciplina_turma (
-                id SERIAL PRIMARY KEY,
-                id_professor VARCHAR(20) NOT NULL,
-                id_disciplina VARCHAR(20) NOT NULL,
-                id_turma VARCHAR(20) NOT NULL,
-                CONSTRAINT unique_vinculo UNIQUE (id_professor, id_disciplina, id_turma)
-            );
-            """)
-            
-            # Adicionar comentário à tabela
-            cursor.execute("""
-            COMMENT ON TABLE professor_disciplina_turma IS 'Tabela que armazena os vínculos entre professores, disciplinas e turmas';
-            """)
-            
-            logger.info("Tabela professor_disciplina_turma criada com sucesso!")
-        
-        # Verificar índices
-        cursor.execute("""
-        SELECT indexname FROM pg_indexes 
-        WHERE tablename = 'professor_disciplina_turma' AND indexname = 'idx_pdt_professor';
-        """)
-        if not cursor.fetchone():
-            logger.info("Criando índices para melhorar a performance...")
-            
-            # Criar índices para melhorar a performance das consultas
-            cursor.execute("""
-            CREATE INDEX idx_pdt_professor ON professor_disciplina_turma (id_professor);
-            """)
-            
-            cursor.execute("""
-            CREATE INDEX idx_pdt_disciplina ON professor_disciplina_turma (id_disciplina);
-            """)
-            
-            cursor.execute("""
-            CREATE INDEX idx_pdt_turma ON professor_disciplina_turma (id_turma);
-            """)
-            
-            logger.info("Índices criados com sucesso!")
-        else:
-            logger.info("Índices já existem na tabela.")
-            
-        cursor.close()
-        conn.close()
-        logger.info("Processo de verificação e criação da tabela professor_disciplina_turma concluído com sucesso!")
-        
-    except Exception as e:
-        logger.error(f"Erro ao criar tabela professor_disciplina_turma: {e}")
-
 
 @app.post("/api/professor_disciplina_turma", response_model=Dict, status_code=status.HTTP_201_CREATED)
 def criar_vinculo_professor_disciplina_turma(vinculo: ProfessorDisciplinaTurmaCreate):
@@ -4324,6 +4496,7 @@ def criar_vinculo_professor_disciplina_turma(vinculo: ProfessorDisciplinaTurmaCr
             (vinculo.id_professor, vinculo.id_disciplina, vinculo.id_turma),
             fetch_one=True
         )
+        referencia_cache.invalidar("professor_disciplina_turma")
         
         if not result:
             raise HTTPException(
@@ -4331,6 +4504,8 @@ def criar_vinculo_professor_disciplina_turma(vinculo: ProfessorDisciplinaTurmaCr
                 detail="Falha ao inserir vínculo"
             )
         
+        resumo_professor_cache.invalidar_professor(vinculo.id_professor)
+        
         return {
             "message": "Vínculo criado com sucesso",
             "id": result["id"],
@@ -4351,11 +4526,14 @@ def criar_vinculo_professor_disciplina_turma(vinculo: ProfessorDisciplinaTurmaCr
 
 @app.get("/api/professor_disciplina_turma", response_model=List[Dict])
 def listar_vinculos_professor_disciplina_turma(
+    response: Response,
     id_professor: Optional[str] = Query(None, description="ID do professor"),
     id_disciplina: Optional[str] = Query(None, description="ID da disciplina"),
-    id_turma: Optional[str] = Query(None, description="ID da turma")
+    id_turma: Optional[str] = Query(None, description="ID da turma"),
+    limit: Optional[int] = parametro_limit(),
+    cursor: Optional[str] = parametro_cursor()
 ):
-    """Lista todos os vínculos ou filtra por professor, disciplina ou turma."""
+    """Lista todos os vínculos ou filtra por professor, disciplina ou turma (paginação opcional)."""
     try:
         # Construir a consulta SQL
         query = "SELECT * FROM professor_disciplina_turma"
@@ -4376,9 +4554,13 @@ def listar_vinculos_professor_disciplina_turma(
         
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
+        query, params = paginar_consulta(ORDEM_VINCULOS, query, params, limit, cursor,
+                                         tem_where=bool(conditions))
         
         # Executar a consulta
         result = execute_query(query, params)
+        result, proximo_cursor = ORDEM_VINCULOS.pagina(result, limit)
+        definir_proximo_cursor(response, proximo_cursor)
         
         # Formatar o resultado
         vinculos = []
@@ -4392,6 +4574,8 @@ def listar_vinculos_professor_disciplina_turma(
         
         return vinculos
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -4405,7 +4589,7 @@ def excluir_vinculo_professor_disciplina_turma(
     """Exclui um vínculo específico pelo seu ID."""
     try:
         # Verificar se o vínculo existe
-        query = "SELECT id FROM professor_disciplina_turma WHERE id = %s"
+        query = "SELECT id, id_professor FROM professor_disciplina_turma WHERE id = %s"
         result = execute_query(query, (vinculo_id,), fetch_one=True)
         
         if not result:
@@ -4417,6 +4601,8 @@ def excluir_vinculo_professor_disciplina_turma(
         # Excluir o vínculo
         query = "DELETE FROM professor_disciplina_turma WHERE id = %s"
         execute_query(query, (vinculo_id,), fetch=False)
+        resumo_professor_cache.invalidar_professor(result["id_professor"])
+        referencia_cache.invalidar("professor_disciplina_turma")
         
         return {"message": "Vínculo excluído com sucesso"}
         
@@ -4455,115 +4641,83 @@ def excluir_vinculo(
     """Endpoint alternativo para excluir vínculo entre professor, disciplina e turma."""
     return excluir_vinculo_professor_disciplina_turma(vinculo_id)
 
-# Chamar a função para garantir que a tabela existe
-criar_tabela_vinculos()
-
 # ==============================================================
-# Função para criar tabela do Calendário Escolar
+# Endpoints para Calendário Escolar
 # ==============================================================
 
-def criar_tabela_calendario():
-    """Cria a tabela calendario_escolar se ela não existir."""
-    try:
-        import logging
-        logging.basicConfig(level=logging.INFO)
-        logger = logging.getLogger(__name__)
-        
-        logger.info("Verificando se a tabela calendario_escolar existe...")
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Verificar se a tabela já existe
-        cursor.execute("SELECT to_regclass('public.calendario_escolar');")
-        result = cursor.fetchone()
-        table_exists = result[0] if result else None
-        
-        if table_exists:
-            logger.info("A tabela calendario_escolar já existe.")
+COLUNAS_EVENTO_CALENDARIO = """id, titulo, descricao, data_inicio, data_fim, hora_inicio, hora_fim,
+               tipo_evento, cor, recorrente, frequencia_recorrencia, recorrencia_ate,
+               recorrencia_excecoes, observacoes, criado_por, data_criacao, ativo, id_escola"""
+
+# Ocorrências dos eventos recorrentes por (evento, ano) (ver calendario_recorrencia.py)
+ocorrencias_cache = CacheOcorrencias()
+metricas.fonte("calendario_ocorrencias", ocorrencias_cache.status)
+
+def formatar_evento_calendario(row, ocorrencia=None):
+    """Monta a resposta de um evento; com ocorrencia=(inicio, fim), a de uma ocorrência da série."""
+    data_inicio, data_fim = ocorrencia or (row["data_inicio"], row["data_fim"])
+    return {
+        "id": row["id"],
+        "titulo": row["titulo"],
+        "descricao": row["descricao"],
+        "data_inicio": data_inicio.strftime('%Y-%m-%d'),
+        "data_fim": data_fim.strftime('%Y-%m-%d'),
+        "hora_inicio": row["hora_inicio"].strftime('%H:%M') if row["hora_inicio"] else None,
+        "hora_fim": row["hora_fim"].strftime('%H:%M') if row["hora_fim"] else None,
+        "tipo_evento": row["tipo_evento"],
+        "cor": row["cor"],
+        "recorrente": row["recorrente"],
+        "frequencia_recorrencia": row["frequencia_recorrencia"],
+        "recorrencia_ate": row["recorrencia_ate"].strftime('%Y-%m-%d') if row["recorrencia_ate"] else None,
+        "recorrencia_excecoes": [data.strftime('%Y-%m-%d') for data in row["recorrencia_excecoes"] or []],
+        "observacoes": row["observacoes"],
+        "criado_por": row["criado_por"],
+        "data_criacao": row["data_criacao"],
+        "ativo": row["ativo"],
+        "id_escola": row["id_escola"],
+        "inicio_serie": row["data_inicio"].strftime('%Y-%m-%d') if ocorrencia else None
+    }
+
+def expandir_eventos_calendario(rows, intervalo):
+    """
+    Substitui cada evento recorrente pelas suas ocorrências no intervalo consultado.
+
+    Sem intervalo (ou com um dos lados em aberto), as séries são expandidas em
+    uma janela limitada (ver janela_expansao).
+    """
+    janela = janela_expansao(intervalo)
+    eventos = []
+    for row in rows:
+        if row["recorrente"] and row["frequencia_recorrencia"] in FREQUENCIAS:
+            for ocorrencia in ocorrencias_cache.ocorrencias(row, *janela):
+                eventos.append(formatar_evento_calendario(row, ocorrencia))
         else:
-            # Criar a tabela calendario_escolar
-            logger.info("Criando tabela calendario_escolar...")
-            cursor.execute("""
-            CREATE TABLE calendario_escolar (
-                id SERIAL PRIMARY KEY,
-                titulo VARCHAR(200) NOT NULL,
-                descricao TEXT,
-                data_inicio DATE NOT NULL,
-                data_fim DATE NOT NULL,
-                hora_inicio TIME,
-                hora_fim TIME,
-                tipo_evento VARCHAR(50) NOT NULL DEFAULT 'evento_escolar',
-                cor VARCHAR(7) DEFAULT '#3498db',
-                recorrente BOOLEAN DEFAULT FALSE,
-                frequencia_recorrencia VARCHAR(20),
-                observacoes TEXT,
-                criado_por VARCHAR(100) NOT NULL,
-                data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                ativo BOOLEAN DEFAULT TRUE,
-                CHECK (data_fim >= data_inicio),
-                CHECK (tipo_evento IN ('feriado_nacional', 'feriado_estadual', 'feriado_municipal', 'evento_escolar', 'reuniao', 'conselho_classe', 'formatura', 'festa_junina', 'semana_pedagogica', 'outro'))
-            );
-            """)
-            
-            # Adicionar comentário à tabela
-            cursor.execute("""
-            COMMENT ON TABLE calendario_escolar IS 'Tabela que armazena os eventos do calendário escolar';
-            """)
-            
-            # Criar índices para melhorar a performance
-            cursor.execute("""
-            CREATE INDEX idx_calendario_data_inicio ON calendario_escolar (data_inicio);
-            """)
-            
-            cursor.execute("""
-            CREATE INDEX idx_calendario_data_fim ON calendario_escolar (data_fim);
-            """)
-            
-            cursor.execute("""
-            CREATE INDEX idx_calendario_tipo_evento ON calendario_escolar (tipo_evento);
-            """)
-            
-            cursor.execute("""
-            CREATE INDEX idx_calendario_ativo ON calendario_escolar (ativo);
-            """)
-            
-            # Inserir alguns eventos padrão (feriados nacionais principais)
-            cursor.execute("""
-            INSERT INTO calendario_escolar (titulo, data_inicio, data_fim, tipo_evento, cor, criado_por, observacoes) VALUES
-            ('Confraternização Universal', '2024-01-01', '2024-01-01', 'feriado_nacional', '#e74c3c', 'Sistema', 'Feriado Nacional'),
-            ('Carnaval', '2024-02-12', '2024-02-13', 'feriado_nacional', '#9b59b6', 'Sistema', 'Feriado Nacional'),
-            ('Sexta-feira Santa', '2024-03-29', '2024-03-29', 'feriado_nacional', '#8b4513', 'Sistema', 'Feriado Nacional'),
-            ('Tiradentes', '2024-04-21', '2024-04-21', 'feriado_nacional', '#27ae60', 'Sistema', 'Feriado Nacional'),
-            ('Dia do Trabalhador', '2024-05-01', '2024-05-01', 'feriado_nacional', '#e67e22', 'Sistema', 'Feriado Nacional'),
-            ('Independência do Brasil', '2024-09-07', '2024-09-07', 'feriado_nacional', '#f1c40f', 'Sistema', 'Feriado Nacional'),
-            ('Nossa Senhora Aparecida', '2024-10-12', '2024-10-12', 'feriado_nacional', '#3498db', 'Sistema', 'Feriado Nacional'),
-            ('Finados', '2024-11-02', '2024-11-02', 'feriado_nacional', '#34495e', 'Sistema', 'Feriado Nacional'),
-            ('Proclamação da República', '2024-11-15', '2024-11-15', 'feriado_nacional', '#2ecc71', 'Sistema', 'Feriado Nacional'),
-            ('Natal', '2024-12-25', '2024-12-25', 'feriado_nacional', '#c0392b', 'Sistema', 'Feriado Nacional');
-            """)
-            
-            logger.info("Tabela calendario_escolar criada com dados iniciais!")
-        
-        cursor.close()
-        conn.close()
-        logger.info("Processo de verificação e criação da tabela calendario_escolar concluído!")
-        
-    except Exception as e:
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"Erro ao criar tabela calendario_escolar: {e}")
-        print(f"Erro ao criar tabela calendario_escolar: {e}")  # Fallback para print
+            eventos.append(formatar_evento_calendario(row))
+    eventos.sort(key=lambda evento: (evento["data_inicio"], evento["hora_inicio"] or ""))
+    return eventos
 
-# ==============================================================
-# Endpoints para Calendário Escolar
-# ==============================================================
+def validar_recorrencia(frequencia, ate, excecoes):
+    """Valida os campos de recorrência (400 em caso de erro)."""
+    if frequencia and frequencia not in FREQUENCIAS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Frequência de recorrência inválida. Use: {', '.join(FREQUENCIAS)}"
+        )
+    try:
+        if ate:
+            datetime.strptime(ate, '%Y-%m-%d')
+        for data in excecoes or []:
+            datetime.strptime(data, '%Y-%m-%d')
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Formato de data da recorrência inválido. Use YYYY-MM-DD"
+        )
 
 @app.get("/api/calendario/teste")
 def teste_calendario():
     """Endpoint de teste para verificar se o calendário está funcionando."""
     try:
-        # Garantir que a tabela existe
-        criar_tabela_calendario()
         return {
             "status": "success",
             "message": "Calendário escolar está funcionando!",
@@ -4586,11 +4740,8 @@ def teste_calendario():
 @app.post("/api/calendario/eventos", response_model=EventoCalendario, status_code=status.HTTP_201_CREATED)
 def criar_evento_calendario(evento: EventoCalendarioCreate):
     """Cria um novo evento no calendário escolar."""
-    print(f"=== CRIANDO EVENTO DO CALENDÁRIO: {evento.titulo} ===")
+    logger.debug("CRIANDO EVENTO DO CALENDÁRIO: %s", evento.titulo)
     try:
-        # Garantir que a tabela existe
-        criar_tabela_calendario()
-        
         # Validar datas
         from datetime import datetime
         try:
@@ -4627,15 +4778,16 @@ def criar_evento_calendario(evento: EventoCalendarioCreate):
                     detail="Formato de hora de fim inválido. Use HH:MM"
                 )
         
+        validar_recorrencia(evento.frequencia_recorrencia, evento.recorrencia_ate, evento.recorrencia_excecoes)
+        
         # Inserir evento no banco
-        query = """
+        query = f"""
         INSERT INTO calendario_escolar (
             titulo, descricao, data_inicio, data_fim, hora_inicio, hora_fim,
-            tipo_evento, cor, recorrente, frequencia_recorrencia, observacoes, criado_por
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        RETURNING id, titulo, descricao, data_inicio, data_fim, hora_inicio, hora_fim,
-                  tipo_evento, cor, recorrente, frequencia_recorrencia, observacoes,
-                  criado_por, data_criacao, ativo
+            tipo_evento, cor, recorrente, frequencia_recorrencia, recorrencia_ate,
+            recorrencia_excecoes, observacoes, criado_por, id_escola
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s::date[], %s, %s, %s)
+        RETURNING {COLUNAS_EVENTO_CALENDARIO}
         """
         
         params = (
@@ -4649,8 +4801,11 @@ def criar_evento_calendario(evento: EventoCalendarioCreate):
             evento.cor,
             evento.recorrente,
             evento.frequencia_recorrencia,
+            evento.recorrencia_ate,
+            evento.recorrencia_excecoes,
             evento.observacoes,
-            evento.criado_por
+            evento.criado_por,
+            escola_atual()  # Sem X-Escola-ID: evento de toda a rede
         )
         
         result = execute_query(query, params, fetch_one=True)
@@ -4661,38 +4816,19 @@ def criar_evento_calendario(evento: EventoCalendarioCreate):
                 detail="Falha ao criar evento"
             )
         
-        # Formatar resposta
-        evento_criado = {
-            "id": result["id"],
-            "titulo": result["titulo"],
-            "descricao": result["descricao"],
-            "data_inicio": result["data_inicio"].strftime('%Y-%m-%d'),
-            "data_fim": result["data_fim"].strftime('%Y-%m-%d'),
-            "hora_inicio": result["hora_inicio"].strftime('%H:%M') if result["hora_inicio"] else None,
-            "hora_fim": result["hora_fim"].strftime('%H:%M') if result["hora_fim"] else None,
-            "tipo_evento": result["tipo_evento"],
-            "cor": result["cor"],
-            "recorrente": result["recorrente"],
-            "frequencia_recorrencia": result["frequencia_recorrencia"],
-            "observacoes": result["observacoes"],
-            "criado_por": result["criado_por"],
-            "data_criacao": result["data_criacao"],
-            "ativo": result["ativo"]
-        }
+        evento_criado = formatar_evento_calendario(result)
         
-        print(f"Evento criado com sucesso: {evento_criado}")
+        logger.info(f"Evento criado com sucesso: {evento_criado}")
         return evento_criado
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO ao criar evento: {str(e)}")
+        logger.exception(f"ERRO ao criar evento: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao criar evento: {str(e)}"
         )
-    finally:
-        print("=== FINALIZANDO CRIAÇÃO DE EVENTO ===")
 
 @app.get("/api/calendario/eventos", response_model=List[EventoCalendario])
 def listar_eventos_calendario(
@@ -4703,94 +4839,63 @@ def listar_eventos_calendario(
     data_fim: Optional[str] = Query(None, description="Data de fim do período (YYYY-MM-DD)")
 ):
     """Lista eventos do calendário com filtros opcionais."""
-    print(f"=== LISTANDO EVENTOS DO CALENDÁRIO ===")
+    logger.debug("LISTANDO EVENTOS DO CALENDÁRIO")
     try:
-        # Garantir que a tabela existe
-        criar_tabela_calendario()
-        
         # Construir query base
-        query = """
-        SELECT id, titulo, descricao, data_inicio, data_fim, hora_inicio, hora_fim,
-               tipo_evento, cor, recorrente, frequencia_recorrencia, observacoes,
-               criado_por, data_criacao, ativo
+        query = f"""
+        SELECT {COLUNAS_EVENTO_CALENDARIO}
         FROM calendario_escolar
         WHERE ativo = TRUE
         """
         params = []
         
-        # Adicionar filtros
-        if mes and ano:
-            query += " AND EXTRACT(MONTH FROM data_inicio) = %s AND EXTRACT(YEAR FROM data_inicio) = %s"
-            params.extend([mes, ano])
-        elif ano:
-            query += " AND EXTRACT(YEAR FROM data_inicio) = %s"
-            params.append(ano)
+        # Mês/ano e período viram um único intervalo [inicio, fim): entram os
+        # eventos que se sobrepõem a ele (ver calendario_periodos.py)
+        try:
+            intervalo = intervalo_consulta(ano, mes, data_inicio, data_fim)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Filtro de data inválido. Use mês de 1 a 12 e datas no formato YYYY-MM-DD"
+            )
+        if intervalo:
+            # Eventos recorrentes entram se a série alcança o intervalo
+            query += " AND " + CONDICAO_PERIODO_OU_SERIE
+            params.extend(intervalo * 2)
         
         if tipo_evento:
             query += " AND tipo_evento = %s"
             params.append(tipo_evento)
         
-        if data_inicio and data_fim:
-            query += " AND data_inicio >= %s AND data_fim <= %s"
-            params.extend([data_inicio, data_fim])
-        elif data_inicio:
-            query += " AND data_inicio >= %s"
-            params.append(data_inicio)
-        elif data_fim:
-            query += " AND data_fim <= %s"
-            params.append(data_fim)
-        
-        # Ordenar por data
-        query += " ORDER BY data_inicio ASC, hora_inicio ASC"
+        # Eventos da escola da requisição e os de toda a rede
+        condicao = condicao_escola("id_escola", params, rede=True)
+        if condicao:
+            query += " AND " + condicao
         
         results = execute_query(query, params)
         
-        if not results:
-            return []
-        
-        # Formatar resultados
-        eventos = []
-        for row in results:
-            evento = {
-                "id": row["id"],
-                "titulo": row["titulo"],
-                "descricao": row["descricao"],
-                "data_inicio": row["data_inicio"].strftime('%Y-%m-%d'),
-                "data_fim": row["data_fim"].strftime('%Y-%m-%d'),
-                "hora_inicio": row["hora_inicio"].strftime('%H:%M') if row["hora_inicio"] else None,
-                "hora_fim": row["hora_fim"].strftime('%H:%M') if row["hora_fim"] else None,
-                "tipo_evento": row["tipo_evento"],
-                "cor": row["cor"],
-                "recorrente": row["recorrente"],
-                "frequencia_recorrencia": row["frequencia_recorrencia"],
-                "observacoes": row["observacoes"],
-                "criado_por": row["criado_por"],
-                "data_criacao": row["data_criacao"],
-                "ativo": row["ativo"]
-            }
-            eventos.append(evento)
+        # Ocorrências das séries no intervalo, ordenadas por data
+        eventos = expandir_eventos_calendario(results, intervalo)
         
-        print(f"Encontrados {len(eventos)} eventos")
+        logger.debug("Encontrados %s eventos", len(eventos))
         return eventos
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"ERRO ao listar eventos: {str(e)}")
+        logger.exception(f"ERRO ao listar eventos: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao listar eventos: {str(e)}"
         )
-    finally:
-        print("=== FINALIZANDO LISTAGEM DE EVENTOS ===")
 
 @app.get("/api/calendario/eventos/{evento_id}", response_model=EventoCalendario)
 def obter_evento_calendario(evento_id: int = Path(..., description="ID do evento")):
     """Obtém um evento específico do calendário."""
-    print(f"=== OBTENDO EVENTO {evento_id} ===")
+    logger.debug("OBTENDO EVENTO %s", evento_id)
     try:
-        query = """
-        SELECT id, titulo, descricao, data_inicio, data_fim, hora_inicio, hora_fim,
-               tipo_evento, cor, recorrente, frequencia_recorrencia, observacoes,
-               criado_por, data_criacao, ativo
+        query = f"""
+        SELECT {COLUNAS_EVENTO_CALENDARIO}
         FROM calendario_escolar
         WHERE id = %s AND ativo = TRUE
         """
@@ -4800,37 +4905,18 @@ def obter_evento_calendario(evento_id: int = Path(..., description="ID do evento
         if not result:
             raise HTTPException(status_code=404, detail="Evento não encontrado")
         
-        # Formatar resposta
-        evento = {
-            "id": result["id"],
-            "titulo": result["titulo"],
-            "descricao": result["descricao"],
-            "data_inicio": result["data_inicio"].strftime('%Y-%m-%d'),
-            "data_fim": result["data_fim"].strftime('%Y-%m-%d'),
-            "hora_inicio": result["hora_inicio"].strftime('%H:%M') if result["hora_inicio"] else None,
-            "hora_fim": result["hora_fim"].strftime('%H:%M') if result["hora_fim"] else None,
-            "tipo_evento": result["tipo_evento"],
-            "cor": result["cor"],
-            "recorrente": result["recorrente"],
-            "frequencia_recorrencia": result["frequencia_recorrencia"],
-            "observacoes": result["observacoes"],
-            "criado_por": result["criado_por"],
-            "data_criacao": result["data_criacao"],
-            "ativo": result["ativo"]
-        }
+        evento = formatar_evento_calendario(result)
         
         return evento
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO ao obter evento {evento_id}: {str(e)}")
+        logger.exception(f"ERRO ao obter evento {evento_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao obter evento: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO OBTENÇÃO DO EVENTO {evento_id} ===")
 
 @app.put("/api/calendario/eventos/{evento_id}", response_model=EventoCalendario)
 def atualizar_evento_calendario(
@@ -4838,7 +4924,7 @@ def atualizar_evento_calendario(
     evento: EventoCalendarioUpdate = Body(...)
 ):
     """Atualiza um evento do calendário."""
-    print(f"=== ATUALIZANDO EVENTO {evento_id} ===")
+    logger.debug("ATUALIZANDO EVENTO %s", evento_id)
     try:
         # Verificar se o evento existe
         check_query = "SELECT id FROM calendario_escolar WHERE id = %s AND ativo = TRUE"
@@ -4900,6 +4986,12 @@ def atualizar_evento_calendario(
             updates["recorrente"] = evento.recorrente
         if evento.frequencia_recorrencia is not None:
             updates["frequencia_recorrencia"] = evento.frequencia_recorrencia
+        if evento.recorrencia_ate is not None:
+            # String vazia remove o fim da série
+            updates["recorrencia_ate"] = evento.recorrencia_ate or None
+        if evento.recorrencia_excecoes is not None:
+            updates["recorrencia_excecoes"] = evento.recorrencia_excecoes
+        validar_recorrencia(evento.frequencia_recorrencia, evento.recorrencia_ate, evento.recorrencia_excecoes)
         if evento.observacoes is not None:
             updates["observacoes"] = evento.observacoes
         if evento.ativo is not None:
@@ -4910,14 +5002,15 @@ def atualizar_evento_calendario(
             return obter_evento_calendario(evento_id)
         
         # Construir query de atualização
-        set_clause = ", ".join(f"{field} = %s" for field in updates.keys())
+        set_clause = ", ".join(
+            f"{field} = %s::date[]" if field == "recorrencia_excecoes" else f"{field} = %s"
+            for field in updates.keys()
+        )
         query = f"""
         UPDATE calendario_escolar 
         SET {set_clause}
         WHERE id = %s
-        RETURNING id, titulo, descricao, data_inicio, data_fim, hora_inicio, hora_fim,
-                  tipo_evento, cor, recorrente, frequencia_recorrencia, observacoes,
-                  criado_por, data_criacao, ativo
+        RETURNING {COLUNAS_EVENTO_CALENDARIO}
         """
         
         params = list(updates.values())
@@ -4931,43 +5024,25 @@ def atualizar_evento_calendario(
                 detail="Falha ao atualizar evento"
             )
         
-        # Formatar resposta
-        evento_atualizado = {
-            "id": result["id"],
-            "titulo": result["titulo"],
-            "descricao": result["descricao"],
-            "data_inicio": result["data_inicio"].strftime('%Y-%m-%d'),
-            "data_fim": result["data_fim"].strftime('%Y-%m-%d'),
-            "hora_inicio": result["hora_inicio"].strftime('%H:%M') if result["hora_inicio"] else None,
-            "hora_fim": result["hora_fim"].strftime('%H:%M') if result["hora_fim"] else None,
-            "tipo_evento": result["tipo_evento"],
-            "cor": result["cor"],
-            "recorrente": result["recorrente"],
-            "frequencia_recorrencia": result["frequencia_recorrencia"],
-            "observacoes": result["observacoes"],
-            "criado_por": result["criado_por"],
-            "data_criacao": result["data_criacao"],
-            "ativo": result["ativo"]
-        }
+        ocorrencias_cache.invalidar(evento_id)
+        evento_atualizado = formatar_evento_calendario(result)
         
-        print(f"Evento atualizado: {evento_atualizado}")
+        logger.info(f"Evento atualizado: {evento_atualizado}")
         return evento_atualizado
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO ao atualizar evento {evento_id}: {str(e)}")
+        logger.exception(f"ERRO ao atualizar evento {evento_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao atualizar evento: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO ATUALIZAÇÃO DO EVENTO {evento_id} ===")
 
 @app.delete("/api/calendario/eventos/{evento_id}", status_code=status.HTTP_204_NO_CONTENT)
 def deletar_evento_calendario(evento_id: int = Path(..., description="ID do evento")):
     """Deleta (inativa) um evento do calendário."""
-    print(f"=== DELETANDO EVENTO {evento_id} ===")
+    logger.debug("DELETANDO EVENTO %s", evento_id)
     try:
         # Verificar se o evento existe
         check_query = "SELECT id FROM calendario_escolar WHERE id = %s AND ativo = TRUE"
@@ -4979,20 +5054,19 @@ def deletar_evento_calendario(evento_id: int = Path(..., description="ID do even
         # Soft delete - marcar como inativo
         query = "UPDATE calendario_escolar SET ativo = FALSE WHERE id = %s"
         execute_query(query, (evento_id,), fetch=False)
+        ocorrencias_cache.invalidar(evento_id)
         
-        print(f"Evento {evento_id} deletado com sucesso")
+        logger.info(f"Evento {evento_id} deletado com sucesso")
         return None
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERRO ao deletar evento {evento_id}: {str(e)}")
+        logger.exception(f"ERRO ao deletar evento {evento_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao deletar evento: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO DELEÇÃO DO EVENTO {evento_id} ===")
 
 @app.get("/api/calendario/tipos-evento")
 def listar_tipos_evento():
@@ -5018,111 +5092,236 @@ def resumo_mensal_calendario(
     mes: int = Path(..., ge=1, le=12, description="Mês (1-12)")
 ):
     """Retorna um resumo dos eventos do mês especificado."""
-    print(f"=== RESUMO MENSAL DO CALENDÁRIO {mes}/{ano} ===")
+    logger.debug("RESUMO MENSAL DO CALENDÁRIO %s/%s", mes, ano)
     try:
-        # Garantir que a tabela existe
-        criar_tabela_calendario()
-        
-        # Buscar eventos do mês
-        query = """
-        SELECT COUNT(*) as total_eventos,
-               tipo_evento,
-               COUNT(*) as quantidade
+        # Uma só consulta agrupada por tipo: os eventos simples são contados no banco
+        # (incluindo os de vários dias que começaram antes do mês); das séries vêm as
+        # regras, e as ocorrências no mês são contadas a partir do cache de expansão
+        intervalo = intervalo_mes(ano, mes)
+        params = list(intervalo * 2)
+        condicao = condicao_escola("id_escola", params, rede=True)
+        query = f"""
+        SELECT tipo_evento,
+               COUNT(*) FILTER (WHERE NOT recorrente) AS quantidade,
+               json_agg(json_build_object(
+                   'id', id, 'data_inicio', data_inicio, 'data_fim', data_fim,
+                   'frequencia_recorrencia', frequencia_recorrencia,
+                   'recorrencia_ate', recorrencia_ate, 'recorrencia_excecoes', recorrencia_excecoes
+               )) FILTER (WHERE recorrente) AS series
         FROM calendario_escolar
-        WHERE EXTRACT(MONTH FROM data_inicio) = %s 
-        AND EXTRACT(YEAR FROM data_inicio) = %s
-        AND ativo = TRUE
+        WHERE ativo = TRUE
+        AND {CONDICAO_PERIODO_OU_SERIE}
+        {"AND " + condicao if condicao else ""}
         GROUP BY tipo_evento
-        ORDER BY quantidade DESC
         """
         
-        results = execute_query(query, (mes, ano))
-        
-        # Contar total de eventos
-        total_query = """
-        SELECT COUNT(*) as total
-        FROM calendario_escolar
-        WHERE EXTRACT(MONTH FROM data_inicio) = %s 
-        AND EXTRACT(YEAR FROM data_inicio) = %s
-        AND ativo = TRUE
-        """
+        results = execute_query(query, params)
         
-        total_result = execute_query(total_query, (mes, ano), fetch_one=True)
-        total_eventos = total_result["total"] if total_result else 0
+        por_tipo = []
+        for row in results:
+            quantidade = row["quantidade"]
+            for serie in row["series"] or []:
+                regra = {
+                    "id": serie["id"],
+                    "data_inicio": date.fromisoformat(serie["data_inicio"]),
+                    "data_fim": date.fromisoformat(serie["data_fim"]),
+                    "frequencia_recorrencia": serie["frequencia_recorrencia"],
+                    "recorrencia_ate": date.fromisoformat(serie["recorrencia_ate"]) if serie["recorrencia_ate"] else None,
+                    "recorrencia_excecoes": [date.fromisoformat(data) for data in serie["recorrencia_excecoes"] or []],
+                }
+                if regra["frequencia_recorrencia"] in FREQUENCIAS:
+                    quantidade += len(ocorrencias_cache.ocorrencias(regra, *intervalo))
+                elif regra["data_inicio"] < intervalo[1] and regra["data_fim"] >= intervalo[0]:
+                    quantidade += 1
+            if quantidade:
+                por_tipo.append({"tipo": row["tipo_evento"], "quantidade": quantidade})
+        por_tipo.sort(key=lambda item: item["quantidade"], reverse=True)
         
         # Formatar resposta
         resumo = {
             "ano": ano,
             "mes": mes,
-            "total_eventos": total_eventos,
-            "por_tipo": []
+            "total_eventos": sum(item["quantidade"] for item in por_tipo),
+            "por_tipo": por_tipo
         }
         
-        for row in results:
-            resumo["por_tipo"].append({
-                "tipo": row["tipo_evento"],
-                "quantidade": row["quantidade"]
-            })
-        
         return resumo
         
     except Exception as e:
-        print(f"ERRO ao gerar resumo mensal: {str(e)}")
+        logger.exception(f"ERRO ao gerar resumo mensal: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao gerar resumo mensal: {str(e)}"
         )
-    finally:
-        print(f"=== FINALIZANDO RESUMO MENSAL {mes}/{ano} ===")
-
-# Chamar a função para garantir que a tabela do calendário existe
-criar_tabela_calendario()
 
 # Endpoint para calcular médias de todas as notas
 @app.post("/api/calcular-medias", status_code=status.HTTP_200_OK)
-def calcular_medias():
-    """Recalcula as médias finais de todas as notas"""
+def calcular_medias(
+    ano: Optional[int] = Query(None, description="Ano letivo"),
+    bimestre: Optional[int] = Query(None, description="Bimestre"),
+    turma_id: Optional[str] = Query(None, description="ID da turma"),
+    disciplina_id: Optional[str] = Query(None, description="ID da disciplina"),
+    completo: bool = Query(False, description="Reavalia todas as notas do escopo, não só as pendentes"),
+    tamanho_lote: int = Query(5000, ge=100, le=50000, description="Notas gravadas por transação")
+):
+    """
+    Recalcula as médias das notas pendentes (ou de todas, com completo=true)
+    dentro do escopo informado, em lotes curtos que travam apenas as linhas alteradas.
+    Com X-Escola-ID, apenas as notas da escola.
+    """
+    exigir_migracao("0013", "Recálculo de médias pendentes")
+    escopo = {"id_escola": escola_atual(), "ano": ano, "bimestre": bimestre,
+              "id_turma": turma_id, "id_disciplina": disciplina_id}
+    inicio = time.monotonic()
+
+    def registrar_progresso(lote, linhas, total):
+        logger.info(f"Recálculo de médias {escopo}: lote {lote} com {linhas} notas ({total} no total)")
+
+    conn = None
     try:
-        # Atualizar todas as médias usando a fórmula correta com casts explícitos para PostgreSQL
-        query = """
-            UPDATE nota
-            SET media = CASE
-                WHEN nota_mensal IS NOT NULL AND nota_bimestral IS NOT NULL THEN
-                    CASE 
-                        WHEN recuperacao IS NOT NULL AND recuperacao > 0 THEN
-                            ROUND(((nota_mensal::numeric + nota_bimestral::numeric) / 2 + recuperacao::numeric) / 2, 1)
-                        ELSE
-                            ROUND((nota_mensal::numeric + nota_bimestral::numeric) / 2, 1)
-                    END
-                WHEN nota_mensal IS NOT NULL THEN
-                    CASE 
-                        WHEN recuperacao IS NOT NULL AND recuperacao > 0 THEN
-                            ROUND((nota_mensal::numeric + recuperacao::numeric) / 2, 1)
-                        ELSE
-                            nota_mensal
-                    END
-                WHEN nota_bimestral IS NOT NULL THEN
-                    CASE 
-                        WHEN recuperacao IS NOT NULL AND recuperacao > 0 THEN
-                            ROUND((nota_bimestral::numeric + recuperacao::numeric) / 2, 1)
-                        ELSE
-                            nota_bimestral
-                    END
-                ELSE
-                    0
-            END
-            WHERE nota_mensal IS NOT NULL OR nota_bimestral IS NOT NULL
-        """
-        
-        result = execute_query(query, fetch=False)
-        return {"message": "Médias recalculadas com sucesso!"}
-        
+        conn = get_db_connection()
+        resultado = recalcular_pendentes(
+            conn,
+            escopo=escopo,
+            tamanho_lote=tamanho_lote,
+            completo=completo,
+            progresso=registrar_progresso,
+        )
+        cursor = conn.cursor()
+        restantes = contar_pendentes(cursor, escopo)
+        cursor.close()
+
+        return {
+            "message": "Médias recalculadas com sucesso!",
+            "escopo": {chave: valor for chave, valor in escopo.items() if valor is not None},
+            "lotes": resultado["lotes"],
+            "notas_atualizadas": resultado["atualizadas"],
+            "pendentes_restantes": restantes,
+            "duracao_ms": round((time.monotonic() - inicio) * 1000)
+        }
+
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"ERRO ao calcular médias: {str(e)}")
+        logger.exception(f"ERRO ao calcular médias: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao calcular médias: {str(e)}"
         )
+    finally:
+        if conn:
+            conn.close()
+
+@app.get("/api/calcular-medias/pendentes")
+def consultar_medias_pendentes(
+    ano: Optional[int] = Query(None, description="Ano letivo"),
+    bimestre: Optional[int] = Query(None, description="Bimestre"),
+    turma_id: Optional[str] = Query(None, description="ID da turma"),
+    disciplina_id: Optional[str] = Query(None, description="ID da disciplina")
+):
+    """Retorna quantas notas do escopo aguardam recálculo da média"""
+    exigir_migracao("0013", "Contagem de médias pendentes")
+    escopo = {"id_escola": escola_atual(), "ano": ano, "bimestre": bimestre,
+              "id_turma": turma_id, "id_disciplina": disciplina_id}
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        pendentes = contar_pendentes(cursor, escopo)
+        cursor.close()
+        return {
+            "escopo": {chave: valor for chave, valor in escopo.items() if valor is not None},
+            "pendentes": pendentes
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"ERRO ao consultar médias pendentes: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao consultar médias pendentes: {str(e)}"
+        )
+    finally:
+        if conn:
+            conn.close()
+
+def montar_consulta_boletim(ano, turma_id=None, disciplina_id=None, aluno_id=None, id_escola=None):
+    """
+    Monta a consulta do boletim sobre boletim_agregado.
+
+    As linhas vêm ordenadas por aluno (nome e id), de modo que todas as
+    disciplinas de um aluno são consecutivas. Com id_escola, apenas as notas
+    lançadas na escola entram no boletim.
+
+    Returns:
+        tuple: (query, params)
+    """
+    query = """
+        SELECT 
+            b.id_aluno,
+            a.nome_aluno,
+            b.id_disciplina,
+            d.nome_disciplina,
+            b.id_turma,
+            t.serie,
+            b.notas_bimestrais,
+            b.media_anual,
+            b.situacao
+        FROM boletim_agregado b
+        JOIN aluno a ON b.id_aluno = a.id_aluno
+        JOIN disciplina d ON b.id_disciplina = d.id_disciplina
+        LEFT JOIN turma t ON b.id_turma = t.id_turma
+        WHERE b.ano = %s
+    """
+    params = [ano]
+    
+    # Adicionar filtros opcionais
+    if turma_id:
+        query += " AND b.id_turma = %s"
+        params.append(turma_id)
+    
+    if disciplina_id:
+        query += " AND b.id_disciplina = %s"
+        params.append(disciplina_id)
+    
+    if aluno_id:
+        query += " AND b.id_aluno = %s"
+        params.append(aluno_id)
+    
+    if id_escola is not None:
+        query += " AND b.id_escola = %s"
+        params.append(id_escola)
+    
+    query += " ORDER BY a.nome_aluno, b.id_aluno, d.nome_disciplina"
+    return query, params
+
+def agrupar_boletim_por_aluno(linhas):
+    """
+    Agrupa as linhas de montar_consulta_boletim (tuplas, na ordem da consulta)
+    em um boletim por aluno, emitindo cada aluno assim que suas linhas terminam.
+    """
+    atual = None
+    for (id_aluno, nome_aluno, id_disciplina, nome_disciplina, id_turma, serie,
+         notas_bimestrais, media_anual, situacao) in linhas:
+        if atual is None or atual['id_aluno'] != id_aluno:
+            if atual is not None:
+                yield atual
+            atual = {
+                'id_aluno': id_aluno,
+                'nome_aluno': nome_aluno,
+                'id_turma': id_turma,
+                'serie': serie,
+                'disciplinas': []
+            }
+        atual['disciplinas'].append({
+            'id_disciplina': id_disciplina,
+            'nome_disciplina': nome_disciplina,
+            'notas_bimestrais': notas_bimestrais,
+            'media_anual': media_anual,
+            'situacao': situacao
+        })
+    if atual is not None:
+        yield atual
 
 # Endpoint para gerar boletim de médias
 @app.get("/api/boletim-medias")
@@ -5132,153 +5331,266 @@ def gerar_boletim_medias(
     disciplina_id: Optional[str] = Query(None, description="ID da disciplina (opcional)"),
     aluno_id: Optional[str] = Query(None, description="ID do aluno (opcional)")
 ):
-    """Gera boletim com médias bimestrais e situação final dos alunos"""
+    """
+    Gera boletim com médias bimestrais e situação final dos alunos.
+
+    Lê a tabela boletim_agregado, mantida pelo banco a cada gravação de nota
+    (ver boletim_agregado.py); médias anuais e situações já vêm calculadas.
+    Para a escola inteira, prefira /api/boletim-medias/stream.
+    """
+    conn = None
     try:
-        # Query base para buscar notas com informações completas
-        base_query = """
-            SELECT 
-                n.id_aluno,
-                a.nome_aluno,
-                n.id_disciplina,
-                d.nome_disciplina,
-                n.id_turma,
-                t.serie,
-                n.bimestre,
-                n.nota_mensal,
-                n.nota_bimestral,
-                n.recuperacao,
-                n.frequencia,
-                n.media,
-                n.ano
-            FROM nota n
-            JOIN aluno a ON n.id_aluno = a.id_aluno
-            JOIN disciplina d ON n.id_disciplina = d.id_disciplina
-            JOIN turma t ON n.id_turma = t.id_turma
-            WHERE n.ano = %s
-        """
+        query, params = montar_consulta_boletim(ano, turma_id, disciplina_id, aluno_id, escola_atual())
         
-        params = [ano]
-        
-        # Adicionar filtros opcionais
-        if turma_id:
-            base_query += " AND n.id_turma = %s"
-            params.append(turma_id)
-        
-        if disciplina_id:
-            base_query += " AND n.id_disciplina = %s"
-            params.append(disciplina_id)
-        
-        if aluno_id:
-            base_query += " AND n.id_aluno = %s"
-            params.append(aluno_id)
-        
-        base_query += " ORDER BY a.nome_aluno, d.nome_disciplina, n.bimestre"
-        
-        notas = execute_query(base_query, params)
-        
-        # Organizar dados por aluno e disciplina
-        boletim = {}
-        
-        for nota in notas:
-            aluno_id = nota['id_aluno']
-            disciplina_id = nota['id_disciplina']
-            
-            # Inicializar estrutura do aluno se não existir
-            if aluno_id not in boletim:
-                boletim[aluno_id] = {
-                    'id_aluno': aluno_id,
-                    'nome_aluno': nota['nome_aluno'],
-                    'id_turma': nota['id_turma'],
-                    'serie': nota['serie'],
-                    'disciplinas': {}
-                }
-            
-            # Inicializar disciplina se não existir
-            if disciplina_id not in boletim[aluno_id]['disciplinas']:
-                boletim[aluno_id]['disciplinas'][disciplina_id] = {
-                    'id_disciplina': disciplina_id,
-                    'nome_disciplina': nota['nome_disciplina'],
-                    'notas_bimestrais': {},
-                    'media_anual': 0,
-                    'situacao': 'Sem notas'
-                }
-            
-            # Adicionar nota do bimestre
-            bimestre = nota['bimestre']
-            boletim[aluno_id]['disciplinas'][disciplina_id]['notas_bimestrais'][bimestre] = {
-                'nota_mensal': nota['nota_mensal'],
-                'nota_bimestral': nota['nota_bimestral'],
-                'recuperacao': nota['recuperacao'],
-                'frequencia': nota['frequencia'],
-                'media_bimestral': nota['media']
-            }
-        
-        # Calcular médias anuais e situações
-        for aluno_id in boletim:
-            for disciplina_id in boletim[aluno_id]['disciplinas']:
-                disciplina = boletim[aluno_id]['disciplinas'][disciplina_id]
-                notas_bimestrais = disciplina['notas_bimestrais']
-                
-                # Calcular média anual (soma das médias bimestrais / 4)
-                medias_validas = []
-                for bim in range(1, 5):  # Bimestres 1 a 4
-                    if bim in notas_bimestrais and notas_bimestrais[bim]['media_bimestral'] is not None:
-                        medias_validas.append(float(notas_bimestrais[bim]['media_bimestral']))
-                
-                if medias_validas:
-                    # Se tem menos de 4 bimestres, calcular com os disponíveis
-                    if len(medias_validas) == 4:
-                        media_anual = sum(medias_validas) / 4
-                    else:
-                        # Estimar média anual com base nos bimestres disponíveis
-                        media_anual = sum(medias_validas) / len(medias_validas)
-                    
-                    disciplina['media_anual'] = round(media_anual, 1)
-                    
-                    # Determinar situação
-                    if media_anual >= 6.0:
-                        disciplina['situacao'] = 'Aprovado'
-                    elif media_anual >= 4.0:
-                        disciplina['situacao'] = 'Recuperação Final'
-                    else:
-                        disciplina['situacao'] = 'Reprovado'
-                else:
-                    disciplina['media_anual'] = 0
-                    disciplina['situacao'] = 'Sem notas'
-        
-        # Converter para lista para facilitar o uso no frontend
-        resultado = []
-        for aluno_id, dados_aluno in boletim.items():
-            disciplinas_lista = []
-            for disciplina_id, dados_disciplina in dados_aluno['disciplinas'].items():
-                disciplinas_lista.append(dados_disciplina)
-            
-            dados_aluno['disciplinas'] = disciplinas_lista
-            resultado.append(dados_aluno)
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        resultado = list(agrupar_boletim_por_aluno(cursor.fetchall()))
+        cursor.close()
         
-        return {
+        return resposta_json({
             'ano': ano,
             'total_alunos': len(resultado),
             'boletim': resultado
-        }
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"ERRO ao gerar boletim: {str(e)}")
+        logger.exception(f"ERRO ao gerar boletim: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao gerar boletim: {str(e)}"
         )
+    finally:
+        if conn:
+            conn.close()
+
+# Linhas buscadas por vez pelo cursor do servidor no boletim em streaming
+BOLETIM_STREAM_ITERSIZE = 2000
+
+class RespostaStreamingComConexao(StreamingResponse):
+    """
+    StreamingResponse que devolve a conexão dedicada ao pool quando a resposta
+    termina, de qualquer forma: o gerador só chega ao seu finally se for
+    consumido até o fim, e um cliente que desconecta no meio do envio deixaria
+    a conexão (com a transação do cursor no servidor) presa até o coletor de lixo.
+    """
+
+    def __init__(self, conteudo, conn, **kwargs):
+        super().__init__(conteudo, **kwargs)
+        self.conn = conn
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # close() é idempotente: não faz nada se o gerador já fechou a conexão
+            with anyio.CancelScope(shield=True):
+                await run_in_threadpool(self.conn.close)
+
+@app.get("/api/boletim-medias/stream")
+def gerar_boletim_medias_stream(
+    ano: int = Query(..., description="Ano letivo"),
+    turma_id: Optional[str] = Query(None, description="ID da turma (opcional)"),
+    disciplina_id: Optional[str] = Query(None, description="ID da disciplina (opcional)"),
+    aluno_id: Optional[str] = Query(None, description="ID do aluno (opcional)"),
+    formato: str = Query("ndjson", pattern="^(ndjson|json)$",
+                         description="ndjson (um aluno por linha) ou json (mesmo formato de /api/boletim-medias)")
+):
+    """
+    Gera o boletim em streaming, um aluno por vez.
+
+    As notas são lidas com um cursor no servidor e cada aluno é enviado assim
+    que todas as suas disciplinas foram lidas, então a memória usada não cresce
+    com o tamanho da escola.
+    """
+    query, params = montar_consulta_boletim(ano, turma_id, disciplina_id, aluno_id, escola_atual())
+
+    # Conexão própria: o empréstimo da requisição é devolvido antes do fim do streaming
+    conn = get_db_connection_dedicada()
+
+    def gerar():
+        total = 0
+        try:
+            # Cursores no servidor exigem uma transação aberta
+            conn.autocommit = False
+            cursor = conn.cursor(name="boletim_stream")
+            cursor.itersize = BOLETIM_STREAM_ITERSIZE
+            cursor.execute(query, params)
+
+            if formato == "json":
+                yield f'{{"ano": {ano}, "boletim": ['
+            for aluno in agrupar_boletim_por_aluno(cursor):
+                dados = json_dumps_rapido(aluno)
+                if formato == "json":
+                    yield dados if total == 0 else b"," + dados
+                else:
+                    yield dados + b"\n"
+                total += 1
+            if formato == "json":
+                yield f'], "total_alunos": {total}}}'
+
+            cursor.close()
+            conn.commit()
+            logger.info(f"Boletim em streaming do ano {ano}: {total} alunos enviados")
+        except Exception as e:
+            logger.exception(f"ERRO ao gerar boletim em streaming após {total} alunos: {str(e)}")
+            raise
+        finally:
+            conn.close()
+
+    media_type = "application/json" if formato == "json" else "application/x-ndjson"
+    return RespostaStreamingComConexao(gerar(), conn, media_type=media_type)
+
+# ==============================================================
+# BOLETIM EM PDF
+# ==============================================================
+
+# Arquivos já gerados, pela hash do conteúdo das notas
+boletim_pdf_cache = boletim_pdf.CacheArquivos()
+# Gerações em segundo plano (escola inteira)
+boletim_pdf_tarefas = boletim_pdf.TarefasBoletim()
+
+@app.on_event("shutdown")
+def encerrar_geracao_boletins():
+    boletim_pdf_tarefas.encerrar()
+    boletim_pdf.encerrar_pool()
+
+def carregar_boletim_alunos(ano, turma_id=None, disciplina_id=None, aluno_id=None, id_escola=None):
+    """Retorna a lista de alunos do boletim (mesmo conteúdo de /api/boletim-medias)."""
+    query, params = montar_consulta_boletim(ano, turma_id, disciplina_id, aluno_id, id_escola)
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        alunos = list(agrupar_boletim_por_aluno(cursor.fetchall()))
+        cursor.close()
+        return alunos
+    finally:
+        conn.close()
+
+def gerar_boletim_pdf(alunos, ano, formato, progresso=None):
+    """
+    Gera (ou busca no cache) o arquivo de boletins.
+
+    Returns:
+        tuple: (conteudo, veio_do_cache)
+    """
+    chave = boletim_pdf.chave_conteudo(alunos, ano, formato)
+    conteudo = boletim_pdf_cache.obter(chave)
+    if conteudo is not None:
+        if progresso is not None:
+            progresso(len(alunos), len(alunos))
+        return conteudo, True
+
+    inicio = time.monotonic()
+    conteudo = boletim_pdf.gerar_arquivo(alunos, ano, formato=formato, progresso=progresso)
+    boletim_pdf_cache.guardar(chave, conteudo)
+    logger.info(f"Boletim {formato} de {len(alunos)} alunos gerado em {time.monotonic() - inicio:.2f}s")
+    return conteudo, False
+
+def resposta_arquivo_boletim(conteudo, ano, formato, cache=None):
+    media_type = "application/zip" if formato == "zip" else "application/pdf"
+    headers = {"Content-Disposition": f'attachment; filename="boletim_{ano}.{formato}"'}
+    if cache is not None:
+        headers["X-Cache"] = "HIT" if cache else "MISS"
+    return Response(content=conteudo, media_type=media_type, headers=headers)
+
+@app.get("/api/boletim-medias/pdf")
+def baixar_boletim_pdf(
+    ano: int = Query(..., description="Ano letivo"),
+    turma_id: Optional[str] = Query(None, description="ID da turma (opcional)"),
+    disciplina_id: Optional[str] = Query(None, description="ID da disciplina (opcional)"),
+    aluno_id: Optional[str] = Query(None, description="ID do aluno (opcional)"),
+    formato: str = Query("pdf", pattern="^(pdf|zip)$",
+                         description="pdf (um arquivo com todos os alunos) ou zip (um PDF por aluno)")
+):
+    """
+    Gera o boletim em PDF de um aluno, de uma turma ou da escola.
+    Para a escola inteira, prefira POST /api/boletim-medias/pdf/tarefas.
+    """
+    try:
+        alunos = carregar_boletim_alunos(ano, turma_id, disciplina_id, aluno_id, escola_atual())
+        if not alunos:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Nenhum boletim encontrado para os filtros informados"
+            )
+        conteudo, cache = gerar_boletim_pdf(alunos, ano, formato)
+        return resposta_arquivo_boletim(conteudo, ano, formato, cache)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"ERRO ao gerar boletim em PDF: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao gerar boletim em PDF: {str(e)}"
+        )
+
+@app.post("/api/boletim-medias/pdf/tarefas", status_code=status.HTTP_202_ACCEPTED)
+def criar_tarefa_boletim_pdf(
+    ano: int = Query(..., description="Ano letivo"),
+    turma_id: Optional[str] = Query(None, description="ID da turma (opcional)"),
+    disciplina_id: Optional[str] = Query(None, description="ID da disciplina (opcional)"),
+    aluno_id: Optional[str] = Query(None, description="ID do aluno (opcional)"),
+    formato: str = Query("pdf", pattern="^(pdf|zip)$",
+                         description="pdf (um arquivo com todos os alunos) ou zip (um PDF por aluno)")
+):
+    """
+    Agenda a geração do boletim em segundo plano.
+    Acompanhe pelo id retornado em GET /api/boletim-medias/pdf/tarefas/{id_tarefa}.
+    """
+    # A tarefa roda fora da requisição: a escola é lida aqui
+    id_escola = escola_atual()
+
+    def executar(progresso):
+        alunos = carregar_boletim_alunos(ano, turma_id, disciplina_id, aluno_id, id_escola)
+        progresso(0, len(alunos))
+        conteudo, _ = gerar_boletim_pdf(alunos, ano, formato, progresso)
+        return conteudo
+
+    descricao = {"ano": ano, "turma_id": turma_id, "disciplina_id": disciplina_id,
+                 "aluno_id": aluno_id, "id_escola": id_escola, "formato": formato}
+    id_tarefa = boletim_pdf_tarefas.iniciar(executar, descricao)
+    return boletim_pdf_tarefas.status(id_tarefa)
+
+@app.get("/api/boletim-medias/pdf/tarefas/{id_tarefa}")
+def consultar_tarefa_boletim_pdf(id_tarefa: str):
+    """Retorna o estado e o progresso de uma geração de boletim"""
+    tarefa = boletim_pdf_tarefas.status(id_tarefa)
+    if tarefa is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tarefa não encontrada")
+    return tarefa
+
+@app.get("/api/boletim-medias/pdf/tarefas/{id_tarefa}/arquivo")
+def baixar_tarefa_boletim_pdf(id_tarefa: str):
+    """Baixa o arquivo gerado por uma tarefa concluída"""
+    tarefa = boletim_pdf_tarefas.status(id_tarefa)
+    if tarefa is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tarefa não encontrada")
+    if tarefa["estado"] != "concluida":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Tarefa ainda não concluída (estado: {tarefa['estado']})"
+        )
+    conteudo = boletim_pdf_tarefas.arquivo(id_tarefa)
+    return resposta_arquivo_boletim(conteudo, tarefa["descricao"]["ano"], tarefa["descricao"]["formato"])
 
 # ==============================================================
 # ENDPOINTS PARA ESCOLAS
 # ==============================================================
 
 @app.get("/api/escolas/", response_model=List[Escola])
-def read_escolas():
+def read_escolas(
+    response: Response,
+    limit: Optional[int] = parametro_limit(),
+    cursor: Optional[str] = parametro_cursor()
+):
     """
-    Lista todas as escolas cadastradas.
+    Lista todas as escolas cadastradas (paginação opcional por limit/cursor).
     """
-    print("=== INICIANDO BUSCA DE ESCOLAS ===")
+    logger.debug("INICIANDO BUSCA DE ESCOLAS")
     try:
         query = """
             SELECT id_escola, codigo_inep, cnpj, razao_social, nome_fantasia, logo,
@@ -5288,19 +5600,21 @@ def read_escolas():
                    gestor_nome, gestor_cpf, gestor_email,
                    ativo, data_cadastro, data_atualizacao
             FROM escolas
-            ORDER BY razao_social
         """
+        query, params = paginar_consulta(ORDEM_ESCOLAS, query, [], limit, cursor)
         
-        print(f"Executando query: {query}")
-        escolas = execute_query(query)
-        print(f"Resultado da query: {escolas}")
-        print(f"Tipo do resultado: {type(escolas)}")
-        print(f"Número de escolas encontradas: {len(escolas) if escolas else 0}")
+        logger.debug("Executando query: %s", query)
+        escolas = execute_query(query, params)
+        logger.debug("Resultado da query: %s", escolas)
+        logger.debug("Número de escolas encontradas: %s", len(escolas) if escolas else 0)
         
         if not escolas:
-            print("Nenhuma escola encontrada, retornando lista vazia")
+            logger.debug("Nenhuma escola encontrada, retornando lista vazia")
             return []
         
+        escolas, proximo_cursor = ORDEM_ESCOLAS.pagina(escolas, limit)
+        definir_proximo_cursor(response, proximo_cursor)
+        
         resultado = [
             {
                 "id_escola": escola["id_escola"],
@@ -5333,14 +5647,14 @@ def read_escolas():
             for escola in escolas
         ]
         
-        print(f"Resultado formatado: {resultado}")
-        print(f"Retornando {len(resultado)} escolas")
-        print("=== FINALIZANDO BUSCA DE ESCOLAS ===")
+        logger.debug("Resultado formatado: %s", resultado)
+        logger.debug("Retornando %s escolas", len(resultado))
         return resultado
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"ERRO ao buscar escolas: {e}")
-        print(f"Stack trace: {str(e)}")
+        logger.exception(f"ERRO ao buscar escolas: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao buscar escolas: {str(e)}"
@@ -5403,7 +5717,7 @@ def read_escola(escola_id: int = Path(..., description="ID da escola")):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Erro ao buscar escola: {e}")
+        logger.exception(f"Erro ao buscar escola: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao buscar escola: {str(e)}"
@@ -5486,7 +5800,7 @@ def create_escola(escola: EscolaCreate):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Erro ao criar escola: {e}")
+        logger.exception(f"Erro ao criar escola: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao criar escola: {str(e)}"
@@ -5652,7 +5966,7 @@ def update_escola(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Erro ao atualizar escola: {e}")
+        logger.exception(f"Erro ao atualizar escola: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao atualizar escola: {str(e)}"
@@ -5683,7 +5997,7 @@ def delete_escola(escola_id: int = Path(..., description="ID da escola")):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Erro ao excluir escola: {e}")
+        logger.exception(f"Erro ao excluir escola: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao excluir escola: {str(e)}"
@@ -5755,7 +6069,7 @@ def toggle_escola_status(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Erro ao alterar status da escola: {e}")
+        logger.exception(f"Erro ao alterar status da escola: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao alterar status da escola: {str(e)}"
@@ -5797,8 +6111,9 @@ def read_escolas_filtro(
             params.append(f"%{codigo_inep}%")
         
         if cidade:
-            base_query += " AND cidade ILIKE %s"
-            params.append(f"%{cidade}%")
+            # Sem diferenciar acentos: "sao luis" encontra "São Luís" (ver busca.py)
+            base_query += " AND busca_normalizar(cidade) LIKE busca_normalizar(%s)"
+            params.append(f"%{escapar_like(cidade)}%")
         
         if uf:
             base_query += " AND uf ILIKE %s"
@@ -5856,83 +6171,106 @@ def read_escolas_filtro(
         ]
         
     except Exception as e:
-        print(f"Erro ao buscar escolas com filtro: {e}")
+        logger.exception(f"Erro ao buscar escolas com filtro: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao buscar escolas com filtro: {str(e)}"
         )
 
-# Inicialização do servidor (quando executado diretamente)
-if __name__ == "__main__":
-    uvicorn.run("simplified_api:app", host="0.0.0.0", port=8000, reload=True) 
+# ===== BUSCA POR NOME (ver busca.py) =====
 
-@app.post("/api/schema/adicionar_frequencia", status_code=status.HTTP_200_OK)
-def adicionar_campo_frequencia():
-    """
-    Adiciona o campo 'frequencia' à tabela 'nota' caso ainda não exista.
-    Endpoint melhorado para maior robustez.
-    """
+def executar_busca(alvo, q, limit, filtros=None):
+    """Busca ranqueada por nome, sem diferenciar acentos e maiúsculas."""
+    exigir_migracao("0011", "Busca por nome")
+    conn = None
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Verificar se o campo já existe
-        cursor.execute("""
-            SELECT COUNT(*) 
-            FROM information_schema.columns 
-            WHERE table_name = 'nota' AND column_name = 'frequencia'
-        """)
-        campo_existe = cursor.fetchone()[0] > 0
-        
-        if not campo_existe:
-            print("🔧 Campo 'frequencia' não encontrado. Adicionando...")
-            
-            # Adicionar o campo frequencia com IF NOT EXISTS para segurança extra
-            cursor.execute("""
-                ALTER TABLE nota 
-                ADD COLUMN IF NOT EXISTS frequencia INTEGER DEFAULT 0
-            """)
-            print("✅ Campo 'frequencia' adicionado à tabela 'nota' com sucesso!")
-            
-            # Atualizar registros existentes para ter valor padrão 0
-            cursor.execute("""
-                UPDATE nota 
-                SET frequencia = 0 
-                WHERE frequencia IS NULL
-            """)
-            print("🔄 Registros existentes atualizados com frequencia = 0")
-            
-            conn.commit()
-            
-            return {
-                "status": "success",
-                "message": "Campo 'frequencia' adicionado com sucesso à tabela 'nota'",
-                "details": {
-                    "campo_criado": True,
-                    "registros_atualizados": True
-                }
-            }
-        else:
-            print("ℹ️ Campo 'frequencia' já existe na tabela 'nota'")
-            return {
-                "status": "info", 
-                "message": "Campo 'frequencia' já existe na tabela 'nota'",
-                "details": {
-                    "campo_criado": False,
-                    "registros_atualizados": False
-                }
-            }
-            
+        return buscar(conn, alvo, q, limit, filtros)
+    except HTTPException:
+        raise
     except Exception as e:
-        if conn:
-            conn.rollback()
-        print(f"❌ Erro ao adicionar campo 'frequencia': {str(e)}")
+        logger.exception(f"Erro na busca de {alvo}: {e}")
         raise HTTPException(
-            status_code=500,
-            detail=f"Erro ao adicionar campo frequencia: {str(e)}"
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro na busca de {alvo}: {str(e)}"
         )
     finally:
-        if cursor:
-            cursor.close()
         if conn:
             conn.close()
+
+@app.get("/api/busca/alunos")
+def buscar_alunos(
+    q: str = Query(..., min_length=1, max_length=100, description="Nome ou parte do nome"),
+    limit: int = Query(LIMITE_PADRAO_BUSCA, ge=1, le=LIMITE_MAXIMO_BUSCA),
+    id_turma: Optional[str] = Query(None, description="Restringe à turma")
+):
+    """Alunos cujo nome começa com o termo, contém suas palavras ou se parece com ele."""
+    return executar_busca("alunos", q, limit, {"id_turma": id_turma, "id_escola": escola_atual()})
+
+@app.get("/api/busca/professores")
+def buscar_professores(
+    q: str = Query(..., min_length=1, max_length=100, description="Nome ou parte do nome"),
+    limit: int = Query(LIMITE_PADRAO_BUSCA, ge=1, le=LIMITE_MAXIMO_BUSCA),
+    ativo: Optional[bool] = Query(None, description="Filtrar por status ativo (true/false)")
+):
+    """Professores cujo nome começa com o termo, contém suas palavras ou se parece com ele."""
+    return executar_busca("professores", q, limit, {"ativo": ativo})
+
+@app.get("/api/busca/escolas")
+def buscar_escolas(
+    q: str = Query(..., min_length=1, max_length=100, description="Nome fantasia, razão social ou cidade"),
+    limit: int = Query(LIMITE_PADRAO_BUSCA, ge=1, le=LIMITE_MAXIMO_BUSCA),
+    ativo: Optional[bool] = Query(None, description="Filtrar por status ativo (true/false)"),
+    uf: Optional[str] = Query(None, description="Filtrar por UF")
+):
+    """Escolas por nome fantasia, razão social e cidade."""
+    return executar_busca("escolas", q, limit, {"ativo": ativo, "uf": uf.upper() if uf else None})
+
+@app.get("/api/autocompletar/{tipo}")
+def autocompletar_nomes(
+    tipo: str = Path(..., pattern=f"^({'|'.join(TIPOS_AUTOCOMPLETAR)})$", description="alunos, professores ou disciplinas"),
+    q: str = Query(..., min_length=1, max_length=100, description="Início do nome ou de uma de suas palavras"),
+    id_turma: Optional[str] = Query(None, description="Restringe à turma"),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """
+    Sugestões de nomes para a digitação, do índice em memória (sem ida ao banco).
+
+    Retorna [{"id", "nome"}] em ordem alfabética. Com X-Escola-ID, alunos e
+    professores são apenas os das turmas da escola. Se as turmas pedidas ficaram
+    fora do limite de memória do índice, os alunos vêm da busca no banco.
+    """
+    try:
+        escola = escola_atual()
+        sugestoes = indice_autocompletar.buscar(tipo, q, id_turma, limit, escola)
+        if sugestoes is None:
+            sugestoes = [
+                {"id": aluno["id_aluno"], "nome": aluno["nome_aluno"]}
+                for aluno in executar_busca("alunos", q, limit, {"id_turma": id_turma, "id_escola": escola})
+            ]
+        return resposta_json(sugestoes)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Erro no autocompletar de {tipo}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro no autocompletar de {tipo}: {str(e)}"
+        )
+
+# Inicialização do servidor (quando executado diretamente)
+if __name__ == "__main__":
+    uvicorn.run("simplified_api:app", host="0.0.0.0", port=8000, reload=True) 
+
+@app.post("/api/schema/adicionar_frequencia", status_code=status.HTTP_200_OK)
+def adicionar_campo_frequencia():
+    """Confirma o campo 'frequencia' da tabela 'nota' (adicionado pela migração 0003)."""
+    exigir_migracao("0003", "Campo 'frequencia' da tabela 'nota'")
+    return {
+        "status": "info",
+        "message": "Campo 'frequencia' já existe na tabela 'nota'",
+        "details": {
+            "campo_criado": False,
+            "registros_atualizados": False
+        }
+    }
@@ -0,0 +1,9 @@
+"""
+Configuração comum dos testes (python -m pytest, a partir de backend/).
+Os módulos do backend são importados pelo nome (from db_pool import ...),
+como fazem simplified_api.py e os scripts.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
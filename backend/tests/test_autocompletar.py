@@ -0,0 +1,53 @@
+"""
+Índice de autocompletar (autocompletar.py) sem banco: as linhas de cada tipo
+são devolvidas por uma conexão simulada.
+"""
+from autocompletar import IndiceAutocompletar
+
+LINHAS = {
+    "FROM aluno": [("A1", "Ana Souza", "1A", 1), ("A2", "Antônio Lima", "1A", 1), ("B1", "Ana Beatriz", "9Z", 2)],
+    "FROM professor": [("P1", "Paula Ramos", "1A", 1), ("P2", "Pedro Alves", "9Z", 2), ("P3", "Patrícia Sem Turma", None, None)],
+    "FROM disciplina": [("MAT", "Matemática", "1A", None), ("MUS", "Música", None, None)],
+}
+
+
+class _Conexao:
+    def cursor(self):
+        return self
+
+    def execute(self, sql):
+        self.sql = sql
+
+    def fetchall(self):
+        return next(linhas for trecho, linhas in LINHAS.items() if trecho in self.sql)
+
+    def close(self):
+        pass
+
+
+def _ids(sugestoes):
+    return [sugestao["id"] for sugestao in sugestoes]
+
+
+def _indice(memoria_mb=None):
+    return IndiceAutocompletar(_Conexao, lambda tabelas: (1,) * len(tabelas), memoria_mb)
+
+
+def test_escola_restringe_alunos_e_professores():
+    indice = _indice()
+    assert _ids(indice.buscar("alunos", "an")) == ["B1", "A1", "A2"]
+    assert _ids(indice.buscar("alunos", "an", id_escola=1)) == ["A1", "A2"]
+    assert _ids(indice.buscar("alunos", "an", id_escola=2)) == ["B1"]
+    assert _ids(indice.buscar("professores", "p", id_escola=2)) == ["P2"]
+    assert indice.buscar("alunos", "an", id_escola=3) == []
+    # Turma de outra escola
+    assert indice.buscar("alunos", "an", id_turma="1A", id_escola=2) == []
+    assert _ids(indice.buscar("alunos", "an", id_turma="9Z", id_escola=2)) == ["B1"]
+
+
+def test_disciplinas_ignoram_a_escola():
+    assert _ids(_indice().buscar("disciplinas", "m", id_escola=2)) == ["MAT", "MUS"]
+
+
+def test_escola_fora_da_memoria_consulta_o_banco():
+    assert _indice(memoria_mb=0.000001).buscar("alunos", "an", id_escola=1) is None
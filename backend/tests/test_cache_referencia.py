@@ -0,0 +1,92 @@
+"""
+Cache de referência (cache_referencia.py) sem banco: as tabelas e o contador
+de versões ficam em um dicionário, alterado como faria outro worker.
+"""
+import pytest
+
+from cache_referencia import CacheReferencia, CONSULTAS
+
+
+class BancoFalso:
+    def __init__(self):
+        self.tabelas = {tabela: [] for tabela in CONSULTAS}
+        self.versoes = {tabela: 0 for tabela in CONSULTAS}
+        self.verificacoes = 0
+
+    def inserir(self, tabela, linha):
+        self.tabelas[tabela].append(linha)
+        self.versoes[tabela] += 1
+
+
+class _Cursor:
+    def __init__(self, conexao, dicionario):
+        self.connection = conexao
+        self.dicionario = dicionario
+        self.linhas = []
+
+    def execute(self, query, params=None):
+        banco = self.connection.banco
+        if "to_regclass" in query:
+            self.linhas = [(True,)]
+        elif "FROM versao_referencia" in query:
+            banco.verificacoes += 1
+            self.linhas = list(banco.versoes.items())
+        else:
+            tabela = next(tabela for tabela, consulta in CONSULTAS.items() if consulta == query)
+            linhas = banco.tabelas[tabela]
+            self.linhas = [dict(linha) for linha in linhas] if self.dicionario else [tuple(linha.values()) for linha in linhas]
+
+    def fetchone(self):
+        return self.linhas[0]
+
+    def fetchall(self):
+        return self.linhas
+
+    def close(self):
+        pass
+
+
+class _Conexao:
+    def __init__(self, banco):
+        self.banco = banco
+
+    def cursor(self, cursor_factory=None):
+        return _Cursor(self, cursor_factory is not None)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def banco():
+    banco = BancoFalso()
+    banco.inserir("turma", {"id": 1, "id_turma": "1A", "serie": "1", "turno": "manha",
+                            "tipo_turma": None, "coordenador": None, "id_escola": 1})
+    return banco
+
+
+def test_id_ausente_verifica_a_versao_antes_de_negar(banco):
+    cache = CacheReferencia(lambda: _Conexao(banco), intervalo=60)
+    assert cache.turma_existe("1A")
+
+    # Outro worker cria a turma dentro do intervalo de verificação
+    banco.inserir("turma", {"id": 2, "id_turma": "2A", "serie": "2", "turno": "tarde",
+                            "tipo_turma": None, "coordenador": None, "id_escola": 1})
+    assert cache.turma_existe("2A")
+    assert cache.turma("2A")["serie"] == "2"
+
+
+def test_id_presente_nao_consulta_o_banco(banco):
+    cache = CacheReferencia(lambda: _Conexao(banco), intervalo=60)
+    cache.turma_existe("1A")
+    verificacoes = banco.verificacoes
+
+    assert cache.turma_existe("1A")
+    assert cache.turma_por_id(1)["id_turma"] == "1A"
+    assert banco.verificacoes == verificacoes
+
+    # Um id realmente inexistente custa uma verificação, e nenhuma recarga
+    recargas = cache.stats["recargas"]
+    assert not cache.turma_existe("9Z")
+    assert banco.verificacoes == verificacoes + 1
+    assert cache.stats["recargas"] == recargas
@@ -0,0 +1,134 @@
+"""
+Pool de conexões (db_pool.py) sem banco: as conexões psycopg2 são simuladas.
+"""
+import time
+import asyncio
+import threading
+
+import httpx
+import pytest
+import psycopg2.extensions
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+
+import db_pool
+from db_pool import ConnectionPool
+
+
+class _Info:
+    transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+
+class _Cursor:
+    def execute(self, query, params=None):
+        time.sleep(0.005)  # ida ao banco
+
+    def fetchall(self):
+        return [{"id": 1}]
+
+    def close(self):
+        pass
+
+
+class ConexaoFalsa:
+    def __init__(self, **params):
+        self.closed = 0
+        self.autocommit = False
+        self.info = _Info()
+
+    def cursor(self, *args, **kwargs):
+        return _Cursor()
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(db_pool.psycopg2, "connect", lambda **params: ConexaoFalsa(**params))
+    return ConnectionPool({}, maxconn=3, timeout=5)
+
+
+def test_chamadas_aninhadas_usam_a_mesma_conexao(pool):
+    with pool.conexao_requisicao():
+        externa = pool.getconn()
+        interna = pool.getconn()
+        assert interna._conexao() is externa._conexao()
+        interna.close()
+        assert pool.status()["em_uso"] == 1
+        externa.close()
+        # Último proxy fechado: a conexão volta ao pool antes do fim do bloco
+        assert pool.status()["em_uso"] == 0
+        pool.getconn().close()
+    assert pool.status()["em_uso"] == 0
+    assert pool.status()["criadas"] == 1
+
+
+def test_transacao_aberta_fica_com_a_requisicao(pool):
+    with pool.conexao_requisicao():
+        conn = pool.getconn()
+        conn._conexao().info = type("Info", (), {"transaction_status": psycopg2.extensions.TRANSACTION_STATUS_INTRANS})()
+        conn.close()
+        assert pool.status()["em_uso"] == 1
+    assert pool.status()["em_uso"] == 0
+
+
+def test_proxy_nao_fechado_volta_no_fim_da_requisicao(pool):
+    with pool.conexao_requisicao():
+        pool.getconn()
+    assert pool.status()["em_uso"] == 0
+
+
+def test_mais_requisicoes_que_threads_do_threadpool(pool):
+    """
+    Muito mais requisições simultâneas que conexões e que threads do
+    threadpool (40): o endpoint, a validação da resposta e o middleware de
+    ETag usam threads; nenhuma requisição pode ficar esperando o pool.
+    """
+    app = FastAPI()
+
+    class Item(BaseModel):
+        id: int
+
+    def consultar():
+        conn = pool.getconn()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            return cursor.fetchall()
+        finally:
+            conn.close()
+
+    @app.middleware("http")
+    async def etag(request: Request, call_next):
+        await run_in_threadpool(consultar)
+        return await call_next(request)
+
+    @app.middleware("http")
+    async def conexao_por_requisicao(request: Request, call_next):
+        with pool.conexao_requisicao():
+            return await call_next(request)
+
+    @app.get("/itens", response_model=list[Item])
+    def listar():
+        return consultar() + consultar()
+
+    async def disparar(quantidade):
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://teste") as cliente:
+            respostas = await asyncio.gather(*[cliente.get("/itens") for _ in range(quantidade)])
+        return [resposta.status_code for resposta in respostas]
+
+    inicio = time.monotonic()
+    codigos = asyncio.run(disparar(120))
+    duracao = time.monotonic() - inicio
+
+    assert codigos == [200] * 120
+    assert pool.stats["timeouts"] == 0
+    assert pool.status()["em_uso"] == 0
+    assert duracao < pool.timeout
+    assert threading.active_count() < 100
@@ -0,0 +1,28 @@
+"""
+Métricas (metricas.py) sem banco nem servidor: as consultas são registradas
+diretamente, como faria o observador de medicao_db.
+"""
+from metricas import Metricas
+
+
+def _series(metricas, nome):
+    return {linha.split(" ")[0] for linha in metricas.texto().splitlines() if linha.startswith(nome + "{")}
+
+
+def test_forma_exposta_continua_exposta_fora_das_mais_custosas():
+    metricas = Metricas(top_consultas=2)
+    metricas.registrar_consulta("SELECT * FROM turma", 0.010)
+    metricas.registrar_consulta("SELECT * FROM aluno", 0.020)
+    primeira = _series(metricas, "gestao_db_consulta_execucoes_total")
+    assert len(primeira) == 2
+
+    # Duas formas mais custosas tiram as anteriores do topo
+    metricas.registrar_consulta("SELECT * FROM nota", 0.500)
+    metricas.registrar_consulta("SELECT * FROM disciplina", 0.400)
+    segunda = _series(metricas, "gestao_db_consulta_execucoes_total")
+    assert primeira < segunda
+    assert len(segunda) == 4
+
+    # Uma forma que nunca chegou ao topo não é exposta
+    metricas.registrar_consulta("SELECT * FROM professor", 0.001)
+    assert _series(metricas, "gestao_db_consulta_execucoes_total") == segunda
@@ -0,0 +1,67 @@
+"""
+Cálculo de médias (motor_medias.py): o cálculo vetorizado deve dar exatamente o
+mesmo resultado da API escalar (Decimal, ROUND_HALF_UP) para qualquer nota com
+até 3 casas decimais, inclusive nos empates de arredondamento (.x5).
+"""
+import random
+from decimal import Decimal, ROUND_HALF_UP
+
+import pytest
+
+from motor_medias import calcular_media, gerar_casos
+
+np = pytest.importorskip("numpy")
+
+from motor_medias import calcular_medias_lote  # noqa: E402
+
+
+def _divergencias(casos):
+    vetorizados = calcular_medias_lote(*zip(*casos)).tolist()
+    return [(caso, calcular_media(*caso), vetorizado)
+            for caso, vetorizado in zip(casos, vetorizados)
+            if calcular_media(*caso) != vetorizado]
+
+
+def _media_decimal(mensal, bimestral, recuperacao):
+    # A fórmula escrita de novo, por extenso, só com Decimal
+    notas = [Decimal(str(nota)) for nota in (mensal, bimestral) if nota is not None]
+    base = sum(notas) / len(notas) if notas else Decimal(0)
+    if recuperacao is not None and recuperacao > 0:
+        base = (base + Decimal(str(recuperacao))) / 2
+    return float(base.quantize(Decimal("0.1"), rounding=ROUND_HALF_UP))
+
+
+@pytest.mark.parametrize("semente", [0, 1, 2, 3, 4])
+def test_lote_igual_ao_escalar_em_casos_aleatorios(semente):
+    assert _divergencias(gerar_casos(5000, semente=semente)) == []
+
+
+def test_lote_igual_ao_escalar_nos_empates_de_arredondamento():
+    gerador = random.Random(2024)
+    casos = []
+    for _ in range(5000):
+        # Base terminada em .x5: (m + b) / 2 com m + b terminando em .x
+        decimos = gerador.randint(0, 99)
+        mensal = round(gerador.randint(0, decimos) / 10, 1)
+        bimestral = round(decimos / 10 + 0.1 - mensal, 1) if decimos < 99 else 10.0
+        casos.append((mensal, bimestral, None))
+        # Recuperação que leva a média a .x25, .x5 e .x75
+        casos.append((mensal, bimestral, round(gerador.randint(1, 100) / 10, 1)))
+        # Notas com 2 e 3 casas terminadas em 5
+        casos.append((round(gerador.randint(0, 199) * 0.05, 2), None, None))
+        casos.append((round(gerador.randint(0, 1999) * 0.005, 3),
+                      round(gerador.randint(0, 1999) * 0.005, 3),
+                      round(gerador.randint(0, 1999) * 0.005, 3)))
+    casos += [(6.85, None, None), (6.95, None, None), (0.05, None, None), (9.95, None, None),
+              (6.8, 6.9, None), (6.9, 7.0, 7.0), (5.0, 6.0, 6.5), (0.0, 0.1, None)]
+    assert _divergencias(casos) == []
+
+
+def test_escalar_igual_a_formula_em_decimal():
+    for caso in gerar_casos(2000, semente=7):
+        assert calcular_media(*caso) == _media_decimal(*caso), caso
+
+
+def test_nan_e_none_sao_nota_ausente():
+    assert calcular_medias_lote([float("nan"), None], [8.0, 8.0], [None, float("nan")]).tolist() == [8.0, 8.0]
+    assert calcular_media(None, 8.0, None) == 8.0
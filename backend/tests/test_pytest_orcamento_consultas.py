@@ -0,0 +1,97 @@
+"""
+Plugin pytest_orcamento_consultas.py: testes de uma aplicação com o
+OrcamentoConsultasMiddleware falham quando uma requisição estoura o orçamento
+ou repete a mesma consulta (N+1). Os testes rodam em um pytest interno
+(pytester); as consultas são informadas ao middleware como faria o observador
+de medicao_db, sem banco.
+"""
+# O pytest interno roda neste processo e descarta os módulos que importar:
+# FastAPI (e o pydantic_core, que não pode ser carregado duas vezes) é
+# importado aqui para continuar carregado entre os testes.
+import fastapi.testclient  # noqa: F401
+
+pytest_plugins = ["pytester"]
+
+APP = """
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from orcamento_consultas import OrcamentoConsultasMiddleware, registrar_consulta
+
+app = FastAPI()
+app.add_middleware(OrcamentoConsultasMiddleware, orcamento=1000, repeticoes=1000)
+
+
+@app.get("/turmas")
+def turmas():
+    # Uma consulta para a lista e uma por turma: N+1
+    registrar_consulta("SELECT id_turma FROM turma", 0.001)
+    for id_turma in ("1A", "1B", "1C"):
+        registrar_consulta(f"SELECT COUNT(*) FROM aluno WHERE id_turma = '{id_turma}'", 0.001)
+    return []
+
+
+@app.get("/alunos")
+def alunos():
+    registrar_consulta("SELECT * FROM aluno", 0.001)
+    registrar_consulta("SELECT * FROM turma", 0.001)
+    return []
+
+
+@pytest.fixture
+def cliente():
+    with TestClient(app) as cliente:
+        yield cliente
+"""
+
+
+def _rodar(pytester, testes):
+    pytester.makeconftest(APP)
+    pytester.makepyfile(testes)
+    return pytester.runpytest("-p", "pytest_orcamento_consultas")
+
+
+def test_marcador_falha_com_n_mais_1_e_orcamento_estourado(pytester):
+    resultado = _rodar(pytester, """
+        import pytest
+
+        @pytest.mark.orcamento_consultas(maximo=10, repetidas=2)
+        def test_n_mais_1(cliente):
+            cliente.get("/turmas")
+
+        @pytest.mark.orcamento_consultas(maximo=1, repetidas=None)
+        def test_orcamento(cliente):
+            cliente.get("/alunos")
+
+        @pytest.mark.orcamento_consultas(maximo=2, repetidas=2)
+        def test_dentro_do_orcamento(cliente):
+            cliente.get("/alunos")
+    """)
+    # O marcador é conferido no teardown: o teste estourado aparece como erro
+    # (e a sessão falha), depois do resultado do próprio corpo do teste
+    resultado.assert_outcomes(passed=3, errors=2)
+    assert resultado.ret != 0
+    resultado.stdout.fnmatch_lines([
+        "*GET /turmas: 4 consultas - repetida 3x: SELECT COUNT(*) FROM aluno WHERE id_turma = ?*",
+        "*GET /alunos: 2 consultas - orcamento 2/1*",
+    ])
+
+
+def test_fixture_falha_apenas_no_trecho_verificado(pytester):
+    resultado = _rodar(pytester, """
+        def test_trecho_com_n_mais_1(cliente, orcamento_consultas):
+            cliente.get("/turmas")  # fora do trecho: não é verificado
+            with orcamento_consultas(maximo=2):
+                cliente.get("/alunos")
+            assert orcamento_consultas.relatorios[-1].total == 2
+            with orcamento_consultas(maximo=10):
+                cliente.get("/turmas")
+
+        def test_trecho_ok(cliente, orcamento_consultas):
+            with orcamento_consultas(maximo=2):
+                cliente.get("/alunos")
+    """)
+    resultado.assert_outcomes(passed=1, failed=1)
+    assert resultado.ret != 0
+    resultado.stdout.fnmatch_lines(["*Orçamento de consultas excedido*", "*GET /turmas: 4 consultas - repetida 3x*"])
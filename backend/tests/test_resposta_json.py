@@ -0,0 +1,68 @@
+"""
+Resposta JSON rápida (resposta_json.py) contra o caminho normal do FastAPI
+(response_model validado pelo Pydantic), com linhas simuladas do cursor.
+"""
+import datetime
+import decimal
+import json
+from collections import namedtuple
+from typing import List, Optional
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from resposta_json import resposta_linhas
+
+Coluna = namedtuple("Coluna", "name type_code")
+
+# Ordem do SELECT diferente da ordem dos campos do modelo (id primeiro)
+DESCRICAO = [
+    Coluna("id", 23), Coluna("id_aluno", 1043), Coluna("nome_aluno", 1043),
+    Coluna("data_nasc", 1082), Coluna("media", 1700), Coluna("frequencia", 23),
+    Coluna("atualizado_em", 1114),
+]
+LINHAS = [
+    (7, "ALU0007", "Ana", datetime.date(2010, 3, 9), decimal.Decimal("7.85"), 92,
+     datetime.datetime(2024, 5, 2, 14, 30, 5)),
+    (8, "ALU0008", "Bruno", None, None, None, None),
+]
+
+
+class AlunoMedia(BaseModel):
+    id_aluno: str
+    nome_aluno: str
+    data_nasc: Optional[datetime.date] = None
+    media: Optional[float] = None
+    frequencia: Optional[int] = None
+    atualizado_em: Optional[datetime.datetime] = None
+    id: Optional[int] = None
+
+
+def _app():
+    app = FastAPI()
+
+    @app.get("/pydantic", response_model=List[AlunoMedia])
+    def pelo_modelo():
+        return [dict(zip([coluna.name for coluna in DESCRICAO], linha)) for linha in LINHAS]
+
+    @app.get("/rapida", response_model=List[AlunoMedia])
+    def rapida():
+        return resposta_linhas(DESCRICAO, LINHAS, modelo=AlunoMedia)
+
+    return app
+
+
+def test_mesmo_corpo_e_ordem_de_chaves_que_o_response_model():
+    with TestClient(_app()) as cliente:
+        esperado = cliente.get("/pydantic").json()
+        obtido = cliente.get("/rapida").json()
+
+    assert obtido == esperado
+    assert [list(item) for item in obtido] == [list(item) for item in esperado]
+    assert list(obtido[0]) == list(AlunoMedia.model_fields)
+
+
+def test_sem_modelo_mantem_a_ordem_das_colunas():
+    corpo = json.loads(resposta_linhas(DESCRICAO, LINHAS[:1]).body)
+    assert list(corpo[0]) == [coluna.name for coluna in DESCRICAO]
@@ -267,8 +267,16 @@ class CalendarioEscolar {
         document.getElementById('evento-id').value = evento.id;
         document.getElementById('evento-titulo').value = evento.titulo;
         document.getElementById('evento-descricao').value = evento.descricao || '';
-        document.getElementById('evento-data-inicio').value = evento.data_inicio;
-        document.getElementById('evento-data-fim').value = evento.data_fim;
+        // Ocorrência de evento recorrente: o formulário edita a série, a partir da primeira data
+        let dataInicio = evento.data_inicio;
+        let dataFim = evento.data_fim;
+        if (evento.inicio_serie) {
+            const duracao = new Date(evento.data_fim) - new Date(evento.data_inicio);
+            dataInicio = evento.inicio_serie;
+            dataFim = new Date(new Date(evento.inicio_serie).getTime() + duracao).toISOString().split('T')[0];
+        }
+        document.getElementById('evento-data-inicio').value = dataInicio;
+        document.getElementById('evento-data-fim').value = dataFim;
         document.getElementById('evento-hora-inicio').value = evento.hora_inicio || '';
         document.getElementById('evento-hora-fim').value = evento.hora_fim || '';
         document.getElementById('evento-tipo').value = evento.tipo_evento;
@@ -5323,8 +5323,10 @@ function initNotas() {
         }
     }
     
-    // Carregar todas as notas
-    function carregarNotas() {
+    // Carregar notas, uma página por vez (cursor vem no cabeçalho X-Proximo-Cursor)
+    function carregarNotas(cursor = null) {
+        const NOTAS_POR_PAGINA = 200;
+        
         // Verificar novamente qual tabela está disponível (pode ter mudado se o usuário navegou)
         const tabelaAtual = document.getElementById('notas-lista') || document.querySelector('.notas-table tbody');
         
@@ -5333,42 +5335,47 @@ function initNotas() {
             return;
         }
         
-        // Mostrar indicador de carregamento
-        tabelaAtual.innerHTML = `
-            <tr>
-                <td colspan="10" class="text-center">
-                    <div class="spinner-border text-primary" role="status">
-                        <span class="visually-hidden">Carregando...</span>
-                    </div>
-                </td>
-            </tr>
-        `;
+        const linhaCarregarMais = tabelaAtual.querySelector('.carregar-mais-notas');
+        if (linhaCarregarMais) {
+            linhaCarregarMais.remove();
+        }
+        
+        if (!cursor) {
+            // Primeira página: mostrar indicador de carregamento
+            tabelaAtual.innerHTML = `
+                <tr>
+                    <td colspan="10" class="text-center">
+                        <div class="spinner-border text-primary" role="status">
+                            <span class="visually-hidden">Carregando...</span>
+                        </div>
+                    </td>
+                </tr>
+            `;
+        }
         
-        // Buscar notas da API
-        fetch(CONFIG.getApiUrl('/notas'))
+        // A listagem completa já traz nome do aluno, disciplina e série, ordenada no servidor
+        let url = CONFIG.getApiUrl(`/notas/completo/?limit=${NOTAS_POR_PAGINA}`);
+        if (cursor) {
+            url += `&cursor=${encodeURIComponent(cursor)}`;
+        }
+        
+        fetch(url)
             .then(response => {
                 if (!response.ok) {
                     throw new Error(`Erro ao carregar notas: ${response.status}`);
                 }
-                return response.json();
+                const proximoCursor = response.headers.get('X-Proximo-Cursor');
+                return response.json().then(notas => ({ notas, proximoCursor }));
             })
-            .then(notas => {
-                console.log("Notas recuperadas da API:", notas ? (Array.isArray(notas) ? notas.length : "objeto") : "nenhuma");
+            .then(({ notas, proximoCursor }) => {
+                const notasArray = Array.isArray(notas) ? notas : [];
+                console.log("Notas recuperadas da API:", notasArray.length, proximoCursor ? "(há mais páginas)" : "");
                 
-                // Normalizar notas para garantir que seja um array
-                let notasArray = [];
-                if (Array.isArray(notas)) {
-                    notasArray = notas;
-                } else if (notas && typeof notas === 'object') {
-                    // Tentar extrair notas de diferentes estruturas possíveis
-                    if (notas.notas && Array.isArray(notas.notas)) {
-                        notasArray = notas.notas;
-                    } else {
-                        notasArray = Object.values(notas).filter(item => item && typeof item === 'object');
-                    }
+                if (!cursor) {
+                    tabelaAtual.innerHTML = '';
                 }
                 
-                if (notasArray.length === 0) {
+                if (!cursor && notasArray.length === 0) {
                     tabelaAtual.innerHTML = `
                         <tr class="text-center">
                             <td colspan="10">Nenhuma nota cadastrada</td>
@@ -5377,153 +5384,92 @@ function initNotas() {
                     return;
                 }
                 
-                // Obter informações adicionais necessárias (alunos, disciplinas, turmas)
-                Promise.all([
-                    fetch(CONFIG.getApiUrl('/alunos')).then(r => r.ok ? r.json() : []),
-                    fetch(CONFIG.getApiUrl('/disciplinas')).then(r => r.ok ? r.json() : []),
-                    fetch(CONFIG.getApiUrl('/turmas')).then(r => r.ok ? r.json() : [])
-                ])
-                .then(([alunos, disciplinas, turmas]) => {
-                    // Limpar a tabela
-                    tabelaAtual.innerHTML = '';
+                // Adicionar cada nota à tabela
+                notasArray.forEach(nota => {
+                    const alunoId = nota.id_aluno;
+                    const disciplinaId = nota.id_disciplina;
+                    const turmaId = nota.id_turma;
+                    const notaId = nota.id;
                     
-                    // Ordenar notas por ID do aluno e bimestre
-                    notasArray.sort((a, b) => {
-                        const alunoA = alunos.find(al => al.id_aluno === (a.id_aluno || a.aluno_id));
-                        const alunoB = alunos.find(al => al.id_aluno === (b.id_aluno || b.aluno_id));
-                        
-                        if (alunoA && alunoB) {
-                            if (alunoA.nome_aluno !== alunoB.nome_aluno) {
-                                return alunoA.nome_aluno.localeCompare(alunoB.nome_aluno);
-                            }
-                            // Se for o mesmo aluno, ordenar por bimestre
-                            const bimestreA = parseInt(a.bimestre || 0);
-                            const bimestreB = parseInt(b.bimestre || 0);
-                            return bimestreA - bimestreB;
-                        }
-                        return 0;
-                    });
+                    // Extrair valores específicos ou usar valores padrão
+                    const ano = nota.ano || '-';
+                    const bimestre = nota.bimestre || '-';
+                    const notaMensal = nota.nota_mensal ?? '-';
+                    const notaBimestral = nota.nota_bimestral ?? '-';
+                    const recuperacao = nota.recuperacao ?? '-';
+                    const media = nota.media ?? '-';
                     
-                    // Adicionar cada nota à tabela
-                    notasArray.forEach(nota => {
-                        // Normalizar IDs para lidar com diferentes estruturas possíveis
-                        const alunoId = nota.id_aluno || nota.aluno_id;
-                        const disciplinaId = nota.id_disciplina || nota.disciplina_id;
-                        const turmaId = nota.id_turma || nota.turma_id;
-                        const notaId = nota.id_nota || nota.id || `${alunoId}-${disciplinaId}-${nota.bimestre}`;
-                        
-                        const aluno = alunos.find(a => a.id_aluno === alunoId) || { nome_aluno: `Aluno ${alunoId}` };
-                        const disciplina = disciplinas.find(d => d.id_disciplina === disciplinaId) || { nome_disciplina: `Disciplina ${disciplinaId}` };
-                        const turma = turmas.find(t => t.id_turma === turmaId) || { id_turma: turmaId || '-', serie: 'Desconhecida' };
-                        
-                        // Usar o campo ano diretamente da nota, se disponível
-                        const ano = nota.ano || (turma.serie ? turma.serie.split('º')[0] : '-');
-                        
-                        // Extrair valores específicos ou usar valores padrão
-                        const bimestre = nota.bimestre || '-';
-                        const notaMensal = nota.nota_mensal || nota.mensal || '-';
-                        const notaBimestral = nota.nota_bimestral || nota.bimestral || '-';
-                        const recuperacao = nota.recuperacao || '-';
-                        
-                        // Calcular média ou usar a média já fornecida
-                        let media;
-                        if (nota.media) {
-                            media = nota.media;
-                        } else if (notaMensal !== '-' && notaBimestral !== '-') {
-                            // Calcular média ponderada (40% mensal + 60% bimestral)
-                            const nMensal = parseFloat(notaMensal);
-                            const nBimestral = parseFloat(notaBimestral);
-                            if (!isNaN(nMensal) && !isNaN(nBimestral)) {
-                                media = ((nMensal * 0.4) + (nBimestral * 0.6)).toFixed(1);
+                    const tr = document.createElement('tr');
+                    
+                    // Adicionar classes para colorir baseado na média
+                    if (media !== '-') {
+                        const mediaNum = parseFloat(media);
+                        if (!isNaN(mediaNum)) {
+                            if (mediaNum >= 6.0) {
+                                tr.classList.add('table-success');
+                            } else if (mediaNum >= 4.0) {
+                                tr.classList.add('table-warning');
                             } else {
-                                media = '-';
+                                tr.classList.add('table-danger');
                             }
-                        } else {
-                            media = nota.valor || '-';
                         }
-                        
-                        const tr = document.createElement('tr');
-                        
-                        // Adicionar classes para colorir baseado na média
-                        if (media !== '-') {
-                            const mediaNum = parseFloat(media);
-                            if (!isNaN(mediaNum)) {
-                                if (mediaNum >= 6.0) {
-                                    tr.classList.add('table-success');
-                                } else if (mediaNum >= 4.0) {
-                                    tr.classList.add('table-warning');
-                                } else {
-                                    tr.classList.add('table-danger');
-                                }
-                            }
+                    }
+                    
+                    tr.innerHTML = `
+                        <td>${ano}</td>
+                        <td>${bimestre}</td>
+                        <td>${turmaId} - ${nota.serie || 'Série não informada'}</td>
+                        <td>${nota.nome_disciplina || `Disciplina ${disciplinaId}`}</td>
+                        <td>${nota.nome_aluno || `Aluno ${alunoId}`}</td>
+                        <td>${notaMensal}</td>
+                        <td>${notaBimestral}</td>
+                        <td>${recuperacao}</td>
+                        <td>${media}</td>
+                        <td class="text-center">
+                            <button class="btn btn-sm btn-outline-primary edit-nota" data-id="${notaId}" 
+                                data-aluno="${alunoId}" data-disciplina="${disciplinaId}" data-bimestre="${bimestre}" data-turma="${turmaId}">
+                                <i class="fas fa-edit"></i>
+                            </button>
+                            <button class="btn btn-sm btn-outline-danger delete-nota" data-id="${notaId}"
+                                data-aluno="${alunoId}" data-disciplina="${disciplinaId}" data-bimestre="${bimestre}" data-turma="${turmaId}">
+                                <i class="fas fa-trash"></i>
+                            </button>
+                        </td>
+                    `;
+                    
+                    // Adicionar eventos para botões desta linha
+                    tr.querySelector('.edit-nota').addEventListener('click', function() {
+                        if (typeof editarNota === 'function') {
+                            editarNota(notaId, alunoId, disciplinaId, bimestre, turmaId);
+                        } else {
+                            console.warn("Função editarNota não encontrada");
                         }
-                        
-                        tr.innerHTML = `
-                            <td>${ano}</td>
-                            <td>${bimestre}</td>
-                            <td>${turma.id_turma} - ${turma.serie || 'Série não informada'}</td>
-                            <td>${disciplina.nome_disciplina}</td>
-                            <td>${aluno.nome_aluno}</td>
-                            <td>${notaMensal}</td>
-                            <td>${notaBimestral}</td>
-                            <td>${recuperacao}</td>
-                            <td>${media}</td>
-                            <td class="text-center">
-                                <button class="btn btn-sm btn-outline-primary edit-nota" data-id="${notaId}" 
-                                    data-aluno="${alunoId}" data-disciplina="${disciplinaId}" data-bimestre="${bimestre}" data-turma="${turmaId}">
-                                    <i class="fas fa-edit"></i>
-                                </button>
-                                <button class="btn btn-sm btn-outline-danger delete-nota" data-id="${notaId}"
-                                    data-aluno="${alunoId}" data-disciplina="${disciplinaId}" data-bimestre="${bimestre}" data-turma="${turmaId}">
-                                    <i class="fas fa-trash"></i>
-                                </button>
-                            </td>
-                        `;
-                        
-                        tabelaAtual.appendChild(tr);
                     });
-                    
-                    // Adicionar eventos para botões
-                    document.querySelectorAll('.edit-nota').forEach(btn => {
-                        btn.addEventListener('click', function() {
-                            const idNota = this.getAttribute('data-id');
-                            const idAluno = this.getAttribute('data-aluno');
-                            const idDisciplina = this.getAttribute('data-disciplina');
-                            const bimestre = this.getAttribute('data-bimestre');
-                            const idTurma = this.getAttribute('data-turma');
-                            
-                            if (typeof editarNota === 'function') {
-                                editarNota(idNota, idAluno, idDisciplina, bimestre, idTurma);
-                            } else {
-                                console.warn("Função editarNota não encontrada");
-                            }
-                        });
+                    tr.querySelector('.delete-nota').addEventListener('click', function() {
+                        if (typeof excluirNota === 'function') {
+                            excluirNota(notaId, alunoId, disciplinaId, bimestre, turmaId);
+                        } else {
+                            console.warn("Função excluirNota não encontrada");
+                        }
                     });
                     
-                    document.querySelectorAll('.delete-nota').forEach(btn => {
-                        btn.addEventListener('click', function() {
-                            const idNota = this.getAttribute('data-id');
-                            const idAluno = this.getAttribute('data-aluno');
-                            const idDisciplina = this.getAttribute('data-disciplina');
-                            const bimestre = this.getAttribute('data-bimestre');
-                            const idTurma = this.getAttribute('data-turma');
-                            
-                            if (typeof excluirNota === 'function') {
-                                excluirNota(idNota, idAluno, idDisciplina, bimestre, idTurma);
-                            } else {
-                                console.warn("Função excluirNota não encontrada");
-                            }
-                        });
-                    });
-                })
-                .catch(error => {
-                    console.error("Erro ao processar dados para a tabela de notas:", error);
-                    tabelaAtual.innerHTML = `
-                        <tr class="text-center">
-                            <td colspan="10">Erro ao processar dados: ${error.message}</td>
-                        </tr>
-                    `;
+                    tabelaAtual.appendChild(tr);
                 });
+                
+                // Próxima página sob demanda
+                if (proximoCursor) {
+                    const tr = document.createElement('tr');
+                    tr.className = 'carregar-mais-notas';
+                    tr.innerHTML = `
+                        <td colspan="10" class="text-center">
+                            <button class="btn btn-sm btn-outline-secondary">
+                                <i class="fas fa-chevron-down"></i> Carregar mais notas
+                            </button>
+                        </td>
+                    `;
+                    tr.querySelector('button').addEventListener('click', () => carregarNotas(proximoCursor));
+                    tabelaAtual.appendChild(tr);
+                }
             })
             .catch(error => {
                 console.error("Erro ao carregar notas:", error);
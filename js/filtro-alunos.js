@@ -202,8 +202,16 @@ function filtrarAlunos() {
         return;
     }
     
-    // Buscar todos os alunos e aplicar filtros no cliente, já que a API não está filtrando corretamente
-    fetch(CONFIG.getApiUrl('/alunos'))
+    // Com nome, a busca do servidor (sem diferenciar acentos, por relevância) já
+    // filtra e limita os alunos; os demais filtros são aplicados no cliente
+    let urlAlunos = CONFIG.getApiUrl('/alunos');
+    if (filtroNome) {
+        const parametros = new URLSearchParams({ q: filtroNome, limit: 100 });
+        if (filtroTurmaVal) parametros.set('id_turma', filtroTurmaVal);
+        urlAlunos = CONFIG.getApiUrl(`/busca/alunos?${parametros}`);
+    }
+    
+    fetch(urlAlunos)
         .then(response => {
             if (!response.ok) {
                 throw new Error(`Erro ao carregar alunos: ${response.status} - ${response.statusText}`);
@@ -223,10 +231,6 @@ function filtrarAlunos() {
                         return false;
                     }
                     
-                    if (filtroNome && !aluno.nome_aluno.toLowerCase().includes(filtroNome.toLowerCase())) {
-                        return false;
-                    }
-                    
                     if (filtroTurmaVal && aluno.id_turma !== filtroTurmaVal) {
                         return false;
                     }
@@ -259,10 +263,12 @@ function filtrarAlunos() {
                 return;
             }
             
-            // Ordenar alunos por ID ou nome
-            alunosFiltrados.sort((a, b) => {
-                return a.nome_aluno.localeCompare(b.nome_aluno);
-            });
+            // Ordenar alunos por nome (os da busca já vêm por relevância)
+            if (!filtroNome) {
+                alunosFiltrados.sort((a, b) => {
+                    return a.nome_aluno.localeCompare(b.nome_aluno);
+                });
+            }
             
             // Limpar lista e preenchê-la com os alunos
             alunosLista.innerHTML = '';
@@ -1556,12 +1556,70 @@ const NotasModule = {
         }
     },
 
+    // Baixar o boletim em PDF gerado no servidor
+    // Turma ou aluno: download direto. Escola inteira: tarefa em segundo plano com acompanhamento do progresso.
+    baixarBoletimPDF: async function(formato = 'pdf') {
+        const filtros = this.state.filtrosBoletim || {};
+        const params = new URLSearchParams();
+        params.append('ano', filtros.ano || new Date().getFullYear());
+        if (filtros.turma_id) params.append('turma_id', filtros.turma_id);
+        if (filtros.disciplina_id) params.append('disciplina_id', filtros.disciplina_id);
+        if (filtros.aluno_id) params.append('aluno_id', filtros.aluno_id);
+        params.append('formato', formato);
+        
+        const salvarArquivo = async (response) => {
+            if (!response.ok) {
+                const erro = await response.json().catch(() => ({}));
+                throw new Error(erro.detail || `Erro ${response.status}`);
+            }
+            const blob = await response.blob();
+            const link = document.createElement('a');
+            link.href = URL.createObjectURL(blob);
+            link.download = `Boletim_${params.get('ano')}${filtros.turma_id ? '_' + filtros.turma_id : ''}.${formato}`;
+            document.body.appendChild(link);
+            link.click();
+            link.remove();
+            setTimeout(() => URL.revokeObjectURL(link.href), 1000);
+        };
+        
+        try {
+            if (filtros.turma_id || filtros.aluno_id) {
+                this.mostrarInfo("Gerando boletim em PDF...");
+                await salvarArquivo(await fetch(ConfigModule.getApiUrl(`/boletim-medias/pdf?${params.toString()}`)));
+                this.mostrarSucesso("Boletim gerado com sucesso!");
+                return;
+            }
+            
+            // Escola inteira: gerar em segundo plano
+            const tarefa = await ConfigModule.fetchApi(`/boletim-medias/pdf/tarefas?${params.toString()}`, { method: 'POST' });
+            let estado = tarefa;
+            while (estado.estado === 'pendente' || estado.estado === 'executando') {
+                if (estado.total) {
+                    this.mostrarInfo(`Gerando boletins: ${estado.renderizados} de ${estado.total} alunos...`);
+                }
+                await new Promise(resolve => setTimeout(resolve, 1000));
+                estado = await ConfigModule.fetchApi(`/boletim-medias/pdf/tarefas/${tarefa.id_tarefa}`);
+            }
+            if (estado.estado !== 'concluida') {
+                throw new Error(estado.erro || 'Falha ao gerar os boletins');
+            }
+            await salvarArquivo(await fetch(ConfigModule.getApiUrl(`/boletim-medias/pdf/tarefas/${tarefa.id_tarefa}/arquivo`)));
+            this.mostrarSucesso("Boletins gerados com sucesso!");
+        } catch (error) {
+            console.error("Erro ao baixar boletim em PDF:", error);
+            this.mostrarErro(`Não foi possível gerar o boletim em PDF: ${error.message}`);
+        }
+    },
+
     // Exibir modal com boletim de médias
     exibirBoletimModal: function(boletimData, filtros) {
         console.log("🎯 Iniciando exibição do boletim modal");
         console.log("📊 Dados do boletim:", boletimData);
         console.log("🔍 Filtros aplicados:", filtros);
         
+        // Guardar os filtros para o download do PDF gerado no servidor
+        this.state.filtrosBoletim = filtros;
+        
         const modalId = 'modalBoletimMedias';
         let modal = document.getElementById(modalId);
         
@@ -1878,6 +1936,9 @@ const NotasModule = {
                             <button type="button" class="btn glass-btn primary" onclick="window.print()">
                                 <i class="fas fa-print me-2"></i>Imprimir Boletim
                             </button>
+                            <button type="button" class="btn glass-btn primary" onclick="NotasModule.baixarBoletimPDF()">
+                                <i class="fas fa-file-pdf me-2"></i>Baixar PDF
+                            </button>
                         </div>
                     </div>
                 </div>
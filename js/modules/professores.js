@@ -132,23 +132,17 @@ const ProfessoresModule = {
     // Carregar disciplinas e turmas vinculadas
     carregarDisciplinasTurmas: async function() {
         try {
-            // Em vez de chamar um endpoint específico para vínculos, vamos usar os dados que já temos
             this.state.disciplinasTurmas = [];
-            
-            // Para cada disciplina, vamos buscar as turmas associadas
-            for (const disciplina of this.state.disciplinas) {
-                try {
-                    // Buscar turmas para esta disciplina
-                    const turmas = await ConfigModule.fetchApi(`/disciplinas/${disciplina.id_disciplina}/turmas`);
-                    
-                    if (Array.isArray(turmas) && turmas.length > 0) {
-                        this.state.disciplinasTurmas.push({
-                            disciplina: disciplina.id_disciplina,
-                            turmas: turmas
-                        });
-                    }
-                } catch (erro) {
-                    console.warn(`Não foi possível carregar turmas para a disciplina ${disciplina.id_disciplina}:`, erro);
+
+            // Uma única requisição traz todas as disciplinas com suas turmas vinculadas
+            const disciplinas = await ConfigModule.fetchApi('/disciplinas/?incluir_turmas=true');
+
+            for (const disciplina of (Array.isArray(disciplinas) ? disciplinas : [])) {
+                if (Array.isArray(disciplina.turmas) && disciplina.turmas.length > 0) {
+                    this.state.disciplinasTurmas.push({
+                        disciplina: disciplina.id_disciplina,
+                        turmas: disciplina.turmas
+                    });
                 }
             }
             
@@ -48,8 +48,8 @@ function salvarLancamentoEmMassa() {
         btnCancelar.disabled = true;
     }
     
-    // Array para armazenar todas as promessas de salvamento
-    const promessasSalvamento = [];
+    // Notas da planilha, enviadas em uma única requisição para /notas/lote
+    const notasLote = [];
     
     // Para cada linha da tabela (cada aluno)
     const linhasAlunos = tabela.querySelectorAll('tbody tr');
@@ -68,7 +68,6 @@ function salvarLancamentoEmMassa() {
         const notaBimestralInput = linha.querySelector('.nota-bimestral');
         const notaRecuperacaoInput = linha.querySelector('.nota-recuperacao');
         const frequenciaInput = linha.querySelector('.frequencia');
-        const notaIdInput = linha.querySelector('.nota-id');
         
         // Se não encontrou os inputs necessários, pular
         if (!notaMensalInput || !notaBimestralInput) {
@@ -81,7 +80,6 @@ function salvarLancamentoEmMassa() {
         const notaBimestral = notaBimestralInput.value.trim();
         const notaRecuperacao = notaRecuperacaoInput ? notaRecuperacaoInput.value.trim() : '';
         const frequencia = frequenciaInput ? frequenciaInput.value.trim() : '';
-        const notaId = notaIdInput ? notaIdInput.value.trim() : '';
         
         // Se não tem nenhuma nota preenchida, pular
         if (!notaMensal && !notaBimestral && !notaRecuperacao) {
@@ -132,57 +130,22 @@ function salvarLancamentoEmMassa() {
             }
         }
         
-        // Criar objeto de nota
+        // Criar objeto de nota (turma, disciplina, ano e bimestre vão no cabeçalho do lote)
         const notaObj = {
             id_aluno: alunoId,
-            id_turma: turmaId,
-            id_disciplina: disciplinaId,
-            ano: parseInt(ano),
-            bimestre: parseInt(bimestre),
             nota_mensal: notaMensal ? parseFloat(notaMensal) : null,
             nota_bimestral: notaBimestral ? parseFloat(notaBimestral) : null,
             recuperacao: notaRecuperacao ? parseFloat(notaRecuperacao) : null,
-            frequencia: frequencia ? parseFloat(frequencia) : null
+            frequencia: frequencia ? parseInt(frequencia) : null
             // Não enviar média ou status - serão calculados pelo backend
         };
         
         console.log(`Preparando nota para aluno ${alunoId}:`, notaObj);
-        
-        // Se tem ID de nota, atualizar, caso contrário criar nova
-        const url = notaId 
-            ? CONFIG.getApiUrl(`/notas/${notaId}`) 
-            : CONFIG.getApiUrl('/notas');
-        
-        const method = notaId ? 'PUT' : 'POST';
-        
-        // Criar promessa para este salvamento
-        const promessa = fetch(url, {
-            method: method,
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify(notaObj)
-        })
-        .then(response => {
-            if (!response.ok) {
-                throw new Error(`Erro ao salvar nota para aluno ${alunoId}: ${response.status}`);
-            }
-            return response.json();
-        })
-        .then(resultado => {
-            console.log(`Nota ${method === 'POST' ? 'criada' : 'atualizada'} com sucesso para aluno ${alunoId}:`, resultado);
-            return resultado;
-        })
-        .catch(error => {
-            console.error(`Erro ao salvar nota para aluno ${alunoId}:`, error);
-            throw error;
-        });
-        
-        promessasSalvamento.push(promessa);
+        notasLote.push(notaObj);
     });
     
     // Se não há notas para salvar
-    if (promessasSalvamento.length === 0) {
+    if (notasLote.length === 0) {
         console.log('Nenhuma nota para salvar');
         
         // Resetar os botões
@@ -199,10 +162,31 @@ function salvarLancamentoEmMassa() {
         return;
     }
     
-    // Processar todas as promessas
-    Promise.all(promessasSalvamento)
-        .then(resultados => {
+    // Enviar a planilha inteira; o backend grava todas as linhas em uma transação
+    fetch(CONFIG.getApiUrl('/notas/lote'), {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            id_turma: turmaId,
+            id_disciplina: disciplinaId,
+            ano: parseInt(ano),
+            bimestre: parseInt(bimestre),
+            notas: notasLote
+        })
+    })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`Erro ao salvar lote de notas: ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(lote => {
+            const resultados = lote.resultados.filter(r => r.status !== 'erro');
+            const erros = lote.resultados.filter(r => r.status === 'erro');
             console.log(`Salvas ${resultados.length} notas com sucesso!`);
+            erros.forEach(r => console.error(`Erro ao salvar nota para aluno ${r.id_aluno}: ${r.erro}`));
             
             // Registrar atividade
             if (typeof registrarAtividade === 'function') {
@@ -216,10 +200,15 @@ function salvarLancamentoEmMassa() {
             }
             
             // Mostrar mensagem flutuante de sucesso
+            let mensagem = `Notas salvas com sucesso! (${resultados.length} registros)`;
+            if (erros.length > 0) {
+                mensagem += ` - ${erros.length} não foram salvas: ` +
+                    erros.map(r => `${r.id_aluno} (${r.erro})`).join(', ');
+            }
             if (typeof mostrarMensagemFlutuante === 'function') {
-                mostrarMensagemFlutuante(`Notas salvas com sucesso! (${resultados.length} registros)`, 'success');
+                mostrarMensagemFlutuante(mensagem, erros.length > 0 ? 'warning' : 'success');
             } else {
-                alert(`Notas salvas com sucesso! (${resultados.length} registros)`);
+                alert(mensagem);
             }
             
             // Remover o formulário de lançamento em massa